@@ -2,21 +2,16 @@ import streamlit as st
 import pandas as pd
 import os
 import warnings
+
+from cattleclimate.datos import DATA_HIDRO, cargar_cne, cargar_glosario
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 
 # --- Configuración inicial ---
 st.set_page_config(page_title="Lectura archivos .data", layout="wide")
 st.title("Visor de Archivos .data con Información de Etiqueta y Estación")
 
-# --- Rutas base ---
-base_path = r"C:\Proyectos\CattleClimate_Python"
-data_path = os.path.join(base_path, "datos", "hidrometeorologicos")
-glosario_path = os.path.join(base_path, "datos", "Glosario Variables.xlsx")
-cne_path = os.path.join(base_path, "datos", "CNE_IDEAM.xlsx")
-
-# --- Cargar archivos auxiliares ---
-glosario = pd.read_excel(glosario_path, sheet_name="Básicas")
-cne = pd.read_excel(cne_path, sheet_name="CNE")
+# --- Rutas base (relativas al proyecto, multiplataforma) ---
+data_path = str(DATA_HIDRO)
 
 # --- Buscar archivos .data ---
 data_files = [f for f in os.listdir(data_path) if f.endswith(".data")]
@@ -31,7 +26,9 @@ if archivo_seleccionado:
         etiqueta, codigo = archivo_seleccionado.replace(".data", "").split("@")
         st.info(f"Etiqueta: {etiqueta}, Código: {codigo}")  # <- agregado
 
-        # Información desde el glosario
+        # Información desde el glosario (los Excel se leen una sola vez y quedan en caché)
+        glosario = cargar_glosario()
+        cne = cargar_cne()
         info_glosario = glosario[glosario["Etiqueta"] == etiqueta]
         info_cne = cne[cne["CODIGO"] == int(codigo)]
 
@@ -59,7 +56,8 @@ if archivo_seleccionado:
         df_data["Etiqueta"] = etiqueta
         df_data["Código"] = codigo
         st.markdown("#### 📊 Contenido del archivo .data:")
-        st.dataframe(df_data.head(20))
+        from cattleclimate.grilla import tabla_paginada
+        tabla_paginada(df_data, clave="archivo", tamano=25)
 
     except Exception as e:
         st.error(f"❌ Error en procesamiento: {e}")
@@ -1,7 +1,6 @@
 import streamlit as st
 import pandas as pd
 import os
-from datetime import datetime
 import plotly.express as px
 import io
 
@@ -46,21 +45,13 @@ datos_crudos = [line.strip() for line in lineas[1:]]
 st.markdown("### 🛠 Primeras líneas del archivo:")
 st.code("\n".join(datos_crudos[:5]), language="text")
 
-# Parseo de líneas
-fechas = []
-valores = []
-errores = 0
-
-for idx, linea in enumerate(datos_crudos):
-    try:
-        parte_fecha, parte_valor = linea.split("|")
-        fecha = datetime.strptime(parte_fecha.strip(), "%Y-%m-%d %H:%M:%S")
-        valor = float(parte_valor.strip())
-        fechas.append(fecha)
-        valores.append(valor)
-    except Exception:
-        errores += 1
-        continue
+# Parseo de líneas (vectorizado: fechas datetime64 en lugar de un objeto datetime por fila)
+partes = pd.Series(datos_crudos).str.split("|", expand=True).reindex(columns=range(3)).astype("object")
+fechas = pd.to_datetime(partes[0].str.strip(), format="%Y-%m-%d %H:%M:%S", errors="coerce")
+valores = pd.to_numeric(partes[1].str.strip(), errors="coerce")
+correctas = fechas.notna() & valores.notna() & partes[2].isna()
+errores = int((~correctas).sum())
+fechas, valores = fechas[correctas].to_numpy(), valores[correctas].to_numpy()
 
 # Mostrar resumen de validación
 total = len(datos_crudos)
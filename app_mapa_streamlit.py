@@ -1,13 +1,17 @@
+import numpy as np
 import streamlit as st
 import pandas as pd
 
+from cattleclimate.superficie import PERIODOS, VARIABLES_SUPERFICIE, cubetas, recuadro, superficie, valores_estaciones
+from cattleclimate.vecinos import MAPA_PATH
+
 # Título
 st.title("Mapa de Estaciones Meteorológicas - IDEAM")
 
 # Cargar los datos
 @st.cache_data
 def cargar_estaciones():
-    df = pd.read_csv("datos/estaciones_mapa.csv")
+    df = pd.read_csv(MAPA_PATH)
     return df.dropna(subset=["latitud", "longitud"])
 
 estaciones = cargar_estaciones()
@@ -28,5 +32,45 @@ st.map(muestra)
 with st.expander("Ver tabla de estaciones"):
     st.dataframe(estaciones)
 
+# Superficie interpolada (IDW); las teselas calculadas quedan en caché al mover el recuadro o el tiempo
+st.subheader("🌡️ Superficie interpolada entre estaciones")
+
+with st.sidebar:
+    st.markdown("### 🌡️ Superficie")
+    variable = st.selectbox("Variable", list(VARIABLES_SUPERFICIE))
+    periodo = st.selectbox("Periodo", list(PERIODOS), index=list(PERIODOS).index("mes"))
+    correccion = st.checkbox("Corregir por altitud", value=True,
+                             help="Gradiente vertical estándar; altitud de las celdas interpolada desde el CNE")
+
+disponibles = cubetas(variable, periodo)
+if len(disponibles) == 0:
+    st.info(f"No hay estaciones con {variable} y coordenadas en el CNE.")
+else:
+    lat_min, lat_max, lon_min, lon_max = recuadro(variable)
+    with st.sidebar:
+        latitudes = st.slider("Latitud", lat_min - 2, lat_max + 2, (lat_min, lat_max), step=0.25)
+        longitudes = st.slider("Longitud", lon_min - 2, lon_max + 2, (lon_min, lon_max), step=0.25)
+    if periodo == "total":
+        posicion = 0
+        st.caption("Promedio de todo el registro")
+    else:
+        posicion = st.slider("Tiempo", 0, len(disponibles) - 1, len(disponibles) - 1)
+        st.caption(f"Cubeta: {np.datetime_as_string(disponibles[posicion])}")
+    if latitudes[0] == latitudes[1] or longitudes[0] == longitudes[1]:
+        st.warning("Amplíe el recuadro: la latitud y la longitud necesitan un rango mayor que cero.")
+    else:
+        lat, lon, grilla = superficie(variable, periodo, disponibles[posicion], (*latitudes, *longitudes), correccion)
+        puntos = valores_estaciones(variable, periodo, disponibles[posicion])
+
+        import plotly.graph_objects as go
+        fig = go.Figure(go.Heatmap(x=lon, y=lat, z=grilla, colorscale="RdYlBu_r", colorbar=dict(title=variable)))
+        fig.add_trace(go.Scatter(
+            x=puntos["longitud"], y=puntos["latitud"], mode="markers+text", text=puntos["Valor"].round(1),
+            textposition="top center", marker=dict(color="black", size=7), hovertext=puntos["Codigo"], name="Estaciones"
+        ))
+        fig.update_layout(height=600, margin=dict(t=20, b=20), xaxis_title="Longitud", yaxis_title="Latitud",
+                          yaxis_scaleanchor="x", showlegend=False)
+        st.plotly_chart(fig, use_container_width=True)
+
 # Pie de página
 st.caption("Proyecto AGRISOS BIOCLIMÁTICA - Visualización geoespacial con Streamlit")
@@ -1,89 +1,52 @@
 import streamlit as st
-import pandas as pd
-import os
 import warnings
 
+from cattleclimate.consulta import COLUMNAS, consultar
+from cattleclimate.diagnostico import etapa
+from cattleclimate.grilla import tabla_paginada
+from cattleclimate.sesion import obtener_corpus, panel_diagnostico
+
 # --- Configuración general ---
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 st.set_page_config(page_title="Lectura masiva de archivos .data", layout="wide")
 st.title("📦 Lectura masiva de archivos .data con metadatos")
 
-# --- Rutas base ---
-base_path = r"C:\Proyectos\CattleClimate_Python"
-data_path = os.path.join(base_path, "datos", "hidrometeorologicos")
-glosario_path = os.path.join(base_path, "datos", "Glosario Variables.xlsx")
-cne_path = os.path.join(base_path, "datos", "CNE_IDEAM.xlsx")
-
-# --- Cargar archivos auxiliares ---
-glosario = pd.read_excel(glosario_path, sheet_name="Básicas")
-cne = pd.read_excel(cne_path, sheet_name="CNE")
-
-# --- Buscar archivos .data ---
-data_files = [f for f in os.listdir(data_path) if f.endswith(".data")]
+# --- Datos compartidos (una sola copia por proceso, desde la caché si existe) ---
+corpus = obtener_corpus()
+data_files = sorted(corpus.catalogo["Archivo"])
 st.sidebar.write(f"🗃️ Archivos encontrados: {len(data_files)}")
 
-# --- Función principal para leer todos los archivos ---
-@st.cache_data(show_spinner=True)
-def cargar_archivos():
-    todos = []
-
-    for file in data_files:
-        try:
-            etiqueta, codigo = file.replace(".data", "").split("@")
-            codigo_int = int(codigo)
-            ruta = os.path.join(data_path, file)
-
-            df = pd.read_csv(ruta, sep="|", engine="python", names=["Fecha", "Valor"])
-
-            # Añadir etiqueta y código
-            df["Archivo"] = file
-            df["Etiqueta"] = etiqueta
-            df["Código"] = codigo
-
-            # Datos del glosario
-            fila_glosario = glosario[glosario["Etiqueta"] == etiqueta]
-            if not fila_glosario.empty:
-                for col in fila_glosario.columns:
-                    df[col] = fila_glosario.iloc[0][col]
-
-            # Datos de la estación
-            fila_cne = cne[cne["CODIGO"] == codigo_int]
-            if not fila_cne.empty:
-                for col in fila_cne.columns:
-                    df[col] = fila_cne.iloc[0][col]
-
-            todos.append(df)
-
-        except Exception as e:
-            st.warning(f"Error procesando {file}: {e}")
-
-    if todos:
-        return pd.concat(todos, ignore_index=True)
-    else:
-        return pd.DataFrame()
-
-# --- Ejecutar lectura y mostrar resultado ---
-st.info("Cargando todos los archivos .data y generando tabla combinada...")
-df_total = cargar_archivos()
-
-if not df_total.empty:
-    st.success(f"✅ {len(df_total)} registros procesados desde {df_total['Archivo'].nunique()} archivos.")
-
-    # Filtro opcional
-    filtro = st.selectbox("🔎 Filtrar por archivo", options=["Todos"] + sorted(df_total["Archivo"].unique()))
+if data_files:
+    # Filtro opcional (se resuelve sobre el catálogo, sin leer los demás archivos)
+    filtro = st.selectbox("🔎 Filtrar por archivo", options=["Todos"] + data_files)
+    filtros = {}
     if filtro != "Todos":
-        df_filtrado = df_total[df_total["Archivo"] == filtro]
-    else:
-        df_filtrado = df_total
-
-    st.dataframe(df_filtrado.head(1000), use_container_width=True)
-
-    # Descargar CSV
-    st.download_button(
-        "⬇️ Descargar como CSV",
-        data=df_filtrado.to_csv(index=False),
-        file_name="datos_consolidados.csv",
-        mime="text/csv"
-    )
+        etiqueta, codigo = filtro.replace(".data", "").split("@")
+        filtros = {"etiquetas": [etiqueta], "codigos": [codigo]}
+
+    def leer(desplazamiento, limite):
+        return consultar(columnas=COLUMNAS, corpus=corpus, desplazamiento=desplazamiento, limite=limite, **filtros)
+
+    # Las filas se cuentan sobre la forma compacta, sin expandir ninguna serie
+    reporte = {}
+    consultar(columnas=COLUMNAS, corpus=corpus, limite=0, reporte=reporte, **filtros)
+    st.success(f"✅ {reporte['filas_totales']} registros de {reporte['series']} archivos.")
+
+    # Solo se lee y se convierte a pandas la página visible; el glosario y el CNE completos van en la descarga
+    vista = tabla_paginada(leer, clave="metadatos", total=reporte["filas_totales"])
+
+    # Descargar CSV (se genera solo a pedido)
+    if st.button("📦 Preparar CSV con metadatos"):
+        vista = leer(0, None) if vista is None else vista
+        with etapa("export_csv", pagina="app_metadatos", filas=vista.num_rows):
+            csv = corpus.anexar_metadatos(vista.to_pandas()).to_csv(index=False)
+        st.download_button(
+            "⬇️ Descargar como CSV",
+            data=csv,
+            file_name="datos_consolidados.csv",
+            mime="text/csv"
+        )
 else:
     st.error("❌ No se pudo construir el DataFrame. Verifica los archivos.")
+
+panel_diagnostico()
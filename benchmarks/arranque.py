@@ -0,0 +1,125 @@
+# benchmarks/arranque.py
+"""Presupuesto de arranque: tiempo del primer render de cada página y del cambio de página.
+
+Cada medición corre en un proceso nuevo con `streamlit.testing.v1.AppTest`:
+
+    arranque       la página es lo primero que se ejecuta (importaciones en frío)
+    cambio_pagina  la página se ejecuta después de la portada, como al navegar
+
+Además verifica que la portada no importe librerías pesadas. Termina con código
+1 si alguna medición supera el presupuesto, de modo que sirve como control en CI.
+
+Uso:
+    python -m benchmarks.arranque [--paginas pages/3_Graficas_Interactivas.py ...] [--salida reporte.json]
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+# Sin importar cattleclimate: el proceso hijo debe empezar sin pandas ni numpy cargados
+BASE_DIR = Path(__file__).resolve().parent.parent
+PORTADA = "streamlit_app.py"
+
+# Segundos permitidos por página (primer render en frío / al llegar desde la portada)
+PRESUPUESTO_ARRANQUE_S = 2.0
+PRESUPUESTO_CAMBIO_S = 1.0
+PRESUPUESTO_PORTADA_S = 0.5
+
+# La portada solo debe cargar streamlit
+MODULOS_PESADOS = ("pandas", "numpy", "plotly", "pyarrow", "openpyxl", "fpdf", "xlsxwriter", "dask", "kaleido")
+TIEMPO_MAX_S = 120
+
+
+def paginas():
+    return [PORTADA] + sorted(str(p.relative_to(BASE_DIR)) for p in (BASE_DIR / "pages").glob("*.py"))
+
+
+def _medir(pagina, previa, cola):
+    sys.path.insert(0, str(BASE_DIR))
+    from streamlit.testing.v1 import AppTest
+
+    if previa is not None:
+        AppTest.from_file(str(BASE_DIR / previa), default_timeout=TIEMPO_MAX_S).run()
+    antes = set(sys.modules)
+    inicio = time.perf_counter()
+    prueba = AppTest.from_file(str(BASE_DIR / pagina), default_timeout=TIEMPO_MAX_S).run()
+    segundos = time.perf_counter() - inicio
+    nuevos = {m.split(".")[0] for m in set(sys.modules) - antes}
+    cola.put({
+        "segundos": round(segundos, 3),
+        "excepciones": [str(e.value) for e in prueba.exception],
+        "pesados": sorted(nuevos & set(MODULOS_PESADOS)),
+    })
+
+
+def medir(pagina, previa=None):
+    """Corre la página en un proceso nuevo (opcionalmente después de `previa`)"""
+    contexto = multiprocessing.get_context("spawn")
+    cola = contexto.Queue()
+    proceso = contexto.Process(target=_medir, args=(pagina, previa, cola))
+    proceso.start()
+    proceso.join(TIEMPO_MAX_S * 2)
+    if proceso.is_alive():
+        proceso.terminate()
+        proceso.join()
+    if cola.empty():
+        return {"segundos": None, "excepciones": [f"el proceso terminó con código {proceso.exitcode}"], "pesados": []}
+    return cola.get()
+
+
+def evaluar(lista=None):
+    """Mide todas las páginas y devuelve (resultados, violaciones del presupuesto)"""
+    resultados, violaciones = [], []
+    for pagina in lista or paginas():
+        portada = pagina == PORTADA
+        frio = medir(pagina)
+        cambio = None if portada else medir(pagina, previa=PORTADA)
+        registro = {
+            "pagina": pagina,
+            "arranque_s": frio["segundos"],
+            "cambio_pagina_s": cambio["segundos"] if cambio else None,
+            "modulos_pesados": frio["pesados"],
+            "excepciones": frio["excepciones"] + (cambio["excepciones"] if cambio else []),
+        }
+        resultados.append(registro)
+
+        limite = PRESUPUESTO_PORTADA_S if portada else PRESUPUESTO_ARRANQUE_S
+        if registro["arranque_s"] is None or registro["arranque_s"] > limite:
+            violaciones.append(f"{pagina}: arranque {registro['arranque_s']} s > {limite} s")
+        if cambio is not None and (cambio["segundos"] is None or cambio["segundos"] > PRESUPUESTO_CAMBIO_S):
+            violaciones.append(f"{pagina}: cambio de página {cambio['segundos']} s > {PRESUPUESTO_CAMBIO_S} s")
+        if portada and frio["pesados"]:
+            violaciones.append(f"{pagina}: importa {', '.join(frio['pesados'])}")
+        if registro["excepciones"]:
+            violaciones.append(f"{pagina}: {registro['excepciones'][0]}")
+
+        cambio_txt = f"{registro['cambio_pagina_s']:>10.2f}" if registro["cambio_pagina_s"] is not None else f"{'-':>10}"
+        arranque_txt = f"{registro['arranque_s']:>10.2f}" if registro["arranque_s"] is not None else f"{'-':>10}"
+        print(f"{pagina:<42}{arranque_txt}{cambio_txt}  {', '.join(frio['pesados'])}", flush=True)
+    return resultados, violaciones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paginas", nargs="+", default=None)
+    parser.add_argument("--salida", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    print(f"{'página':<42}{'arranque':>10}{'cambio':>10}  librerías pesadas")
+    resultados, violaciones = evaluar(args.paginas)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"resultados": resultados, "violaciones": violaciones}, f, ensure_ascii=False, indent=1)
+
+    for v in violaciones:
+        print(f"✗ {v}")
+    if violaciones:
+        sys.exit(1)
+    print("✓ Dentro del presupuesto")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+# benchmarks/suite.py
+"""Suite de benchmarks reproducible sobre el corpus `datos/hidrometeorologicos`.
+
+Ejecuta, fuera de Streamlit, las cargas de trabajo reales de la aplicación:
+
+    parse_app0         lectura vectorizada con pandas, como en app_0.py
+    parse_leer_serie   lectura de un archivo con `leer_serie`
+    consolidacion      todas las series en una sola tabla (CorpusCompartido.vista)
+    filtro             filtro estación × variable sobre la tabla consolidada
+    indices            ITH, ITGH y CTR para todas las estaciones con Tbs/Tbh
+    export_csv         exportación CSV de la estación más grande (todas sus variables)
+    export_excel       ídem en .xlsx
+    export_pdf         ídem en PDF (requiere fpdf)
+    mapa               carga de estaciones_mapa.csv y JSON del mapa de st.map
+
+Cada caso corre en un proceso nuevo, de modo que los tiempos son "en frío" y el
+pico de memoria (ru_maxrss) es el del caso. Las escalas 10× y 100× se arman con
+enlaces duros a los archivos reales bajo códigos de estación nuevos (no ocupan
+disco); los casos de un solo archivo y de exportación no dependen del número de
+estaciones y solo se miden en la escala 1.
+
+Uso:
+    python -m benchmarks.suite [--escalas 1 10 100] [--casos filtro indices ...]
+                               [--salida reporte.json] [--comparar anterior.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cattleclimate.almacen import CACHE_DIR
+from cattleclimate.datos import DATA_DIR, DATA_HIDRO, leer_serie, listar_archivos, separar_nombre
+
+try:
+    import resource
+except ImportError:  # Windows: sin ru_maxrss no se reporta el pico de memoria
+    resource = None
+
+ESCALAS_DIR = CACHE_DIR / "benchmarks"
+MAPA_PATH = DATA_DIR / "estaciones_mapa.csv"
+TIEMPO_MAX_S = 1800
+
+
+# --- Datos de cada escala ---
+def preparar_escala(escala):
+    """Directorio con el corpus replicado `escala` veces bajo códigos de estación nuevos"""
+    destino = ESCALAS_DIR / f"escala_{escala}"
+    hidro = destino / "hidrometeorologicos"
+    archivos = listar_archivos(DATA_HIDRO)
+    esperados = len(archivos) * escala
+    if hidro.exists() and len(list(hidro.glob("*.data"))) == esperados:
+        return destino
+
+    shutil.rmtree(destino, ignore_errors=True)
+    hidro.mkdir(parents=True)
+    for replica in range(escala):
+        for ruta in archivos:
+            etiqueta, codigo = separar_nombre(ruta)
+            copia = hidro / f"{etiqueta}@{codigo}{replica:03d}.data"
+            try:
+                os.link(ruta, copia)
+            except OSError:  # otro sistema de archivos o sin soporte de enlaces
+                shutil.copyfile(ruta, copia)
+
+    mapa = pd.read_csv(MAPA_PATH)
+    pd.concat([mapa] * escala, ignore_index=True).to_csv(destino / "estaciones_mapa.csv", index=False)
+    return destino
+
+
+def _archivo_mayor(hidro):
+    return max(listar_archivos(hidro), key=lambda r: r.stat().st_size)
+
+
+def _seleccion_estacion(hidro):
+    """Todas las variables de la estación del archivo más grande (lo que se exporta)"""
+    _, codigo = separar_nombre(_archivo_mayor(hidro))
+    partes = [
+        leer_serie(r).rename("Valor").reset_index().assign(Etiqueta=separar_nombre(r)[0], Codigo=codigo)
+        for r in listar_archivos(hidro, codigo=codigo)
+    ]
+    return pd.concat(partes, ignore_index=True)
+
+
+# --- Casos ---
+# Cada caso recibe el directorio de la escala y `medir`, un contexto que delimita
+# la parte cronometrada; devuelve las filas (y opcionalmente bytes) procesadas.
+def caso_parse_app0(destino, medir):
+    ruta = _archivo_mayor(destino / "hidrometeorologicos")
+    with medir():
+        with open(ruta, "r", encoding="utf-8") as f:
+            lineas = f.readlines()
+        crudas = pd.Series([linea.strip() for linea in lineas[1:]])
+        partes = crudas.str.split("|", expand=True).reindex(columns=range(3)).astype("object")
+        fechas = pd.to_datetime(partes[0].str.strip(), format="%Y-%m-%d %H:%M:%S", errors="coerce")
+        valores = pd.to_numeric(partes[1].str.strip(), errors="coerce")
+        correctas = fechas.notna() & valores.notna() & partes[2].isna()
+        df = pd.DataFrame({"FechaHora": fechas[correctas].to_numpy(), "Valor": valores[correctas].to_numpy()})
+    return {"filas": len(df), "bytes": ruta.stat().st_size}
+
+
+def caso_parse_leer_serie(destino, medir):
+    ruta = _archivo_mayor(destino / "hidrometeorologicos")
+    with medir():
+        serie = leer_serie(ruta)
+    return {"filas": len(serie), "bytes": ruta.stat().st_size}
+
+
+def _consolidar(hidro):
+    from cattleclimate.compartido import CorpusCompartido
+    return CorpusCompartido(hidro).vista()
+
+
+def caso_consolidacion(destino, medir):
+    hidro = destino / "hidrometeorologicos"
+    with medir():
+        vista = _consolidar(hidro)
+    return {"filas": vista.num_rows, "bytes": sum(r.stat().st_size for r in listar_archivos(hidro))}
+
+
+def caso_filtro(destino, medir):
+    hidro = destino / "hidrometeorologicos"
+    etiqueta, codigo = separar_nombre(_archivo_mayor(hidro))
+    df = _consolidar(hidro).to_pandas()
+    with medir():
+        resultado = df[(df["Etiqueta"] == etiqueta) & (df["Codigo"] == codigo)]
+    # El rendimiento se expresa en filas recorridas, no en filas devueltas
+    return {"filas": len(df), "filas_resultado": len(resultado)}
+
+
+def caso_indices(destino, medir):
+    from cattleclimate.almacen import cargar_serie
+    from cattleclimate.indices import calcular_indices, estaciones_con_ith, fuentes_estacion
+
+    hidro = destino / "hidrometeorologicos"
+    filas = 0
+    with medir():
+        for codigo in estaciones_con_ith(hidro):
+            series = {}
+            for variable, ruta in fuentes_estacion(codigo, hidro).items():
+                if ruta is None:
+                    series[variable] = pd.Series(np.nan, dtype="float64")
+                else:
+                    # Las medidas se leen del .data; las derivadas (automáticas) salen de la caché
+                    series[variable] = leer_serie(ruta) if ruta.exists() else cargar_serie(ruta)
+            df = pd.concat([series["Tbs"], series["Tbh"]], axis=1, join="inner", keys=["Tbs", "Tbh"])
+            df = df.join(pd.concat([series["Tr"], series["Vv"]], axis=1, keys=["Tr", "Vv"]))
+            filas += len(calcular_indices(df))
+    return {"filas": filas}
+
+
+def caso_export_csv(destino, medir):
+    df = _seleccion_estacion(destino / "hidrometeorologicos")
+    with medir():
+        datos = df.to_csv(index=False, encoding="utf-8-sig")
+    return {"filas": len(df), "bytes": len(datos.encode("utf-8"))}
+
+
+def caso_export_excel(destino, medir):
+    from cattleclimate.exportar import a_excel
+
+    # Límite de filas de una hoja de Excel
+    df = _seleccion_estacion(destino / "hidrometeorologicos").head(1_048_575)
+    with medir():
+        datos = a_excel(df)
+    return {"filas": len(df), "bytes": len(datos)}
+
+
+def caso_export_pdf(destino, medir):
+    from cattleclimate.exportar import generar_pdf
+
+    df = _seleccion_estacion(destino / "hidrometeorologicos")
+    with medir():
+        datos = generar_pdf(df, "benchmark.csv")
+    return {"filas": len(df), "bytes": len(datos)}
+
+
+def caso_mapa(destino, medir):
+    # Mismo JSON de deck.gl que arma st.map en app_mapa_streamlit.py
+    from streamlit.elements.map import to_deckgl_json
+
+    ruta = destino / "estaciones_mapa.csv"
+    with medir():
+        estaciones = pd.read_csv(ruta).dropna(subset=["latitud", "longitud"])
+        muestra = estaciones.rename(columns={"latitud": "lat", "longitud": "lon"})
+        mapa = to_deckgl_json(muestra, None, None, None, None, None)
+    return {"filas": len(estaciones), "bytes": ruta.stat().st_size + len(mapa)}
+
+
+# (función, depende del número de estaciones)
+CASOS = {
+    "parse_app0": (caso_parse_app0, False),
+    "parse_leer_serie": (caso_parse_leer_serie, False),
+    "consolidacion": (caso_consolidacion, True),
+    "filtro": (caso_filtro, True),
+    "indices": (caso_indices, True),
+    "export_csv": (caso_export_csv, False),
+    "export_excel": (caso_export_excel, False),
+    "export_pdf": (caso_export_pdf, False),
+    "mapa": (caso_mapa, True),
+}
+
+
+# --- Ejecución aislada ---
+def pico_mb():
+    """Pico de memoria residente del proceso en MB (None sin el módulo `resource`)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB; macOS, bytes
+    return pico / 1e6 if sys.platform == "darwin" else pico * 1024 / 1e6
+
+
+class _Medicion:
+    """Contexto que cronometra el bloque y anota la memoria antes y después"""
+
+    def __init__(self):
+        self.segundos = None
+        self.rss_inicio_mb = None
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        self.rss_inicio_mb = pico_mb()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.segundos = time.perf_counter() - self._inicio
+        return False
+
+
+def _ejecutar_caso(nombre, destino, cola):
+    funcion, _ = CASOS[nombre]
+    medicion = _Medicion()
+    try:
+        resultado = funcion(Path(destino), medicion)
+    except ImportError as e:
+        cola.put({"estado": "omitido", "detalle": str(e)})
+        return
+    except Exception as e:
+        cola.put({"estado": "error", "detalle": f"{type(e).__name__}: {e}"})
+        return
+    pico = pico_mb()
+    cola.put({
+        "estado": "ok",
+        "segundos": round(medicion.segundos, 4),
+        "pico_mb": round(pico, 1) if pico is not None else None,
+        "pico_antes_mb": round(medicion.rss_inicio_mb, 1) if medicion.rss_inicio_mb is not None else None,
+        **resultado
+    })
+
+
+def medir_caso(nombre, destino, tiempo_max=TIEMPO_MAX_S):
+    """Corre un caso en un proceso nuevo y devuelve su registro"""
+    contexto = multiprocessing.get_context("spawn")
+    cola = contexto.Queue()
+    proceso = contexto.Process(target=_ejecutar_caso, args=(nombre, str(destino), cola))
+    proceso.start()
+    proceso.join(tiempo_max)
+    if proceso.is_alive():
+        proceso.terminate()
+        proceso.join()
+        return {"estado": "tiempo_agotado", "detalle": f"más de {tiempo_max} s"}
+    if cola.empty():
+        # Típicamente el proceso fue terminado por falta de memoria
+        return {"estado": "error", "detalle": f"el proceso terminó con código {proceso.exitcode}"}
+    registro = cola.get()
+    if registro["estado"] == "ok":
+        segundos = max(registro["segundos"], 1e-9)
+        registro["filas_por_s"] = round(registro["filas"] / segundos)
+        if "bytes" in registro:
+            registro["mb_por_s"] = round(registro["bytes"] / 1e6 / segundos, 2)
+    return registro
+
+
+def entorno():
+    """Versiones y máquina, para que los reportes sean comparables"""
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def ejecutar(escalas=(1, 10, 100), casos=None, tiempo_max=TIEMPO_MAX_S):
+    """Corre la suite y devuelve el reporte como diccionario"""
+    casos = list(casos or CASOS)
+    reporte = {"generado": datetime.now().isoformat(timespec="seconds"), "entorno": entorno(), "resultados": []}
+    for escala in escalas:
+        destino = preparar_escala(escala)
+        for nombre in casos:
+            _, por_escala = CASOS[nombre]
+            if escala != 1 and not por_escala:
+                continue
+            registro = {"caso": nombre, "escala": escala, **medir_caso(nombre, destino, tiempo_max)}
+            reporte["resultados"].append(registro)
+            print(_linea(registro), flush=True)
+    return reporte
+
+
+def _linea(r):
+    if r["estado"] != "ok":
+        return f"{r['caso']:<18}{r['escala']:>5}×  {r['estado']}: {r.get('detalle', '')}"
+    pico = f"{r['pico_mb']:>9.0f}" if r["pico_mb"] is not None else f"{'-':>9}"
+    return f"{r['caso']:<18}{r['escala']:>5}×{r['segundos']:>11.3f}{pico}{r['filas']:>13,}{r['filas_por_s']:>14,}"
+
+
+def comparar(reporte, anterior):
+    """Tabla de tiempos del reporte actual contra uno anterior (razón > 1 = más lento)"""
+    previos = {(r["caso"], r["escala"]): r for r in anterior["resultados"] if r["estado"] == "ok"}
+    filas = []
+    for r in reporte["resultados"]:
+        previo = previos.get((r["caso"], r["escala"]))
+        if r["estado"] != "ok" or previo is None:
+            continue
+        filas.append({
+            "caso": r["caso"], "escala": r["escala"],
+            "antes_s": previo["segundos"], "ahora_s": r["segundos"],
+            "razon": round(r["segundos"] / max(previo["segundos"], 1e-9), 2)
+        })
+    return pd.DataFrame(filas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--casos", nargs="+", choices=list(CASOS), default=None)
+    parser.add_argument("--salida", type=Path, default=None,
+                        help="ruta del reporte JSON (por defecto cache/benchmarks/reporte_<fecha>.json)")
+    parser.add_argument("--comparar", type=Path, default=None, help="reporte anterior para comparar tiempos")
+    parser.add_argument("--tiempo-max", type=int, default=TIEMPO_MAX_S, help="segundos máximos por caso")
+    args = parser.parse_args(argv)
+
+    print(f"{'caso':<18}{'escala':>6}{'tiempo (s)':>11}{'pico MB':>9}{'filas':>13}{'filas/s':>14}")
+    reporte = ejecutar(args.escalas, args.casos, args.tiempo_max)
+
+    salida = args.salida or ESCALAS_DIR / f"reporte_{datetime.now():%Y%m%d_%H%M%S}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=1)
+    print(f"Reporte: {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            tabla = comparar(reporte, json.load(f))
+        print(tabla.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/ventanas.py
+"""Compara las estadísticas móviles O(n) contra pandas.rolling en el archivo más grande.
+
+Como referencia adicional mide la versión ingenua `rolling().apply` del percentil
+90 en la ventana de 24 h, que es lo que se usaría sin este módulo. El error del
+percentil se mide contra `np.nanquantile` sobre ventanas recortadas a mano en
+`MUESTRAS` posiciones repartidas en la serie, no contra el mismo pandas.
+
+Uso:
+    python -m benchmarks.ventanas [ARCHIVO.data]
+"""
+import sys
+import time
+
+import numpy as np
+
+from cattleclimate.datos import DATA_HIDRO, leer_serie
+from cattleclimate.remuestreo import remuestrear
+from cattleclimate.ventanas import cuantil_movil, maximo_movil, media_movil, minimo_movil
+
+ARCHIVO_POR_DEFECTO = DATA_HIDRO / "DV_AUT_2@25025380.data"
+FRECUENCIA = "10min"
+VENTANAS = {"24h": 144, "72h": 432, "7D": 1008}
+MUESTRAS = 2_000  # posiciones donde se verifica el percentil
+
+
+def cronometrar(funcion, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def error_cuantil(propio, valores, ventana, q, muestras=MUESTRAS):
+    """Error máximo de un cuantil móvil frente a np.nanquantile en posiciones de muestra"""
+    posiciones = np.linspace(0, len(valores) - 1, min(muestras, len(valores))).astype(int)
+    errores = []
+    for i in posiciones:
+        tramo = valores[max(0, i - ventana + 1):i + 1]
+        if not np.isnan(tramo).all():
+            errores.append(abs(propio[i] - np.nanquantile(tramo, q)))
+    return max(errores, default=np.nan)
+
+
+def main(ruta=ARCHIVO_POR_DEFECTO):
+    serie = leer_serie(ruta)
+    regular = remuestrear(serie, FRECUENCIA)
+    valores = regular["Valor"].to_numpy()
+    movil = regular["Valor"].rolling
+
+    print(f"Archivo: {ruta.name} · {len(serie):,} registros · grilla {FRECUENCIA}: {len(valores):,} celdas")
+    print(f"{'Ventana':<8}{'Estadística':<12}{'motor (s)':>12}{'pandas (s)':>12}{'error máx':>12}")
+
+    for nombre, ventana in VENTANAS.items():
+        casos = [
+            ("media", lambda: media_movil(valores, ventana), lambda: movil(ventana, min_periods=1).mean()),
+            ("max", lambda: maximo_movil(valores, ventana), lambda: movil(ventana, min_periods=1).max()),
+            ("min", lambda: minimo_movil(valores, ventana), lambda: movil(ventana, min_periods=1).min()),
+            ("p90", lambda: cuantil_movil(valores, ventana, 0.9),
+             lambda: movil(ventana, min_periods=1).quantile(0.9)),
+        ]
+        for estadistica, motor, referencia in casos:
+            propio, t_propio = cronometrar(motor)
+            esperado, t_pandas = cronometrar(referencia)
+            if estadistica == "p90":
+                error = error_cuantil(propio, valores, ventana, 0.9)
+            else:
+                error = np.nanmax(np.abs(propio - esperado.to_numpy()))
+            print(f"{nombre:<8}{estadistica:<12}{t_propio:>12.4f}{t_pandas:>12.4f}{error:>12.4f}")
+
+    _, t_apply = cronometrar(
+        lambda: movil(VENTANAS["24h"], min_periods=1).apply(lambda v: np.nanpercentile(v, 90), raw=True)
+    )
+    print(f"Referencia ingenua rolling().apply p90 24h: {t_apply:.2f} s")
+
+
+if __name__ == "__main__":
+    main(DATA_HIDRO / sys.argv[1] if len(sys.argv) > 1 else ARCHIVO_POR_DEFECTO)
@@ -0,0 +1,2 @@
+# cattleclimate/__init__.py
+"""Motores de cálculo compartidos por las páginas de Streamlit de CattleClimate."""
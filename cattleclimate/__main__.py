@@ -0,0 +1,5 @@
+# cattleclimate/__main__.py
+"""Permite `python -m cattleclimate <subcomando>` (ver cattleclimate.cli)."""
+from cattleclimate.cli import main
+
+main()
@@ -0,0 +1,295 @@
+# cattleclimate/almacen.py
+"""Caché en disco compartida entre el trabajador de precálculo y las páginas.
+
+Estructura de `cache/`:
+
+    cache/
+    ├── manifiesto.json          # huella de cada .data y fecha del último precálculo
+    ├── series/ETIQUETA@CODIGO.arrow  # serie compacta (`cattleclimate.compacto`)
+    ├── metadatos/*.pkl          # hojas de Excel (glosario, CNE) ya leídas
+    ├── agregados/mensual.arrow
+    └── indices/ITH@CODIGO.arrow, episodios.arrow
+
+Las tablas se guardan en formato Arrow IPC (Feather v2) sin compresión, que se
+lee muy rápido y admite mapeo en memoria. Las series no llevan una fecha por
+fila: se guardan con inicio, paso y tramos, y valores int16 o float32.
+"""
+import hashlib
+import json
+import os
+import pickle
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from cattleclimate.compacto import a_serie, desde_serie, guardar, leer
+from cattleclimate.datos import BASE_DIR, leer_serie
+from cattleclimate.diagnostico import registrar_cache
+
+CACHE_DIR = BASE_DIR / "cache"
+MANIFIESTO_PATH = CACHE_DIR / "manifiesto.json"
+SERIES_DIR = CACHE_DIR / "series"
+AGREGADOS_DIR = CACHE_DIR / "agregados"
+INDICES_DIR = CACHE_DIR / "indices"
+METADATOS_DIR = CACHE_DIR / "metadatos"
+IMPUTADAS_DIR = CACHE_DIR / "imputadas"
+VECINOS_PATH = IMPUTADAS_DIR / "vecinos.arrow"
+
+
+def huella(ruta):
+    """Huella de un archivo fuente: fecha de modificación (ns) y tamaño"""
+    estado = Path(ruta).stat()
+    return {"mtime_ns": estado.st_mtime_ns, "tamano": estado.st_size}
+
+
+def leer_manifiesto():
+    """Manifiesto de la caché (vacío si todavía no se ha precalculado nada)"""
+    try:
+        with open(MANIFIESTO_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"generado": None, "series": {}}
+
+
+def guardar_manifiesto(manifiesto):
+    """Escribe el manifiesto de forma atómica"""
+    CACHE_DIR.mkdir(exist_ok=True)
+    temporal = MANIFIESTO_PATH.with_suffix(".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=1)
+    os.replace(temporal, MANIFIESTO_PATH)
+
+
+def guardar_tabla(df, ruta):
+    """Guarda un DataFrame como Arrow IPC sin compresión, de forma atómica.
+
+    Un índice con nombre (p. ej. Fecha) se guarda como columna.
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    if not isinstance(df.index, pd.RangeIndex):
+        df = df.reset_index()
+    temporal = ruta.with_suffix(".tmp")
+    df.to_feather(temporal, compression="uncompressed")
+    os.replace(temporal, ruta)
+
+
+def leer_tabla(ruta):
+    """Lee una tabla Arrow de la caché (None si no existe)"""
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return None
+    return pd.read_feather(ruta)
+
+
+def guardar_arrow(tabla, ruta, firma):
+    """Guarda una tabla Arrow con su `firma` (texto) en los metadatos del esquema, de forma atómica"""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tabla = tabla.replace_schema_metadata({"firma": firma})
+    temporal = ruta.with_suffix(".tmp")
+    with pa.ipc.new_file(str(temporal), tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    os.replace(temporal, ruta)
+
+
+def leer_arrow(ruta, firma):
+    """Tabla Arrow guardada con `guardar_arrow`, mapeada en memoria (None si falta o la firma cambió)"""
+    try:
+        tabla = pa.ipc.open_file(pa.memory_map(str(ruta), "r")).read_all()
+    except (FileNotFoundError, OSError, pa.ArrowInvalid):
+        return None
+    if (tabla.schema.metadata or {}).get(b"firma", b"").decode() != firma:
+        return None
+    return tabla
+
+
+def guardar_npz(ruta, firma, **arrays):
+    """Guarda arrays NumPy con su `firma` (texto) en un .npz, de forma atómica"""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_suffix(".tmp.npz")
+    np.savez(temporal, firma=np.array(firma), **arrays)
+    os.replace(temporal, ruta)
+
+
+def leer_npz(ruta, firma=None):
+    """Arrays guardados con `guardar_npz` (None si falta, está dañado o su firma no es `firma`).
+
+    Sin `firma` se devuelve todo, con la firma guardada en "firma": las cachés
+    incrementales aprovechan lo ya calculado aunque los datos hayan cambiado.
+    """
+    try:
+        with np.load(ruta) as guardado:
+            arrays = {k: guardado[k] for k in guardado.files}
+    except (FileNotFoundError, OSError, ValueError):
+        return None
+    if firma is None:
+        return arrays
+    if str(arrays.pop("firma", "")) != firma:
+        return None
+    return arrays
+
+
+def guardar_bytes(ruta, contenido):
+    """Escribe `contenido` (bytes) en `ruta` de forma atómica"""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_suffix(".tmp")
+    temporal.write_bytes(contenido)
+    os.replace(temporal, ruta)
+
+
+def ruta_serie(nombre):
+    return SERIES_DIR / f"{nombre}.arrow"
+
+
+def guardar_serie(serie, ruta):
+    """Guarda una serie de la caché en forma compacta (ver `cattleclimate.compacto`)"""
+    guardar(desde_serie(serie), ruta)
+
+
+def serie_vigente(ruta_data, manifiesto=None):
+    """True si la serie precalculada corresponde a la versión actual del archivo .data"""
+    manifiesto = manifiesto or leer_manifiesto()
+    entrada = manifiesto["series"].get(Path(ruta_data).stem)
+    return (
+        entrada is not None
+        and {k: entrada.get(k) for k in ("mtime_ns", "tamano")} == huella(ruta_data)
+        and ruta_serie(Path(ruta_data).stem).exists()
+    )
+
+
+def cargar_serie(ruta_data, manifiesto=None):
+    """Serie de un archivo .data: desde la caché si está vigente, si no, leyendo el archivo.
+
+    Las variables derivadas (`cattleclimate.psicrometria`) y las series horarias
+    reconstruidas (`cattleclimate.diurno`) no existen en disco: se calculan a
+    partir de sus fuentes.
+    """
+    ruta_data = Path(ruta_data)
+    if not ruta_data.exists():
+        # Importación diferida: psicrometria y diurno dependen de este módulo
+        from cattleclimate.psicrometria import es_derivada, serie_derivada
+        if es_derivada(ruta_data):
+            return serie_derivada(ruta_data)
+        from cattleclimate.diurno import es_reconstruida, serie_reconstruida
+        if es_reconstruida(ruta_data):
+            return serie_reconstruida(ruta_data)
+    if serie_vigente(ruta_data, manifiesto):
+        compacta = leer(ruta_serie(ruta_data.stem))
+        if compacta is not None:
+            registrar_cache("series_precalculadas", True)
+            return a_serie(compacta, ruta_data.stem)
+    registrar_cache("series_precalculadas", False)
+    return leer_serie(ruta_data)
+
+
+def archivos_fuente(ruta_data):
+    """Archivos reales de los que sale la serie: ella misma o, si es virtual, sus fuentes ([] si faltan)"""
+    ruta_data = Path(ruta_data)
+    if ruta_data.exists():
+        return [ruta_data]
+    from cattleclimate.diurno import EXTREMOS_HUMEDAD, EXTREMOS_TEMPERATURA, es_reconstruida, pares_extremos
+    from cattleclimate.psicrometria import es_derivada, fuentes_derivada
+
+    if es_derivada(ruta_data):
+        fuentes = fuentes_derivada(ruta_data.stem.split("@")[1], ruta_data.parent)
+        return fuentes if all(r.exists() for r in fuentes) else []
+    if es_reconstruida(ruta_data):
+        codigo = ruta_data.stem.split("@")[1]
+        temperatura = pares_extremos(codigo, ruta_data.parent, EXTREMOS_TEMPERATURA)
+        humedad = pares_extremos(codigo, ruta_data.parent, EXTREMOS_HUMEDAD) or []
+        return temperatura + humedad if temperatura else []
+    return []
+
+
+def firma_archivos(rutas):
+    """Huella (ruta, fecha de modificación, tamaño) de archivos reales, para invalidar cachés"""
+    return tuple((str(r), *huella(r).values()) for r in rutas)
+
+
+def firma_fuentes(ruta_data):
+    """Huella de los archivos de los que sale la serie, para invalidar cachés derivadas.
+
+    Las series reconstruidas dependen además de la calibración del modelo diurno,
+    que entra en la huella: recalibrar invalida lo calculado con ellas.
+    """
+    ruta_data = Path(ruta_data)
+    rutas = archivos_fuente(ruta_data)
+    firma = firma_archivos(rutas)
+    if rutas and not ruta_data.exists():
+        from cattleclimate.diurno import PARAMETROS_DEFECTO, calibracion, es_reconstruida
+        if es_reconstruida(ruta_data):
+            parametros = calibracion(ruta_data.parent)
+            firma += (tuple(sorted((k, v) for k, v in parametros.items() if k in PARAMETROS_DEFECTO)),)
+    return firma
+
+
+def huella_datos(tiempos, valores):
+    """sha1 de los tiempos (int64 ns) y valores (float64) de un tramo de serie.
+
+    Las cachés incrementales la guardan para el tramo ya procesado y solo suman lo
+    nuevo si ese tramo sigue idéntico (un .data puede corregirse en cualquier fila).
+    """
+    sha = hashlib.sha1(np.ascontiguousarray(tiempos, dtype="int64").tobytes())
+    sha.update(np.ascontiguousarray(valores, dtype="float64").tobytes())
+    return sha.hexdigest()
+
+
+# --- Metadatos (Excel) ---
+@lru_cache(maxsize=8)
+def _hoja(ruta_excel, hoja, firma, lector):
+    ruta_cache = METADATOS_DIR / f"{Path(ruta_excel).stem}.pkl"
+    try:
+        with open(ruta_cache, "rb") as f:
+            guardado = pickle.load(f)
+        if guardado["firma"] == firma and guardado["hoja"] == hoja:
+            registrar_cache("metadatos_disco", True)
+            return guardado["df"]
+    except (FileNotFoundError, EOFError, KeyError, pickle.UnpicklingError, AttributeError, ImportError):
+        pass
+    registrar_cache("metadatos_disco", False)
+    df = lector(ruta_excel, hoja)
+    # Pickle y no Arrow: el CNE tiene columnas con tipos mezclados (números y texto)
+    METADATOS_DIR.mkdir(parents=True, exist_ok=True)
+    temporal = ruta_cache.with_suffix(".tmp")
+    with open(temporal, "wb") as f:
+        pickle.dump({"firma": firma, "hoja": hoja, "df": df}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, ruta_cache)
+    return df
+
+
+def cargar_hoja(ruta_excel, hoja, lector):
+    """Hoja de Excel leída una sola vez: en memoria del proceso y en `cache/metadatos/`.
+
+    `lector(ruta, hoja)` solo se llama si el .xlsx cambió o no hay caché. El
+    DataFrame devuelto es compartido: quien lo modifique debe copiarlo antes.
+    """
+    firma = tuple(huella(ruta_excel).values())
+    aciertos_previos = _hoja.cache_info().hits
+    df = _hoja(Path(ruta_excel), hoja, firma, lector)
+    registrar_cache("metadatos", _hoja.cache_info().hits > aciertos_previos)
+    return df
+
+
+def frescura(manifiesto=None):
+    """Fecha del último precálculo (None si nunca se ha ejecutado el trabajador)"""
+    generado = (manifiesto or leer_manifiesto()).get("generado")
+    return datetime.fromisoformat(generado) if generado else None
+
+
+def descripcion_frescura(manifiesto=None):
+    """Texto corto para mostrar en las páginas"""
+    manifiesto = manifiesto or leer_manifiesto()
+    fecha = frescura(manifiesto)
+    if fecha is None:
+        return "Sin precálculo: los datos se leen directamente de los archivos .data"
+    return (
+        f"Datos precalculados el {fecha:%Y-%m-%d %H:%M} "
+        f"({len(manifiesto['series'])} series en caché)"
+    )
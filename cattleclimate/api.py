@@ -0,0 +1,367 @@
+# cattleclimate/api.py
+"""API HTTP/JSON local de solo lectura sobre la caché de series, índices y agregados.
+
+    python -m cattleclimate.api [--host 127.0.0.1] [--puerto 8765]
+
+Rutas (todas GET):
+
+    /estaciones?q=&departamento=&municipio=&etiqueta=     búsqueda de estaciones
+    /series/ETIQUETA/CODIGO?desde=&hasta=                 serie de un archivo .data
+    /indices/CODIGO?desde=&hasta=                         Tbs, Tbh, Tr, Vv, ITH, ITGH y CTR (o solo ITH)
+    /agregados?etiqueta=&codigo=&anio=                    agregados mensuales
+    /episodios?codigo=&umbral=                            episodios de estrés térmico
+    /salud                                                estado de la caché
+
+Parámetros comunes: `pagina` (desde 1), `tamano` (filas por página), `columnas`
+(separadas por coma) y `formato` (`json` o `arrow`). El JSON es columnar
+({"columnas": [...], "datos": [[...], ...]}) y se comprime con gzip si el
+cliente lo acepta; `arrow` devuelve un flujo Arrow IPC.
+
+Cada respuesta lleva un ETag derivado de la huella de los archivos de origen:
+un cliente que repite la consulta con `If-None-Match` recibe 304 sin cuerpo
+mientras los datos no cambien. Las tablas y las páginas serializadas se guardan
+en memoria con la misma huella, así que recorrer páginas no vuelve a leer disco.
+
+Las peticiones se atienden en hilos (`ThreadingHTTPServer`); el servidor solo
+lee archivos locales y por defecto escucha únicamente en 127.0.0.1.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from cattleclimate.almacen import huella, leer_manifiesto, serie_vigente
+from cattleclimate.compartido import ESQUEMA_SERIE, CorpusCompartido, recortar
+from cattleclimate.datos import DATA_HIDRO, leer_serie
+from cattleclimate.diagnostico import registrar_cache
+from cattleclimate.indices import firma_indices, serie_ith, tabla_indices
+from cattleclimate.precomputo import EPISODIOS_PATH, MENSUAL_PATH
+
+log = logging.getLogger("cattleclimate.api")
+
+TAMANO_PAGINA = 1000
+TAMANO_MAXIMO = 50000
+TIPO_JSON = "application/json; charset=utf-8"
+TIPO_ARROW = "application/vnd.apache.arrow.stream"
+
+
+class ErrorConsulta(Exception):
+    """Error del cliente (ruta o parámetros inválidos) con su código HTTP"""
+
+    def __init__(self, mensaje, estado=HTTPStatus.BAD_REQUEST):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+# --- Versiones de los datos (base del ETag y de las cachés) ---
+def _firma(*rutas):
+    """Huella combinada de varios archivos (None para los que no existen)"""
+    return tuple(tuple(huella(r).values()) if r.exists() else None for r in rutas)
+
+
+@lru_cache(maxsize=1)
+def _corpus(generado):
+    return CorpusCompartido()
+
+
+def corpus():
+    """Corpus del proceso; se renueva cuando el precálculo publica un manifiesto nuevo"""
+    return _corpus(leer_manifiesto().get("generado"))
+
+
+# --- Tablas completas por recurso (Arrow, en memoria) ---
+@lru_cache(maxsize=64)
+def _tabla_serie(nombre, version):
+    ruta = DATA_HIDRO / f"{nombre}.data"
+    if serie_vigente(ruta):
+        return corpus().tabla(nombre)
+    # El .data cambió y el precálculo todavía no lo alcanza: se lee directamente
+    serie = leer_serie(ruta).rename("Valor").reset_index()
+    return pa.Table.from_pandas(serie, preserve_index=False).cast(ESQUEMA_SERIE)
+
+
+@lru_cache(maxsize=32)
+def _tabla_indices(codigo, version):
+    df = tabla_indices(codigo)
+    if df.empty:
+        df = serie_ith(codigo).to_frame()
+    return pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+
+
+@lru_cache(maxsize=4)
+def _tabla_cache(ruta, version):
+    return pa.ipc.open_file(pa.memory_map(str(ruta), "r")).read_all()
+
+
+@lru_cache(maxsize=1)
+def _tabla_estaciones(generado):
+    estaciones = corpus().estaciones()
+    df = estaciones.groupby("Codigo", sort=True).agg(
+        nombre=("nombre", "first"),
+        DEPARTAMENTO=("DEPARTAMENTO", "first"),
+        MUNICIPIO=("MUNICIPIO", "first"),
+        Etiquetas=("Etiqueta", lambda s: ",".join(sorted(s)))
+    ).reset_index()
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _filtrar_igual(tabla, columna, valor, tipo=str):
+    if valor is None:
+        return tabla
+    if columna not in tabla.column_names:
+        raise ErrorConsulta(f"La tabla no tiene la columna {columna}")
+    try:
+        return tabla.filter(pc.equal(tabla[columna], pa.scalar(tipo(valor))))
+    except ValueError:
+        raise ErrorConsulta(f"Valor inválido para {columna}: {valor}")
+
+
+def _contiene(tabla, columna, texto):
+    columna = pc.utf8_lower(pc.cast(tabla[columna], pa.string()))
+    return pc.fill_null(pc.match_substring(columna, texto.lower()), False)
+
+
+def _recorte_fechas(tabla, p):
+    try:
+        return recortar(tabla, p.get("desde"), p.get("hasta"))
+    except ValueError:
+        raise ErrorConsulta("Fechas inválidas; use AAAA-MM-DD o AAAA-MM-DD HH:MM")
+
+
+# --- Recursos ---
+def _estaciones(p, generado):
+    tabla = _tabla_estaciones(generado)
+    if p.get("q"):
+        tabla = tabla.filter(pc.or_(_contiene(tabla, "nombre", p["q"]), _contiene(tabla, "Codigo", p["q"])))
+    for parametro, columna in (("departamento", "DEPARTAMENTO"), ("municipio", "MUNICIPIO"),
+                               ("etiqueta", "Etiquetas")):
+        if p.get(parametro):
+            tabla = tabla.filter(_contiene(tabla, columna, p[parametro]))
+    return tabla
+
+
+def _indices(p, codigo, version):
+    tabla = _tabla_indices(codigo, version)
+    if tabla.num_rows == 0:
+        raise ErrorConsulta(f"La estación {codigo} no tiene datos para calcular el ITH", HTTPStatus.NOT_FOUND)
+    return _recorte_fechas(tabla, p)
+
+
+def _agregados(p, version):
+    tabla = _tabla_cache(MENSUAL_PATH, version)
+    tabla = _filtrar_igual(tabla, "Etiqueta", p.get("etiqueta"))
+    tabla = _filtrar_igual(tabla, "Codigo", p.get("codigo"))
+    return _filtrar_igual(tabla, "Anio", p.get("anio"), int)
+
+
+def _episodios(p, version):
+    tabla = _tabla_cache(EPISODIOS_PATH, version)
+    tabla = _filtrar_igual(tabla, "Codigo", p.get("codigo"))
+    return _filtrar_igual(tabla, "Umbral", p.get("umbral"), int)
+
+
+def _tabla_precalculada(ruta):
+    if not ruta.exists():
+        raise ErrorConsulta(f"Todavía no existe {ruta.name}; ejecute el precálculo", HTTPStatus.NOT_FOUND)
+    return _firma(ruta)
+
+
+def resolver(ruta):
+    """(versión, función que arma la tabla a partir de los parámetros) de una ruta.
+
+    La versión solo mira huellas de archivos, así que responder un 304 no lee datos.
+    """
+    partes = ruta.strip("/").split("/")
+    if partes == ["estaciones"]:
+        generado = leer_manifiesto().get("generado")
+        return generado, lambda p: _estaciones(p, generado)
+    if len(partes) == 3 and partes[0] == "series":
+        nombre = f"{partes[1]}@{partes[2]}"
+        ruta_data = DATA_HIDRO / f"{nombre}.data"
+        if not ruta_data.exists():
+            raise ErrorConsulta(f"No existe la serie {nombre}", HTTPStatus.NOT_FOUND)
+        version = _firma(ruta_data)
+        return version, lambda p: _recorte_fechas(_tabla_serie(nombre, version), p)
+    if len(partes) == 2 and partes[0] == "indices":
+        codigo = partes[1]
+        version = firma_indices(codigo)
+        return version, lambda p: _indices(p, codigo, version)
+    if partes == ["agregados"]:
+        version = _tabla_precalculada(MENSUAL_PATH)
+        return version, lambda p: _agregados(p, version)
+    if partes == ["episodios"]:
+        version = _tabla_precalculada(EPISODIOS_PATH)
+        return version, lambda p: _episodios(p, version)
+    raise ErrorConsulta(f"Ruta desconocida: {ruta}", HTTPStatus.NOT_FOUND)
+
+
+# --- Serialización ---
+def _entero(p, nombre, defecto, minimo=1, maximo=None):
+    try:
+        valor = int(p.get(nombre, defecto))
+    except ValueError:
+        raise ErrorConsulta(f"'{nombre}' debe ser un entero")
+    if valor < minimo or (maximo is not None and valor > maximo):
+        raise ErrorConsulta(f"'{nombre}' fuera de rango ({minimo}..{maximo or '∞'})")
+    return valor
+
+
+def _a_json(tabla, meta):
+    columnas = []
+    for nombre, columna in zip(tabla.column_names, tabla.columns):
+        if pa.types.is_timestamp(columna.type):
+            # En segundos para que %S no agregue fracciones
+            columna = pc.strftime(columna.cast(pa.timestamp("s"), safe=False), "%Y-%m-%dT%H:%M:%S")
+        elif pa.types.is_dictionary(columna.type):
+            columna = columna.cast(pa.string())
+        elif pa.types.is_floating(columna.type):
+            # NaN no es JSON válido: se envía como null
+            columna = pc.if_else(pc.is_nan(columna), pa.scalar(None, columna.type), columna)
+        columnas.append(columna.to_pylist())
+    cuerpo = {**meta, "columnas": tabla.column_names, "datos": [list(fila) for fila in zip(*columnas)]}
+    return json.dumps(cuerpo, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _a_arrow(tabla):
+    tabla = tabla.replace_schema_metadata(None)
+    sumidero = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sumidero, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    return sumidero.getvalue().to_pybytes()
+
+
+@lru_cache(maxsize=256)
+def _cuerpo(ruta, consulta, version, gzip_ok):
+    """Página serializada; la clave incluye la versión de los datos, así que nunca queda vieja"""
+    p = dict(consulta)
+    tabla = resolver(ruta)[1](p)
+    tamano = _entero(p, "tamano", TAMANO_PAGINA, maximo=TAMANO_MAXIMO)
+    pagina = _entero(p, "pagina", 1)
+    if p.get("columnas"):
+        faltantes = set(p["columnas"].split(",")) - set(tabla.column_names)
+        if faltantes:
+            raise ErrorConsulta(f"Columnas desconocidas: {', '.join(sorted(faltantes))}")
+        tabla = tabla.select(p["columnas"].split(","))
+
+    total = tabla.num_rows
+    trozo = tabla.slice((pagina - 1) * tamano, tamano)
+    siguiente = None
+    if pagina * tamano < total:
+        siguiente = f"{ruta}?{urlencode({**p, 'pagina': pagina + 1})}"
+    meta = {"total": total, "pagina": pagina, "tamano": tamano, "siguiente": siguiente}
+
+    if p.get("formato", "json") == "arrow":
+        return _a_arrow(trozo), TIPO_ARROW, meta, None
+    cuerpo = _a_json(trozo, meta)
+    if gzip_ok and len(cuerpo) > 1024:
+        return gzip.compress(cuerpo, compresslevel=5), TIPO_JSON, meta, "gzip"
+    return cuerpo, TIPO_JSON, meta, None
+
+
+def _etag(ruta, consulta, version):
+    return '"' + hashlib.sha1(repr((ruta, consulta, version)).encode()).hexdigest()[:20] + '"'
+
+
+def responder(ruta, consulta, etag_cliente=None, gzip_ok=False):
+    """Atiende una petición. Devuelve (estado, cabeceras, cuerpo)"""
+    p = {k: v[-1] for k, v in parse_qs(consulta).items()}
+    if p.get("formato", "json") not in ("json", "arrow"):
+        return _error(ErrorConsulta("'formato' debe ser json o arrow"))
+    if ruta.rstrip("/") == "/salud":
+        manifiesto = leer_manifiesto()
+        return _respuesta_json({"generado": manifiesto.get("generado"), "series": len(manifiesto["series"])})
+
+    try:
+        version = resolver(ruta)[0]
+        clave = tuple(sorted(p.items()))
+        etag = _etag(ruta, clave, version)
+        if etag_cliente is not None and etag in [e.strip() for e in etag_cliente.split(",")]:
+            return HTTPStatus.NOT_MODIFIED, {"ETag": etag}, b""
+
+        aciertos = _cuerpo.cache_info().hits
+        cuerpo, tipo, meta, codificacion = _cuerpo(ruta, clave, version, gzip_ok)
+        registrar_cache("api", _cuerpo.cache_info().hits > aciertos)
+    except ErrorConsulta as e:
+        return _error(e)
+
+    cabeceras = {
+        "Content-Type": tipo, "ETag": etag, "Cache-Control": "no-cache",
+        "X-Total": str(meta["total"]), "X-Pagina": str(meta["pagina"])
+    }
+    if meta["siguiente"]:
+        cabeceras["Link"] = f'<{meta["siguiente"]}>; rel="next"'
+    if codificacion:
+        cabeceras["Content-Encoding"] = codificacion
+    return HTTPStatus.OK, cabeceras, cuerpo
+
+
+def _respuesta_json(datos, estado=HTTPStatus.OK):
+    cuerpo = json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return estado, {"Content-Type": TIPO_JSON}, cuerpo
+
+
+def _error(e):
+    return _respuesta_json({"error": str(e)}, e.estado)
+
+
+# --- Servidor ---
+class _Manejador(BaseHTTPRequestHandler):
+    server_version = "CattleClimate"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        try:
+            estado, cabeceras, cuerpo = responder(
+                partes.path, partes.query,
+                etag_cliente=self.headers.get("If-None-Match"),
+                gzip_ok="gzip" in self.headers.get("Accept-Encoding", "")
+            )
+        except Exception:
+            log.exception("Error al atender %s", self.path)
+            estado, cabeceras, cuerpo = _respuesta_json({"error": "Error interno"}, HTTPStatus.INTERNAL_SERVER_ERROR)
+        self.send_response(estado)
+        for nombre, valor in cabeceras.items():
+            self.send_header(nombre, valor)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        log.info("%s %s", self.address_string(), formato % args)
+
+
+def servidor(host="127.0.0.1", puerto=8765):
+    """Crea el servidor HTTP (sin iniciarlo)"""
+    httpd = ThreadingHTTPServer((host, puerto), _Manejador)
+    httpd.daemon_threads = True
+    return httpd
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    httpd = servidor(args.host, args.puerto)
+    log.info("API en http://%s:%d", args.host, args.puerto)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,608 @@
+# cattleclimate/cli.py
+"""Línea de comandos para ejecutar el flujo de las páginas sin Streamlit (cron, servidores).
+
+    python -m cattleclimate ingerir   [--procesos N] [--forzar]
+    python -m cattleclimate indices   [--procesos N] [--forzar]
+    python -m cattleclimate agregar   [--procesos N] [--forzar] [--salida mensual.csv]
+    python -m cattleclimate consolidar --salida datos.parquet [--etiquetas ...] [--codigos ...]
+                                       [--departamentos ...] [--desde AAAA-MM-DD] [--hasta ...] [--metadatos]
+    python -m cattleclimate exportar  ENTRADA SALIDA
+    python -m cattleclimate dataset   [--forzar] [--compactar]   # Parquet particionado
+    python -m cattleclimate imputar   [--etiquetas ...] [--vecinos K] [--radio-km R] [--r-min R]
+    python -m cattleclimate reconstruir [--codigos ...]   # horas desde máximas y mínimas diarias
+    python -m cattleclimate pronosticar [--horas H] [--codigos ...] [--salida pronostico.csv]
+    python -m cattleclimate graficar  ETIQUETA --salida DIR [--formato png|svg|html] [--codigos ...]
+    python -m cattleclimate cubos     [--etiquetas ...]   # hora del día × día del año
+    python -m cattleclimate todo      [--procesos N]   # ingerir + indices + agregar
+
+Cada subcomando también acepta su nombre en inglés (ingest, compute-indices,
+aggregate, consolidate, export, partition, impute, reconstruct,
+forecast, render, cubes, all).
+
+Los subcomandos largos reparten el trabajo entre procesos y guardan su avance
+cada `--lote` elementos (el manifiesto de la caché para `ingerir`, y
+`cache/cli/<tarea>.json` para los demás): si se interrumpen, al volver a
+ejecutarlos continúan donde quedaron y omiten lo que no cambió.
+
+Códigos de salida: 0 éxito, 1 algunos elementos fallaron, 2 argumentos inválidos
+(se validan antes de empezar), 3 la selección no produjo datos, 4 error al leer o
+escribir los datos, 130 interrumpido.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from cattleclimate.almacen import (
+    CACHE_DIR, IMPUTADAS_DIR, INDICES_DIR, VECINOS_PATH, cargar_serie, firma_fuentes, guardar_manifiesto,
+    guardar_serie, guardar_tabla, leer_manifiesto, leer_tabla, ruta_serie, serie_vigente
+)
+from cattleclimate.datos import DATA_HIDRO, leer_serie, listar_archivos
+from cattleclimate.episodios import ruta_ith_horario
+from cattleclimate.indices import UMBRALES_ITH, firma_indices, tabla_indices
+from cattleclimate.precomputo import (
+    EPISODIOS_PATH, MENSUAL_PATH, agregado_mensual, eliminar_huerfanas, estaciones_indices, indices_estacion,
+    registrar_serie, resumen_serie
+)
+
+log = logging.getLogger("cattleclimate.cli")
+
+AVANCE_DIR = CACHE_DIR / "cli"
+
+SALIDA_OK = 0
+SALIDA_FALLOS = 1
+SALIDA_USO = 2
+SALIDA_SIN_DATOS = 3
+SALIDA_ERROR = 4
+SALIDA_INTERRUMPIDO = 130
+
+# Formatos por extensión: de `consolidar` (escritura por lotes), de `escribir` y de `leer_entrada`
+FORMATOS_CONSOLIDAR = (".csv", ".parquet", ".arrow", ".feather")
+FORMATOS_SALIDA = (".csv", ".xlsx", ".pdf", ".json", ".parquet")
+FORMATOS_ENTRADA = (".csv", ".parquet", ".arrow", ".feather")
+
+# Tablas de la caché que se pueden exportar por nombre
+TABLAS_CACHE = {"mensual": MENSUAL_PATH, "episodios": EPISODIOS_PATH, "vecinos": VECINOS_PATH}
+
+
+# --- Avance (checkpoints) ---
+def leer_avance(tarea):
+    """{elemento: firma} de lo ya procesado por la tarea"""
+    try:
+        with open(AVANCE_DIR / f"{tarea}.json", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def guardar_avance(tarea, avance):
+    AVANCE_DIR.mkdir(parents=True, exist_ok=True)
+    ruta = AVANCE_DIR / f"{tarea}.json"
+    temporal = ruta.with_suffix(".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(avance, f)
+    os.replace(temporal, ruta)
+
+
+def _ejecutar(funcion, elementos, procesos, al_terminar, lote, al_guardar):
+    """Aplica `funcion` a cada elemento en paralelo.
+
+    `al_terminar(elemento, resultado)` se llama en el proceso principal a medida
+    que terminan, y `al_guardar()` cada `lote` elementos y al final. Devuelve la
+    lista de elementos que fallaron.
+    """
+    fallidos = []
+    hechos = 0
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        futuros = {ejecutor.submit(funcion, e): e for e in elementos}
+        try:
+            for futuro in as_completed(futuros):
+                elemento = futuros[futuro]
+                try:
+                    al_terminar(elemento, futuro.result())
+                except Exception as e:
+                    fallidos.append(elemento)
+                    log.error("%s: %s", elemento, e)
+                hechos += 1
+                if hechos % lote == 0:
+                    al_guardar()
+                    log.info("Avance: %d/%d", hechos, len(futuros))
+        except KeyboardInterrupt:
+            for futuro in futuros:
+                futuro.cancel()
+            al_guardar()
+            raise
+    al_guardar()
+    return fallidos
+
+
+# --- ingerir ---
+def _ingerir_archivo(ruta):
+    serie = leer_serie(ruta)
+    guardar_serie(serie, ruta_serie(ruta.stem))
+    return resumen_serie(serie)
+
+
+def ingerir(directorio=DATA_HIDRO, procesos=None, forzar=False, lote=25):
+    """Lee los .data nuevos o modificados a la caché de series. Devuelve los archivos fallidos"""
+    manifiesto = leer_manifiesto()
+    archivos = listar_archivos(directorio)
+    pendientes = [r for r in archivos if forzar or not serie_vigente(r, manifiesto)]
+    log.info("ingerir: %d de %d archivos pendientes", len(pendientes), len(archivos))
+
+    fallidos = _ejecutar(_ingerir_archivo, pendientes, procesos,
+                         lambda ruta, resumen: registrar_serie(manifiesto, ruta, resumen), lote,
+                         lambda: guardar_manifiesto(manifiesto))
+    huerfanas = eliminar_huerfanas(archivos, manifiesto)
+    if pendientes or huerfanas or manifiesto.get("generado") is None:
+        manifiesto["generado"] = datetime.now().isoformat(timespec="seconds")
+    guardar_manifiesto(manifiesto)
+    return fallidos
+
+
+# --- indices ---
+def _firma_estacion(codigo, directorio):
+    # Fuentes de los índices y del ITH horario de los episodios, como quedan al guardarlas en el avance (JSON)
+    horario = ruta_ith_horario(codigo, directorio)
+    firma = (firma_indices(codigo, directorio), firma_fuentes(horario) if horario else None)
+    return json.loads(json.dumps(firma))
+
+
+def _indices_estacion(args):
+    codigo, directorio = args
+    episodios = indices_estacion(codigo, directorio)
+    completa = tabla_indices(codigo, directorio)
+    if not completa.empty:
+        guardar_tabla(completa, INDICES_DIR / f"INDICES@{codigo}.arrow")
+    return episodios
+
+
+def _combinar(previa, clave, conservar, nuevas):
+    """Filas de la tabla previa cuya `clave` está en `conservar`, más las partes nuevas"""
+    partes = [] if previa is None else [previa[previa[clave].isin(conservar)]]
+    partes += [p for p in nuevas if not p.empty]
+    return pd.concat(partes, ignore_index=True) if partes else None
+
+
+def calcular_indices_corpus(directorio=DATA_HIDRO, procesos=None, forzar=False, lote=5):
+    """ITH, episodios e índices completos (ITGH, CTR) por estación. Devuelve las estaciones fallidas"""
+    avance = {} if forzar else leer_avance("indices")
+    estaciones = estaciones_indices(directorio)
+    firmas = {c: _firma_estacion(c, directorio) for c in estaciones}
+    pendientes = [c for c in estaciones if avance.get(c) != firmas[c]]
+    log.info("indices: %d de %d estaciones pendientes", len(pendientes), len(estaciones))
+
+    previos = leer_tabla(EPISODIOS_PATH)
+    nuevos = {}
+
+    def al_terminar(args, episodios):
+        nuevos[args[0]] = episodios
+
+    def al_guardar():
+        # Primero la tabla y luego el avance: una estación solo figura como hecha si su salida existe
+        tabla = _combinar(previos, "Codigo", [c for c in estaciones if c not in nuevos], nuevos.values())
+        if tabla is not None:
+            guardar_tabla(tabla, EPISODIOS_PATH)
+        guardar_avance("indices", {c: firmas[c] for c in estaciones if c not in pendientes or c in nuevos})
+
+    fallidos = _ejecutar(_indices_estacion, [(c, directorio) for c in pendientes], procesos,
+                         al_terminar, lote, al_guardar)
+    return [codigo for codigo, _ in fallidos]
+
+
+# --- agregar ---
+def _agregar_serie(nombre):
+    return agregado_mensual(cargar_serie(DATA_HIDRO / f"{nombre}.data"))
+
+
+def agregar(procesos=None, forzar=False, lote=25):
+    """Agregados mensuales de todas las series ingeridas. Devuelve las series fallidas"""
+    manifiesto = leer_manifiesto()
+    firmas = {n: [e.get("mtime_ns"), e.get("tamano")] for n, e in manifiesto["series"].items()}
+    avance = {} if forzar else leer_avance("agregar")
+    pendientes = [n for n in firmas if avance.get(n) != firmas[n]]
+    log.info("agregar: %d de %d series pendientes", len(pendientes), len(firmas))
+
+    previo = leer_tabla(MENSUAL_PATH)
+    if previo is not None:
+        previo = previo.assign(_serie=previo["Etiqueta"] + "@" + previo["Codigo"])
+    nuevos = {}
+
+    def al_terminar(nombre, df):
+        nuevos[nombre] = df
+
+    def al_guardar():
+        tabla = _combinar(previo, "_serie", [n for n in firmas if n not in nuevos],
+                          [df.assign(_serie=n) for n, df in nuevos.items()])
+        if tabla is not None:
+            guardar_tabla(tabla.drop(columns="_serie"), MENSUAL_PATH)
+        guardar_avance("agregar", {n: firmas[n] for n in firmas if n not in pendientes or n in nuevos})
+
+    return _ejecutar(_agregar_serie, pendientes, procesos, al_terminar, lote, al_guardar)
+
+
+# --- consolidar ---
+def _escritor(salida, esquema):
+    import pyarrow as pa
+
+    sufijo = salida.suffix.lower()
+    if sufijo == ".csv":
+        import pyarrow.csv as pacsv
+        return pacsv.CSVWriter(str(salida), esquema)
+    if sufijo == ".parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(str(salida), esquema)
+    if sufijo in (".arrow", ".feather"):
+        return pa.ipc.new_file(str(salida), esquema)
+    raise ValueError(f"Formato de salida no soportado: {sufijo} (use .csv, .parquet o .arrow)")
+
+
+def consolidar(salida, etiquetas=None, codigos=None, departamentos=None, desde=None, hasta=None,
+               metadatos=False, directorio=DATA_HIDRO):
+    """Escribe las series seleccionadas en un solo archivo, serie por serie. Devuelve las filas escritas"""
+    import pyarrow as pa
+
+    from cattleclimate.consulta import COLUMNAS_CLAVE, COLUMNAS_META, COLUMNAS_SERIE, consultar_por_serie
+
+    columnas = COLUMNAS_SERIE + COLUMNAS_CLAVE + (COLUMNAS_META if metadatos else [])
+    series = consultar_por_serie(etiquetas, codigos, departamentos, desde=desde, hasta=hasta,
+                                 columnas=columnas, directorio=directorio)
+    escritor = None
+    filas = 0
+    salida = Path(salida)
+    # Temporal con la misma extensión (de ella depende el formato) hasta terminar de escribir
+    temporal = salida.with_name(f".{salida.stem}.tmp{salida.suffix}")
+    try:
+        try:
+            for tabla in series:
+                # Texto plano en lugar de diccionarios: todos los formatos lo admiten
+                tabla = tabla.cast(pa.schema([
+                    tabla.schema.field(c).with_type(pa.string()) if c not in COLUMNAS_SERIE else tabla.schema.field(c)
+                    for c in columnas
+                ]))
+                if escritor is None:
+                    escritor = _escritor(temporal, tabla.schema)
+                escritor.write_table(tabla)
+                filas += tabla.num_rows
+        finally:
+            if escritor is not None:
+                escritor.close()
+        if escritor is not None:
+            os.replace(temporal, salida)
+    finally:
+        # Si algo falló a mitad de camino no queda un archivo parcial
+        temporal.unlink(missing_ok=True)
+    return filas
+
+
+# --- imputar ---
+def imputar(etiquetas=None, k=None, radio_km=None, r_min=None):
+    """Rellena huecos desde estaciones vecinas y guarda las series en la caché. Devuelve las variables fallidas"""
+    from cattleclimate import vecinos
+
+    k = vecinos.K_VECINOS if k is None else k
+    radio_km = vecinos.RADIO_KM if radio_km is None else radio_km
+    r_min = vecinos.R_MIN if r_min is None else r_min
+
+    etiquetas = etiquetas or vecinos.variables_imputables()
+    fallidas, tablas = [], []
+    for etiqueta in etiquetas:
+        try:
+            series = vecinos.imputar(etiqueta, k, r_min, radio_km)
+            tablas.append(vecinos.tabla_vecinos(etiqueta, k, r_min, radio_km).assign(Etiqueta=etiqueta))
+        except (ValueError, OSError) as e:
+            log.error("imputar %s: %s", etiqueta, e)
+            fallidas.append(etiqueta)
+            continue
+        for nombre, df in series.items():
+            guardar_tabla(df, IMPUTADAS_DIR / f"{nombre}.arrow")
+        rellenas = sum(int(df["Relleno"].sum()) for df in series.values())
+        log.info("imputar %s: %d estaciones, %d celdas rellenadas", etiqueta, len(series), rellenas)
+    if tablas:
+        guardar_tabla(pd.concat(tablas, ignore_index=True), VECINOS_PATH)
+    return fallidas
+
+
+# --- reconstruir ---
+def reconstruir(codigos=None):
+    """Calibra el modelo diurno y reconstruye las series horarias. Devuelve las estaciones fallidas"""
+    from cattleclimate import diurno
+
+    parametros = diurno.calibracion()
+    log.info("reconstruir: calibración con %d días, RMSE %.2f °C (Parton-Logan sin calibrar: %.2f °C)",
+             parametros["dias"], parametros.get("rmse_t", float("nan")), parametros.get("rmse_t_defecto", float("nan")))
+    fallidas = []
+    for codigo in codigos or diurno.estaciones_reconstruibles():
+        try:
+            df = diurno.reconstruir(codigo)
+        except (ValueError, OSError) as e:
+            log.error("reconstruir %s: %s", codigo, e)
+            fallidas.append(codigo)
+            continue
+        log.info("reconstruir %s: %d horas, %d con ITH >= %d", codigo, len(df),
+                 int((df["ITH"] >= UMBRALES_ITH[0]).sum()), UMBRALES_ITH[0])
+    return fallidas
+
+
+# --- pronosticar ---
+def pronosticar(horas=None, codigos=None, salida=None):
+    """Pronóstico de ITH de las estaciones; devuelve el número de filas"""
+    from cattleclimate.pronostico import HORIZONTE_MAX, pronosticar_corpus
+
+    horas = HORIZONTE_MAX if horas is None else horas
+
+    df = pronosticar_corpus(horas, codigos=codigos)
+    if df.empty:
+        return 0
+    for codigo, grupo in df.groupby("Codigo"):
+        log.info("pronosticar %s: desde %s, ITH máximo %.1f", codigo, grupo["Fecha"].iloc[0], grupo["Pronostico"].max())
+    if salida:
+        escribir(df, salida, "Pronóstico de ITH")
+    return len(df)
+
+
+# --- graficar ---
+def graficar(etiqueta, salida, formato="png", codigos=None, procesos=None):
+    """Una gráfica por estación de la variable, generadas en paralelo; devuelve cuántas se escribieron"""
+    from cattleclimate.graficos import detener, graficas_por_estacion
+
+    try:
+        imagenes = graficas_por_estacion(etiqueta, codigos, formato, procesos)
+    finally:
+        detener()
+    salida = Path(salida)
+    salida.mkdir(parents=True, exist_ok=True)
+    for codigo, contenido in imagenes.items():
+        (salida / f"{etiqueta}@{codigo}.{formato}").write_bytes(contenido)
+    log.info("graficar %s: %d gráficas en %s", etiqueta, len(imagenes), salida)
+    return len(imagenes)
+
+
+# --- cubos ---
+def construir_cubos(etiquetas=None):
+    """Cubos hora × día del año de las series; devuelve las que fallaron"""
+    from cattleclimate.cubos import ETIQUETAS_CUBOS, construir_corpus
+
+    fallidas = construir_corpus(etiquetas or ETIQUETAS_CUBOS)
+    for nombre in fallidas:
+        log.error("cubos %s: sin datos", nombre)
+    return fallidas
+
+
+# --- exportar ---
+def leer_entrada(entrada):
+    """DataFrame desde una tabla de la caché por nombre o desde un archivo .csv/.parquet/.arrow"""
+    if entrada in TABLAS_CACHE:
+        return leer_tabla(TABLAS_CACHE[entrada])
+    ruta = Path(entrada)
+    sufijo = ruta.suffix.lower()
+    if sufijo == ".csv":
+        return pd.read_csv(ruta)
+    if sufijo == ".parquet":
+        return pd.read_parquet(ruta)
+    if sufijo in (".arrow", ".feather"):
+        return pd.read_feather(ruta)
+    raise ValueError(f"Entrada no reconocida: {entrada}")
+
+
+def exportar(entrada, salida):
+    """Convierte la entrada al formato de la salida (.csv, .xlsx, .pdf, .json o .parquet)"""
+    df = leer_entrada(entrada)
+    if df is None or df.empty:
+        return 0
+    return escribir(df, salida, Path(str(entrada)).name)
+
+
+def escribir(df, salida, titulo):
+    """Escribe el DataFrame en el formato de la salida y devuelve el número de filas"""
+    from cattleclimate.exportar import a_excel, generar_pdf
+
+    salida = Path(salida)
+    sufijo = salida.suffix.lower()
+    if sufijo == ".csv":
+        df.to_csv(salida, index=False, encoding="utf-8-sig")
+    elif sufijo == ".xlsx":
+        salida.write_bytes(a_excel(df))
+    elif sufijo == ".pdf":
+        salida.write_bytes(generar_pdf(df, titulo))
+    elif sufijo == ".json":
+        df.to_json(salida, orient="records", indent=2, date_format="iso", force_ascii=False)
+    elif sufijo == ".parquet":
+        df.to_parquet(salida, index=False)
+    else:
+        raise ValueError(f"Formato de salida no soportado: {sufijo}")
+    return len(df)
+
+
+# --- Interfaz ---
+def _crear_parser():
+    parser = argparse.ArgumentParser(prog="python -m cattleclimate", description=__doc__.splitlines()[0])
+    parser.add_argument("-v", "--verboso", action="store_true", help="muestra también mensajes de depuración")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    def paralelo(p, lote):
+        p.add_argument("--procesos", type=int, default=os.cpu_count(), help="procesos de trabajo")
+        p.add_argument("--forzar", action="store_true", help="recalcula aunque no haya cambios")
+        p.add_argument("--lote", type=int, default=lote, help="elementos entre puntos de control")
+
+    paralelo(sub.add_parser("ingerir", aliases=["ingest"], help="lee los .data a la caché de series"), 25)
+    paralelo(sub.add_parser("indices", aliases=["compute-indices"], help="ITH, episodios, ITGH y CTR por estación"), 5)
+    p = sub.add_parser("agregar", aliases=["aggregate"], help="agregados mensuales por serie")
+    paralelo(p, 25)
+    p.add_argument("--salida", type=Path, default=None, help="además exporta la tabla (.csv, .xlsx, .json, .parquet)")
+    paralelo(sub.add_parser("todo", aliases=["all"], help="ingerir, indices y agregar"), 25)
+
+    p = sub.add_parser("consolidar", aliases=["consolidate"], help="series seleccionadas en un solo archivo")
+    p.add_argument("--salida", type=Path, required=True, help=".csv, .parquet o .arrow")
+    p.add_argument("--etiquetas", nargs="+")
+    p.add_argument("--codigos", nargs="+")
+    p.add_argument("--departamentos", nargs="+")
+    p.add_argument("--desde")
+    p.add_argument("--hasta")
+    p.add_argument("--metadatos", action="store_true", help="agrega nombre, departamento y municipio")
+
+    p = sub.add_parser("dataset", aliases=["partition"], help="Parquet particionado por variable, estación y año")
+    p.add_argument("--forzar", action="store_true", help="reescribe todas las series")
+    p.add_argument("--compactar", action="store_true", help="une los archivos anexados de cada partición")
+
+    p = sub.add_parser("imputar", aliases=["impute"], help="rellena huecos desde estaciones vecinas correlacionadas")
+    p.add_argument("--etiquetas", nargs="+", help="por defecto, todas las variables con dos o más estaciones")
+    p.add_argument("--vecinos", type=int, help="vecinas por estación")
+    p.add_argument("--radio-km", type=float, help="distancia máxima a una vecina")
+    p.add_argument("--r-min", type=float, help="correlación mínima de una vecina")
+
+    p = sub.add_parser("reconstruir", aliases=["reconstruct"], help="temperatura y humedad horarias desde extremos diarios")
+    p.add_argument("--codigos", nargs="+", help="por defecto, todas las estaciones con máximas y mínimas diarias")
+
+    p = sub.add_parser("pronosticar", aliases=["forecast"], help="ITH de las próximas horas por estación")
+    p.add_argument("--horas", type=int, help="horizonte desde la última observación")
+    p.add_argument("--codigos", nargs="+", help="por defecto, todas las estaciones con ITH horario")
+    p.add_argument("--salida", type=Path, default=None, help=".csv, .xlsx, .json o .parquet")
+
+    p = sub.add_parser("graficar", aliases=["render"], help="una gráfica por estación para reportes")
+    p.add_argument("etiqueta")
+    p.add_argument("--salida", type=Path, required=True, help="carpeta de destino")
+    p.add_argument("--formato", choices=("png", "svg", "html"), default="png")
+    p.add_argument("--codigos", nargs="+")
+    p.add_argument("--procesos", type=int, default=os.cpu_count(), help="procesos de renderizado")
+
+    p = sub.add_parser("cubos", aliases=["cubes"], help="cubos hora del día × día del año para mapas de calor")
+    p.add_argument("--etiquetas", nargs="+", help="por defecto, ITH medido y reconstruido, TA2 y HRA2")
+
+    p = sub.add_parser("exportar", aliases=["export"], help="convierte una tabla a CSV, Excel, PDF o JSON")
+    p.add_argument("entrada", help=f"archivo .csv/.parquet/.arrow o tabla de la caché: {', '.join(TABLAS_CACHE)}")
+    p.add_argument("salida", type=Path)
+    return parser
+
+
+ALIAS = {"ingest": "ingerir", "compute-indices": "indices", "aggregate": "agregar", "all": "todo",
+         "consolidate": "consolidar", "export": "exportar", "partition": "dataset", "impute": "imputar",
+         "reconstruct": "reconstruir", "forecast": "pronosticar",
+         "render": "graficar", "cubes": "cubos"}
+
+
+def validar(args):
+    """Mensaje de error si los argumentos no son válidos (antes de tocar los datos); None si lo son"""
+    comando = ALIAS.get(args.comando, args.comando)
+    for opcion in ("procesos", "lote", "horas", "vecinos"):
+        valor = getattr(args, opcion, None)
+        if valor is not None and valor < 1:
+            return f"--{opcion} debe ser mayor que cero"
+    if comando == "pronosticar":
+        from cattleclimate.pronostico import HORIZONTE_MAX
+        if args.horas is not None and args.horas > HORIZONTE_MAX:
+            return f"--horas no puede pasar de {HORIZONTE_MAX}"
+    if getattr(args, "radio_km", None) is not None and args.radio_km <= 0:
+        return "--radio-km debe ser mayor que cero"
+    if getattr(args, "r_min", None) is not None and not -1 <= args.r_min <= 1:
+        return "--r-min debe estar entre -1 y 1"
+    if comando == "consolidar":
+        if args.salida.suffix.lower() not in FORMATOS_CONSOLIDAR:
+            return f"Formato de salida no soportado: {args.salida.suffix} (use {', '.join(FORMATOS_CONSOLIDAR)})"
+        fechas = {}
+        for opcion in ("desde", "hasta"):
+            valor = getattr(args, opcion)
+            try:
+                fechas[opcion] = None if valor is None else pd.Timestamp(valor)
+            except ValueError:
+                return f"--{opcion} no es una fecha válida: {valor}"
+        if fechas["desde"] is not None and fechas["hasta"] is not None and fechas["desde"] > fechas["hasta"]:
+            return "--desde es posterior a --hasta"
+    salida = getattr(args, "salida", None)
+    if comando in ("agregar", "pronosticar", "exportar") and salida is not None \
+            and salida.suffix.lower() not in FORMATOS_SALIDA:
+        return f"Formato de salida no soportado: {salida.suffix} (use {', '.join(FORMATOS_SALIDA)})"
+    if comando == "exportar" and args.entrada not in TABLAS_CACHE:
+        entrada = Path(args.entrada)
+        if entrada.suffix.lower() not in FORMATOS_ENTRADA:
+            return f"Entrada no reconocida: {args.entrada}"
+        if not entrada.is_file():
+            return f"No existe la entrada: {args.entrada}"
+    return None
+
+
+def _codigo(fallidos):
+    return SALIDA_FALLOS if fallidos else SALIDA_OK
+
+
+def ejecutar(args):
+    """Ejecuta el subcomando y devuelve el código de salida"""
+    comando = ALIAS.get(args.comando, args.comando)
+    if comando == "ingerir":
+        return _codigo(ingerir(procesos=args.procesos, forzar=args.forzar, lote=args.lote))
+    if comando == "indices":
+        return _codigo(calcular_indices_corpus(procesos=args.procesos, forzar=args.forzar, lote=args.lote))
+    if comando == "agregar":
+        codigo = _codigo(agregar(procesos=args.procesos, forzar=args.forzar, lote=args.lote))
+        if args.salida:
+            exportar("mensual", args.salida)
+        return codigo
+    if comando == "todo":
+        fallidos = ingerir(procesos=args.procesos, forzar=args.forzar, lote=args.lote)
+        fallidos += calcular_indices_corpus(procesos=args.procesos, forzar=args.forzar, lote=args.lote)
+        fallidos += agregar(procesos=args.procesos, forzar=args.forzar, lote=args.lote)
+        return _codigo(fallidos)
+    if comando == "consolidar":
+        filas = consolidar(args.salida, args.etiquetas, args.codigos, args.departamentos,
+                           args.desde, args.hasta, args.metadatos)
+        log.info("consolidar: %d filas en %s", filas, args.salida)
+        return SALIDA_OK if filas else SALIDA_SIN_DATOS
+    if comando == "dataset":
+        from cattleclimate.dataset import compactar, sincronizar
+        cambios = sincronizar(forzar=args.forzar)
+        log.info("dataset: %d series actualizadas", len(cambios))
+        if args.compactar:
+            log.info("dataset: %d particiones compactadas", compactar())
+        return SALIDA_OK
+    if comando == "imputar":
+        return _codigo(imputar(args.etiquetas, args.vecinos, args.radio_km, args.r_min))
+    if comando == "reconstruir":
+        return _codigo(reconstruir(args.codigos))
+    if comando == "pronosticar":
+        return SALIDA_OK if pronosticar(args.horas, args.codigos, args.salida) else SALIDA_SIN_DATOS
+    if comando == "graficar":
+        try:
+            escritas = graficar(args.etiqueta, args.salida, args.formato, args.codigos, args.procesos)
+        except RuntimeError as e:
+            log.error("graficar: %s", e)
+            return SALIDA_FALLOS
+        return SALIDA_OK if escritas else SALIDA_SIN_DATOS
+    if comando == "cubos":
+        return _codigo(construir_cubos(args.etiquetas))
+    if comando == "exportar":
+        filas = exportar(args.entrada, args.salida)
+        log.info("exportar: %d filas en %s", filas, args.salida)
+        return SALIDA_OK if filas else SALIDA_SIN_DATOS
+    return SALIDA_USO
+
+
+def main(argv=None):
+    parser = _crear_parser()
+    args = parser.parse_args(argv)
+    error = validar(args)
+    if error:
+        parser.error(error)  # sale con SALIDA_USO
+    logging.basicConfig(
+        level=logging.DEBUG if args.verboso else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
+    try:
+        codigo = ejecutar(args)
+    except KeyboardInterrupt:
+        log.warning("Interrumpido; el avance quedó guardado")
+        codigo = SALIDA_INTERRUMPIDO
+    except (ValueError, OSError) as e:
+        # Los argumentos ya se validaron: esto es un fallo al leer o escribir los datos
+        log.error("%s", e)
+        codigo = SALIDA_ERROR
+    sys.exit(codigo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# cattleclimate/compacto.py
+"""Representación compacta de series: cadencia regular en lugar de una fecha por fila.
+
+Casi todas las series son horarias, sexhorarias o diarias con huecos. En vez de
+8 bytes de fecha por observación, los tiempos se describen con el inicio, el
+paso (el intervalo más frecuente) y los tramos consecutivos sobre esa rejilla;
+las pocas observaciones fuera de la rejilla van en una lista de excepciones. Si
+así no se ahorra (p. ej. series mensuales, con meses de largo variable) se
+guardan desfases int32 desde el inicio en la unidad más gruesa que los
+represente exactamente (hora, minuto o segundo).
+
+Los valores se guardan como int16 escalados (valor = entero / factor) cuando
+todos tienen a lo sumo `MAX_DECIMALES` decimales y caben en int16, que es lo que
+ocurre con las lecturas de instrumento (0.1 °C, 1 %); si no, como float32, que
+conserva siete cifras significativas. El glosario no trae la precisión de cada
+variable, así que se detecta en los propios datos.
+
+En disco (`cache/series/*.arrow`) la columna `Valor` (y `Desfase` sin rejilla)
+se guarda como Arrow IPC y se puede mapear en memoria; el inicio, el paso, los
+tramos y las excepciones van en los metadatos del esquema. La expansión a
+datetime64/float64 se hace solo al final y solo de la ventana pedida: `rango`
+ubica sus posiciones con búsqueda binaria sobre la forma compacta.
+
+    from cattleclimate.compacto import a_serie, compactar, nbytes
+    c = compactar(tiempos_ns(serie.index), serie.to_numpy())
+    nbytes(c)                          # ~2-3 bytes por observación en lugar de 16
+    a_serie(c, "TA2_AUT_60@25025280")  # pd.Series float64 con DatetimeIndex
+    expandir(c, *rango(c, inicio_ns, fin_ns))  # solo las observaciones de la ventana
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from cattleclimate.datos import indice_desde_ns, tiempos_ns
+
+VERSION = 1
+MAX_DECIMALES = 3
+# Unidades de los desfases, de la más gruesa a la más fina: hora, minuto, segundo, ns
+UNIDADES_NS = (3_600 * 10**9, 60 * 10**9, 10**9, 1)
+_TOLERANCIA = 1e-6
+_INT16 = np.iinfo(np.int16).max
+_INT32 = np.iinfo(np.int32).max
+
+
+# --- Valores ---
+def decimales(valores, maximo=MAX_DECIMALES):
+    """Menor número de decimales que representa todos los valores (None si hacen falta más de `maximo`)"""
+    for d in range(maximo + 1):
+        escalados = valores * 10.0**d
+        if np.all(np.abs(escalados - np.rint(escalados)) < _TOLERANCIA):
+            return d
+    return None
+
+
+def codificar_valores(valores):
+    """(array, factor): int16 con valor = entero / factor, o float32 con factor None"""
+    valores = np.asarray(valores, dtype="float64")
+    d = decimales(valores)
+    if d is not None and (not len(valores) or np.abs(valores).max() * 10**d <= _INT16):
+        return np.rint(valores * 10**d).astype(np.int16), 10**d
+    return valores.astype(np.float32), None
+
+
+def expandir_valores(codificados, factor):
+    """Valores float64; dividir entre una potencia de 10 devuelve exactamente el valor leído del texto"""
+    if factor is None:
+        return np.asarray(codificados, dtype="float64")
+    return codificados / float(factor)
+
+
+# --- Tiempos ---
+def _entero(desfases):
+    return desfases.astype(np.int32) if not len(desfases) or desfases.max() <= _INT32 else desfases
+
+
+def codificar_tiempos(tiempos):
+    """Codificación más pequeña de tiempos int64 (ns) ordenados.
+
+    Con rejilla (`paso` > 0): `tramos` (inicio en pasos, largo) de las
+    observaciones sobre la rejilla y, para las demás, sus `excepciones`
+    (posiciones) y `desfases`. Sin rejilla (`paso` == 0): `desfases` de todas.
+    """
+    tiempos = np.asarray(tiempos, dtype="int64")
+    inicio = int(tiempos[0]) if len(tiempos) else 0
+    desfases = tiempos - inicio
+    unidad = next(u for u in UNIDADES_NS if not np.any(desfases % u))
+    sin_rejilla = {"inicio": inicio, "unidad": unidad, "paso": 0, "desfases": _entero(desfases // unidad)}
+    diferencias = np.diff(tiempos)
+    diferencias = diferencias[diferencias > 0]
+    if not len(diferencias):
+        return sin_rejilla
+
+    pasos, conteos = np.unique(diferencias, return_counts=True)
+    paso = int(pasos[conteos.argmax()])
+    en_rejilla = desfases % paso == 0
+    k = desfases[en_rejilla] // paso
+    if k[-1] > _INT32:
+        return sin_rejilla
+    cortes = np.flatnonzero(np.diff(k) != 1) + 1
+    tramos = np.column_stack([k[np.r_[0, cortes]], np.diff(np.r_[0, cortes, len(k)])]).astype(np.int32)
+    excepciones = np.flatnonzero(~en_rejilla).astype(np.int32)
+    regular = {
+        "inicio": inicio, "unidad": unidad, "paso": paso, "tramos": tramos,
+        "excepciones": excepciones, "desfases": _entero(desfases[~en_rejilla] // unidad),
+    }
+    bytes_regular = tramos.nbytes + excepciones.nbytes + regular["desfases"].nbytes
+    return regular if bytes_regular < sin_rejilla["desfases"].nbytes else sin_rejilla
+
+
+def expandir_tiempos(codigo, n, desde=0, hasta=None):
+    """Tiempos int64 (ns) de las observaciones `desde`:`hasta` (todas por omisión) de las `n` codificadas"""
+    hasta = n if hasta is None else hasta
+    inicio, unidad = codigo["inicio"], codigo["unidad"]
+    if not codigo["paso"]:
+        return inicio + codigo["desfases"][desde:hasta].astype("int64") * unidad
+    excepciones = codigo["excepciones"]
+    e_desde, e_hasta = (int(i) for i in np.searchsorted(excepciones, [desde, hasta]))
+    tiempos = np.empty(hasta - desde, dtype="int64")
+    fuera = np.zeros(hasta - desde, dtype=bool)
+    fuera[excepciones[e_desde:e_hasta] - desde] = True
+    # Observaciones sobre la rejilla de la ventana: de la g_desde a la g_hasta (sin contar excepciones)
+    g_desde, g_hasta = desde - e_desde, hasta - e_hasta
+    primeros, largos = codigo["tramos"][:, 0].astype("int64"), codigo["tramos"][:, 1].astype("int64")
+    finales = np.cumsum(largos)
+    a = int(np.searchsorted(finales, g_desde, "right"))
+    b = max(int(np.searchsorted(finales - largos, g_hasta, "left")), a)
+    primeros, largos = primeros[a:b], largos[a:b]
+    # Paso k de cada observación: posición dentro del tramo + paso inicial del tramo
+    k = np.arange(largos.sum()) + np.repeat(primeros - (np.cumsum(largos) - largos), largos)
+    desplazamiento = g_desde - (int(finales[a - 1]) if a else 0)
+    tiempos[~fuera] = inicio + k[desplazamiento:desplazamiento + g_hasta - g_desde] * codigo["paso"]
+    tiempos[fuera] = inicio + codigo["desfases"][e_desde:e_hasta].astype("int64") * unidad
+    return tiempos
+
+
+def _menores(ordenados, limite):
+    """Cantidad de elementos de un array entero ordenado menores que `limite` (int de Python)"""
+    info = np.iinfo(ordenados.dtype)
+    if limite > info.max:
+        return len(ordenados)
+    return int(np.searchsorted(ordenados, max(limite, info.min), "left"))
+
+
+def _anteriores(codigo, t):
+    """Cantidad de observaciones con tiempo menor que `t` (ns), sin expandir los tiempos"""
+    desfase = t - codigo["inicio"]
+    fuera = _menores(codigo["desfases"], -(-desfase // codigo["unidad"]))
+    if not codigo["paso"]:
+        return fuera
+    # En cada tramo, las observaciones con paso menor que el primero que alcanza `t`
+    limite = -(-desfase // codigo["paso"])
+    primeros, largos = codigo["tramos"][:, 0].astype("int64"), codigo["tramos"][:, 1].astype("int64")
+    return int(np.clip(limite - primeros, 0, largos).sum()) + fuera
+
+
+# --- Serie compacta ---
+def compactar(tiempos, valores):
+    """Serie compacta (dict) de tiempos int64 (ns) ordenados y sus valores"""
+    codificados, factor = codificar_valores(valores)
+    return {"n": len(codificados), "tiempos": codificar_tiempos(tiempos), "valores": codificados, "factor": factor}
+
+
+def desde_serie(serie):
+    """Serie compacta de una serie pandas indexada por fecha"""
+    return compactar(tiempos_ns(serie.index), serie.to_numpy(dtype="float64"))
+
+
+def rango(compacta, inicio=None, fin=None):
+    """(desde, hasta): posiciones de las observaciones entre `inicio` y `fin` (ns, ambos incluidos)"""
+    desde = _anteriores(compacta["tiempos"], int(inicio)) if inicio is not None else 0
+    hasta = _anteriores(compacta["tiempos"], int(fin) + 1) if fin is not None else compacta["n"]
+    return desde, max(hasta, desde)
+
+
+def expandir(compacta, desde=0, hasta=None):
+    """(tiempos int64 ns, valores float64) de una serie compacta, o solo de las observaciones `desde`:`hasta`"""
+    return (
+        expandir_tiempos(compacta["tiempos"], compacta["n"], desde, hasta),
+        expandir_valores(compacta["valores"][desde:hasta], compacta["factor"]),
+    )
+
+
+def a_serie(compacta, nombre=None):
+    """pd.Series float64 indexada por Fecha (datetime64[ns])"""
+    tiempos, valores = expandir(compacta)
+    return pd.Series(valores, index=indice_desde_ns(tiempos), name=nombre)
+
+
+def nbytes(compacta):
+    """Bytes de los arrays de la serie compacta"""
+    arrays = [compacta["valores"]] + [v for v in compacta["tiempos"].values() if isinstance(v, np.ndarray)]
+    return sum(a.nbytes for a in arrays)
+
+
+# --- Disco ---
+def guardar(compacta, ruta):
+    """Guarda la serie compacta como Arrow IPC sin compresión, de forma atómica"""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    codigo = compacta["tiempos"]
+    columnas = {"Valor": compacta["valores"]}
+    meta = {k: codigo[k] for k in ("inicio", "unidad", "paso")}
+    meta.update(version=VERSION, n=compacta["n"], factor=compacta["factor"])
+    arrays = {}
+    if codigo["paso"]:
+        # Arrays de la rejilla: pocos elementos, como bytes en los metadatos del esquema
+        meta["desfases_dtype"] = codigo["desfases"].dtype.str
+        arrays = {
+            b"tramos": codigo["tramos"].tobytes(), b"excepciones": codigo["excepciones"].tobytes(),
+            b"desfases": codigo["desfases"].tobytes(),
+        }
+    else:
+        columnas["Desfase"] = codigo["desfases"]
+    tabla = pa.table(columnas).replace_schema_metadata({b"compacto": json.dumps(meta).encode(), **arrays})
+    temporal = ruta.with_suffix(".tmp")
+    with pa.OSFile(str(temporal), "wb") as f, pa.ipc.new_file(f, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    os.replace(temporal, ruta)
+
+
+def leer(ruta, mapear=False):
+    """Serie compacta guardada con `guardar` (None si no existe).
+
+    Con `mapear` los valores quedan sobre el archivo mapeado en memoria, sin
+    copiarlos. Las tablas Fecha/Valor de versiones anteriores se compactan al leerlas.
+    """
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return None
+    if mapear:
+        # El mapeo sigue abierto mientras haya buffers que lo referencian
+        tabla = pa.ipc.open_file(pa.memory_map(str(ruta), "r")).read_all()
+    else:
+        with pa.OSFile(str(ruta), "rb") as f:
+            tabla = pa.ipc.open_file(f).read_all()
+    metadatos = tabla.schema.metadata or {}
+    if b"compacto" not in metadatos:
+        fechas = tabla.column("Fecha").to_numpy()
+        return compactar(tiempos_ns(fechas), tabla.column("Valor").to_numpy())
+
+    meta = json.loads(metadatos[b"compacto"])
+    codigo = {k: meta[k] for k in ("inicio", "unidad", "paso")}
+    if meta["paso"]:
+        codigo["tramos"] = np.frombuffer(metadatos[b"tramos"], dtype=np.int32).reshape(-1, 2)
+        codigo["excepciones"] = np.frombuffer(metadatos[b"excepciones"], dtype=np.int32)
+        codigo["desfases"] = np.frombuffer(metadatos[b"desfases"], dtype=meta["desfases_dtype"])
+    else:
+        codigo["desfases"] = tabla.column("Desfase").to_numpy()
+    return {"n": meta["n"], "tiempos": codigo, "valores": tabla.column("Valor").to_numpy(), "factor": meta["factor"]}
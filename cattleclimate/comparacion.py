@@ -0,0 +1,71 @@
+# cattleclimate/comparacion.py
+"""Comparación de varias series (estaciones o variables) sobre un eje de tiempo común.
+
+Las series se llevan a una sola matriz float32 serie × celda con
+`vecinos.matriz_estaciones` (un bincount para todas) y se reducen juntas al
+ancho de la gráfica: cada columna de píxeles conserva el mínimo y el máximo de
+cada serie (`reducir`), de modo que picos y huecos se ven igual que con todos los
+puntos y el costo de dibujar 20 series es el de unos pocos miles de puntos.
+
+    from cattleclimate.comparacion import comparar
+    nombres, tiempos, valores = comparar(corpus, ["TA2_AUT_60@25025240", "TA2_AUT_60@25025280"])
+"""
+import numpy as np
+import pandas as pd
+
+from cattleclimate.diagnostico import etapa
+from cattleclimate.remuestreo import frecuencia_nativa
+from cattleclimate.vecinos import matriz_estaciones
+
+ANCHO = 1200  # columnas de píxeles de la gráfica
+MAX_SERIES = 20
+
+
+def frecuencia_comun(nombres):
+    """La frecuencia nativa más gruesa de las series (diaria si alguna es diaria o mensual)"""
+    frecuencias = {frecuencia_nativa(n.split("@")[0]) for n in nombres}
+    return "1h" if frecuencias == {"1h"} else "1D"
+
+
+def alinear(corpus, nombres, inicio=None, fin=None, frecuencia=None):
+    """Nombres con datos, tiempos (ns) y matriz float32 serie × celda de las series `ETIQUETA@CODIGO`"""
+    series = {}
+    for nombre in nombres:
+        tabla = corpus.tabla(nombre, inicio, fin)
+        # De la forma compacta compartida solo se expande la ventana pedida
+        series[nombre] = pd.Series(
+            tabla.column("Valor").to_numpy(), index=pd.DatetimeIndex(tabla.column("Fecha").to_numpy())
+        ).dropna()
+    return matriz_estaciones(series, frecuencia or frecuencia_comun(nombres))
+
+
+def reducir(tiempos, valores, ancho=ANCHO):
+    """Mínimo y máximo de cada serie por columna de píxeles, con un eje común.
+
+    Devuelve (tiempos, valores) con dos celdas por columna: la primera y la última
+    de la columna, con el mínimo y el máximo de cada serie; sin reducir si ya caben.
+    """
+    if len(tiempos) <= 2 * ancho:
+        return tiempos, valores
+    columna = (tiempos - tiempos[0]) * ancho // (tiempos[-1] - tiempos[0] + 1)
+    inicios = np.flatnonzero(np.diff(columna, prepend=-1))
+    finales = np.append(inicios[1:], len(tiempos)) - 1
+    with np.errstate(invalid="ignore"):
+        minimos = np.fmin.reduceat(valores, inicios, axis=1)
+        maximos = np.fmax.reduceat(valores, inicios, axis=1)
+    salida = np.empty((valores.shape[0], 2 * len(inicios)), dtype=valores.dtype)
+    salida[:, 0::2], salida[:, 1::2] = minimos, maximos
+    ejes = np.empty(2 * len(inicios), dtype=tiempos.dtype)
+    ejes[0::2], ejes[1::2] = tiempos[inicios], tiempos[finales]
+    return ejes, salida
+
+
+def comparar(corpus, nombres, inicio=None, fin=None, ancho=ANCHO, frecuencia=None):
+    """Series alineadas y reducidas al ancho: (nombres, tiempos datetime64, matriz serie × punto)"""
+    if len(nombres) > MAX_SERIES:
+        raise ValueError(f"Se pueden comparar hasta {MAX_SERIES} series a la vez")
+    with etapa("comparar", series=len(nombres)) as reg:
+        nombres, tiempos, valores = alinear(corpus, nombres, inicio, fin, frecuencia)
+        tiempos, valores = reducir(tiempos, valores, ancho)
+        reg["filas"] = valores.size
+    return nombres, tiempos.astype("datetime64[ns]"), valores
@@ -0,0 +1,210 @@
+# cattleclimate/compartido.py
+"""Capa de datos compartida y de solo lectura para todas las sesiones de Streamlit.
+
+Un único `CorpusCompartido` por proceso (servido con `st.cache_resource`) guarda
+las series en forma compacta (`cattleclimate.compacto`: inicio, paso y tramos en
+lugar de una fecha por fila, valores int16 o float32). Si el trabajador de
+precálculo ya generó la caché, los valores se mapean en memoria desde
+`cache/series/*.arrow`; si no, se leen una sola vez del archivo .data. Lo único
+compartido es esa forma compacta: cada pedido de `tabla` expande a Arrow (Fecha,
+Valor) solo la ventana de fechas pedida, ubicada con búsqueda binaria sobre la
+forma compacta, y esa copia es de quien la pidió.
+
+Cada sesión trabaja con "vistas": las ventanas expandidas de las series
+seleccionadas, unidas con `pa.concat_tables` (que no vuelve a copiarlas) y que
+solo se convierten a pandas en la parte que realmente se muestra o descarga. Los
+metadatos del glosario y del CNE se unen a esas filas al final, en lugar de
+repetirse en cada registro del corpus.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from cattleclimate.almacen import leer_manifiesto, ruta_serie, serie_vigente
+from cattleclimate.compacto import a_serie, desde_serie, expandir, leer, nbytes, rango
+from cattleclimate.datos import (
+    DATA_HIDRO, cargar_cne, cargar_glosario, leer_serie, listar_archivos, separar_nombre
+)
+from cattleclimate.diagnostico import etapa, registrar_cache
+
+ESQUEMA_SERIE = pa.schema([("Fecha", pa.timestamp("us")), ("Valor", pa.float64())])
+ESQUEMA_VISTA = ESQUEMA_SERIE.append(
+    pa.field("Etiqueta", pa.dictionary(pa.int32(), pa.string()))
+).append(
+    pa.field("Codigo", pa.dictionary(pa.int32(), pa.string()))
+)
+
+
+class CorpusCompartido:
+    """Series del corpus en tablas Arrow de solo lectura, compartidas entre sesiones"""
+
+    def __init__(self, directorio=DATA_HIDRO):
+        self.directorio = directorio
+        self.manifiesto = leer_manifiesto()
+        self.catalogo = pd.DataFrame(
+            [(r.name, *separar_nombre(r)) for r in listar_archivos(directorio)],
+            columns=["Archivo", "Etiqueta", "Codigo"]
+        )
+        self._compactas = {}
+        self._ceros = pa.array(np.zeros(0, dtype=np.int32))
+        self._glosario = None
+        self._cne = None
+        self._candado = threading.Lock()
+
+    # --- Dimensiones (pequeñas, una sola copia por proceso) ---
+    @property
+    def glosario(self):
+        with self._candado:
+            if self._glosario is None:
+                self._glosario = cargar_glosario()
+            return self._glosario
+
+    @property
+    def cne(self):
+        with self._candado:
+            if self._cne is None:
+                self._cne = cargar_cne()
+            return self._cne
+
+    def estaciones(self):
+        """Catálogo de archivos unido con nombre, departamento y municipio de la estación"""
+        cne = self.cne[["CODIGO", "nombre", "DEPARTAMENTO", "MUNICIPIO"]].copy()
+        cne["Codigo"] = cne["CODIGO"].astype(str)
+        return self.catalogo.merge(cne.drop(columns="CODIGO"), on="Codigo", how="left")
+
+    # --- Series ---
+    def tabla(self, nombre, inicio=None, fin=None, desplazamiento=0, limite=None):
+        """Tabla Arrow (Fecha, Valor) de la serie ETIQUETA@CODIGO entre `inicio` y `fin` (incluidos).
+
+        Solo se expande la ventana pedida de la forma compacta y, dentro de ella,
+        las `limite` filas (todas por omisión) a partir de `desplazamiento`.
+        """
+        compacta = self._compacta(nombre)
+        desde, hasta = rango(compacta, _ns(inicio), _ns(fin))
+        desde = min(desde + desplazamiento, hasta)
+        if limite is not None:
+            hasta = min(hasta, desde + limite)
+        tiempos, valores = expandir(compacta, desde, hasta)
+        return pa.table([pa.array(tiempos // 1000, pa.timestamp("us")), pa.array(valores)], schema=ESQUEMA_SERIE)
+
+    def _compacta(self, nombre):
+        with self._candado:
+            registrar_cache("corpus_compartido", nombre in self._compactas)
+            if nombre not in self._compactas:
+                compacta = self._leer_compacta(nombre)
+                self._compactas[nombre] = compacta
+                if compacta["n"] > len(self._ceros):
+                    self._ceros = pa.array(np.zeros(compacta["n"], dtype=np.int32))
+            return self._compactas[nombre]
+
+    def _leer_compacta(self, nombre):
+        ruta_data = self.directorio / f"{nombre}.data"
+        if serie_vigente(ruta_data, self.manifiesto):
+            # Mapeo en memoria: las páginas del archivo se comparten vía caché del sistema operativo
+            compacta = leer(ruta_serie(nombre), mapear=True)
+            if compacta is not None:
+                return compacta
+        return desde_serie(leer_serie(ruta_data))
+
+    def filas(self, nombre, inicio=None, fin=None):
+        """Filas de la serie entre `inicio` y `fin`, contadas sobre la forma compacta sin expandirla"""
+        compacta = self._compacta(nombre)
+        desde, hasta = rango(compacta, _ns(inicio), _ns(fin))
+        return hasta - desde
+
+    def ultima_fecha(self, nombre):
+        """Fecha de la última observación de la serie (None si está vacía), sin expandirla"""
+        compacta = self._compacta(nombre)
+        if not compacta["n"]:
+            return None
+        tiempos, _ = expandir(compacta, compacta["n"] - 1, compacta["n"])
+        return pd.Timestamp(int(tiempos[0]))
+
+    def serie(self, nombre):
+        """Serie pandas de una sola serie (copia pequeña para la sesión)"""
+        return a_serie(self._compacta(nombre), nombre)
+
+    def vista(self, etiquetas=None, codigos=None, inicio=None, fin=None, desplazamiento=0, limite=None):
+        """Tabla Arrow con las series seleccionadas; de cada una se expande solo la ventana pedida.
+
+        Con `limite` se devuelven solo esas filas a partir de `desplazamiento` (una
+        página): se expanden solo las series y los tramos que la cubren.
+        """
+        with etapa("corpus.vista") as reg:
+            vista = self._vista(etiquetas, codigos, inicio, fin, desplazamiento, limite)
+            reg["filas"] = vista.num_rows
+        return vista
+
+    def _vista(self, etiquetas, codigos, inicio, fin, desplazamiento, limite):
+        seleccion = self.catalogo
+        if etiquetas is not None:
+            seleccion = seleccion[seleccion["Etiqueta"].isin(list(etiquetas))]
+        if codigos is not None:
+            seleccion = seleccion[seleccion["Codigo"].isin([str(c) for c in codigos])]
+
+        partes = []
+        nombres = [f"{e}@{c}" for e, c in zip(seleccion["Etiqueta"], seleccion["Codigo"])]
+        for nombre, saltar, tomar in self.repartir(nombres, inicio, fin, desplazamiento, limite):
+            etiqueta, codigo = nombre.split("@")
+            tabla = self.tabla(nombre, inicio, fin, saltar, tomar)
+            n = tabla.num_rows
+            if n == 0:
+                continue
+            # Columnas constantes codificadas como diccionario sobre un único buffer de ceros compartido
+            with self._candado:
+                indices = self._ceros.slice(0, n)
+            partes.append(tabla.append_column(
+                "Etiqueta", pa.DictionaryArray.from_arrays(indices, pa.array([etiqueta]))
+            ).append_column(
+                "Codigo", pa.DictionaryArray.from_arrays(indices, pa.array([codigo]))
+            ))
+        if not partes:
+            return ESQUEMA_VISTA.empty_table()
+        return pa.concat_tables(partes)
+
+    def repartir(self, nombres, inicio=None, fin=None, desplazamiento=0, limite=None):
+        """(nombre, saltar, tomar) de las series, en orden, que aportan filas a la página pedida.
+
+        Sin `limite` son todas las series con todas sus filas de la ventana.
+        """
+        for nombre in nombres:
+            if limite is None:
+                yield nombre, 0, None
+                continue
+            if limite <= 0:
+                return
+            n = self.filas(nombre, inicio, fin)
+            saltar = min(desplazamiento, n)
+            desplazamiento -= saltar
+            tomar = min(n - saltar, limite)
+            if tomar > 0:
+                limite -= tomar
+                yield nombre, saltar, tomar
+
+    # --- Metadatos ---
+    def anexar_metadatos(self, df):
+        """Une al DataFrame (con Etiqueta y Codigo) las columnas del glosario y del CNE"""
+        glosario = self.glosario.drop_duplicates("Etiqueta")
+        cne = self.cne.assign(Codigo=self.cne["CODIGO"].astype(str))
+        with etapa("metadatos", filas=len(df)):
+            df = df.astype({"Etiqueta": str, "Codigo": str})
+            return df.merge(glosario, on="Etiqueta", how="left").merge(cne, on="Codigo", how="left")
+
+    def bytes_en_memoria(self):
+        """Bytes de las series cargadas en forma compacta (incluye lo mapeado desde disco)"""
+        with self._candado:
+            return sum(nbytes(c) for c in self._compactas.values())
+
+
+def _ns(fecha):
+    return None if fecha is None else pd.Timestamp(fecha).value
+
+
+def recortar(tabla, inicio=None, fin=None):
+    """Recorta por rango de fechas con búsqueda binaria (las series están ordenadas)"""
+    fechas = tabla["Fecha"].to_numpy()
+    desde = np.searchsorted(fechas, np.datetime64(pd.Timestamp(inicio)), "left") if inicio is not None else 0
+    hasta = np.searchsorted(fechas, np.datetime64(pd.Timestamp(fin)), "right") if fin is not None else len(fechas)
+    return tabla.slice(int(desde), max(int(hasta - desde), 0))
@@ -0,0 +1,216 @@
+# cattleclimate/consulta.py
+"""Consultas con filtros empujados hasta los archivos.
+
+    from cattleclimate.consulta import consultar
+
+    tabla = consultar(etiquetas=["TA2_AUT_60"], departamentos=["Sucre"],
+                      desde="2021-01-01", hasta="2021-03-31", columnas=["Fecha", "Valor", "Codigo"])
+
+Los filtros se aplican de afuera hacia adentro, para tocar el mínimo de bytes:
+
+1. variable, estación, departamento y municipio se resuelven sobre el catálogo de
+   nombres de archivo unido al CNE: las series que no cumplen ni se abren;
+2. la ventana de tiempo descarta las particiones `Anio=` del dataset Parquet
+   (`cattleclimate.dataset`) fuera del rango, por nombre de directorio;
+3. dentro de cada archivo se leen solo los grupos de filas cuyas estadísticas
+   mínimo/máximo de Fecha tocan la ventana, y solo las columnas pedidas;
+4. el recorte exacto se hace con búsqueda binaria (los archivos están ordenados).
+
+Sin ventana de tiempo no hay grupos que descartar y descomprimir Parquet sale más
+caro que mapear la caché Arrow: en ese caso, y cuando una serie no está en el
+dataset o su .data cambió después de escribirlo, se sirve desde la capa
+compartida (`CorpusCompartido`), que expande de la forma compacta solo las filas
+del mismo recorte.
+
+Para mostrar una página basta con `desplazamiento` y `limite`: las filas de cada
+serie se cuentan sobre la forma compacta y solo se expanden las series (y los
+tramos de ellas) que cubren la página; `reporte["filas_totales"]` trae el total.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cattleclimate.almacen import huella
+from cattleclimate.compartido import ESQUEMA_SERIE, recortar
+from cattleclimate.dataset import DATASET_DIR, leer_estado, ruta_particion, sin_repetidas
+from cattleclimate.datos import DATA_HIDRO
+from cattleclimate.diagnostico import etapa
+
+COLUMNAS_SERIE = ["Fecha", "Valor"]
+COLUMNAS_CLAVE = ["Etiqueta", "Codigo"]
+COLUMNAS_META = ["nombre", "DEPARTAMENTO", "MUNICIPIO"]
+COLUMNAS = COLUMNAS_SERIE + COLUMNAS_CLAVE + COLUMNAS_META
+
+
+def _normalizar(valores):
+    return None if valores is None else {str(v).strip().upper() for v in valores}
+
+
+def seleccionar(estaciones, etiquetas=None, codigos=None, departamentos=None, municipios=None):
+    """Filas del catálogo (Etiqueta, Codigo y metadatos del CNE) que cumplen los filtros"""
+    seleccion = estaciones
+    if etiquetas is not None:
+        seleccion = seleccion[seleccion["Etiqueta"].isin(list(etiquetas))]
+    if codigos is not None:
+        seleccion = seleccion[seleccion["Codigo"].isin([str(c) for c in codigos])]
+    # Departamento y municipio sin distinguir mayúsculas: el CNE no es consistente
+    for columna, valores in (("DEPARTAMENTO", departamentos), ("MUNICIPIO", municipios)):
+        valores = _normalizar(valores)
+        if valores is not None:
+            seleccion = seleccion[seleccion[columna].astype(str).str.strip().str.upper().isin(valores)]
+    return seleccion
+
+
+def _instante(valor):
+    return None if valor is None else pd.Timestamp(valor)
+
+
+def _grupos_en_rango(meta, inicio, fin):
+    """Índices de los grupos de filas cuya Fecha mín/máx se cruza con [inicio, fin]"""
+    grupos = []
+    for i in range(meta.num_row_groups):
+        estadisticas = meta.row_group(i).column(0).statistics
+        if estadisticas is None or not estadisticas.has_min_max:
+            grupos.append(i)
+            continue
+        if inicio is not None and pd.Timestamp(estadisticas.max) < inicio:
+            continue
+        if fin is not None and pd.Timestamp(estadisticas.min) > fin:
+            continue
+        grupos.append(i)
+    return grupos
+
+
+def _anios(directorio, inicio, fin):
+    """Particiones Anio= de una serie dentro del rango de años de la ventana"""
+    directorios = []
+    for ruta in sorted(directorio.glob("Anio=*")):
+        anio = int(ruta.name.split("=")[1])
+        if (inicio is None or anio >= inicio.year) and (fin is None or anio <= fin.year):
+            directorios.append(ruta)
+    return directorios
+
+
+def _leer_dataset(raiz, etiqueta, codigo, inicio, fin, columnas, reporte):
+    """Fecha y las columnas pedidas de una serie, leyendo solo los grupos de filas necesarios"""
+    partes, orden, varias = [], [], False
+    for directorio in _anios(ruta_particion(raiz, etiqueta, codigo), inicio, fin):
+        archivos = sorted(directorio.glob("part-*.parquet"))
+        varias = varias or len(archivos) > 1
+        for ruta in archivos:
+            archivo = pq.ParquetFile(ruta)
+            meta = archivo.metadata
+            grupos = _grupos_en_rango(meta, inicio, fin)
+            reporte["grupos_totales"] += meta.num_row_groups
+            reporte["grupos_leidos"] += len(grupos)
+            if not grupos:
+                continue
+            indices = [meta.schema.names.index(c) for c in columnas]
+            reporte["bytes_leidos"] += sum(
+                meta.row_group(g).column(c).total_compressed_size for g in grupos for c in indices
+            )
+            tabla = archivo.read_row_groups(grupos, columns=columnas)
+            partes.append(tabla)
+            orden.append(np.full(tabla.num_rows, len(orden)))
+    reporte["archivos"] += len(partes)
+    if not partes:
+        return pa.schema([ESQUEMA_SERIE.field(c) for c in columnas]).empty_table()
+    tabla = pa.concat_tables(partes)
+    if varias:
+        # Partición con archivos anexados sin compactar: ordenar y quedarse con la última escritura
+        tabla = sin_repetidas(tabla, np.concatenate(orden))
+    return recortar(tabla, inicio, fin)
+
+
+def _vigente_en_dataset(nombre, estado, directorio):
+    ruta = directorio / f"{nombre}.data"
+    return nombre in estado and ruta.exists() and estado[nombre] == list(huella(ruta).values())
+
+
+def consultar_por_serie(etiquetas=None, codigos=None, departamentos=None, municipios=None,
+                        desde=None, hasta=None, columnas=None, raiz=DATASET_DIR, corpus=None,
+                        directorio=DATA_HIDRO, reporte=None, desplazamiento=0, limite=None):
+    """Genera una tabla Arrow por serie seleccionada (sin juntar todo en memoria).
+
+    `reporte`, si se pasa un dict, se completa con archivos, grupos de filas y bytes leídos.
+    Con `limite` solo se generan las filas de esa página, desde la capa compartida.
+    """
+    if corpus is None:
+        from cattleclimate.compartido import CorpusCompartido
+        corpus = CorpusCompartido(directorio)
+    columnas = list(columnas or COLUMNAS_SERIE + COLUMNAS_CLAVE)
+    desconocidas = set(columnas) - set(COLUMNAS)
+    if desconocidas:
+        raise ValueError(f"Columnas desconocidas: {', '.join(sorted(desconocidas))}")
+    inicio, fin = _instante(desde), _instante(hasta)
+    if reporte is None:
+        reporte = {}
+    for clave in ("series", "archivos", "grupos_leidos", "grupos_totales", "bytes_leidos", "desde_corpus"):
+        reporte.setdefault(clave, 0)
+
+    estaciones = corpus.estaciones() if departamentos or municipios or set(columnas) & set(COLUMNAS_META) \
+        else corpus.catalogo
+    seleccion = seleccionar(estaciones, etiquetas, codigos, departamentos, municipios)
+    estado = leer_estado(raiz)
+    leer = ["Fecha"] + (["Valor"] if "Valor" in columnas else [])
+
+    por_nombre = {f"{f.Etiqueta}@{f.Codigo}": f for f in seleccion.itertuples(index=False)}
+    reporte["series"] += len(por_nombre)
+    if limite is not None:
+        reporte["filas_totales"] = reporte.get("filas_totales", 0) + sum(
+            corpus.filas(nombre, inicio, fin) for nombre in por_nombre
+        )
+
+    for nombre, saltar, tomar in corpus.repartir(por_nombre, inicio, fin, desplazamiento, limite):
+        fila = por_nombre[nombre]
+        if limite is None and (inicio is not None or fin is not None) \
+                and _vigente_en_dataset(nombre, estado, directorio):
+            tabla = _leer_dataset(raiz, fila.Etiqueta, fila.Codigo, inicio, fin, leer, reporte)
+        else:
+            tabla = corpus.tabla(nombre, inicio, fin, saltar, tomar).select(leer)
+            reporte["desde_corpus"] += 1
+            reporte["bytes_leidos"] += tabla.nbytes
+        if tabla.num_rows == 0:
+            continue
+        # Columnas constantes por serie, como diccionario de un solo valor
+        ceros = pa.array(np.zeros(tabla.num_rows, dtype=np.int32))
+        for columna in COLUMNAS_CLAVE + COLUMNAS_META:
+            if columna in columnas:
+                valor = getattr(fila, columna)
+                valor = None if pd.isna(valor) else str(valor)
+                tabla = tabla.append_column(
+                    columna, pa.DictionaryArray.from_arrays(ceros, pa.array([valor], pa.string()))
+                )
+        yield tabla.select(columnas)
+
+
+def consultar(etiquetas=None, codigos=None, departamentos=None, municipios=None,
+              desde=None, hasta=None, columnas=None, raiz=DATASET_DIR, corpus=None,
+              directorio=DATA_HIDRO, reporte=None, desplazamiento=0, limite=None):
+    """Tabla Arrow con las filas y columnas que cumplen los filtros (ver el módulo)"""
+    reporte = {} if reporte is None else reporte
+    with etapa("consulta") as reg:
+        partes = list(consultar_por_serie(
+            etiquetas, codigos, departamentos, municipios, desde, hasta, columnas,
+            raiz, corpus, directorio, reporte, desplazamiento, limite
+        ))
+        if partes:
+            # Los diccionarios de cada serie difieren; se unifican al juntar
+            tabla = pa.concat_tables(partes, promote_options="permissive").unify_dictionaries()
+        else:
+            tabla = vacia(columnas)
+        if limite is None:
+            reporte["filas_totales"] = tabla.num_rows
+        reg.update(filas=tabla.num_rows, **reporte)
+    return tabla
+
+
+def vacia(columnas=None):
+    """Tabla sin filas con el esquema de las columnas pedidas"""
+    columnas = list(columnas or COLUMNAS_SERIE + COLUMNAS_CLAVE)
+    campos = {
+        **{c: ESQUEMA_SERIE.field(c) for c in COLUMNAS_SERIE},
+        **{c: pa.field(c, pa.dictionary(pa.int32(), pa.string())) for c in COLUMNAS_CLAVE + COLUMNAS_META}
+    }
+    return pa.schema([campos[c] for c in columnas]).empty_table()
@@ -0,0 +1,205 @@
+# cattleclimate/cubos.py
+"""Cubos hora del día × día del año por estación y variable, para mapas de calor.
+
+Cada serie se resume en una pasada de NumPy en un cubo 366 × 24 (día del año en
+un calendario bisiesto, así el 29 de febrero tiene su columna, por hora local)
+con el conteo, la suma y el máximo por celda y el número de horas sobre cada
+umbral de la variable (`umbrales_de`). La vista 12 × 24 por mes se obtiene
+sumando días del mismo cubo; media y frecuencia de excedencia salen de dividir.
+
+Los cubos se guardan en `cache/cubos/` con la huella de los archivos fuente, la
+última observación incluida y un sha1 de las observaciones hasta ella. Todas las
+partes son acumulables: cuando solo se agregaron datos al final, se suman las
+horas posteriores; si cambió cualquier observación anterior, se rehace el cubo.
+
+    from cattleclimate.cubos import cubo, matriz
+    c = cubo("ITH_DER_60@25025280")
+    matriz(c, "excedencia", "dia", umbral=79)   # DataFrame 24 × 366 en %
+    matriz(c, "media", "mes")                    # DataFrame 24 × 12
+"""
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from cattleclimate.almacen import (
+    CACHE_DIR, archivos_fuente, cargar_serie, firma_fuentes, guardar_npz, huella_datos, leer_npz
+)
+from cattleclimate.datos import DATA_HIDRO, listar_archivos, separar_nombre, tiempos_ns
+from cattleclimate.diagnostico import etapa, registrar_cache
+from cattleclimate.indices import UMBRALES_ITH
+from cattleclimate.remuestreo import NS_DIA, NS_HORA
+
+CUBOS_DIR = CACHE_DIR / "cubos"
+
+DIAS = 366
+HORAS = 24
+ESTADISTICOS = ("media", "maximo", "excedencia", "observaciones")
+RESOLUCIONES = ("dia", "mes")
+
+# Umbrales por prefijo de etiqueta; las demás variables no llevan excedencias
+UMBRALES_PREFIJO = {"ITH": UMBRALES_ITH, "TA": (30, 35), "TSSM": (30, 35), "HR": (80, 90)}
+
+# Series con mapa de calor por defecto (ITH medido, ITH reconstruido, temperatura y humedad)
+ETIQUETAS_CUBOS = ("ITH_DER_60", "ITH_REC_60", "TA2_AUT_60", "HRA2_AUT_60")
+
+# Primer día (índice en el año bisiesto) de cada mes
+_INICIO_MES = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+# Posición de cada día de 365 en el año bisiesto, para años comunes (salta el 29 de febrero)
+_DIA_COMUN = np.concatenate([np.arange(59), np.arange(60, 366)])
+
+
+def umbrales_de(etiqueta):
+    """Umbrales de excedencia de la variable según el prefijo de su etiqueta"""
+    return next((u for prefijo, u in UMBRALES_PREFIJO.items() if etiqueta.startswith(prefijo)), ())
+
+
+def series_disponibles(etiquetas=ETIQUETAS_CUBOS, directorio=DATA_HIDRO):
+    """Nombres ETIQUETA@CODIGO con datos (reales o virtuales) de las etiquetas"""
+    from cattleclimate.diurno import listar_reconstruidas
+    from cattleclimate.psicrometria import listar_derivadas
+
+    rutas = listar_archivos(directorio) + listar_derivadas(directorio) + listar_reconstruidas(directorio)
+    return sorted({r.stem for r in rutas if separar_nombre(r)[0] in etiquetas})
+
+
+# --- Acumulación ---
+def celdas(tiempos):
+    """Índice plano día del año (calendario bisiesto) × hora de cada tiempo en ns"""
+    fechas = tiempos.view("datetime64[ns]")
+    anio = fechas.astype("datetime64[Y]")
+    dia = (fechas.astype("datetime64[D]") - anio).astype(np.int64)
+    anio_num = anio.astype(np.int64) + 1970
+    bisiesto = (anio_num % 4 == 0) & ((anio_num % 100 != 0) | (anio_num % 400 == 0))
+    dia = np.where(bisiesto, dia, _DIA_COMUN[np.minimum(dia, 364)])
+    return dia * HORAS + (tiempos % NS_DIA) // NS_HORA
+
+
+def acumular(tiempos, valores, umbrales=()):
+    """Cubo (dict de arrays 366 × 24) de un tramo de la serie"""
+    validos = np.isfinite(valores)
+    tiempos, valores = tiempos[validos], valores[validos]
+    celda = celdas(tiempos)
+    n = DIAS * HORAS
+    maximo = np.full(n, -np.inf)
+    np.maximum.at(maximo, celda, valores)
+    return {
+        "conteo": np.bincount(celda, minlength=n).reshape(DIAS, HORAS),
+        "suma": np.bincount(celda, weights=valores, minlength=n).reshape(DIAS, HORAS),
+        "maximo": maximo.reshape(DIAS, HORAS),
+        "excedencias": np.stack([
+            np.bincount(celda[valores >= u], minlength=n).reshape(DIAS, HORAS) for u in umbrales
+        ]) if umbrales else np.zeros((0, DIAS, HORAS), dtype=np.int64),
+    }
+
+
+def combinar(a, b):
+    """Cubo de la unión de dos tramos"""
+    return {
+        "conteo": a["conteo"] + b["conteo"], "suma": a["suma"] + b["suma"],
+        "maximo": np.maximum(a["maximo"], b["maximo"]), "excedencias": a["excedencias"] + b["excedencias"],
+    }
+
+
+# --- Caché ---
+def _ruta(nombre):
+    return CUBOS_DIR / f"{nombre}.npz"
+
+
+@lru_cache(maxsize=128)
+def _cubo(nombre, directorio, firma, umbrales):
+    clave = json.dumps([firma, umbrales])
+    ruta = _ruta(nombre)
+    guardado = leer_npz(ruta)
+    if guardado is not None and str(guardado["firma"]) == clave:
+        registrar_cache("cubos_disco", True)
+        return guardado
+    registrar_cache("cubos_disco", False)
+
+    with etapa("cubos.construir", serie=nombre) as reg:
+        serie = cargar_serie(directorio / f"{nombre}.data").dropna()
+        tiempos, valores = tiempos_ns(serie.index), serie.to_numpy(dtype="float64")
+        modo = "completo"
+        # Mismos umbrales y mismas observaciones hasta la última incluida: solo se suma lo nuevo
+        if guardado is not None and tuple(guardado["umbrales"]) == umbrales and "huella" in guardado and len(tiempos):
+            previas = tiempos <= int(guardado["t_fin"])
+            iguales = previas.sum() == int(guardado["n"]) and \
+                huella_datos(tiempos[previas], valores[previas]) == str(guardado["huella"])
+            if iguales:
+                modo = "incremental"
+                resultado = combinar(
+                    {k: guardado[k] for k in ("conteo", "suma", "maximo", "excedencias")},
+                    acumular(tiempos[~previas], valores[~previas], umbrales)
+                )
+        if modo == "completo":
+            resultado = acumular(tiempos, valores, umbrales)
+        reg["modo"] = modo
+        reg["filas"] = len(valores)
+    resultado.update({
+        "umbrales": np.array(umbrales, dtype="float64"), "n": np.array(len(tiempos)),
+        "t_fin": np.array(tiempos[-1] if len(tiempos) else np.iinfo(np.int64).min),
+        "huella": np.array(huella_datos(tiempos, valores)),
+    })
+    guardar_npz(ruta, clave, **resultado)
+    return resultado
+
+
+def cubo(nombre, directorio=DATA_HIDRO):
+    """Cubo 366 × 24 de la serie ETIQUETA@CODIGO (real o virtual); no modificar"""
+    etiqueta, _ = separar_nombre(directorio / f"{nombre}.data")
+    ruta = directorio / f"{nombre}.data"
+    if not archivos_fuente(ruta):
+        raise FileNotFoundError(f"No hay datos para {nombre}")
+    aciertos_previos = _cubo.cache_info().hits
+    resultado = _cubo(nombre, directorio, firma_fuentes(ruta), tuple(float(u) for u in umbrales_de(etiqueta)))
+    registrar_cache("cubos", _cubo.cache_info().hits > aciertos_previos)
+    return resultado
+
+
+def construir_corpus(etiquetas=ETIQUETAS_CUBOS, directorio=DATA_HIDRO):
+    """Cubos de todas las series de las etiquetas; devuelve los nombres que fallaron"""
+    fallidas = []
+    with etapa("cubos.corpus") as reg:
+        nombres = series_disponibles(etiquetas, directorio)
+        for nombre in nombres:
+            try:
+                cubo(nombre, directorio)
+            except (ValueError, OSError):
+                fallidas.append(nombre)
+        reg["filas"] = len(nombres)
+    return fallidas
+
+
+# --- Vistas ---
+def matriz(c, estadistico="media", resolucion="dia", umbral=None):
+    """DataFrame hora (filas 0-23) × día del año (1-366) o mes (1-12) del estadístico.
+
+    `excedencia` es el % de observaciones con valor mayor o igual que `umbral`
+    (uno de los umbrales del cubo); las celdas sin datos quedan en NaN.
+    """
+    if estadistico not in ESTADISTICOS:
+        raise ValueError(f"Estadístico no soportado: {estadistico}. Opciones: {ESTADISTICOS}")
+    if resolucion not in RESOLUCIONES:
+        raise ValueError(f"Resolución no soportada: {resolucion}. Opciones: {RESOLUCIONES}")
+    conteo, suma, maximo = c["conteo"], c["suma"], c["maximo"]
+    if estadistico == "excedencia":
+        umbrales = list(c["umbrales"])
+        if umbral is None or float(umbral) not in umbrales:
+            raise ValueError(f"Umbral no disponible en el cubo: {umbral}. Opciones: {umbrales}")
+        excedencias = c["excedencias"][umbrales.index(float(umbral))]
+    if resolucion == "mes":
+        conteo = np.add.reduceat(conteo, _INICIO_MES, axis=0)
+        suma = np.add.reduceat(suma, _INICIO_MES, axis=0)
+        maximo = np.maximum.reduceat(maximo, _INICIO_MES, axis=0)
+        if estadistico == "excedencia":
+            excedencias = np.add.reduceat(excedencias, _INICIO_MES, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        valores = {
+            "media": suma / conteo,
+            "maximo": np.where(conteo > 0, maximo, np.nan),
+            "observaciones": conteo.astype("float64"),
+            "excedencia": 100 * excedencias / conteo if estadistico == "excedencia" else None,
+        }[estadistico]
+    columnas = pd.RangeIndex(1, len(valores) + 1, name="Mes" if resolucion == "mes" else "Dia")
+    return pd.DataFrame(valores.T, index=pd.RangeIndex(HORAS, name="Hora"), columns=columnas)
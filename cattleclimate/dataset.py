@@ -0,0 +1,228 @@
+# cattleclimate/dataset.py
+"""Dataset Parquet particionado por variable, estación y año.
+
+    cache/dataset/Etiqueta=TA2_AUT_60/Codigo=25025240/Anio=2021/part-<ns>.parquet
+
+Cada archivo guarda solo Fecha y Valor, ordenados por Fecha, en grupos de filas
+con estadísticas mínimo/máximo: quien lee puede descartar particiones por la
+ruta y grupos de filas por rango de fechas sin abrir el resto (ver
+`pyarrow.dataset` con `particiones()`).
+
+Anexar agrega un archivo `part-*` nuevo a cada partición tocada; `compactar`
+vuelve a dejar un único archivo ordenado y sin fechas repetidas por partición.
+Los archivos se escriben con un nombre temporal oculto y se publican con
+`os.replace`, de modo que un lector nunca ve un archivo a medio escribir.
+"""
+import json
+import logging
+import os
+import time
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from cattleclimate.almacen import CACHE_DIR, huella
+from cattleclimate.compartido import ESQUEMA_SERIE
+from cattleclimate.datos import DATA_HIDRO, listar_archivos, separar_nombre
+from cattleclimate.diagnostico import etapa
+
+log = logging.getLogger("cattleclimate.dataset")
+
+DATASET_DIR = CACHE_DIR / "dataset"
+ESTADO = "_estado.json"
+
+# Un año horario (8 784 filas) cabe en un grupo; las series de 10 minutos quedan en ~6 grupos por año
+FILAS_POR_GRUPO = 16384
+COMPRESION = "zstd"
+
+
+def particiones():
+    """Esquema de partición estilo Hive para `pyarrow.dataset`"""
+    import pyarrow.dataset as ds
+    return ds.partitioning(
+        pa.schema([("Etiqueta", pa.string()), ("Codigo", pa.string()), ("Anio", pa.int16())]),
+        flavor="hive"
+    )
+
+
+def abrir(raiz=DATASET_DIR):
+    """`pyarrow.dataset.Dataset` sobre el directorio (ignora temporales y `_estado.json`)"""
+    import pyarrow.dataset as ds
+    return ds.dataset(raiz, format="parquet", partitioning=particiones())
+
+
+def ruta_particion(raiz, etiqueta, codigo, anio=None):
+    ruta = Path(raiz) / f"Etiqueta={etiqueta}" / f"Codigo={codigo}"
+    return ruta if anio is None else ruta / f"Anio={anio}"
+
+
+def _quitar_vacios(directorio, raiz):
+    """Borra las particiones Anio=* vacías de una serie y, si quedan vacíos, sus directorios hasta `raiz`"""
+    directorio, raiz = Path(directorio), Path(raiz)
+    for anio in directorio.glob("Anio=*"):
+        if not any(anio.iterdir()):
+            anio.rmdir()
+    while directorio != raiz and directorio.is_dir() and not any(directorio.iterdir()):
+        directorio.rmdir()
+        directorio = directorio.parent
+
+
+# --- Escritura ---
+def _escribir_archivo(tabla, directorio):
+    """Escribe `tabla` (ya ordenada) como un part-*.parquet nuevo; devuelve la ruta"""
+    directorio.mkdir(parents=True, exist_ok=True)
+    ruta = directorio / f"part-{time.time_ns()}.parquet"
+    temporal = directorio / f".{ruta.name}.tmp"
+    pq.write_table(
+        tabla, temporal,
+        row_group_size=FILAS_POR_GRUPO,
+        compression=COMPRESION,
+        write_statistics=True,
+        sorting_columns=[pq.SortingColumn(0)]
+    )
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def _por_anio(tabla):
+    """(año, trozo) de una tabla ordenada por Fecha; los trozos no copian datos"""
+    if tabla.num_rows == 0:
+        return []
+    anios = pc.year(tabla["Fecha"]).to_numpy()
+    cortes = np.concatenate(([0], np.flatnonzero(np.diff(anios)) + 1, [len(anios)]))
+    return [(int(anios[i]), tabla.slice(i, j - i)) for i, j in zip(cortes[:-1], cortes[1:])]
+
+
+def _ordenar(tabla):
+    tabla = tabla.select(["Fecha", "Valor"])
+    tabla = tabla if tabla.schema.equals(ESQUEMA_SERIE) else tabla.cast(ESQUEMA_SERIE)
+    fechas = tabla["Fecha"].to_numpy()
+    if len(fechas) > 1 and (np.diff(fechas.view("int64")) < 0).any():
+        tabla = tabla.sort_by("Fecha")
+    return tabla.replace_schema_metadata(None)
+
+
+def escribir_serie(tabla, etiqueta, codigo, raiz=DATASET_DIR, anexar=False):
+    """Escribe una serie (tabla Arrow con Fecha y Valor) en sus particiones por año.
+
+    Con `anexar=False` reemplaza todo lo que había de la serie; con `anexar=True`
+    agrega archivos nuevos (las fechas repetidas se resuelven al compactar, gana
+    la escritura más reciente). Devuelve las rutas escritas.
+    """
+    tabla = _ordenar(tabla)
+    directorio_serie = ruta_particion(raiz, etiqueta, codigo)
+    previos = [] if anexar else sorted(directorio_serie.glob("Anio=*/part-*.parquet"))
+    with etapa("dataset.escribir", serie=f"{etiqueta}@{codigo}", filas=tabla.num_rows):
+        escritas = [
+            _escribir_archivo(trozo, ruta_particion(raiz, etiqueta, codigo, anio))
+            for anio, trozo in _por_anio(tabla)
+        ]
+    # Lo anterior se borra después de publicar lo nuevo
+    for ruta in previos:
+        ruta.unlink(missing_ok=True)
+    _quitar_vacios(directorio_serie, raiz)
+    return escritas
+
+
+# --- Compactación ---
+def sin_repetidas(tabla, orden):
+    """Ordena por Fecha y deja la última escritura de cada fecha repetida"""
+    fechas = tabla["Fecha"].to_numpy().view("int64")
+    indices = np.lexsort((-np.asarray(orden), fechas))
+    fechas = fechas[indices]
+    primeras = np.concatenate(([True], fechas[1:] != fechas[:-1]))
+    return tabla.take(pa.array(indices[primeras]))
+
+
+def compactar_particion(directorio):
+    """Une los part-*.parquet de una partición en uno solo. True si hubo que compactar"""
+    partes = sorted(Path(directorio).glob("part-*.parquet"))
+    if len(partes) < 2:
+        return False
+    tablas = [pq.read_table(p) for p in partes]
+    orden = np.repeat(np.arange(len(tablas)), [t.num_rows for t in tablas])
+    tabla = sin_repetidas(pa.concat_tables(tablas), orden)
+    _escribir_archivo(tabla, Path(directorio))
+    for parte in partes:
+        parte.unlink()
+    return True
+
+
+def compactar(raiz=DATASET_DIR, etiqueta="*", codigo="*"):
+    """Compacta las particiones con más de un archivo. Devuelve cuántas se compactaron"""
+    with etapa("dataset.compactar") as reg:
+        directorios = sorted(Path(raiz).glob(f"Etiqueta={etiqueta}/Codigo={codigo}/Anio=*"))
+        compactadas = sum(compactar_particion(d) for d in directorios)
+        reg["filas"] = compactadas
+    return compactadas
+
+
+# --- Sincronización con los .data ---
+def leer_estado(raiz=DATASET_DIR):
+    try:
+        with open(Path(raiz) / ESTADO, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def guardar_estado(estado, raiz=DATASET_DIR):
+    Path(raiz).mkdir(parents=True, exist_ok=True)
+    ruta = Path(raiz) / ESTADO
+    temporal = ruta.with_suffix(".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(estado, f)
+    os.replace(temporal, ruta)
+
+
+def sincronizar(directorio=DATA_HIDRO, raiz=DATASET_DIR, forzar=False, corpus=None):
+    """Reescribe en el dataset las series cuyo .data cambió y quita las que ya no existen.
+
+    Devuelve los nombres ETIQUETA@CODIGO actualizados o eliminados.
+    """
+    if corpus is None:
+        from cattleclimate.compartido import CorpusCompartido
+        corpus = CorpusCompartido(directorio)
+
+    estado = {} if forzar else leer_estado(raiz)
+    archivos = listar_archivos(directorio)
+    cambios = []
+    for ruta in archivos:
+        firma = list(huella(ruta).values())
+        if estado.get(ruta.stem) == firma:
+            continue
+        etiqueta, codigo = separar_nombre(ruta)
+        escribir_serie(corpus.tabla(ruta.stem), etiqueta, codigo, raiz)
+        estado[ruta.stem] = firma
+        cambios.append(ruta.stem)
+        log.info("Dataset actualizado: %s", ruta.stem)
+        if len(cambios) % 25 == 0:
+            guardar_estado(estado, raiz)
+
+    vigentes = {r.stem for r in archivos}
+    for nombre in [n for n in estado if n not in vigentes]:
+        etiqueta, codigo = nombre.split("@")
+        directorio_serie = ruta_particion(raiz, etiqueta, codigo)
+        for parte in directorio_serie.glob("Anio=*/*.parquet"):
+            parte.unlink()
+        _quitar_vacios(directorio_serie, raiz)
+        del estado[nombre]
+        cambios.append(nombre)
+        log.info("Serie quitada del dataset: %s", nombre)
+    guardar_estado(estado, raiz)
+    return cambios
+
+
+# --- Archivo único para descarga ---
+def a_parquet(df):
+    """Bytes de un .parquet con el DataFrame ordenado por Fecha, en grupos de filas y con estadísticas"""
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    if "Fecha" in tabla.column_names:
+        tabla = tabla.sort_by([("Fecha", "ascending")])
+    buffer = BytesIO()
+    pq.write_table(tabla, buffer, row_group_size=FILAS_POR_GRUPO, compression=COMPRESION, write_statistics=True)
+    return buffer.getvalue()
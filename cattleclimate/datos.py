@@ -0,0 +1,105 @@
+# cattleclimate/datos.py
+"""Rutas del proyecto y lectura vectorizada de archivos .data del IDEAM."""
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cattleclimate.diagnostico import etapa
+
+# --- Rutas base (multiplataforma) ---
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "datos"
+DATA_HIDRO = DATA_DIR / "hidrometeorologicos"
+RESULTS_DIR = BASE_DIR / "resultados"
+GLOSARIO_PATH = DATA_DIR / "Glosario Variables.xlsx"
+CNE_PATH = DATA_DIR / "CNE_IDEAM.xlsx"
+
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+VALORES_NULOS = ["?", "-", "NaN", "NA", "", "null"]
+
+
+def separar_nombre(archivo):
+    """Devuelve (etiqueta, codigo) a partir de un nombre ETIQUETA@CODIGO.data"""
+    etiqueta, codigo = Path(archivo).stem.split("@")
+    return etiqueta, codigo
+
+
+def listar_archivos(directorio=DATA_HIDRO, etiqueta=None, codigo=None):
+    """Lista los archivos .data, opcionalmente filtrados por etiqueta y/o código"""
+    archivos = []
+    for ruta in sorted(Path(directorio).glob("*.data")):
+        try:
+            et, cod = separar_nombre(ruta)
+        except ValueError:
+            continue
+        if etiqueta is not None and et != etiqueta:
+            continue
+        if codigo is not None and cod != str(codigo):
+            continue
+        archivos.append(ruta)
+    return archivos
+
+
+def _leer_hoja(ruta, hoja):
+    with warnings.catch_warnings(), etapa("read_excel", archivo=ruta.name) as reg:
+        warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
+        df = pd.read_excel(ruta, sheet_name=hoja)
+        reg["filas"] = len(df)
+    return df
+
+
+def _hoja_en_cache(ruta, hoja, columnas):
+    # Importación diferida: almacen depende de este módulo
+    from cattleclimate.almacen import cargar_hoja
+    df = cargar_hoja(ruta, hoja, _leer_hoja)
+    return (df if columnas is None else df[list(columnas)]).copy()
+
+
+def cargar_glosario(columnas=None):
+    """Hoja "Básicas" del glosario de variables del IDEAM (el Excel se lee una sola vez)"""
+    return _hoja_en_cache(GLOSARIO_PATH, "Básicas", columnas)
+
+
+def cargar_cne(columnas=None):
+    """Catálogo Nacional de Estaciones, hoja "CNE" (el Excel se lee una sola vez)"""
+    return _hoja_en_cache(CNE_PATH, "CNE", columnas)
+
+
+def leer_serie(ruta):
+    """Lee un archivo .data como serie float64 indexada por Fecha (ordenada y sin duplicados)"""
+    ruta = Path(ruta)
+    with etapa("read_csv", archivo=ruta.name) as reg:
+        df = pd.read_csv(
+            ruta,
+            sep="|",
+            header=0,
+            names=["Fecha", "Valor"],
+            dtype={"Fecha": "object", "Valor": "object"},
+            na_values=VALORES_NULOS,
+            on_bad_lines="skip"
+        )
+        valores = pd.to_numeric(df["Valor"], errors="coerce")
+        fechas = pd.to_datetime(df["Fecha"], format=FORMATO_FECHA, errors="coerce")
+        validos = fechas.notna() & valores.notna()
+
+        serie = pd.Series(
+            valores[validos].to_numpy(dtype="float64"),
+            index=pd.DatetimeIndex(fechas[validos], name="Fecha"),
+            name=ruta.stem
+        )
+        serie = serie.sort_index()
+        serie = serie[~serie.index.duplicated(keep="last")]
+        reg["filas"] = len(serie)
+    return serie
+
+
+def tiempos_ns(indice):
+    """Convierte un índice de fechas a enteros int64 en nanosegundos (independiente de la unidad)"""
+    return np.asarray(indice, dtype="datetime64[ns]").view("int64")
+
+
+def indice_desde_ns(tiempos, nombre="Fecha"):
+    """Construye un DatetimeIndex a partir de enteros int64 en nanosegundos"""
+    return pd.DatetimeIndex(np.asarray(tiempos, dtype="int64").view("datetime64[ns]"), name=nombre)
@@ -0,0 +1,128 @@
+# cattleclimate/diagnostico.py
+"""Instrumentación liviana: tiempos por etapa, memoria (RSS), filas y aciertos de caché.
+
+Uso:
+
+    from cattleclimate.diagnostico import etapa
+
+    with etapa("leer_serie", archivo=ruta.name) as reg:
+        serie = ...
+        reg["filas"] = len(serie)
+
+Los registros quedan en memoria del proceso (últimos `MAX_REGISTROS`) para el
+panel de diagnóstico de la barra lateral, y se pueden volcar como JSON lines
+para comparar versiones. Si la variable de entorno CATTLECLIMATE_PERFIL apunta a
+un archivo, cada registro se agrega allí al momento.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import psutil
+    _PROCESO = psutil.Process()
+except ImportError:  # psutil es opcional: sin él no se reporta memoria
+    _PROCESO = None
+
+MAX_REGISTROS = 5_000
+RUTA_PERFIL = os.environ.get("CATTLECLIMATE_PERFIL")
+
+_registros = deque(maxlen=MAX_REGISTROS)
+_cache = Counter()
+_candado = threading.Lock()
+
+
+def rss_mb():
+    """Memoria residente del proceso en MB (None si psutil no está instalado)"""
+    return _PROCESO.memory_info().rss / 1e6 if _PROCESO is not None else None
+
+
+@contextmanager
+def etapa(nombre, **contexto):
+    """Mide duración y variación de RSS de un bloque; el bloque puede completar `filas` u otros campos"""
+    registro = {"etapa": nombre, "filas": None, **contexto}
+    rss_inicio = rss_mb()
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro["duracion_s"] = round(time.perf_counter() - inicio, 6)
+        rss_fin = rss_mb()
+        registro["rss_mb"] = round(rss_fin, 2) if rss_fin is not None else None
+        registro["rss_delta_mb"] = round(rss_fin - rss_inicio, 2) if rss_fin is not None else None
+        registro["momento"] = datetime.now().isoformat(timespec="milliseconds")
+        _guardar(registro)
+
+
+def registrar_cache(nombre, acierto):
+    """Cuenta un acierto (True) o fallo (False) de la caché `nombre`"""
+    with _candado:
+        _cache[(nombre, "aciertos" if acierto else "fallos")] += 1
+
+
+def _guardar(registro):
+    with _candado:
+        _registros.append(registro)
+    if RUTA_PERFIL:
+        volcar_jsonl(RUTA_PERFIL, [registro])
+
+
+def registros():
+    """Copia de los registros en memoria"""
+    with _candado:
+        return list(_registros)
+
+
+def limpiar():
+    with _candado:
+        _registros.clear()
+        _cache.clear()
+
+
+def resumen_etapas():
+    """Llamadas, tiempo total/medio/máximo, filas y variación de RSS por etapa"""
+    df = pd.DataFrame(registros())
+    if df.empty:
+        return pd.DataFrame(columns=["etapa", "llamadas", "total_s", "media_s", "max_s", "filas", "rss_delta_mb"])
+    return df.groupby("etapa").agg(
+        llamadas=("duracion_s", "size"),
+        total_s=("duracion_s", "sum"),
+        media_s=("duracion_s", "mean"),
+        max_s=("duracion_s", "max"),
+        filas=("filas", "sum"),
+        rss_delta_mb=("rss_delta_mb", "sum")
+    ).sort_values("total_s", ascending=False).reset_index()
+
+
+def resumen_cache():
+    """Aciertos, fallos y tasa de acierto por caché"""
+    with _candado:
+        conteos = dict(_cache)
+    nombres = sorted({nombre for nombre, _ in conteos})
+    filas = []
+    for nombre in nombres:
+        aciertos = conteos.get((nombre, "aciertos"), 0)
+        fallos = conteos.get((nombre, "fallos"), 0)
+        filas.append({
+            "cache": nombre, "aciertos": aciertos, "fallos": fallos,
+            "tasa_acierto": aciertos / (aciertos + fallos) if aciertos + fallos else None
+        })
+    return pd.DataFrame(filas, columns=["cache", "aciertos", "fallos", "tasa_acierto"])
+
+
+def a_jsonl(lista=None):
+    """Registros como texto JSON lines"""
+    lista = registros() if lista is None else lista
+    return "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in lista)
+
+
+def volcar_jsonl(ruta, lista=None):
+    """Agrega los registros (por defecto todos los de memoria) a un archivo JSON lines"""
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(a_jsonl(lista))
@@ -0,0 +1,412 @@
+# cattleclimate/diurno.py
+"""Reconstrucción horaria de temperatura y humedad a partir de los extremos diarios.
+
+Las estaciones convencionales solo reportan máximas y mínimas diarias (`TMX_CON` /
+`TMN_CON`, `HR_CAL_MX_D` / `HR_CAL_MN_D`, ...), así que ahí no se pueden calcular
+el ITH horario ni las horas sobre un umbral. Este módulo sintetiza la curva horaria
+con el modelo de Parton y Logan (1981), vectorizado sobre días × 24 horas:
+
+- de la mínima (amanecer + `c` horas) a la puesta del sol, una semionda senoidal
+  que alcanza la máxima `a` horas después del mediodía solar;
+- de la puesta del sol a la mínima siguiente, un decaimiento exponencial (`b`);
+- la humedad relativa varía al revés que la temperatura entre sus extremos
+  (exponente `p`) o, sin extremos de humedad, con punto de rocío constante igual
+  a la mínima menos `d` grados.
+
+La duración del día sale de la latitud y el día del año; las horas son locales
+(UTC-5). Los parámetros se calibran con una búsqueda en grilla contra las
+estaciones automáticas con `TA2_AUT_60` y `HRA2_AUT_60`, usando los extremos
+calculados de sus propias series horarias; la calibración se guarda en
+`cache/diurno/` con la huella de esos archivos.
+
+Cada estación reconstruible expone series virtuales `ETIQUETA@CODIGO.data`
+(`RECONSTRUIDAS`) que `almacen.cargar_serie` calcula al primer uso:
+
+    from cattleclimate.diurno import calibracion, horas_sobre_umbral, reconstruir
+    calibracion()                       # parámetros y error contra las automáticas
+    reconstruir("25025080")             # DataFrame horario Tbs, HR, Tbh, ITH
+    horas_sobre_umbral("25025080")      # horas por día con ITH sobre cada umbral
+"""
+import json
+import os
+from functools import lru_cache
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from cattleclimate.almacen import CACHE_DIR, cargar_serie, firma_archivos, guardar_arrow, leer_arrow
+from cattleclimate.datos import DATA_HIDRO, listar_archivos, separar_nombre, tiempos_ns
+from cattleclimate.diagnostico import etapa, registrar_cache
+from cattleclimate.indices import UMBRALES_ITH, calcular_ith
+from cattleclimate.psicrometria import bulbo_humedo_stull, presion_saturacion
+from cattleclimate.remuestreo import NS_DIA, NS_HORA
+
+DIURNO_DIR = CACHE_DIR / "diurno"
+CALIBRACION_PATH = DIURNO_DIR / "calibracion.json"
+
+# Pares (máxima, mínima) diarios, en orden de preferencia
+EXTREMOS_TEMPERATURA = (("TMX_CON", "TMN_CON"), ("TA2_MX_D", "TA2_MN_D"))
+EXTREMOS_HUMEDAD = (("HR_CAL_MX_D", "HR_CAL_MN_D"), ("HRA2_MX_D", "HRA2_MN_D"))
+
+# Series horarias de referencia para calibrar
+REFERENCIA = ("TA2_AUT_60", "HRA2_AUT_60")
+
+# Etiqueta virtual -> (descripción, unidad, columna de `reconstruir`)
+RECONSTRUIDAS = {
+    "TA_REC_60": ("Temperatura horaria reconstruida", "°C", "Tbs"),
+    "HR_REC_60": ("Humedad relativa horaria reconstruida", "%", "HR"),
+    "TBH_REC_60": ("Temperatura de bulbo húmedo reconstruida (Stull)", "°C", "Tbh"),
+    "ITH_REC_60": ("ITH horario reconstruido", "", "ITH"),
+}
+
+# Valores de Parton y Logan para aire a 1.5 m, usados si no hay con qué calibrar
+PARAMETROS_DEFECTO = {"a": 1.86, "b": 2.2, "c": -0.17, "p": 1.0, "d": 1.0}
+GRILLA = {
+    "a": np.arange(0.0, 4.01, 0.25),
+    "b": np.arange(0.5, 6.01, 0.5),
+    "c": np.arange(-1.5, 2.01, 0.25),
+    "p": np.arange(0.4, 2.51, 0.1),
+    "d": np.arange(0.0, 5.01, 0.25),
+}
+DIAS_CALIBRACION = 1500  # muestra de días para la búsqueda en grilla
+HR_VALIDA = (5, 100)  # %; fuera de rango son fallas del sensor (ceros, 999)
+MERIDIANO_HUSO = -75.0  # UTC-5
+
+
+# --- Modelo ---
+def geometria_solar(dias, latitud, longitud):
+    """Hora local de salida y puesta del sol para días desde la época (arrays)"""
+    dia_anio = (np.asarray(dias) + 4) % 365.25  # 1970-01-01 es el día 1; aproximación suficiente
+    declinacion = np.radians(23.45) * np.sin(2 * np.pi * (284 + dia_anio) / 365)
+    coseno = -np.tan(np.radians(latitud)) * np.tan(declinacion)
+    semiarco = np.degrees(np.arccos(np.clip(coseno, -1, 1))) / 15
+    mediodia = 12 - (longitud - MERIDIANO_HUSO) / 15
+    return mediodia - semiarco, mediodia + semiarco
+
+
+def temperatura_horaria(tmax, tmin, amanecer, ocaso, a, b, c):
+    """Matriz días × 24 de temperaturas en horas enteras (NaN sin extremos vecinos)"""
+    horas = np.arange(24)[None, :]
+    inicio = (amanecer + c)[:, None]
+    fin = ocaso[:, None]
+    luz = fin - inicio
+    amplitud = (tmax - tmin)[:, None]
+    minima = tmin[:, None]
+    diurna = minima + amplitud * np.sin(np.pi * (horas - inicio) / (luz + 2 * a))
+
+    # Temperatura a la puesta del sol y decaimiento hasta la mínima siguiente
+    puesta = minima + amplitud * np.sin(np.pi * luz / (luz + 2 * a))
+    noche = 24 - luz
+    base = np.exp(-b)
+
+    def decaimiento(transcurrido):
+        return (np.exp(-b * transcurrido / noche) - base) / (1 - base)
+
+    minima_siguiente = np.append(tmin[1:], np.nan)[:, None]
+    puesta_anterior = np.insert(puesta[:-1, 0], 0, np.nan)[:, None]
+    tarde = minima_siguiente + (puesta - minima_siguiente) * decaimiento(horas - fin)
+    madrugada = minima + (puesta_anterior - minima) * decaimiento(horas + 24 - fin)
+    return np.where(horas < inicio, madrugada, np.where(horas <= fin, diurna, tarde))
+
+
+def humedad_horaria(t, tmax, tmin, hrmax, hrmin, p):
+    """Humedad relativa que baja de la máxima a la mínima cuando la temperatura sube"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraccion = np.clip((t - tmin[:, None]) / (tmax - tmin)[:, None], 0, 1)
+    return hrmax[:, None] - (hrmax - hrmin)[:, None] * fraccion ** p
+
+
+def humedad_por_rocio(t, tmin, d):
+    """Humedad relativa con punto de rocío constante igual a la mínima menos `d`"""
+    return np.minimum(100 * presion_saturacion(tmin[:, None] - d) / presion_saturacion(t), 100)
+
+
+# --- Datos diarios ---
+def en_dias(serie, dias):
+    """Valores de una serie diaria en la grilla continua de días `dias` (NaN si faltan)"""
+    valores = np.full(len(dias), np.nan)
+    if serie is None or serie.empty:
+        return valores
+    posicion = tiempos_ns(serie.index) // NS_DIA - dias[0]
+    dentro = (posicion >= 0) & (posicion < len(dias))
+    valores[posicion[dentro]] = serie.to_numpy(dtype="float64")[dentro]
+    return valores
+
+
+def matriz_horaria(serie):
+    """Días y matriz días × 24 de una serie horaria; solo quedan los días con las 24 horas"""
+    t = tiempos_ns(serie.index)
+    valores = serie.to_numpy(dtype="float64")
+    exactas = (t % NS_HORA == 0) & np.isfinite(valores)
+    t, valores = t[exactas], valores[exactas]
+    dia = t // NS_DIA
+    dias = np.arange(dia.min(), dia.max() + 1)
+    matriz = np.full((len(dias), 24), np.nan)
+    matriz[dia - dias[0], (t % NS_DIA) // NS_HORA] = valores
+    completos = np.isfinite(matriz).all(axis=1)
+    matriz[~completos] = np.nan
+    return dias, matriz
+
+
+def pares_extremos(codigo, directorio, pares):
+    """Rutas del primer par de extremos diarios (máxima, mínima) presente en la estación; None si no hay"""
+    return next(
+        ([directorio / f"{e}@{codigo}.data" for e in par] for par in pares
+         if all((directorio / f"{e}@{codigo}.data").exists() for e in par)),
+        None
+    )
+
+
+def estaciones_reconstruibles(directorio=DATA_HIDRO):
+    """Códigos con máxima y mínima diarias de temperatura"""
+    codigos = {separar_nombre(r)[1] for par in EXTREMOS_TEMPERATURA for r in listar_archivos(directorio, etiqueta=par[0])}
+    return sorted(c for c in codigos if pares_extremos(c, directorio, EXTREMOS_TEMPERATURA))
+
+
+def _coordenadas(codigo):
+    from cattleclimate.vecinos import cargar_coordenadas
+
+    coordenadas = cargar_coordenadas()
+    if codigo not in coordenadas.index:
+        raise ValueError(f"La estación {codigo} no tiene coordenadas en el CNE")
+    return tuple(coordenadas.loc[codigo, ["latitud", "longitud"]].astype(float))
+
+
+# --- Calibración ---
+def _referencia(directorio):
+    """Matrices días × 24 de las estaciones automáticas, unidas, con su geometría solar"""
+    bloques = []
+    for codigo in sorted({separar_nombre(r)[1] for r in listar_archivos(directorio, etiqueta=REFERENCIA[0])}):
+        rutas = [directorio / f"{e}@{codigo}.data" for e in REFERENCIA]
+        if not all(r.exists() for r in rutas):
+            continue
+        try:
+            latitud, longitud = _coordenadas(codigo)
+        except ValueError:
+            continue
+        dias, t = matriz_horaria(cargar_serie(rutas[0]))
+        hr = np.full_like(t, np.nan)
+        humedad = cargar_serie(rutas[1])
+        humedad = humedad[(humedad > HR_VALIDA[0]) & (humedad <= HR_VALIDA[1])]
+        dias_hr, matriz_hr = matriz_horaria(humedad)
+        comunes, i, j = np.intersect1d(dias, dias_hr, return_indices=True)
+        hr[i] = matriz_hr[j]
+        amanecer, ocaso = geometria_solar(dias, latitud, longitud)
+        # Los días usados necesitan a sus vecinos completos (madrugada y tarde)
+        completos = np.isfinite(t).all(axis=1) & np.isfinite(hr).all(axis=1)
+        util = completos & np.roll(completos, 1) & np.roll(completos, -1)
+        util[[0, -1]] = False
+        bloques.append((t, hr, amanecer, ocaso, util))
+    return bloques
+
+
+def _muestra(bloques, n, semilla=0):
+    """Ventanas de tres días (anterior, día, siguiente) tomadas al azar de las estaciones"""
+    centros = [(k, i) for k, b in enumerate(bloques) for i in np.flatnonzero(b[4])]
+    if not centros:
+        return None
+    rng = np.random.default_rng(semilla)
+    elegidos = [centros[i] for i in rng.choice(len(centros), min(n, len(centros)), replace=False)]
+    # (días, 3, 24) de temperatura y humedad; (días, 3) de amanecer y ocaso
+    return tuple(
+        np.stack([bloques[k][campo][i - 1:i + 2] for k, i in elegidos]) for campo in range(4)
+    )
+
+
+def _modelar(t, amanecer, ocaso, a, b, c):
+    """Temperatura del día central de cada ventana a partir de los extremos de las tres.
+
+    Las ventanas se evalúan seguidas como una grilla de días: el día central queda
+    entre sus vecinos reales y los cruces entre ventanas se descartan.
+    """
+    n = len(t)
+    tmax, tmin = t.max(axis=2).ravel(), t.min(axis=2).ravel()
+    modelo = temperatura_horaria(tmax, tmin, amanecer.ravel(), ocaso.ravel(), a, b, c)
+    return modelo.reshape(n, 3, 24)[:, 1]
+
+
+def _rmse(modelo, observado):
+    return float(np.sqrt(np.nanmean((modelo - observado) ** 2)))
+
+
+def calibrar(directorio=DATA_HIDRO, dias=DIAS_CALIBRACION):
+    """Parámetros a, b, c, p, d por búsqueda en grilla y el error (RMSE) de cada parte"""
+    muestra = _muestra(_referencia(directorio), dias)
+    if muestra is None:
+        return {**PARAMETROS_DEFECTO, "dias": 0}
+    t, hr, amanecer, ocaso = muestra
+    observado = t[:, 1]
+    # a y c dan la forma del día y b la de la noche: se alternan búsquedas de
+    # (a, c) con b fijo y de b con (a, c) fijos en vez de recorrer la grilla completa
+    errores = {}
+
+    def error(a, b, c):
+        if (a, b, c) not in errores:
+            errores[(a, b, c)] = _rmse(_modelar(t, amanecer, ocaso, a, b, c), observado)
+        return errores[(a, b, c)]
+
+    a, b, c = (PARAMETROS_DEFECTO[k] for k in "abc")
+    for _ in range(3):
+        a, c = min(product(GRILLA["a"], GRILLA["c"]), key=lambda ac: error(ac[0], b, ac[1]))
+        b = min(GRILLA["b"], key=lambda b: error(a, b, c))
+    modelo = _modelar(t, amanecer, ocaso, a, b, c)
+
+    tmax, tmin = t[:, 1].max(axis=1), t[:, 1].min(axis=1)
+    hrmax, hrmin = hr[:, 1].max(axis=1), hr[:, 1].min(axis=1)
+    observada = hr[:, 1]
+    errores_p = {p: _rmse(humedad_horaria(modelo, tmax, tmin, hrmax, hrmin, p), observada) for p in GRILLA["p"]}
+    errores_d = {d: _rmse(humedad_por_rocio(modelo, tmin, d), observada) for d in GRILLA["d"]}
+    p, d = min(errores_p, key=errores_p.get), min(errores_d, key=errores_d.get)
+
+    defecto = PARAMETROS_DEFECTO
+    return {
+        "a": float(a), "b": float(b), "c": float(c), "p": float(p), "d": float(d),
+        "dias": int(len(t)),
+        "rmse_t": errores[(a, b, c)],
+        "rmse_t_defecto": _rmse(_modelar(t, amanecer, ocaso, defecto["a"], defecto["b"], defecto["c"]), observado),
+        "rmse_hr_extremos": errores_p[p],
+        "rmse_hr_rocio": errores_d[d],
+    }
+
+
+@lru_cache(maxsize=4)
+def _calibracion(directorio, firma):
+    clave = json.dumps(firma)
+    try:
+        with open(CALIBRACION_PATH, encoding="utf-8") as f:
+            guardada = json.load(f)
+        if guardada.get("firma") == clave:
+            registrar_cache("diurno_calibracion_disco", True)
+            return guardada["parametros"]
+    except (FileNotFoundError, OSError, ValueError, KeyError):
+        pass
+    registrar_cache("diurno_calibracion_disco", False)
+    with etapa("diurno.calibrar") as reg:
+        parametros = calibrar(directorio)
+        reg["dias"] = parametros["dias"]
+    DIURNO_DIR.mkdir(parents=True, exist_ok=True)
+    temporal = CALIBRACION_PATH.with_suffix(".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump({"firma": clave, "parametros": parametros}, f, indent=1)
+    os.replace(temporal, CALIBRACION_PATH)
+    return parametros
+
+
+def calibracion(directorio=DATA_HIDRO):
+    """Parámetros del modelo calibrados contra las estaciones automáticas (ver `calibrar`)"""
+    rutas = sorted(r for e in REFERENCIA for r in listar_archivos(directorio, etiqueta=e))
+    aciertos_previos = _calibracion.cache_info().hits
+    parametros = _calibracion(directorio, firma_archivos(rutas))
+    registrar_cache("diurno_calibracion", _calibracion.cache_info().hits > aciertos_previos)
+    return dict(parametros)
+
+
+# --- Reconstrucción ---
+def reconstruir_extremos(dias, tmax, tmin, latitud, longitud, parametros, hrmax=None, hrmin=None):
+    """Tbs y HR horarias (días × 24) para una grilla continua de días con sus extremos"""
+    invalidos = ~(tmax >= tmin)
+    tmax, tmin = np.where(invalidos, np.nan, tmax), np.where(invalidos, np.nan, tmin)
+    amanecer, ocaso = geometria_solar(dias, latitud, longitud)
+    t = temperatura_horaria(tmax, tmin, amanecer, ocaso, parametros["a"], parametros["b"], parametros["c"])
+    hr = humedad_por_rocio(t, tmin, parametros["d"])
+    if hrmax is not None:
+        con_extremos = (hrmax >= hrmin) & (hrmax <= HR_VALIDA[1]) & (hrmin > HR_VALIDA[0])
+        por_extremos = humedad_horaria(t, tmax, tmin, hrmax, hrmin, parametros["p"])
+        hr = np.where(con_extremos[:, None], por_extremos, hr)
+    return t, hr
+
+
+@lru_cache(maxsize=32)
+def _reconstruir(codigo, directorio, firma, parametros):
+    nombre = f"DIURNO@{codigo}"
+    clave = json.dumps([firma, parametros])
+    ruta = DIURNO_DIR / f"{codigo}.arrow"
+    tabla = leer_arrow(ruta, clave)
+    registrar_cache("diurno_disco", tabla is not None)
+    if tabla is None:
+        with etapa("diurno.reconstruir", serie=nombre) as reg:
+            maxima, minima = (cargar_serie(r) for r in pares_extremos(codigo, directorio, EXTREMOS_TEMPERATURA))
+            inicio = min(tiempos_ns(maxima.index).min(), tiempos_ns(minima.index).min()) // NS_DIA
+            fin = max(tiempos_ns(maxima.index).max(), tiempos_ns(minima.index).max()) // NS_DIA
+            dias = np.arange(inicio, fin + 1)
+            humedad = pares_extremos(codigo, directorio, EXTREMOS_HUMEDAD)
+            hrmax, hrmin = (en_dias(cargar_serie(r), dias) for r in humedad) if humedad else (None, None)
+            t, hr = reconstruir_extremos(
+                dias, en_dias(maxima, dias), en_dias(minima, dias), *_coordenadas(codigo),
+                dict(parametros), hrmax, hrmin
+            )
+            tiempos = (dias[:, None] * NS_DIA + np.arange(24)[None, :] * NS_HORA).ravel()
+            t, hr = t.ravel(), hr.ravel()
+            validos = np.isfinite(t) & np.isfinite(hr)
+            tabla = pa.table({
+                "Fecha": tiempos[validos].astype("datetime64[ns]"),
+                "Tbs": t[validos].astype("float32"),
+                "HR": hr[validos].astype("float32"),
+            })
+            reg["filas"] = tabla.num_rows
+        guardar_arrow(tabla, ruta, clave)
+    df = tabla.to_pandas().set_index("Fecha")
+    tbs, hr = df["Tbs"].to_numpy("float64"), df["HR"].to_numpy("float64")
+    df["Tbh"] = bulbo_humedo_stull(tbs, hr)
+    df["ITH"] = calcular_ith(tbs, df["Tbh"].to_numpy())
+    return df
+
+
+def reconstruir(codigo, directorio=DATA_HIDRO):
+    """DataFrame horario (Tbs, HR, Tbh, ITH) reconstruido de los extremos diarios de la estación"""
+    codigo = str(codigo)
+    temperatura = pares_extremos(codigo, directorio, EXTREMOS_TEMPERATURA)
+    if temperatura is None:
+        raise FileNotFoundError(f"La estación {codigo} no tiene máximas y mínimas diarias de temperatura")
+    rutas = temperatura + (pares_extremos(codigo, directorio, EXTREMOS_HUMEDAD) or [])
+    parametros = tuple(sorted((k, v) for k, v in calibracion(directorio).items() if k in PARAMETROS_DEFECTO))
+    aciertos_previos = _reconstruir.cache_info().hits
+    df = _reconstruir(codigo, directorio, firma_archivos(rutas), parametros)
+    registrar_cache("diurno", _reconstruir.cache_info().hits > aciertos_previos)
+    return df.copy()
+
+
+def reconstruir_corpus(directorio=DATA_HIDRO):
+    """Reconstrucción de todas las estaciones con extremos diarios: {codigo: DataFrame}"""
+    with etapa("diurno.corpus") as reg:
+        resultado = {codigo: reconstruir(codigo, directorio) for codigo in estaciones_reconstruibles(directorio)}
+        reg["filas"] = sum(len(df) for df in resultado.values())
+    return resultado
+
+
+def horas_sobre_umbral(codigo, umbrales=UMBRALES_ITH, directorio=DATA_HIDRO):
+    """Horas por día con ITH reconstruido mayor o igual a cada umbral"""
+    ith = reconstruir(codigo, directorio)["ITH"]
+    dias = ith.index.normalize()
+    return pd.DataFrame(
+        {f"Horas_ITH>={u}": (ith >= u).groupby(dias).sum() for u in umbrales}
+    ).rename_axis("Fecha")
+
+
+# --- Series virtuales ---
+def es_reconstruida(ruta):
+    """True si la ruta ETIQUETA@CODIGO.data corresponde a una serie reconstruida"""
+    try:
+        return separar_nombre(ruta)[0] in RECONSTRUIDAS
+    except ValueError:
+        return False
+
+
+def listar_reconstruidas(directorio=DATA_HIDRO, etiqueta=None):
+    """Rutas virtuales de las series reconstruidas (no existen en disco)"""
+    etiquetas = [etiqueta] if etiqueta is not None else list(RECONSTRUIDAS)
+    return [
+        directorio / f"{e}@{c}.data"
+        for c in estaciones_reconstruibles(directorio) for e in etiquetas if e in RECONSTRUIDAS
+    ]
+
+
+def serie_reconstruida(ruta):
+    """Serie reconstruida a partir de su ruta virtual ETIQUETA@CODIGO.data"""
+    etiqueta, codigo = separar_nombre(ruta)
+    if etiqueta not in RECONSTRUIDAS:
+        raise ValueError(f"{etiqueta} no es una serie reconstruida. Opciones: {list(RECONSTRUIDAS)}")
+    serie = reconstruir(codigo, ruta.parent)[RECONSTRUIDAS[etiqueta][2]].astype("float64")
+    return serie.rename(f"{etiqueta}@{codigo}")
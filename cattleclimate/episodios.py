@@ -0,0 +1,169 @@
+# cattleclimate/episodios.py
+"""Detección de episodios de estrés térmico por codificación de rachas (run-length).
+
+Un episodio es una racha de celdas consecutivas de la grilla regular con el índice
+igual o por encima de un umbral. Las celdas sin dato cortan la racha, de modo que
+un hueco nunca une dos episodios.
+
+Las duraciones solo tienen sentido si la serie es al menos tan fina como la
+grilla: las lecturas convencionales (07, 13 y 19 h) no se aceptan en una grilla
+horaria. Por estación se usa el ITH horario (`ETIQUETAS_ITH_HORARIO`): derivado
+de TA2_AUT_60 y HRA2_AUT_60 en las automáticas o reconstruido de los extremos
+diarios en las convencionales.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from cattleclimate.almacen import archivos_fuente, cargar_serie, firma_fuentes
+from cattleclimate.datos import DATA_HIDRO, indice_desde_ns, tiempos_ns
+from cattleclimate.diagnostico import registrar_cache
+from cattleclimate.indices import UMBRALES_ITH
+from cattleclimate.remuestreo import NS_HORA, remuestrear
+
+COLUMNAS_EPISODIOS = [
+    "Umbral", "Inicio", "Fin", "Duracion_h", "Pico", "Fecha_pico", "Grados_hora"
+]
+
+# ITH horario por estación, en orden de preferencia: medido (derivado) o reconstruido
+ETIQUETAS_ITH_HORARIO = ("ITH_DER_60", "ITH_REC_60")
+
+
+def rachas(mascara):
+    """Devuelve (inicios, fines) de las rachas True de una máscara; `fines` es exclusivo"""
+    mascara = np.asarray(mascara, dtype=bool)
+    bordes = np.diff(np.concatenate(([0], mascara.astype(np.int8), [0])))
+    return np.flatnonzero(bordes == 1), np.flatnonzero(bordes == -1)
+
+
+def _episodios_umbral(valores, tiempos, paso_h, umbral):
+    """Episodios de un umbral sobre una grilla regular (arreglos NumPy)"""
+    # NaN >= umbral es False, así que los huecos cortan las rachas
+    with np.errstate(invalid="ignore"):
+        sobre = valores >= umbral
+    inicios, fines = rachas(sobre)
+    if len(inicios) == 0:
+        return pd.DataFrame(columns=COLUMNAS_EPISODIOS)
+
+    largos = fines - inicios
+    exceso = np.where(sobre, valores - umbral, 0.0)
+    acumulado = np.concatenate(([0.0], np.cumsum(exceso)))
+    grados_hora = (acumulado[fines] - acumulado[inicios]) * paso_h
+
+    # Pico por racha: reduceat sobre las celdas dentro de episodios
+    celdas = np.flatnonzero(sobre)
+    desplazamientos = np.concatenate(([0], np.cumsum(largos)[:-1]))
+    picos = np.maximum.reduceat(valores[celdas], desplazamientos)
+
+    # Primera celda de cada racha que alcanza el pico
+    id_racha = np.repeat(np.arange(len(inicios)), largos)
+    es_pico = valores[celdas] == picos[id_racha]
+    _, primeras = np.unique(id_racha[es_pico], return_index=True)
+    pos_pico = celdas[es_pico][primeras]
+
+    return pd.DataFrame({
+        "Umbral": umbral,
+        "Inicio": indice_desde_ns(tiempos[inicios]),
+        "Fin": indice_desde_ns(tiempos[fines - 1]),
+        "Duracion_h": largos * paso_h,
+        "Pico": picos,
+        "Fecha_pico": indice_desde_ns(tiempos[pos_pico]),
+        "Grados_hora": grados_hora
+    })
+
+
+def detectar_episodios(serie, umbrales=UMBRALES_ITH, frecuencia="1h",
+                       estrategia="nan", max_horas=3):
+    """Episodios de excedencia de una serie para cada umbral.
+
+    La serie se lleva primero a una grilla regular (ver `remuestrear`); con
+    estrategia "lineal" se pueden cerrar huecos cortos antes de buscar rachas.
+    ValueError si la serie es más gruesa que la grilla (cada racha duraría una celda).
+    """
+    paso_ns = pd.Timedelta(frecuencia).value
+    tiempos_serie = tiempos_ns(serie.dropna().index)
+    if len(tiempos_serie) > 1:
+        intervalo = int(np.median(np.diff(tiempos_serie)))
+        if intervalo > paso_ns:
+            raise ValueError(
+                f"La serie tiene un dato cada {pd.Timedelta(intervalo)}: no se pueden medir rachas "
+                f"en una grilla de {frecuencia}; use una serie horaria o una grilla más gruesa"
+            )
+    regular = remuestrear(serie, frecuencia, estrategia=estrategia, max_horas=max_horas)
+    valores = regular["Valor"].to_numpy()
+    tiempos = tiempos_ns(regular.index)
+    paso_h = paso_ns / NS_HORA
+
+    partes = [_episodios_umbral(valores, tiempos, paso_h, u) for u in umbrales]
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return pd.DataFrame(columns=COLUMNAS_EPISODIOS)
+    return pd.concat(partes, ignore_index=True)
+
+
+def resumir_episodios(episodios, por=("Umbral",)):
+    """Número de episodios, horas totales, racha máxima y grados-hora por grupo"""
+    por = list(por)
+    if episodios.empty:
+        return pd.DataFrame(columns=por + [
+            "Episodios", "Horas_totales", "Racha_max_h", "Pico_max", "Grados_hora"
+        ])
+    return episodios.groupby(por).agg(
+        Episodios=("Inicio", "size"),
+        Horas_totales=("Duracion_h", "sum"),
+        Racha_max_h=("Duracion_h", "max"),
+        Pico_max=("Pico", "max"),
+        Grados_hora=("Grados_hora", "sum")
+    ).reset_index()
+
+
+def ruta_ith_horario(codigo, directorio=DATA_HIDRO):
+    """Ruta virtual del ITH horario de la estación (ver `ETIQUETAS_ITH_HORARIO`); None si no tiene"""
+    rutas = (directorio / f"{etiqueta}@{codigo}.data" for etiqueta in ETIQUETAS_ITH_HORARIO)
+    return next((r for r in rutas if archivos_fuente(r)), None)
+
+
+def estaciones_ith_horario(directorio=DATA_HIDRO):
+    """Códigos con ITH horario medido o reconstruido"""
+    from cattleclimate.diurno import estaciones_reconstruibles
+    from cattleclimate.psicrometria import estaciones_derivables
+
+    return sorted(set(estaciones_derivables(directorio)) | set(estaciones_reconstruibles(directorio)))
+
+
+@lru_cache(maxsize=256)
+def _episodios_estacion_cache(codigo, ruta, umbrales, frecuencia, estrategia, max_horas, firma):
+    ith = cargar_serie(ruta)
+    episodios = detectar_episodios(ith, umbrales, frecuencia, estrategia, max_horas)
+    episodios.insert(0, "Codigo", codigo)
+    return episodios
+
+
+def episodios_estacion(codigo, umbrales=UMBRALES_ITH, frecuencia="1h",
+                       estrategia="nan", max_horas=3, directorio=DATA_HIDRO):
+    """Episodios del ITH horario de una estación, en caché por (estación, umbrales, parámetros)"""
+    ruta = ruta_ith_horario(codigo, directorio)
+    if ruta is None:
+        return pd.DataFrame(columns=["Codigo"] + COLUMNAS_EPISODIOS)
+    aciertos_previos = _episodios_estacion_cache.cache_info().hits
+    episodios = _episodios_estacion_cache(
+        str(codigo), ruta, tuple(sorted(umbrales)), frecuencia, estrategia, max_horas,
+        firma_fuentes(ruta)
+    )
+    registrar_cache("episodios", _episodios_estacion_cache.cache_info().hits > aciertos_previos)
+    return episodios.copy()
+
+
+def episodios_corpus(codigos=None, umbrales=UMBRALES_ITH, frecuencia="1h",
+                     estrategia="nan", max_horas=3, directorio=DATA_HIDRO):
+    """Episodios de ITH horario para todas las estaciones (o las indicadas) en un solo DataFrame"""
+    if codigos is None:
+        codigos = estaciones_ith_horario(directorio)
+    partes = [
+        episodios_estacion(c, umbrales, frecuencia, estrategia, max_horas, directorio) for c in codigos
+    ]
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return pd.DataFrame(columns=["Codigo"] + COLUMNAS_EPISODIOS)
+    return pd.concat(partes, ignore_index=True)
@@ -0,0 +1,66 @@
+# cattleclimate/exportar.py
+"""Exportación de resultados a Excel y PDF (compartida por la página 5 y los benchmarks)."""
+import time
+from io import BytesIO
+
+import pandas as pd
+
+
+def a_excel(df):
+    """Bytes de un libro .xlsx con el DataFrame (xlsxwriter si está instalado, si no openpyxl)"""
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        df.to_excel(writer, index=False)
+    return buffer.getvalue()
+
+
+def generar_pdf(df, filename):
+    """Genera un PDF profesional con los resultados"""
+    from fpdf import FPDF  # solo se necesita al exportar
+
+    pdf = FPDF()
+    pdf.add_page()
+
+    # Encabezado
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 10, "Reporte de Datos Climáticos", 0, 1, 'C')
+    pdf.set_font("Arial", '', 12)
+    pdf.cell(0, 10, f"Archivo: {filename}", 0, 1)
+    pdf.cell(0, 10, f"Generado el: {time.strftime('%Y-%m-%d %H:%M')}", 0, 1)
+    pdf.ln(10)
+
+    # Estadísticas
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "Resumen Estadístico", 0, 1)
+    pdf.set_font("Arial", '', 10)
+
+    if df.select_dtypes(include='number').columns.any():
+        stats = df.describe().round(2)
+        for col in stats.columns:
+            pdf.cell(0, 6, f"{col}:", 0, 1)
+            pdf.cell(10)
+            pdf.multi_cell(0, 6, f"Media={stats[col]['mean']} | Min={stats[col]['min']} | Max={stats[col]['max']}")
+            pdf.ln(2)
+
+    # Muestra de datos (versión simplificada)
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "Muestra de Datos", 0, 1)
+    pdf.set_font("Arial", '', 8)
+
+    # Configuración de anchos de columna FIJOS para evitar el error
+    col_widths = [30, 60]  # Anchos fijos para la primera y demás columnas
+
+    # Encabezados
+    cols = df.columns
+    for i, col in enumerate(cols):
+        pdf.cell(col_widths[0] if i == 0 else col_widths[1], 8, str(col), border=1)
+    pdf.ln()
+
+    # Datos (limitado a 30 filas)
+    for _, row in df.head(30).iterrows():
+        for i, col in enumerate(cols):
+            pdf.cell(col_widths[0] if i == 0 else col_widths[1], 6, str(row[col]), border=1)
+        pdf.ln()
+
+    return pdf.output(dest='S').encode('latin1')
@@ -0,0 +1,210 @@
+# cattleclimate/graficos.py
+"""Exportación de gráficas Plotly a PNG, SVG y HTML bajo demanda.
+
+Rasterizar con Kaleido cuesta arrancar un navegador sin cabeza por proceso. Aquí
+las imágenes se generan en un proceso de trabajo persistente (`_pool`) que
+importa Plotly y Kaleido una sola vez: la primera imagen lo calienta y las
+siguientes lo reutilizan. El HTML no necesita Kaleido y se genera en el proceso.
+
+Cada salida se guarda en `cache/graficos/` con la huella de la figura (su JSON),
+el formato y el tamaño, de modo que la misma gráfica no se vuelve a generar entre
+reruns ni entre sesiones. `renderizar_lote` reparte las figuras que faltan entre
+varios procesos para reportes con una gráfica por estación.
+
+    from cattleclimate.graficos import renderizar, renderizar_lote
+    png = renderizar(fig, "png")                       # bytes
+    imagenes = renderizar_lote({"25025240": fig1, "25025280": fig2}, "svg", procesos=4)
+"""
+import atexit
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from cattleclimate.almacen import CACHE_DIR, guardar_bytes
+from cattleclimate.diagnostico import etapa, registrar_cache
+
+log = logging.getLogger("cattleclimate.graficos")
+
+GRAFICOS_DIR = CACHE_DIR / "graficos"
+
+FORMATOS = {"png": "image/png", "svg": "image/svg+xml", "html": "text/html"}
+ANCHO, ALTO, ESCALA = 1200, 500, 1
+MAX_ARCHIVOS = 500  # salidas guardadas; se descartan las más antiguas
+
+_pool = None
+_procesos = 0
+_candado = threading.Lock()
+
+
+# --- Huella y caché en disco ---
+def huella(fig, formato, ancho=ANCHO, alto=ALTO, escala=ESCALA):
+    """Huella (sha1) de la figura con el formato y el tamaño de salida"""
+    texto = fig if isinstance(fig, str) else fig.to_json()
+    firma = hashlib.sha1(texto.encode("utf-8"))
+    firma.update(f"|{formato}|{ancho}|{alto}|{escala}".encode())
+    return firma.hexdigest()
+
+
+def _ruta(clave, formato):
+    return GRAFICOS_DIR / f"{clave}.{formato}"
+
+
+def _leer(clave, formato):
+    try:
+        return _ruta(clave, formato).read_bytes()
+    except OSError:
+        return None
+
+
+def _guardar(clave, formato, contenido):
+    guardar_bytes(_ruta(clave, formato), contenido)
+    archivos = sorted(GRAFICOS_DIR.iterdir(), key=lambda r: r.stat().st_mtime)
+    for viejo in archivos[:max(len(archivos) - MAX_ARCHIVOS, 0)]:
+        viejo.unlink(missing_ok=True)
+
+
+# --- Proceso de trabajo ---
+def _iniciar_trabajador():
+    """Deja abierto en el proceso el navegador de Kaleido para reutilizarlo entre imágenes"""
+    try:
+        import kaleido
+    except ImportError:
+        log.warning("Kaleido no está instalado: solo se podrá exportar HTML")
+        return
+    try:
+        kaleido.start_sync_server(silence_warnings=True)
+    except (AttributeError, RuntimeError) as e:
+        # AttributeError: Kaleido anterior a 1.1; cada imagen arrancará su propio navegador
+        log.warning("No se pudo dejar Kaleido abierto (%s: %s); se requiere kaleido>=1.1",
+                    type(e).__name__, e)
+
+
+def _a_imagen(figura_json, formato, ancho, alto, escala):
+    """Se ejecuta en el proceso de trabajo: Plotly y Kaleido quedan cargados entre llamadas"""
+    import plotly.io as pio
+
+    figura = pio.from_json(figura_json, skip_invalid=True)
+    return pio.to_image(figura, format=formato, width=ancho, height=alto, scale=escala)
+
+
+def _obtener_pool(procesos=1):
+    """Pool persistente; se recrea solo si se piden más procesos"""
+    global _pool, _procesos
+    with _candado:
+        if _pool is None or procesos > _procesos:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: el servidor de Streamlit tiene hilos y no conviene hacer fork
+            _pool = ProcessPoolExecutor(
+                procesos, mp_context=multiprocessing.get_context("spawn"), initializer=_iniciar_trabajador
+            )
+            _procesos = procesos
+        return _pool
+
+
+@atexit.register
+def detener():
+    """Cierra el proceso de trabajo (también al salir del intérprete)"""
+    global _pool, _procesos
+    with _candado:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _procesos = None, 0
+
+
+def _error(e):
+    if isinstance(e, BrokenProcessPool):
+        detener()  # el siguiente pedido arranca un proceso nuevo
+    return RuntimeError(
+        f"No se pudo generar la imagen ({type(e).__name__}: {e}). "
+        "Verifique que kaleido esté instalado; la exportación HTML no lo necesita."
+    )
+
+
+# --- Exportación ---
+def renderizar(fig, formato="png", ancho=ANCHO, alto=ALTO, escala=ESCALA, figura_json=None):
+    """Bytes de la figura en `formato` (png, svg o html), desde la caché si ya se generó.
+
+    `figura_json` evita volver a serializar la figura si quien llama ya lo hizo.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}. Opciones: {list(FORMATOS)}")
+    figura_json = figura_json or fig.to_json()
+    clave = huella(figura_json, formato, ancho, alto, escala)
+    contenido = _leer(clave, formato)
+    registrar_cache("graficos", contenido is not None)
+    if contenido is not None:
+        return contenido
+    with etapa("grafico", formato=formato) as reg:
+        if formato == "html":
+            contenido = fig.to_html(include_plotlyjs=True, full_html=True).encode("utf-8")
+        else:
+            try:
+                contenido = _obtener_pool().submit(_a_imagen, figura_json, formato, ancho, alto, escala).result()
+            except Exception as e:
+                raise _error(e) from e
+        reg["bytes"] = len(contenido)
+    _guardar(clave, formato, contenido)
+    return contenido
+
+
+def renderizar_lote(figuras, formato="png", procesos=None, ancho=ANCHO, alto=ALTO, escala=ESCALA):
+    """{nombre: bytes} de varias figuras; las que no están en caché se generan en paralelo"""
+    if formato == "html":
+        return {nombre: renderizar(fig, formato) for nombre, fig in figuras.items()}
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}. Opciones: {list(FORMATOS)}")
+    resultado, pendientes = {}, {}
+    for nombre, fig in figuras.items():
+        figura_json = fig.to_json()
+        clave = huella(figura_json, formato, ancho, alto, escala)
+        contenido = _leer(clave, formato)
+        registrar_cache("graficos", contenido is not None)
+        if contenido is not None:
+            resultado[nombre] = contenido
+        else:
+            pendientes[nombre] = (clave, figura_json)
+    if pendientes:
+        procesos = min(procesos or os.cpu_count(), len(pendientes))
+        with etapa("grafico.lote", formato=formato, filas=len(pendientes)):
+            pool = _obtener_pool(procesos)
+            futuros = {
+                nombre: pool.submit(_a_imagen, figura_json, formato, ancho, alto, escala)
+                for nombre, (_, figura_json) in pendientes.items()
+            }
+            for nombre, futuro in futuros.items():
+                try:
+                    contenido = futuro.result()
+                except Exception as e:
+                    raise _error(e) from e
+                _guardar(pendientes[nombre][0], formato, contenido)
+                resultado[nombre] = contenido
+    return {nombre: resultado[nombre] for nombre in figuras}
+
+
+# --- Reportes ---
+def figura_serie(serie, titulo=None, max_puntos=5_000):
+    """Gráfica de línea simple de una serie (submuestreada para el reporte)"""
+    import plotly.graph_objects as go
+
+    paso = max(len(serie) // max_puntos, 1)
+    muestra = serie.iloc[::paso]
+    fig = go.Figure(go.Scatter(x=muestra.index, y=muestra.to_numpy(), mode="lines"))
+    fig.update_layout(title=titulo or serie.name, margin=dict(t=50, b=30), xaxis_title="Fecha")
+    return fig
+
+
+def graficas_por_estacion(etiqueta, codigos=None, formato="png", procesos=None):
+    """Una gráfica por estación de la variable `etiqueta`: {codigo: bytes}"""
+    from cattleclimate.almacen import cargar_serie
+    from cattleclimate.datos import listar_archivos, separar_nombre
+
+    rutas = listar_archivos(etiqueta=etiqueta)
+    if codigos is not None:
+        rutas = [r for r in rutas if separar_nombre(r)[1] in set(map(str, codigos))]
+    figuras = {separar_nombre(r)[1]: figura_serie(cargar_serie(r), r.stem) for r in rutas}
+    return renderizar_lote(figuras, formato, procesos)
@@ -0,0 +1,188 @@
+# cattleclimate/grilla.py
+"""Tabla paginada para Streamlit sobre tablas Arrow.
+
+    from cattleclimate.grilla import tabla_paginada
+    tabla_paginada(vista, clave="consolidador")
+
+El orden y los filtros se resuelven sobre la tabla Arrow completa (sin pasar por
+pandas) y solo la página visible, con las columnas elegidas, se convierte a
+DataFrame y se envía al navegador. Para ordenar se usa una selección top-k
+cuando la página pedida está cerca del principio, que es lo habitual, en lugar
+de ordenar todas las filas.
+
+En lugar de la tabla se puede pasar una función `leer(desplazamiento, limite)`
+con el `total` de filas (p. ej. sobre `consulta.consultar`): sin orden ni filtro
+solo se lee la página visible, y la tabla completa se lee solo al ordenar o filtrar.
+
+    leer = lambda desplazamiento, limite: consultar(desplazamiento=desplazamiento, limite=limite)
+    tabla_paginada(leer, clave="metadatos", total=total)
+"""
+import math
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import streamlit as st
+
+from cattleclimate.diagnostico import etapa
+
+TAMANOS_PAGINA = (25, 100, 500, 2000)
+SIN_ORDEN = "(sin orden)"
+_COMPARACION = re.compile(r"^\s*(>=|<=|!=|>|<|=)?\s*(.+?)\s*$")
+_OPERADORES = {
+    ">=": pc.greater_equal, "<=": pc.less_equal, ">": pc.greater,
+    "<": pc.less, "=": pc.equal, "!=": pc.not_equal
+}
+
+
+# --- Operaciones sobre Arrow ---
+def _por_trozos(columna, funcion):
+    """Aplica `funcion` a cada trozo; en los diccionarios, solo a los valores distintos"""
+    trozos = []
+    for trozo in columna.chunks:
+        if pa.types.is_dictionary(trozo.type):
+            trozos.append(pc.take(funcion(trozo.dictionary), trozo.indices))
+        else:
+            trozos.append(funcion(trozo))
+    return pa.chunked_array(trozos, type=trozos[0].type) if trozos else funcion(pa.array([], pa.string()))
+
+
+def _clave_orden(columna):
+    """Columna ordenable: los diccionarios se reemplazan por el rango de su valor"""
+    if not pa.types.is_dictionary(columna.type):
+        return columna
+    return _por_trozos(columna, lambda valores: pc.rank(valores, sort_keys="ascending", tiebreaker="dense"))
+
+
+def _escalar(texto, tipo):
+    if pa.types.is_timestamp(tipo):
+        return pa.scalar(pd.Timestamp(texto).to_datetime64(), pa.timestamp("us")).cast(tipo)
+    if pa.types.is_integer(tipo):
+        return pa.scalar(int(texto), tipo)
+    return pa.scalar(float(texto), tipo)
+
+
+def filtrar(tabla, columna, expresion):
+    """Filtra por una columna.
+
+    Columnas numéricas y de fecha: `>= 30`, `< 2021-01-01`, `= 5`, o un rango `a..b`.
+    Texto: contiene (sin distinguir mayúsculas).
+    """
+    expresion = (expresion or "").strip()
+    if not expresion or columna not in tabla.column_names:
+        return tabla
+    datos = tabla[columna]
+    tipo = datos.type.value_type if pa.types.is_dictionary(datos.type) else datos.type
+    if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+        mascara = _por_trozos(datos, lambda v: pc.match_substring(v, expresion, ignore_case=True))
+        return tabla.filter(pc.fill_null(mascara, False))
+    if not (pa.types.is_integer(tipo) or pa.types.is_floating(tipo) or pa.types.is_timestamp(tipo)):
+        raise ValueError(f"No se puede filtrar la columna {columna} ({tipo})")
+    try:
+        if ".." in expresion:
+            desde, hasta = (_escalar(p.strip(), tipo) for p in expresion.split("..", 1))
+            mascara = pc.and_(pc.greater_equal(datos, desde), pc.less_equal(datos, hasta))
+        else:
+            operador, valor = _COMPARACION.match(expresion).groups()
+            mascara = _OPERADORES[operador or "="](datos, _escalar(valor, tipo))
+    except (ValueError, TypeError):
+        raise ValueError(f"Filtro inválido para {columna}: {expresion}")
+    return tabla.filter(pc.fill_null(mascara, False))
+
+
+def pagina(tabla, numero, tamano, orden=None, descendente=False, columnas=None):
+    """Filas de la página `numero` (desde 1) con el orden pedido, solo con `columnas`"""
+    # Los rangos de un diccionario solo se comparan entre trozos si comparten diccionario
+    tabla = tabla.unify_dictionaries()
+    total = tabla.num_rows
+    inicio = (numero - 1) * tamano
+    fin = min(inicio + tamano, total)
+    if orden is None or total == 0:
+        trozo = tabla.slice(inicio, max(fin - inicio, 0))
+    else:
+        sentido = "descending" if descendente else "ascending"
+        claves = pa.table({
+            "clave": _clave_orden(tabla[orden]),
+            # Desempate por posición: las páginas no se solapan aunque haya valores repetidos
+            "fila": pa.array(np.arange(total, dtype=np.int64))
+        })
+        orden_claves = [("clave", sentido), ("fila", "ascending")]
+        if fin <= total // 4:
+            indices = pc.select_k_unstable(claves, fin, orden_claves)
+        else:
+            indices = pc.sort_indices(claves, orden_claves)
+        trozo = tabla.take(indices.slice(inicio, fin - inicio))
+    return trozo.select(columnas) if columnas else trozo
+
+
+# --- Componente de Streamlit ---
+def tabla_paginada(tabla, clave, tamano=100, columnas=None, orden=None, descendente=False, total=None):
+    """Muestra una tabla Arrow (o DataFrame) por páginas, con orden y filtro del lado del servidor.
+
+    `tabla` también puede ser una función `leer(desplazamiento, limite)` con su
+    `total` de filas (ver el módulo). Devuelve la tabla Arrow filtrada completa
+    (por ejemplo, para exportarla), o None si solo se leyó la página visible.
+    """
+    leer = tabla if callable(tabla) else None
+    if leer is not None:
+        if total is None:
+            raise ValueError("Con una función de lectura hace falta el total de filas")
+        tabla = leer(0, 0)  # solo el esquema
+    elif isinstance(tabla, pd.DataFrame):
+        tabla = pa.Table.from_pandas(tabla, preserve_index=False)
+    nombres = tabla.column_names
+
+    with st.expander("⚙️ Columnas, orden y filtro", expanded=False):
+        c1, c2, c3 = st.columns([3, 2, 1])
+        visibles = c1.multiselect("Columnas", nombres, default=columnas or nombres, key=f"{clave}_columnas")
+        opciones = [SIN_ORDEN] + nombres
+        por = c2.selectbox(
+            "Ordenar por", opciones, index=opciones.index(orden) if orden in nombres else 0, key=f"{clave}_orden"
+        )
+        desc = c3.checkbox("Descendente", value=descendente, key=f"{clave}_desc")
+        c4, c5 = st.columns([1, 3])
+        columna_filtro = c4.selectbox("Filtrar", nombres, key=f"{clave}_filtro_col")
+        expresion = c5.text_input(
+            "Valor", key=f"{clave}_filtro", placeholder="texto, >= 30, 2021-01-01..2021-06-30"
+        )
+
+    por = None if por == SIN_ORDEN else por
+    perezosa = leer is not None and por is None and not (expresion or "").strip()
+    if leer is not None and not perezosa:
+        # Ordenar o filtrar necesita todas las filas
+        with etapa("grilla.leer", clave=clave) as reg:
+            tabla = leer(0, None)
+            reg["filas"] = tabla.num_rows
+    if perezosa:
+        filtrada = None
+    else:
+        try:
+            filtrada = filtrar(tabla, columna_filtro, expresion)
+        except ValueError as e:
+            st.warning(str(e))
+            filtrada = tabla
+        total = filtrada.num_rows
+    c1, c2, c3 = st.columns([1, 1, 4])
+    tamanos = sorted(set(TAMANOS_PAGINA) | {tamano})
+    filas = c1.selectbox("Filas", tamanos, index=tamanos.index(tamano), key=f"{clave}_tamano")
+    paginas = max(math.ceil(total / filas), 1)
+    if st.session_state.setdefault(f"{clave}_pagina", 1) > paginas:
+        # El filtro dejó menos páginas que la que estaba abierta
+        st.session_state[f"{clave}_pagina"] = paginas
+    numero = c2.number_input("Página", min_value=1, max_value=paginas, step=1, key=f"{clave}_pagina")
+    numero = min(int(numero), paginas)
+
+    with etapa("grilla", clave=clave) as reg:
+        if perezosa:
+            trozo = leer((numero - 1) * filas, filas)
+            trozo = trozo.select(visibles) if visibles else trozo
+        else:
+            trozo = pagina(filtrada, numero, filas, por, desc, visibles or None)
+        df = trozo.to_pandas()
+        reg["filas"] = len(df)
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    inicio = (numero - 1) * filas
+    c3.caption(f"Filas {min(inicio + 1, total):,}–{min(inicio + filas, total):,} de {total:,} · página {numero} de {paginas}")
+    return filtrada
@@ -0,0 +1,125 @@
+# cattleclimate/indices.py
+"""Índices de confort térmico para ganado vacuno (ITH, ITGH, CTR)."""
+import numpy as np
+import pandas as pd
+
+from cattleclimate.almacen import archivos_fuente, cargar_serie, firma_fuentes
+from cattleclimate.datos import DATA_HIDRO, listar_archivos, separar_nombre
+
+# Etiquetas IDEAM usadas por defecto para cada variable de entrada
+VARIABLES_INDICES = {
+    "Tbs": "TSSM_CON",   # Temperatura de bulbo seco
+    "Tbh": "THSM_CON",   # Temperatura de bulbo húmedo
+    "Tr": "TPR_CAL",     # Temperatura de punto de rocío
+    "Vv": "VVAG_CON"     # Velocidad del viento
+}
+
+# Juegos de entrada por tipo de estación, en orden de preferencia. Las automáticas
+# solo miden temperatura y humedad: Tbh y Tr salen de `cattleclimate.psicrometria`
+FUENTES_INDICES = {
+    "convencional": {"Tbs": "TSSM_CON", "Tbh": "THSM_CON", "Tr": "TPR_CAL"},
+    "automatica": {"Tbs": "TA2_AUT_60", "Tbh": "TBH_DER_60", "Tr": "TPR_DER_60"},
+}
+FUENTES_VIENTO = ("VVAG_CON", "VV_AUT_10", "VV_AUT_2", "VV_10_MEDIA_H")
+
+# Umbrales de ITH: alerta, peligro y emergencia
+UMBRALES_ITH = (72, 79, 84)
+
+
+def calcular_ith(tbs, tbh):
+    """ITH (Índice de Temperatura y Humedad)"""
+    return 0.72 * (tbs + tbh) + 40.6
+
+
+def calcular_indices(df):
+    """Agrega ITH, Tgn, ITGH y CTR a un DataFrame con columnas Tbs, Tbh, Tr y Vv"""
+    df = df.copy()
+    # ITH (Índice de Temperatura y Humedad)
+    df["ITH"] = calcular_ith(df["Tbs"], df["Tbh"])
+
+    # ITGH (Índice de Temperatura de Globo y Humedad)
+    df["Tgn"] = 0.0162 * df["Tbs"]**2 + 0.8562 * df["Tbs"] - 0.9387
+    df["ITGH"] = df["Tgn"] + 0.36 * df["Tr"] + 41.5
+
+    # CTR (Carga Térmica Radiante)
+    df["CTR"] = 5.67e-8 * (100 * np.sqrt(2.51 * df["Vv"]**0.5 * (df["Tgn"] - df["Tbs"])) + (df["Tgn"] / 100)**44)**4
+    return df
+
+
+def archivos_ith(codigo, directorio=DATA_HIDRO):
+    """Archivos reales de los que salen Tbs y Tbh de una estación (None si falta alguna).
+
+    Para una estación automática son TA2 y HRA2, de los que se derivan ambas.
+    """
+    fuentes = fuentes_estacion(codigo, directorio)
+    if fuentes["Tbs"] is None or fuentes["Tbh"] is None:
+        return None
+    return list(dict.fromkeys(archivos_fuente(fuentes["Tbs"]) + archivos_fuente(fuentes["Tbh"])))
+
+
+def firma_indices(codigo, directorio=DATA_HIDRO):
+    """Huella de los archivos reales de Tbs, Tbh, Tr y Vv de una estación (para cachés e ETag)"""
+    return tuple(firma_fuentes(r) if r is not None else None for r in fuentes_estacion(codigo, directorio).values())
+
+
+def serie_ith(codigo, directorio=DATA_HIDRO, lector=cargar_serie):
+    """Serie de ITH de una estación en las fechas donde coinciden Tbs y Tbh.
+
+    Tbs y Tbh salen de `fuentes_estacion`; `lector` debe saber leer las series
+    derivadas (`almacen.cargar_serie`).
+    """
+    fuentes = fuentes_estacion(codigo, directorio)
+    if fuentes["Tbs"] is None or fuentes["Tbh"] is None:
+        return pd.Series(dtype="float64", name="ITH")
+    df = pd.concat([lector(fuentes["Tbs"]), lector(fuentes["Tbh"])], axis=1, join="inner")
+    return calcular_ith(df.iloc[:, 0], df.iloc[:, 1]).rename("ITH")
+
+
+def tabla_indices(codigo, directorio=DATA_HIDRO, lector=cargar_serie):
+    """Tbs, Tbh, Tr y Vv de una estación en las fechas comunes, con ITH, Tgn, ITGH y CTR.
+
+    DataFrame vacío si a la estación le falta alguna de las cuatro variables.
+    """
+    fuentes = fuentes_estacion(codigo, directorio)
+    if any(r is None for r in fuentes.values()):
+        return pd.DataFrame(columns=list(fuentes) + ["ITH", "Tgn", "ITGH", "CTR"])
+    df = pd.concat([lector(r) for r in fuentes.values()], axis=1, join="inner")
+    df.columns = list(fuentes)
+    return calcular_indices(df)
+
+
+def fuentes_estacion(codigo, directorio=DATA_HIDRO):
+    """Rutas de Tbs, Tbh, Tr y Vv de una estación (None en las que falten).
+
+    Se usa el primer juego de `FUENTES_INDICES` completo en la estación, para no
+    mezclar lecturas convencionales con automáticas; las rutas de variables
+    derivadas son virtuales y se leen con `almacen.cargar_serie`.
+    """
+    from cattleclimate.psicrometria import estaciones_derivables, es_derivada
+
+    derivable = str(codigo) in estaciones_derivables(directorio)
+
+    def disponible(etiqueta):
+        ruta = directorio / f"{etiqueta}@{codigo}.data"
+        return ruta.exists() or (derivable and es_derivada(ruta))
+
+    rutas = dict.fromkeys(["Tbs", "Tbh", "Tr", "Vv"])
+    for juego in FUENTES_INDICES.values():
+        if all(disponible(e) for e in juego.values()):
+            rutas.update({var: directorio / f"{e}@{codigo}.data" for var, e in juego.items()})
+            break
+    else:
+        # Ningún juego completo: lo que haya, variable por variable
+        for var in ("Tbs", "Tbh", "Tr"):
+            etiqueta = next((j[var] for j in FUENTES_INDICES.values() if disponible(j[var])), None)
+            rutas[var] = directorio / f"{etiqueta}@{codigo}.data" if etiqueta else None
+    viento = next((e for e in FUENTES_VIENTO if disponible(e)), None)
+    rutas["Vv"] = directorio / f"{viento}@{codigo}.data" if viento else None
+    return rutas
+
+
+def estaciones_con_ith(directorio=DATA_HIDRO):
+    """Códigos de estación con Tbs y Tbh, medidas o derivadas (ver `fuentes_estacion`)"""
+    etiquetas_tbs = {juego["Tbs"] for juego in FUENTES_INDICES.values()}
+    codigos = {separar_nombre(r)[1] for e in etiquetas_tbs for r in listar_archivos(directorio, etiqueta=e)}
+    return sorted(c for c in codigos if archivos_ith(c, directorio) is not None)
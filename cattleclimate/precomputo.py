@@ -0,0 +1,203 @@
+# cattleclimate/precomputo.py
+"""Trabajador de precálculo: vigila `datos/hidrometeorologicos` y llena la caché compartida.
+
+Se ejecuta fuera de Streamlit, por ejemplo en una terminal aparte o como servicio:
+
+    python -m cattleclimate.precomputo            # vigila cada 60 s
+    python -m cattleclimate.precomputo --una-vez  # un solo ciclo (cron)
+    python -m cattleclimate.precomputo --directorio /ruta/a/datos   # otra carpeta de .data
+
+En cada ciclo solo se vuelven a leer los archivos .data nuevos o modificados; los
+agregados mensuales, los índices y el dataset Parquet del modo SQL se actualizan
+únicamente para lo afectado.
+Las páginas leen los resultados listos con `cattleclimate.almacen`.
+"""
+import argparse
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from cattleclimate.almacen import (
+    AGREGADOS_DIR, INDICES_DIR, archivos_fuente, guardar_manifiesto, guardar_serie, guardar_tabla, huella,
+    leer_manifiesto, leer_tabla, ruta_serie, serie_vigente
+)
+from cattleclimate.dataset import sincronizar
+from cattleclimate.datos import DATA_HIDRO, leer_serie, listar_archivos, separar_nombre
+from cattleclimate.episodios import episodios_estacion, estaciones_ith_horario, ruta_ith_horario
+from cattleclimate.indices import archivos_ith, estaciones_con_ith, serie_ith
+
+log = logging.getLogger("cattleclimate.precomputo")
+
+MENSUAL_PATH = AGREGADOS_DIR / "mensual.arrow"
+EPISODIOS_PATH = INDICES_DIR / "episodios.arrow"
+
+
+def agregado_mensual(serie):
+    """Media, máximo, mínimo y número de registros por año y mes"""
+    etiqueta, codigo = separar_nombre(serie.name)
+    grupos = serie.groupby([serie.index.year.rename("Anio"), serie.index.month.rename("Mes")])
+    df = grupos.agg(["mean", "max", "min", "size"]).reset_index()
+    df.columns = ["Anio", "Mes", "Media", "Maximo", "Minimo", "Registros"]
+    df.insert(0, "Codigo", codigo)
+    df.insert(0, "Etiqueta", etiqueta)
+    return df
+
+
+def _actualizar_series(archivos, manifiesto, forzar):
+    """Lee y guarda las series nuevas o modificadas; devuelve {nombre: serie}"""
+    nuevas = {}
+    for ruta in archivos:
+        if not forzar and serie_vigente(ruta, manifiesto):
+            continue
+        serie = leer_serie(ruta)
+        guardar_serie(serie, ruta_serie(ruta.stem))
+        registrar_serie(manifiesto, ruta, resumen_serie(serie))
+        nuevas[ruta.stem] = serie
+        log.info("Serie precalculada: %s (%d filas)", ruta.stem, len(serie))
+    return nuevas
+
+
+def eliminar_huerfanas(archivos, manifiesto):
+    """Quita de la caché las series cuyo archivo .data ya no existe"""
+    vigentes = {r.stem for r in archivos}
+    huerfanas = [nombre for nombre in manifiesto["series"] if nombre not in vigentes]
+    for nombre in huerfanas:
+        ruta_serie(nombre).unlink(missing_ok=True)
+        del manifiesto["series"][nombre]
+        log.info("Serie eliminada de la caché: %s", nombre)
+    return huerfanas
+
+
+def resumen_serie(serie):
+    """Filas y rango de fechas de una serie, tal como se anotan en el manifiesto"""
+    return {
+        "filas": len(serie),
+        "inicio": str(serie.index.min()) if len(serie) else None,
+        "fin": str(serie.index.max()) if len(serie) else None
+    }
+
+
+def registrar_serie(manifiesto, ruta, resumen):
+    """Anota en el manifiesto la huella y el resumen de una serie recién guardada en la caché"""
+    manifiesto["series"][ruta.stem] = {**huella(ruta), **resumen}
+
+
+def indices_estacion(codigo, directorio=DATA_HIDRO):
+    """Calcula y guarda el ITH de una estación; devuelve sus episodios (con columna Codigo).
+
+    Los episodios se miden sobre el ITH horario (ver `episodios.ruta_ith_horario`).
+    """
+    ith = serie_ith(codigo, directorio)
+    if ith.empty:
+        # Estación con ITH horario pero sin Tbs y Tbh: la tabla vacía marca que ya se calculó
+        ith.index = pd.DatetimeIndex([], name="Fecha")
+    guardar_tabla(ith.to_frame("ITH"), INDICES_DIR / f"ITH@{codigo}.arrow")
+    return episodios_estacion(codigo, directorio=directorio)
+
+
+def estaciones_indices(directorio=DATA_HIDRO):
+    """Estaciones con ITH de Tbs y Tbh o con ITH horario (las reconstruidas solo tienen este)"""
+    return sorted(set(estaciones_con_ith(directorio)) | set(estaciones_ith_horario(directorio)))
+
+
+def archivos_indices(codigo, directorio=DATA_HIDRO):
+    """Archivos de los que salen el ITH y los episodios de una estación"""
+    horario = ruta_ith_horario(codigo, directorio)
+    return (archivos_ith(codigo, directorio) or []) + (archivos_fuente(horario) if horario else [])
+
+
+def _actualizar_mensual(nuevas, huerfanas):
+    previo = leer_tabla(MENSUAL_PATH)
+    partes = []
+    if previo is not None:
+        cambiadas = [separar_nombre(n) for n in list(nuevas) + huerfanas]
+        claves = previo["Etiqueta"] + "@" + previo["Codigo"]
+        partes.append(previo[~claves.isin([f"{e}@{c}" for e, c in cambiadas])])
+    partes += [agregado_mensual(s) for s in nuevas.values() if len(s)]
+    if partes:
+        mensual = pd.concat(partes, ignore_index=True)
+        guardar_tabla(mensual, MENSUAL_PATH)
+
+
+def _actualizar_indices(nuevas, huerfanas, forzar, directorio=DATA_HIDRO):
+    estaciones = estaciones_indices(directorio)
+    cambiadas = set(nuevas) | set(huerfanas)
+    afectadas = {separar_nombre(n)[1] for n in huerfanas} | {
+        c for c in estaciones if any(r.stem in cambiadas for r in archivos_indices(c, directorio))
+    } if cambiadas else set()
+    recalcular = [
+        c for c in estaciones
+        if forzar or c in afectadas or not (INDICES_DIR / f"ITH@{c}.arrow").exists()
+    ]
+    if not recalcular:
+        return
+
+    previos = leer_tabla(EPISODIOS_PATH)
+    partes = []
+    if previos is not None:
+        partes.append(previos[previos["Codigo"].isin(estaciones) & ~previos["Codigo"].isin(recalcular)])
+
+    for codigo in recalcular:
+        partes.append(indices_estacion(codigo, directorio))
+        log.info("ITH y episodios precalculados: estación %s", codigo)
+
+    partes = [p for p in partes if not p.empty]
+    if partes:
+        guardar_tabla(pd.concat(partes, ignore_index=True), EPISODIOS_PATH)
+
+
+def precomputar(forzar=False, directorio=DATA_HIDRO):
+    """Un ciclo de precálculo. Devuelve el número de series actualizadas o eliminadas"""
+    manifiesto = leer_manifiesto()
+    archivos = listar_archivos(directorio)
+
+    nuevas = _actualizar_series(archivos, manifiesto, forzar)
+    huerfanas = eliminar_huerfanas(archivos, manifiesto)
+    # Estaciones que acaban de tener ITH sin que cambie un .data (p. ej. al derivar Tbh en las automáticas)
+    sin_ith = any(not (INDICES_DIR / f"ITH@{c}.arrow").exists() for c in estaciones_indices(directorio))
+    if nuevas or huerfanas or sin_ith or manifiesto.get("generado") is None:
+        # El manifiesto se guarda antes de los índices para que estos lean la caché vigente
+        guardar_manifiesto(manifiesto)
+        _actualizar_mensual(nuevas, huerfanas)
+        _actualizar_indices(nuevas, huerfanas, forzar, directorio)
+        sincronizar(directorio, forzar=forzar)
+        manifiesto["generado"] = datetime.now().isoformat(timespec="seconds")
+        guardar_manifiesto(manifiesto)
+    return len(nuevas) + len(huerfanas)
+
+
+def vigilar(intervalo=60, directorio=DATA_HIDRO):
+    """Ejecuta ciclos de precálculo indefinidamente cada `intervalo` segundos"""
+    log.info("Vigilando %s cada %d s", directorio, intervalo)
+    while True:
+        try:
+            cambios = precomputar(directorio=directorio)
+            if cambios:
+                log.info("Ciclo terminado: %d series actualizadas", cambios)
+        except Exception:
+            log.exception("Error en el ciclo de precálculo")
+        time.sleep(intervalo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precálculo de la caché de CattleClimate")
+    parser.add_argument("--una-vez", action="store_true", help="ejecuta un solo ciclo y termina")
+    parser.add_argument("--forzar", action="store_true", help="recalcula todo aunque no haya cambios")
+    parser.add_argument("--intervalo", type=int, default=60, help="segundos entre ciclos")
+    parser.add_argument("--directorio", type=Path, default=DATA_HIDRO, help="carpeta de los archivos .data")
+    args = parser.parse_args(argv)
+    if not args.directorio.is_dir():
+        parser.error(f"No existe la carpeta {args.directorio}")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.una_vez or args.forzar:
+        precomputar(forzar=args.forzar, directorio=args.directorio)
+    if not args.una_vez:
+        vigilar(args.intervalo, args.directorio)
+
+
+if __name__ == "__main__":
+    main()
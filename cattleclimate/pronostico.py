@@ -0,0 +1,251 @@
+# cattleclimate/pronostico.py
+"""Pronóstico de ITH a 24-72 horas por estación con regresión armónica.
+
+El modelo de cada estación tiene dos partes:
+
+- un ciclo medio con armónicos diarios (`ARMONICOS_DIA`) y anuales
+  (`ARMONICOS_ANIO`) ajustado por mínimos cuadrados sobre el ITH horario;
+- la persistencia de la anomalía: el residuo de la última hora observada decae
+  como un AR(1) horario (`phi`), que también da el ancho de los intervalos.
+
+El ajuste se guarda como estadísticas suficientes (XᵀX, Xᵀy, yᵀy y sus productos
+con la hora anterior), que son sumas: cuando llegan datos nuevos solo se acumulan
+las horas posteriores al último ajuste, y los coeficientes se resuelven para todas
+las estaciones a la vez con `np.linalg.solve` sobre la pila de sistemas. Las
+estadísticas se guardan en `cache/pronostico/` con la huella de los archivos fuente
+(y de la calibración, para las reconstruidas) y un sha1 de las horas ya sumadas:
+si cambió alguna de ellas, el ajuste se rehace completo.
+
+El ITH horario es el mismo que usan los episodios (`episodios.ruta_ith_horario`):
+`ITH_DER_60`, derivado de `cattleclimate.psicrometria`, o en las estaciones
+convencionales `ITH_REC_60`, reconstruido desde extremos diarios
+(`cattleclimate.diurno`). El pronóstico arranca en la hora siguiente a la
+última observación.
+
+    from cattleclimate.pronostico import pronosticar, pronosticar_corpus
+    pronosticar("25025280", horas=48)   # Pronostico, Inferior, Superior, P(ITH>=umbral)
+    pronosticar_corpus(horas=24)        # todas las estaciones, en formato largo
+"""
+import json
+from functools import lru_cache
+from math import erfc, sqrt
+
+import numpy as np
+import pandas as pd
+
+from cattleclimate.almacen import CACHE_DIR, cargar_serie, firma_fuentes, guardar_npz, huella_datos, leer_npz
+from cattleclimate.datos import DATA_HIDRO, tiempos_ns
+from cattleclimate.diagnostico import etapa, registrar_cache
+from cattleclimate.episodios import estaciones_ith_horario, ruta_ith_horario
+from cattleclimate.indices import UMBRALES_ITH
+from cattleclimate.remuestreo import NS_DIA, NS_HORA
+
+PRONOSTICO_DIR = CACHE_DIR / "pronostico"
+
+ARMONICOS_DIA = 3
+ARMONICOS_ANIO = 2
+NS_ANIO = int(365.2425 * NS_DIA)
+HORIZONTE_MAX = 72  # horas
+NIVEL = 0.9  # probabilidad cubierta por los intervalos
+Z_NIVEL = 1.6449  # cuantil normal de (1 + NIVEL) / 2
+MIN_HORAS = 24 * 60  # horas con dato para ajustar un modelo
+
+# Tipo de fuente según la serie de la que sale el ITH horario
+TIPOS_FUENTE = {"ITH_DER_60": "automatica", "ITH_REC_60": "reconstruida"}
+
+
+# --- ITH horario ---
+def tipo_fuente(codigo, directorio=DATA_HIDRO):
+    """"automatica" o "reconstruida" según la serie de ITH horario de la estación; None si no tiene"""
+    ruta = ruta_ith_horario(codigo, directorio)
+    return None if ruta is None else TIPOS_FUENTE[ruta.stem.split("@")[0]]
+
+
+# --- Regresión armónica ---
+def diseno(tiempos):
+    """Matriz de diseño: constante y armónicos diarios y anuales para tiempos en ns"""
+    tiempos = np.asarray(tiempos, dtype=np.int64)
+    fase_dia = 2 * np.pi * (tiempos % NS_DIA) / NS_DIA
+    fase_anio = 2 * np.pi * (tiempos % NS_ANIO) / NS_ANIO
+    columnas = [np.ones(len(tiempos))]
+    for fase, armonicos in ((fase_dia, ARMONICOS_DIA), (fase_anio, ARMONICOS_ANIO)):
+        for k in range(1, armonicos + 1):
+            columnas += [np.cos(k * fase), np.sin(k * fase)]
+    return np.column_stack(columnas)
+
+
+def estadisticas(tiempos, valores, previo=None):
+    """Estadísticas suficientes de un tramo; `previo` (tiempo, valor) enlaza la primera hora"""
+    tiempos = np.asarray(tiempos, dtype=np.int64)
+    valores = np.asarray(valores, dtype="float64")
+    x = diseno(tiempos)
+    if previo is not None:
+        t_lag = np.concatenate([[previo[0]], tiempos])
+        y_lag = np.concatenate([[previo[1]], valores])
+        x_lag = np.vstack([diseno([previo[0]]), x])
+    else:
+        t_lag, y_lag, x_lag = tiempos, valores, x
+    # Pares de horas consecutivas para la autocorrelación de los residuos
+    seguidas = np.diff(t_lag) == NS_HORA
+    actual, anterior = x_lag[1:][seguidas], x_lag[:-1][seguidas]
+    y_actual, y_anterior = y_lag[1:][seguidas], y_lag[:-1][seguidas]
+    return {
+        "xtx": x.T @ x, "xty": x.T @ valores, "yty": valores @ valores, "n": len(valores),
+        "xtx_lag": actual.T @ anterior, "xty_lag": actual.T @ y_anterior, "xly": anterior.T @ y_actual,
+        "yty_lag": y_actual @ y_anterior, "n_lag": int(seguidas.sum()),
+    }
+
+
+def sumar(a, b):
+    """Estadísticas de la unión de dos tramos"""
+    return {k: a[k] + b[k] for k in a}
+
+
+def ajustar(est):
+    """Coeficientes, varianza residual y phi; acepta estadísticas apiladas por estación"""
+    xtx, xty = np.asarray(est["xtx"]), np.asarray(est["xty"])
+    p = xtx.shape[-1]
+    # Un poco de regularización por si algún armónico no tiene datos (registros cortos)
+    regularizacion = 1e-9 * np.trace(xtx, axis1=-2, axis2=-1)[..., None, None] * np.eye(p)
+    beta = np.linalg.solve(xtx + regularizacion, xty[..., None])[..., 0]
+
+    def cuadratica(m, a, b):
+        return np.einsum("...i,...ij,...j->...", a, m, b)
+
+    sse = est["yty"] - 2 * np.einsum("...i,...i->...", beta, xty) + cuadratica(xtx, beta, beta)
+    sce_lag = (est["yty_lag"] - np.einsum("...i,...i->...", beta, est["xty_lag"])
+               - np.einsum("...i,...i->...", beta, est["xly"]) + cuadratica(est["xtx_lag"], beta, beta))
+    n, n_lag = np.asarray(est["n"], dtype="float64"), np.asarray(est["n_lag"], dtype="float64")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        varianza = np.maximum(sse, 0) / np.maximum(n - p, 1)
+        phi = np.clip((sce_lag / np.maximum(n_lag, 1)) / (sse / n), 0, 0.999)
+    return {"beta": beta, "varianza": varianza, "phi": np.nan_to_num(phi)}
+
+
+# --- Caché de modelos ---
+def _ruta(codigo):
+    return PRONOSTICO_DIR / f"{codigo}.npz"
+
+
+def _a_estadisticas(guardado):
+    return {k: guardado[k] for k in guardado if k not in ("firma", "ultimo", "huella")}
+
+
+@lru_cache(maxsize=64)
+def _modelo(codigo, ruta, firma):
+    clave = json.dumps(firma)
+    ruta = _ruta(codigo)
+    guardado = leer_npz(ruta)
+    if guardado is not None and str(guardado["firma"]) == clave:
+        registrar_cache("pronostico_disco", True)
+        return _a_estadisticas(guardado), tuple(guardado["ultimo"])
+    registrar_cache("pronostico_disco", False)
+
+    with etapa("pronostico.ajuste", serie=f"ITH@{codigo}") as reg:
+        ith = cargar_serie(ruta).dropna()
+        tiempos, valores = tiempos_ns(ith.index), ith.to_numpy(dtype="float64")
+        modo = "completo"
+        if guardado is not None and "huella" in guardado:
+            t_fin, y_fin = guardado["ultimo"]
+            previas = tiempos <= int(t_fin)
+            # Solo se acumula lo nuevo si lo anterior no cambió (mismas horas con los mismos valores)
+            iguales = previas.sum() == int(guardado["n"]) and previas.any() and \
+                huella_datos(tiempos[previas], valores[previas]) == str(guardado["huella"])
+            if iguales:
+                modo = "incremental"
+                nuevas = ~previas
+                est = _a_estadisticas(guardado)
+                if nuevas.any():
+                    est = sumar(est, estadisticas(tiempos[nuevas], valores[nuevas], previo=(int(t_fin), y_fin)))
+        if modo == "completo":
+            est = estadisticas(tiempos, valores)
+        reg["modo"] = modo
+        reg["filas"] = len(valores)
+    ultimo = (float(tiempos[-1]), float(valores[-1])) if len(valores) else (np.nan, np.nan)
+    guardar_npz(ruta, clave, ultimo=np.array(ultimo, dtype="float64"),
+                huella=np.array(huella_datos(tiempos, valores)), **est)
+    return est, ultimo
+
+
+def modelo(codigo, directorio=DATA_HIDRO):
+    """Estadísticas suficientes y última observación (tiempo ns, ITH) de la estación"""
+    codigo = str(codigo)
+    ruta = ruta_ith_horario(codigo, directorio)
+    if ruta is None:
+        raise FileNotFoundError(f"La estación {codigo} no tiene temperatura horaria ni extremos diarios")
+    aciertos_previos = _modelo.cache_info().hits
+    # Para el ITH reconstruido la huella incluye los parámetros calibrados del modelo diurno
+    resultado = _modelo(codigo, ruta, firma_fuentes(ruta))
+    registrar_cache("pronostico", _modelo.cache_info().hits > aciertos_previos)
+    return resultado
+
+
+# --- Pronóstico ---
+def _probabilidad_sobre(media, desviacion, umbral):
+    """P(ITH >= umbral) con error normal"""
+    return np.vectorize(erfc)((umbral - media) / (desviacion * sqrt(2))) / 2
+
+
+def proyectar(est, ajuste, ultimo, horas=HORIZONTE_MAX, umbrales=UMBRALES_ITH):
+    """Pronóstico horario desde la última observación con intervalos y probabilidad por umbral"""
+    t_fin, y_fin = ultimo
+    pasos = np.arange(1, horas + 1)
+    tiempos = int(t_fin) + pasos * NS_HORA
+    x = diseno(tiempos)
+    beta, varianza, phi = ajuste["beta"], ajuste["varianza"], ajuste["phi"]
+    anomalia = y_fin - diseno([int(t_fin)])[0] @ beta
+    media = x @ beta + anomalia * phi ** pasos
+    # Varianza del AR(1) a h pasos más la incertidumbre de los coeficientes
+    parametros = np.einsum("ij,jk,ik->i", x, np.linalg.pinv(est["xtx"]), x) * varianza
+    desviacion = np.sqrt(varianza * (1 - phi ** (2 * pasos)) + parametros)
+    df = pd.DataFrame({
+        "Pronostico": media,
+        "Inferior": media - Z_NIVEL * desviacion,
+        "Superior": media + Z_NIVEL * desviacion,
+        "Horizonte_h": pasos,
+    }, index=pd.DatetimeIndex(tiempos.astype("datetime64[ns]"), name="Fecha"))
+    for umbral in umbrales:
+        df[f"P(ITH>={umbral})"] = _probabilidad_sobre(media, desviacion, umbral)
+    return df
+
+
+def pronosticar(codigo, horas=HORIZONTE_MAX, umbrales=UMBRALES_ITH, directorio=DATA_HIDRO):
+    """Pronóstico de ITH de una estación para las próximas `horas` (ver `proyectar`)"""
+    est, ultimo = modelo(codigo, directorio)
+    if est["n"] < MIN_HORAS:
+        raise ValueError(f"La estación {codigo} tiene menos de {MIN_HORAS} horas de ITH")
+    return proyectar(est, ajustar(est), ultimo, horas, umbrales)
+
+
+def pronosticar_corpus(horas=HORIZONTE_MAX, umbrales=UMBRALES_ITH, codigos=None, directorio=DATA_HIDRO):
+    """Pronóstico de todas las estaciones, con los coeficientes resueltos en un solo lote"""
+    with etapa("pronostico.corpus") as reg:
+        modelos = {}
+        for codigo in codigos or estaciones_ith_horario(directorio):
+            est, ultimo = modelo(codigo, directorio)
+            if est["n"] >= MIN_HORAS:
+                modelos[codigo] = (est, ultimo)
+        if not modelos:
+            return pd.DataFrame()
+        pila = {k: np.stack([est[k] for est, _ in modelos.values()]) for k in next(iter(modelos.values()))[0]}
+        ajustes = ajustar(pila)
+        partes = []
+        for i, (codigo, (est, ultimo)) in enumerate(modelos.items()):
+            ajuste = {k: v[i] for k, v in ajustes.items()}
+            partes.append(proyectar(est, ajuste, ultimo, horas, umbrales).assign(Codigo=codigo))
+        reg["filas"] = sum(len(p) for p in partes)
+    return pd.concat(partes).reset_index()
+
+
+def resumen_modelos(codigos=None, directorio=DATA_HIDRO):
+    """Horas de ajuste, última observación, error típico y phi por estación"""
+    filas = []
+    for codigo in codigos or estaciones_ith_horario(directorio):
+        est, (t_fin, _) = modelo(codigo, directorio)
+        ajuste = ajustar(est)
+        filas.append({
+            "Codigo": codigo, "Fuente": tipo_fuente(codigo, directorio), "Horas": int(est["n"]),
+            "Ultima_observacion": pd.Timestamp(int(t_fin)), "Error_tipico": float(np.sqrt(ajuste["varianza"])),
+            "Phi": float(ajuste["phi"]),
+        })
+    return pd.DataFrame(filas)
@@ -0,0 +1,166 @@
+# cattleclimate/psicrometria.py
+"""Variables psicrométricas derivadas de temperatura y humedad relativa.
+
+Muchas estaciones automáticas solo miden `TA2_AUT_60` y `HRA2_AUT_60`. A partir de
+ese par se derivan, vectorizado con NumPy:
+
+    TPR_DER_60  temperatura de punto de rocío (Magnus)            °C
+    TBH_DER_60  temperatura de bulbo húmedo (Stull, 2011)          °C
+    PV_DER_60   presión de vapor                                  hPa
+    IC_DER_60   índice de calor (Rothfusz, NOAA)                  °C
+    ITH_DER_60  índice de temperatura y humedad con TBH_DER_60
+
+Cada variable derivada se registra como una serie virtual `ETIQUETA@CODIGO.data`
+para toda estación que tenga las dos fuentes: `almacen.cargar_serie` la calcula
+al primer uso (no existe en `datos/`) y la guarda en `cache/derivadas/` con la
+huella de los archivos fuente; mientras estos no cambien, se lee de ahí.
+
+    from cattleclimate.almacen import cargar_serie
+    tbh = cargar_serie(DATA_HIDRO / "TBH_DER_60@25025240.data")
+"""
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from cattleclimate.almacen import CACHE_DIR, cargar_serie, firma_archivos, guardar_arrow, leer_arrow
+from cattleclimate.datos import DATA_HIDRO, listar_archivos, separar_nombre
+from cattleclimate.diagnostico import etapa, registrar_cache
+from cattleclimate.indices import calcular_ith
+
+DERIVADAS_DIR = CACHE_DIR / "derivadas"
+
+# Temperatura (°C) y humedad relativa (%) de las que se derivan las demás
+FUENTES_DERIVADAS = ("TA2_AUT_60", "HRA2_AUT_60")
+
+
+# --- Fórmulas (escalares o arrays) ---
+def presion_saturacion(t):
+    """Presión de vapor de saturación (hPa), Magnus con los coeficientes de la OMM"""
+    return 6.112 * np.exp(17.62 * t / (243.12 + t))
+
+
+def presion_vapor(t, hr):
+    """Presión de vapor (hPa) a partir de temperatura (°C) y humedad relativa (%)"""
+    return presion_saturacion(t) * hr / 100
+
+
+def punto_rocio(t, hr):
+    """Temperatura de punto de rocío (°C), inversa de Magnus"""
+    gamma = np.log(np.maximum(hr, 1e-3) / 100) + 17.62 * t / (243.12 + t)
+    return 243.12 * gamma / (17.62 - gamma)
+
+
+def bulbo_humedo_stull(t, hr):
+    """Temperatura de bulbo húmedo (Stull, 2011) a partir de temperatura (°C) y humedad (%)"""
+    return (t * np.arctan(0.151977 * np.sqrt(hr + 8.313659)) + np.arctan(t + hr)
+            - np.arctan(hr - 1.676331) + 0.00391838 * hr ** 1.5 * np.arctan(0.023101 * hr)
+            - 4.686035)
+
+
+def indice_calor(t, hr):
+    """Índice de calor (°C): regresión de Rothfusz con los ajustes de la NOAA"""
+    f = t * 9 / 5 + 32
+    simple = 0.5 * (f + 61.0 + (f - 68.0) * 1.2 + hr * 0.094)
+    rothfusz = (-42.379 + 2.04901523 * f + 10.14333127 * hr - 0.22475541 * f * hr
+                - 6.83783e-3 * f ** 2 - 5.481717e-2 * hr ** 2 + 1.22874e-3 * f ** 2 * hr
+                + 8.5282e-4 * f * hr ** 2 - 1.99e-6 * f ** 2 * hr ** 2)
+    with np.errstate(invalid="ignore"):
+        seco = (hr < 13) & (f >= 80) & (f <= 112)
+        rothfusz = np.where(seco, rothfusz - (13 - hr) / 4 * np.sqrt((17 - np.abs(f - 95)) / 17), rothfusz)
+        humedo = (hr > 85) & (f >= 80) & (f <= 87)
+        rothfusz = np.where(humedo, rothfusz + (hr - 85) / 10 * (87 - f) / 5, rothfusz)
+    # La regresión solo aplica con calor; por debajo de 80 °F se usa la fórmula simple
+    resultado = np.where((simple + f) / 2 >= 80, rothfusz, simple)
+    return (resultado - 32) * 5 / 9
+
+
+def ith(t, hr):
+    """ITH con el bulbo húmedo de Stull"""
+    return calcular_ith(t, bulbo_humedo_stull(t, hr))
+
+
+# Etiqueta virtual -> (descripción, unidad, fórmula de (t, hr))
+DERIVADAS = {
+    "TPR_DER_60": ("Temperatura de punto de rocío", "°C", punto_rocio),
+    "TBH_DER_60": ("Temperatura de bulbo húmedo (Stull)", "°C", bulbo_humedo_stull),
+    "PV_DER_60": ("Presión de vapor", "hPa", presion_vapor),
+    "IC_DER_60": ("Índice de calor", "°C", indice_calor),
+    "ITH_DER_60": ("Índice de temperatura y humedad", "", ith),
+}
+
+
+# --- Registro de series virtuales ---
+def es_derivada(ruta):
+    """True si la ruta ETIQUETA@CODIGO.data corresponde a una variable derivada"""
+    try:
+        return separar_nombre(ruta)[0] in DERIVADAS
+    except ValueError:
+        return False
+
+
+def fuentes_derivada(codigo, directorio):
+    """Rutas de temperatura y humedad de las que salen las derivadas de la estación"""
+    return [directorio / f"{etiqueta}@{codigo}.data" for etiqueta in FUENTES_DERIVADAS]
+
+
+def estaciones_derivables(directorio=DATA_HIDRO):
+    """Códigos con temperatura y humedad relativa para derivar las variables"""
+    codigos = [separar_nombre(r)[1] for r in listar_archivos(directorio, etiqueta=FUENTES_DERIVADAS[0])]
+    return sorted(c for c in codigos if all(r.exists() for r in fuentes_derivada(c, directorio)))
+
+
+def listar_derivadas(directorio=DATA_HIDRO, etiqueta=None, codigo=None):
+    """Rutas virtuales ETIQUETA@CODIGO.data de las variables derivadas (no existen en disco)"""
+    etiquetas = [etiqueta] if etiqueta is not None else list(DERIVADAS)
+    return [
+        directorio / f"{e}@{c}.data"
+        for c in estaciones_derivables(directorio) if codigo is None or c == str(codigo)
+        for e in etiquetas if e in DERIVADAS
+    ]
+
+
+def calcular(etiqueta, t, hr):
+    """Serie derivada `etiqueta` en las fechas comunes de temperatura y humedad"""
+    df = pd.concat([t, hr], axis=1, join="inner").dropna()
+    # Humedades fuera de rango (códigos de error, sensores saturados) no se usan
+    df = df[(df.iloc[:, 1] > 0) & (df.iloc[:, 1] <= 100)]
+    formula = DERIVADAS[etiqueta][2]
+    valores = formula(df.iloc[:, 0].to_numpy(dtype="float64"), df.iloc[:, 1].to_numpy(dtype="float64"))
+    return pd.Series(valores, index=df.index)
+
+
+@lru_cache(maxsize=64)
+def _serie_derivada(etiqueta, codigo, directorio, firma):
+    nombre = f"{etiqueta}@{codigo}"
+    clave = json.dumps(firma)
+    ruta = DERIVADAS_DIR / f"{nombre}.arrow"
+    tabla = leer_arrow(ruta, clave)
+    registrar_cache("derivadas_disco", tabla is not None)
+    if tabla is None:
+        with etapa("derivada", serie=nombre) as reg:
+            t, hr = (cargar_serie(r) for r in fuentes_derivada(codigo, directorio))
+            serie = calcular(etiqueta, t, hr)
+            tabla = pa.table({"Fecha": serie.index.to_numpy(), "Valor": serie.to_numpy()})
+            reg["filas"] = tabla.num_rows
+        guardar_arrow(tabla, ruta, clave)
+    return pd.Series(
+        tabla["Valor"].to_numpy(), index=pd.DatetimeIndex(tabla["Fecha"].to_numpy(), name="Fecha"), name=nombre
+    )
+
+
+def serie_derivada(ruta):
+    """Serie de una variable derivada a partir de su ruta virtual ETIQUETA@CODIGO.data"""
+    etiqueta, codigo = separar_nombre(ruta)
+    if etiqueta not in DERIVADAS:
+        raise ValueError(f"{etiqueta} no es una variable derivada. Opciones: {list(DERIVADAS)}")
+    directorio = ruta.parent
+    fuentes = fuentes_derivada(codigo, directorio)
+    if not all(r.exists() for r in fuentes):
+        raise FileNotFoundError(f"La estación {codigo} no tiene {' y '.join(FUENTES_DERIVADAS)}")
+    aciertos_previos = _serie_derivada.cache_info().hits
+    serie = _serie_derivada(etiqueta, codigo, directorio, firma_archivos(fuentes))
+    registrar_cache("derivadas", _serie_derivada.cache_info().hits > aciertos_previos)
+    return serie.copy()
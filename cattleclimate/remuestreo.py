@@ -0,0 +1,211 @@
+# cattleclimate/remuestreo.py
+"""Remuestreo de series .data a una grilla regular con relleno de huecos.
+
+Cada serie se lleva a la grilla en una sola pasada vectorizada (np.bincount sobre
+el índice de celda) y se rellena según la estrategia elegida:
+
+- "nan": deja los huecos como NaN.
+- "lineal": interpola linealmente huecos de hasta `max_horas`.
+- "climatologica": usa el promedio de la misma hora del día (o del mismo día del
+  año en grillas diarias) calculado sobre la propia serie.
+
+El resultado siempre incluye la máscara de cobertura (celdas con observación real).
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from cattleclimate.datos import (
+    DATA_HIDRO, indice_desde_ns, leer_serie, listar_archivos, separar_nombre, tiempos_ns
+)
+
+ESTRATEGIAS = ("nan", "lineal", "climatologica")
+AGREGACIONES = ("mean", "max", "min", "sum")
+
+NS_HORA = 3_600 * 10**9
+NS_DIA = 24 * NS_HORA
+
+
+def frecuencia_nativa(etiqueta):
+    """Frecuencia de grilla por defecto según el sufijo de la etiqueta (None si es mensual)"""
+    if etiqueta.endswith("_M"):
+        return None
+    if etiqueta.endswith("_D"):
+        return "1D"
+    return "1h"
+
+
+def _agregar_en_celdas(celdas, valores, n, agregacion):
+    """Agrega los valores por celda de la grilla; devuelve (valores, conteos)"""
+    conteos = np.bincount(celdas, minlength=n)
+    if agregacion in ("mean", "sum"):
+        sumas = np.bincount(celdas, weights=valores, minlength=n)
+        if agregacion == "sum":
+            salida = sumas
+        else:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                salida = sumas / conteos
+    elif agregacion == "max":
+        salida = np.full(n, -np.inf)
+        np.maximum.at(salida, celdas, valores)
+    elif agregacion == "min":
+        salida = np.full(n, np.inf)
+        np.minimum.at(salida, celdas, valores)
+    else:
+        raise ValueError(f"Agregación no soportada: {agregacion}")
+    salida = salida.astype("float64")
+    salida[conteos == 0] = np.nan
+    return salida, conteos
+
+
+def longitud_huecos(faltantes):
+    """Para cada posición faltante devuelve la longitud del hueco al que pertenece (0 si hay dato)"""
+    faltantes = np.asarray(faltantes, dtype=bool)
+    if not faltantes.any():
+        return np.zeros(len(faltantes), dtype=np.int64)
+    bordes = np.diff(np.concatenate(([0], faltantes.astype(np.int8), [0])))
+    inicios = np.flatnonzero(bordes == 1)
+    fines = np.flatnonzero(bordes == -1)
+    # Identificador de hueco por posición: cuántos inicios hay hasta ella
+    id_hueco = np.cumsum(bordes[:-1] == 1) - 1
+    largo = (fines - inicios)[id_hueco]
+    largo[~faltantes] = 0
+    return largo
+
+
+def _rellenar_lineal(valores, max_celdas):
+    faltantes = np.isnan(valores)
+    validos = np.flatnonzero(~faltantes)
+    if len(validos) < 2 or not faltantes.any():
+        return valores.copy(), np.zeros(len(valores), dtype=bool)
+
+    posiciones = np.arange(len(valores))
+    interpolado = np.interp(posiciones, validos, valores[validos])
+    # Solo huecos internos (con dato a ambos lados) y no más largos que el límite
+    internos = (posiciones > validos[0]) & (posiciones < validos[-1])
+    rellenar = faltantes & internos & (longitud_huecos(faltantes) <= max_celdas)
+
+    salida = valores.copy()
+    salida[rellenar] = interpolado[rellenar]
+    return salida, rellenar
+
+
+def clave_climatologica(tiempos_ns, paso_ns):
+    """Hora del día para grillas subdiarias; día del año (0-365) para grillas diarias o mayores"""
+    if paso_ns < NS_DIA:
+        return (tiempos_ns % NS_DIA) // NS_HORA, 24
+    return indice_desde_ns(tiempos_ns).dayofyear.to_numpy() - 1, 366
+
+
+def _rellenar_climatologico(valores, tiempos_ns, paso_ns):
+    faltantes = np.isnan(valores)
+    if not faltantes.any():
+        return valores.copy(), faltantes
+
+    clave, n_claves = clave_climatologica(tiempos_ns, paso_ns)
+    validos = ~faltantes
+    sumas = np.bincount(clave[validos], weights=valores[validos], minlength=n_claves)
+    conteos = np.bincount(clave[validos], minlength=n_claves)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        climatologia = sumas / conteos
+
+    salida = valores.copy()
+    salida[faltantes] = climatologia[clave[faltantes]]
+    rellenar = faltantes & ~np.isnan(salida)
+    return salida, rellenar
+
+
+def remuestrear(serie, frecuencia="1h", estrategia="nan", max_horas=3,
+                inicio=None, fin=None, agregacion="mean"):
+    """Lleva una serie a una grilla regular y rellena huecos.
+
+    Devuelve un DataFrame indexado por Fecha con las columnas:
+    Valor, Cobertura (la celda tiene al menos una observación) y Relleno
+    (la celda fue rellenada por la estrategia).
+    """
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estrategia no soportada: {estrategia}. Opciones: {ESTRATEGIAS}")
+
+    paso_ns = pd.Timedelta(frecuencia).value
+    serie = serie.dropna()
+    tiempos = tiempos_ns(serie.index)
+    valores = serie.to_numpy(dtype="float64")
+
+    if len(tiempos) == 0 and (inicio is None or fin is None):
+        # Sin datos no hay de dónde tomar el extremo que falta del rango
+        return pd.DataFrame(
+            {"Valor": [], "Cobertura": [], "Relleno": []},
+            index=pd.DatetimeIndex([], name="Fecha")
+        ).astype({"Valor": "float64", "Cobertura": bool, "Relleno": bool})
+
+    t0 = pd.Timestamp(inicio).value if inicio is not None else int(tiempos.min())
+    t1 = pd.Timestamp(fin).value if fin is not None else int(tiempos.max())
+    if t1 < t0:
+        raise ValueError(f"Rango de fechas vacío: inicio {pd.Timestamp(t0)} posterior a fin {pd.Timestamp(t1)}")
+    t0 -= t0 % paso_ns
+    n = int((t1 - t0) // paso_ns) + 1
+
+    celdas = (tiempos - t0) // paso_ns
+    dentro = (celdas >= 0) & (celdas < n)
+    grilla, conteos = _agregar_en_celdas(celdas[dentro], valores[dentro], n, agregacion)
+    tiempos_grilla = t0 + np.arange(n, dtype=np.int64) * paso_ns
+
+    if estrategia == "lineal":
+        # Hacia arriba: en grillas diarias unas pocas horas equivalen a un día
+        max_celdas = math.ceil(max_horas * NS_HORA / paso_ns)
+        grilla, relleno = _rellenar_lineal(grilla, max_celdas)
+    elif estrategia == "climatologica":
+        grilla, relleno = _rellenar_climatologico(grilla, tiempos_grilla, paso_ns)
+    else:
+        relleno = np.zeros(n, dtype=bool)
+
+    return pd.DataFrame(
+        {"Valor": grilla, "Cobertura": conteos > 0, "Relleno": relleno},
+        index=indice_desde_ns(tiempos_grilla)
+    )
+
+
+def remuestrear_corpus(archivos=None, frecuencia=None, estrategia="nan", max_horas=3,
+                       agregacion="mean"):
+    """Remuestrea un conjunto de archivos .data (por defecto todo el corpus).
+
+    Con `frecuencia=None` cada archivo usa su frecuencia nativa; las series mensuales
+    se omiten. Devuelve un diccionario {"ETIQUETA@CODIGO": DataFrame}.
+    """
+    if archivos is None:
+        archivos = listar_archivos(DATA_HIDRO)
+
+    resultados = {}
+    for ruta in archivos:
+        etiqueta, _ = separar_nombre(ruta)
+        frec = frecuencia or frecuencia_nativa(etiqueta)
+        if frec is None:
+            continue
+        serie = leer_serie(ruta)
+        if serie.empty:
+            continue
+        resultados[serie.name] = remuestrear(
+            serie, frec, estrategia=estrategia, max_horas=max_horas, agregacion=agregacion
+        )
+    return resultados
+
+
+def resumen_cobertura(resultados):
+    """Tabla con el porcentaje de cobertura y de relleno por serie remuestreada"""
+    filas = []
+    for nombre, df in resultados.items():
+        etiqueta, codigo = nombre.split("@")
+        total = len(df)
+        filas.append({
+            "Serie": nombre,
+            "Etiqueta": etiqueta,
+            "Codigo": codigo,
+            "Inicio": df.index.min(),
+            "Fin": df.index.max(),
+            "Celdas": total,
+            "Cobertura_%": 100 * df["Cobertura"].mean() if total else 0.0,
+            "Relleno_%": 100 * df["Relleno"].mean() if total else 0.0,
+            "Faltantes_%": 100 * df["Valor"].isna().mean() if total else 0.0
+        })
+    return pd.DataFrame(filas)
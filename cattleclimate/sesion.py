@@ -0,0 +1,37 @@
+# cattleclimate/sesion.py
+"""Utilidades de Streamlit: capa de datos compartida y panel de diagnóstico."""
+import streamlit as st
+
+from cattleclimate.almacen import leer_manifiesto
+from cattleclimate.diagnostico import a_jsonl, limpiar, resumen_cache, resumen_etapas, rss_mb
+
+
+@st.cache_resource(max_entries=1, show_spinner="Preparando datos compartidos...")
+def _corpus(version_cache):
+    from cattleclimate.compartido import CorpusCompartido  # trae pyarrow solo si se usa
+    return CorpusCompartido()
+
+
+def obtener_corpus():
+    """CorpusCompartido único del proceso; se renueva cuando el trabajador publica un nuevo precálculo"""
+    return _corpus(leer_manifiesto().get("generado"))
+
+
+def panel_diagnostico():
+    """Panel de la barra lateral con tiempos por etapa, memoria y aciertos de caché"""
+    with st.sidebar.expander("🩺 Diagnóstico de rendimiento", expanded=False):
+        memoria = rss_mb()
+        if memoria is not None:
+            st.caption(f"Memoria del proceso: {memoria:,.0f} MB")
+        st.markdown("**Etapas**")
+        st.dataframe(resumen_etapas(), use_container_width=True)
+        st.markdown("**Cachés**")
+        st.dataframe(resumen_cache(), use_container_width=True)
+        st.download_button(
+            "⬇️ Descargar registros (JSONL)",
+            data=a_jsonl(),
+            file_name="perfil_cattleclimate.jsonl",
+            mime="application/x-ndjson"
+        )
+        if st.button("🧹 Limpiar registros"):
+            limpiar()
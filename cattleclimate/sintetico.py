@@ -0,0 +1,359 @@
+# cattleclimate/sintetico.py
+"""Generador de archivos .data sintéticos con el formato exacto del IDEAM.
+
+Escribe `ETIQUETA@CODIGO.data` con encabezado `Fecha|Valor` y filas
+`%Y-%m-%d %H:%M:%S|valor` para estaciones reales del CNE, de modo que la
+ingesta, la caché y los índices se puedan probar a escala de producción:
+
+    python -m cattleclimate.sintetico cache/sintetico --estaciones 500
+    python -m cattleclimate.sintetico cache/sintetico --gb 5 --desde 1990-01-01
+
+Los valores siguen ciclos diario y estacional (bimodal, como en el trópico
+colombiano) con una anomalía diaria común a todas las variables de la estación,
+así que temperatura, humedad y bulbo húmedo quedan correlacionados. Se pueden
+configurar la fracción de huecos y de líneas corruptas (valor vacío, texto,
+fecha inválida o sin separador), que `leer_serie` debe descartar.
+
+Las líneas se arman como una matriz de bytes de ancho fijo con NumPy y se
+compactan quitando el relleno, sin formatear fila por fila en Python.
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cattleclimate.datos import cargar_cne
+from cattleclimate.psicrometria import bulbo_humedo_stull
+from cattleclimate.remuestreo import NS_DIA, NS_HORA
+
+log = logging.getLogger("cattleclimate.sintetico")
+
+ENCABEZADO = b"Fecha|Valor\n"
+FILAS_POR_BLOQUE = 2_000_000
+DIGITOS_ENTEROS = 6
+
+# Etiqueta: (modelo, paso, decimales, horas de observación o None para toda la grilla)
+PERFILES = {
+    "TA2_AUT_60": ("temperatura", "1h", 1, None),
+    "HRA2_AUT_60": ("humedad", "1h", 0, None),
+    "TSSM_CON": ("temperatura", "1D", 1, (7, 13, 19)),
+    "THSM_CON": ("bulbo_humedo", "1D", 1, (7, 13, 19)),
+    "TMX_CON": ("temperatura_max", "1D", 1, (7,)),
+    "TMN_CON": ("temperatura_min", "1D", 1, (7,)),
+    "VV_AUT_10": ("viento", "10min", 1, None),
+    "DV_AUT_10": ("direccion", "10min", 0, None),
+}
+
+TIPOS_CORRUPCION = ("vacio", "texto", "fecha", "sin_separador")
+
+
+# --- Parámetros de la estación ---
+def parametros_estacion(codigo, altitud, semilla=0):
+    """Clima medio de la estación: temperatura por gradiente altitudinal y resto aleatorio estable"""
+    rng = np.random.default_rng([semilla, int(codigo)])
+    altitud = 500.0 if pd.isna(altitud) else float(altitud)
+    return {
+        "codigo": str(codigo),
+        "t_media": 28.0 - 0.0065 * altitud + rng.normal(0, 0.8),
+        "amplitud_diaria": rng.uniform(3.5, 6.5),
+        "amplitud_estacional": rng.uniform(0.3, 1.2),
+        "hr_media": float(np.clip(74 + 0.003 * altitud + rng.normal(0, 5), 55, 92)),
+        "viento_medio": rng.uniform(1.0, 3.5),
+        "direccion_dominante": rng.uniform(0, 360),
+        "semilla": semilla,
+    }
+
+
+def _ruido_por_dia(dias, estacion):
+    """Ruido ~N(0, 1) determinista por día absoluto (no depende del rango ni del bloque)"""
+    desfase = (int(estacion["codigo"]) % 100_003) * 0.137 + estacion["semilla"] * 1.618
+    # Suma de tres uniformes pseudoaleatorias (hash sin/frac) centrada y escalada a varianza 1
+    uniformes = [
+        np.modf(np.abs(np.sin((dias + k * 7919) * 12.9898 + desfase)) * 43_758.5453)[0] for k in range(3)
+    ]
+    return (sum(uniformes) - 1.5) * 2.0
+
+
+def _anomalia_diaria(tiempos, estacion):
+    """Anomalía sinóptica por día (misma para todas las variables de la estación), interpolada"""
+    dias = np.arange(tiempos.min() // NS_DIA - 1, tiempos.max() // NS_DIA + 3)
+    # Persistencia de algunos días: media móvil de 3
+    suavizado = np.convolve(_ruido_por_dia(dias.astype(np.float64), estacion), np.ones(3) / 3, mode="same")
+    return np.interp(tiempos / NS_DIA, dias, suavizado)
+
+
+def serie_sintetica(modelo, tiempos, estacion, rng):
+    """Valores del modelo `modelo` en los tiempos (int64 ns) para la estación"""
+    hora = (tiempos % NS_DIA) / NS_HORA
+    dia_anio = (tiempos % (365.2425 * NS_DIA)) / NS_DIA
+    n = len(tiempos)
+
+    anomalia = _anomalia_diaria(tiempos, estacion)
+    # Ciclo diario con máximo a las 15 h y estacional bimodal (dos temporadas secas)
+    diurno = np.cos(2 * np.pi * (hora - 15) / 24)
+    estacional = estacion["amplitud_estacional"] * np.cos(4 * np.pi * (dia_anio - 30) / 365.2425)
+    base = estacion["t_media"] + estacional + 1.2 * anomalia
+
+    if modelo == "temperatura":
+        return base + estacion["amplitud_diaria"] * diurno + rng.normal(0, 0.3, n)
+    if modelo == "temperatura_max":
+        return base + estacion["amplitud_diaria"] + rng.normal(0, 0.6, n)
+    if modelo == "temperatura_min":
+        return base - estacion["amplitud_diaria"] + rng.normal(0, 0.6, n)
+    if modelo in ("humedad", "bulbo_humedo"):
+        hr = estacion["hr_media"] - 3.2 * estacion["amplitud_diaria"] * diurno - 4 * anomalia
+        hr = np.clip(hr + rng.normal(0, 2.5, n), 15, 100)
+        if modelo == "humedad":
+            return hr
+        t = base + estacion["amplitud_diaria"] * diurno
+        return bulbo_humedo_stull(t, hr) + rng.normal(0, 0.2, n)
+    if modelo == "viento":
+        factor = 1 + 0.5 * np.cos(2 * np.pi * (hora - 14) / 24)
+        return estacion["viento_medio"] * factor * rng.gamma(2.0, 0.5, n)
+    if modelo == "direccion":
+        return np.mod(estacion["direccion_dominante"] + rng.normal(0, 45, n), 360)
+    raise ValueError(f"Modelo desconocido: {modelo}")
+
+
+# --- Grilla de tiempos, huecos y corrupción ---
+def grilla(inicio, fin, paso, horas=None):
+    """Tiempos (int64 ns) de inicio a fin; con `horas`, solo esas horas de cada día"""
+    inicio, fin = pd.Timestamp(inicio).value, pd.Timestamp(fin).value
+    if horas is None:
+        return np.arange(inicio, fin, pd.Timedelta(paso).value, dtype=np.int64)
+    dias = np.arange(inicio - inicio % NS_DIA, fin, NS_DIA, dtype=np.int64)
+    tiempos = (dias[:, None] + np.asarray(horas, dtype=np.int64)[None, :] * NS_HORA).ravel()
+    return tiempos[(tiempos >= inicio) & (tiempos < fin)]
+
+
+def mascara_huecos(n, fraccion, largo_medio, rng):
+    """Máscara True en las filas que se conservan; huecos de largo geométrico"""
+    if fraccion <= 0 or n == 0:
+        return np.ones(n, dtype=bool)
+    inicios = np.flatnonzero(rng.random(n) < fraccion / largo_medio)
+    largos = rng.geometric(1 / largo_medio, len(inicios))
+    delta = np.zeros(n + 1, dtype=np.int32)
+    np.add.at(delta, inicios, 1)
+    np.add.at(delta, np.minimum(inicios + largos, n), -1)
+    return np.cumsum(delta[:-1]) == 0
+
+
+# --- Formato ---
+def _digitos(valores, ancho):
+    """Matriz (n, ancho) de dígitos ASCII con ceros a la izquierda"""
+    potencias = 10 ** np.arange(ancho - 1, -1, -1, dtype=np.int64)
+    return (valores[:, None] // potencias % 10 + 48).astype(np.uint8)
+
+
+def _recoger(tabla, indices):
+    """Filas `indices` de una matriz de bytes, copiando cada fila como un solo bloque"""
+    ancho = tabla.shape[1]
+    filas = np.ascontiguousarray(tabla).view(f"V{ancho}").ravel()
+    return filas[indices].view(np.uint8).reshape(len(indices), ancho)
+
+
+def _dias_ascii(dias):
+    """Matriz (n, 10) con 'YYYY-MM-DD' de días desde la época (algoritmo civil de H. Hinnant)"""
+    z = dias + 719_468
+    era = z // 146_097
+    doe = z - era * 146_097
+    yoe = (doe - doe // 1460 + doe // 36_524 - doe // 146_096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    dia = doy - (153 * mp + 2) // 5 + 1
+    mes = np.where(mp < 10, mp + 3, mp - 9)
+    anio = yoe + era * 400 + (mes <= 2)
+
+    matriz = np.empty((len(dias), 10), dtype=np.uint8)
+    matriz[:, 0:4] = _digitos(anio, 4)
+    matriz[:, 5:7] = _digitos(mes, 2)
+    matriz[:, 8:10] = _digitos(dia, 2)
+    matriz[:, [4, 7]] = ord("-")
+    return matriz
+
+
+@lru_cache(maxsize=1)
+def _horas_ascii():
+    """Matriz (86400, 8) con 'HH:MM:SS' para cada segundo del día"""
+    segundos = np.arange(86_400, dtype=np.int64)
+    matriz = np.empty((86_400, 8), dtype=np.uint8)
+    matriz[:, 0:2] = _digitos(segundos // 3600, 2)
+    matriz[:, 3:5] = _digitos(segundos // 60 % 60, 2)
+    matriz[:, 6:8] = _digitos(segundos % 60, 2)
+    matriz[:, [2, 5]] = ord(":")
+    return matriz
+
+
+def _fechas_ascii(tiempos):
+    """Matriz (n, 19) con 'YYYY-MM-DD HH:MM:SS'; días y horas salen de tablas pequeñas"""
+    dias, resto = np.divmod(tiempos // 1_000_000_000, 86_400)
+    primero = dias.min() if len(dias) else 0
+    tabla_dias = _dias_ascii(np.arange(primero, dias.max() + 1 if len(dias) else 0, dtype=np.int64))
+
+    matriz = np.empty((len(tiempos), 19), dtype=np.uint8)
+    matriz[:, 0:10] = _recoger(tabla_dias, dias - primero)
+    matriz[:, 10] = ord(" ")
+    matriz[:, 11:19] = _recoger(_horas_ascii(), resto)
+    return matriz
+
+
+def _valores_ascii(valores, decimales):
+    """Matriz de ancho fijo con el valor; los bytes 0 son relleno que luego se elimina"""
+    escalados = np.rint(valores * 10 ** decimales).astype(np.int64)
+    if len(escalados) == 0:
+        return _formatear_escalados(escalados, decimales)
+    menor, mayor = escalados.min(), escalados.max()
+    # Las variables meteorológicas toman pocos valores distintos: se formatean una vez y se recogen
+    if mayor - menor < len(escalados) // 4:
+        tabla = _formatear_escalados(np.arange(menor, mayor + 1, dtype=np.int64), decimales)
+        return _recoger(tabla, escalados - menor)
+    return _formatear_escalados(escalados, decimales)
+
+
+def _formatear_escalados(escalados, decimales):
+    absolutos = np.abs(escalados)
+    enteros, fraccion = np.divmod(absolutos, 10 ** decimales)
+    enteros = np.minimum(enteros, 10 ** DIGITOS_ENTEROS - 1)
+
+    partes = [np.where(escalados < 0, ord("-"), 0).astype(np.uint8)[:, None]]
+    digitos = _digitos(enteros, DIGITOS_ENTEROS)
+    # Sin ceros a la izquierda, salvo el de las unidades
+    potencias = 10 ** np.arange(DIGITOS_ENTEROS - 1, -1, -1, dtype=np.int64)
+    visibles = (enteros[:, None] >= potencias) | (potencias == 1)
+    partes.append(np.where(visibles, digitos, 0).astype(np.uint8))
+    if decimales > 0:
+        partes.append(np.full((len(escalados), 1), ord("."), dtype=np.uint8))
+        partes.append(_digitos(fraccion, decimales))
+    return np.hstack(partes)
+
+
+def formatear_lineas(tiempos, valores, decimales, corruptas=None):
+    """Bytes de las líneas `fecha|valor\\n`; `corruptas` asigna a cada fila un tipo de TIPOS_CORRUPCION o -1"""
+    fechas = _fechas_ascii(tiempos)
+    valor = _valores_ascii(valores, decimales)
+    n = len(tiempos)
+    separador = np.full((n, 1), ord("|"), dtype=np.uint8)
+    fin = np.full((n, 1), ord("\n"), dtype=np.uint8)
+
+    if corruptas is not None:
+        tipo = dict(zip(TIPOS_CORRUPCION, range(len(TIPOS_CORRUPCION))))
+        valor[corruptas == tipo["vacio"]] = 0
+        texto = corruptas == tipo["texto"]
+        valor[texto] = 0
+        valor[texto, :3] = np.frombuffer(b"ERR", dtype=np.uint8)
+        fechas[corruptas == tipo["fecha"], 5:7] = np.frombuffer(b"13", dtype=np.uint8)
+        sin_sep = corruptas == tipo["sin_separador"]
+        separador[sin_sep] = 0
+        valor[sin_sep] = 0
+
+    buffer = np.hstack([fechas, separador, valor, fin]).ravel()
+    return buffer[buffer != 0].tobytes()
+
+
+# --- Escritura ---
+def escribir_archivo(ruta, etiqueta, estacion, inicio, fin, huecos=0.05, largo_hueco=6,
+                     corruptas=0.001):
+    """Escribe un .data sintético por bloques; devuelve (líneas, bytes)"""
+    modelo, paso, decimales, horas = PERFILES[etiqueta]
+    tiempos = grilla(inicio, fin, paso, horas)
+    indice_variable = list(PERFILES).index(etiqueta)
+    lineas = 0
+    temporal = ruta.with_suffix(".tmp")
+    with open(temporal, "wb") as f:
+        f.write(ENCABEZADO)
+        for bloque, desde in enumerate(range(0, len(tiempos), FILAS_POR_BLOQUE)):
+            rng = np.random.default_rng(
+                [estacion["semilla"], int(estacion["codigo"]), indice_variable + 1, bloque]
+            )
+            t = tiempos[desde:desde + FILAS_POR_BLOQUE]
+            t = t[mascara_huecos(len(t), huecos, largo_hueco, rng)]
+            valores = serie_sintetica(modelo, t, estacion, rng)
+            tipos = np.where(
+                rng.random(len(t)) < corruptas, rng.integers(0, len(TIPOS_CORRUPCION), len(t)), -1
+            )
+            f.write(formatear_lineas(t, valores, decimales, tipos))
+            lineas += len(t)
+    temporal.replace(ruta)
+    return lineas, ruta.stat().st_size
+
+
+def generar_estacion(destino, estacion, etiquetas, inicio, fin, huecos=0.05, largo_hueco=6,
+                     corruptas=0.001):
+    """Escribe todas las variables de una estación; devuelve una fila de resumen por archivo"""
+    filas = []
+    for etiqueta in etiquetas:
+        ruta = Path(destino) / f"{etiqueta}@{estacion['codigo']}.data"
+        lineas, tamano = escribir_archivo(ruta, etiqueta, estacion, inicio, fin, huecos, largo_hueco, corruptas)
+        filas.append({"Archivo": ruta.name, "Lineas": lineas, "Bytes": tamano})
+    return filas
+
+
+def _generar_estacion(args):
+    return generar_estacion(*args)
+
+
+def generar(destino, estaciones=100, etiquetas=None, inicio="2000-01-01", fin="2025-01-01",
+            huecos=0.05, largo_hueco=6, corruptas=0.001, semilla=0, gb=None, procesos=1):
+    """Genera el corpus sintético; con `gb` se detiene al alcanzar ese tamaño. Devuelve el resumen"""
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    etiquetas = list(etiquetas or PERFILES)
+
+    cne = cargar_cne(columnas=["CODIGO", "altitud"]).dropna(subset=["CODIGO"])
+    cne = cne.sample(frac=1, random_state=semilla)
+    if gb is None:
+        cne = cne.head(estaciones)
+
+    tareas = (
+        (destino, parametros_estacion(codigo, altitud, semilla), etiquetas, inicio, fin,
+         huecos, largo_hueco, corruptas)
+        for codigo, altitud in zip(cne["CODIGO"].astype("int64"), cne["altitud"])
+    )
+    resumen = []
+    total = 0
+    inicio_reloj = time.perf_counter()
+    # Por lotes de `procesos` estaciones, para poder detenerse al alcanzar `gb`
+    with ProcessPoolExecutor(procesos) if procesos > 1 else nullcontext() as ejecutor:
+        mapear = ejecutor.map if ejecutor is not None else map
+        while gb is None or total < gb * 1e9:
+            lote = list(islice(tareas, procesos))
+            if not lote:
+                break
+            for filas in mapear(_generar_estacion, lote):
+                resumen.extend(filas)
+                total += sum(f["Bytes"] for f in filas)
+    segundos = time.perf_counter() - inicio_reloj
+    log.info("%d archivos, %.2f GB en %.1f s (%.0f MB/s)",
+             len(resumen), total / 1e9, segundos, total / 1e6 / max(segundos, 1e-9))
+    return pd.DataFrame(resumen, columns=["Archivo", "Lineas", "Bytes"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera archivos .data sintéticos con formato IDEAM")
+    parser.add_argument("destino", type=Path)
+    parser.add_argument("--estaciones", type=int, default=100)
+    parser.add_argument("--gb", type=float, default=None, help="generar estaciones hasta alcanzar este tamaño")
+    parser.add_argument("--etiquetas", nargs="+", choices=list(PERFILES), default=None)
+    parser.add_argument("--desde", default="2000-01-01")
+    parser.add_argument("--hasta", default="2025-01-01")
+    parser.add_argument("--huecos", type=float, default=0.05, help="fracción de registros faltantes")
+    parser.add_argument("--largo-hueco", type=float, default=6, help="largo medio de un hueco (registros)")
+    parser.add_argument("--corruptas", type=float, default=0.001, help="fracción de líneas corruptas")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--procesos", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    generar(args.destino, args.estaciones, args.etiquetas, args.desde, args.hasta, args.huecos,
+            args.largo_hueco, args.corruptas, args.semilla, args.gb, args.procesos)
+
+
+if __name__ == "__main__":
+    main()
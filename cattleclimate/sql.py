@@ -0,0 +1,288 @@
+# cattleclimate/sql.py
+"""Modo SQL analítico sobre el corpus con DuckDB embebido (dependencia opcional).
+
+Vistas disponibles en cada conexión:
+
+    series      Fecha, Valor, Etiqueta, Codigo, Anio   (dataset Parquet particionado, una fila por fecha)
+    ith         Codigo, Fecha, Tbs, Tbh, ITH           (calculado en SQL a partir de series)
+    fuentes_ith Codigo, Tbs, Tbh, Tbh_derivada         (etiquetas usadas para el ITH de cada estación)
+    estaciones  Codigo, Etiqueta y los datos del CNE de cada archivo .data
+    cne         hoja completa del CNE
+    glosario    glosario de variables
+
+DuckDB lee el dataset Parquet directamente (filtros por Etiqueta, Codigo y Anio
+descartan particiones enteras, y los de Fecha, grupos de filas), de modo que las
+consultas entre estaciones no cargan el corpus en la memoria de Python. El
+dataset lo mantiene al día el trabajador de precálculo (o `python -m
+cattleclimate dataset`); aquí solo se lee.
+
+La conexión es de solo lectura para el usuario: creadas las vistas, se apaga el
+acceso a archivos fuera del dataset y se bloquea la configuración, y cada
+consulta debe ser una única sentencia SELECT, que se ejecuta siempre envuelta
+en `SELECT * FROM (...)`.
+
+    from cattleclimate.sql import ejecutar
+    resultado = ejecutar("SELECT Etiqueta, count(*) FROM series GROUP BY 1")
+"""
+import json
+import time
+from functools import lru_cache
+
+import pandas as pd
+
+from cattleclimate.almacen import CACHE_DIR
+from cattleclimate.dataset import DATASET_DIR, leer_estado
+from cattleclimate.datos import cargar_cne, cargar_glosario, listar_archivos, separar_nombre
+from cattleclimate.diagnostico import etapa
+from cattleclimate.indices import estaciones_con_ith, fuentes_estacion
+from cattleclimate.psicrometria import FUENTES_DERIVADAS
+
+CONSULTAS_PATH = CACHE_DIR / "sql" / "consultas.json"
+TAMANO_PAGINA = 500
+
+# Años con episodio El Niño (ONI ≥ +0.5 °C sostenido) desde 1980
+ANIOS_NINO = (1982, 1983, 1986, 1987, 1991, 1992, 1994, 1995, 1997, 1998, 2002, 2003,
+              2004, 2005, 2006, 2007, 2009, 2010, 2014, 2015, 2016, 2018, 2019, 2023, 2024)
+
+CONSULTAS_PREDEFINIDAS = {
+    "Registros por variable": """
+SELECT Etiqueta, count(*) AS registros, count(DISTINCT Codigo) AS estaciones,
+       min(Fecha) AS desde, max(Fecha) AS hasta
+FROM series
+GROUP BY Etiqueta
+ORDER BY registros DESC""",
+    "ITH medio de la tarde por municipio en años El Niño": f"""
+SELECT e.DEPARTAMENTO, e.MUNICIPIO, year(i.Fecha) AS anio,
+       round(avg(i.ITH), 2) AS ith_medio, count(*) AS horas
+FROM ith i
+JOIN (SELECT DISTINCT Codigo, DEPARTAMENTO, MUNICIPIO FROM estaciones) e USING (Codigo)
+WHERE hour(i.Fecha) BETWEEN 12 AND 17
+  AND year(i.Fecha) IN {ANIOS_NINO}
+GROUP BY ALL
+ORDER BY ith_medio DESC""",
+    "Horas de ITH en peligro (≥ 79) por estación y año": """
+SELECT Codigo, year(Fecha) AS anio, count(*) FILTER (WHERE ITH >= 79) AS horas_peligro,
+       count(*) AS horas, round(100.0 * horas_peligro / horas, 1) AS porcentaje
+FROM ith
+GROUP BY ALL
+ORDER BY Codigo, anio""",
+    "Temperatura media mensual de una estación": """
+SELECT date_trunc('month', Fecha) AS mes, round(avg(Valor), 2) AS media,
+       min(Valor) AS minimo, max(Valor) AS maximo
+FROM series
+WHERE Etiqueta = 'TA2_AUT_60' AND Codigo = '25025240'
+GROUP BY mes
+ORDER BY mes""",
+}
+
+
+def disponible():
+    """True si DuckDB está instalado"""
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# --- Conexión ---
+def _texto(df):
+    """Columnas object a texto: DuckDB no admite columnas con tipos mezclados (p. ej. CORRIENTE)"""
+    objetos = df.select_dtypes(include=["object", "string"]).columns
+    return df.astype({c: "string" for c in objetos})
+
+
+def _firma_dataset(raiz):
+    estado = leer_estado(raiz)
+    return hash(tuple(sorted((k, tuple(v)) for k, v in estado.items())))
+
+
+@lru_cache(maxsize=1)
+def _conexion(raiz, firma):
+    import duckdb
+
+    with etapa("sql.conectar"):
+        con = duckdb.connect(database=":memory:")
+        con.execute(f"""
+            CREATE VIEW series AS
+            SELECT Fecha, Valor, Etiqueta, Codigo, CAST(Anio AS SMALLINT) AS Anio
+            FROM {_sin_repetidas(raiz)}
+        """)
+        con.register("cne_df", _texto(cargar_cne()))
+        con.execute("CREATE TABLE cne AS SELECT * REPLACE (CAST(CODIGO AS VARCHAR) AS CODIGO) FROM cne_df")
+        con.unregister("cne_df")
+        con.register("glosario_df", _texto(cargar_glosario()))
+        con.execute("CREATE TABLE glosario AS SELECT * FROM glosario_df")
+        con.unregister("glosario_df")
+
+        catalogo = pd.DataFrame([separar_nombre(r) for r in listar_archivos()], columns=["Etiqueta", "Codigo"])
+        con.register("catalogo_df", catalogo)
+        con.execute("""
+            CREATE TABLE estaciones AS
+            SELECT c.Codigo, c.Etiqueta, n.* EXCLUDE (CODIGO)
+            FROM catalogo_df c LEFT JOIN cne n ON n.CODIGO = c.Codigo
+        """)
+        con.unregister("catalogo_df")
+
+        _crear_ith(con, raiz)
+
+        # Solo lectura: el dataset sigue accesible, el resto del sistema de archivos y la configuración no
+        raiz_permitida = (str(raiz.resolve()).rstrip("/") + "/").replace("'", "''")
+        con.execute(f"SET allowed_directories = ['{raiz_permitida}']")
+        con.execute("SET enable_external_access = false")
+        con.execute("SET lock_configuration = true")
+    return con
+
+
+def _sin_repetidas(raiz, etiquetas=("*",)):
+    """Subconsulta Etiqueta, Codigo, Anio, Fecha, Valor de unas variables (todas por defecto) con una fila por fecha.
+
+    Entre compactaciones una partición puede tener varios part-*.parquet con la
+    misma fecha; gana el más reciente (el nombre lleva el instante de escritura).
+    """
+    patrones = ", ".join(
+        "'" + str(raiz / f"Etiqueta={e}" / "Codigo=*" / "Anio=*" / "*.parquet").replace("'", "''") + "'"
+        for e in etiquetas
+    )
+    return f"""(
+            SELECT Etiqueta, Codigo, Anio, Fecha, arg_max(Valor, filename) AS Valor
+            FROM read_parquet([{patrones}], hive_partitioning = true, hive_types_autocast = false, filename = true)
+            GROUP BY Etiqueta, Codigo, Anio, Fecha
+        )"""
+
+
+def _crear_ith(con, raiz):
+    """Tabla `fuentes_ith` (Tbs y Tbh de cada estación según `fuentes_estacion`) y vista `ith`.
+
+    Para las estaciones automáticas Tbh es virtual: se deriva aquí de TA2 y HRA2
+    con Stull, como en `psicrometria`.
+    """
+    filas = []
+    for codigo in estaciones_con_ith():
+        fuentes = fuentes_estacion(codigo)
+        derivada = not fuentes["Tbh"].exists()
+        filas.append((codigo, separar_nombre(fuentes["Tbs"])[0], separar_nombre(fuentes["Tbh"])[0], derivada))
+    con.register("fuentes_df", pd.DataFrame(filas, columns=["Codigo", "Tbs", "Tbh", "Tbh_derivada"]))
+    con.execute("CREATE TABLE fuentes_ith AS SELECT * FROM fuentes_df")
+    con.unregister("fuentes_df")
+
+    t, hr = FUENTES_DERIVADAS
+    etiquetas = {e for _, tbs, tbh, derivada in filas for e in ((tbs, t, hr) if derivada else (tbs, tbh))}
+    etiquetas = sorted(e for e in etiquetas if any((raiz / f"Etiqueta={e}").glob("Codigo=*/Anio=*/*.parquet")))
+    if not etiquetas:
+        con.execute("""
+            CREATE VIEW ith AS
+            SELECT NULL::VARCHAR AS Codigo, NULL::TIMESTAMP_NS AS Fecha, NULL::DOUBLE AS Tbs,
+                   NULL::DOUBLE AS Tbh, NULL::DOUBLE AS ITH
+            WHERE false
+        """)
+        return
+    con.execute(f"""
+        CREATE VIEW ith AS
+        WITH unicas AS {_sin_repetidas(raiz, etiquetas)},
+        medidas AS (
+            SELECT f.Codigo, s.Fecha, s.Valor AS Tbs, h.Valor AS Tbh
+            FROM fuentes_ith f
+            JOIN unicas s ON s.Codigo = f.Codigo AND s.Etiqueta = f.Tbs
+            JOIN unicas h ON h.Codigo = f.Codigo AND h.Etiqueta = f.Tbh AND h.Fecha = s.Fecha
+            WHERE NOT f.Tbh_derivada
+        ),
+        derivadas AS (
+            SELECT f.Codigo, s.Fecha, s.Valor AS Tbs,
+                   t.Valor * atan(0.151977 * sqrt(r.Valor + 8.313659)) + atan(t.Valor + r.Valor)
+                   - atan(r.Valor - 1.676331) + 0.00391838 * pow(r.Valor, 1.5) * atan(0.023101 * r.Valor)
+                   - 4.686035 AS Tbh
+            FROM fuentes_ith f
+            JOIN unicas s ON s.Codigo = f.Codigo AND s.Etiqueta = f.Tbs
+            JOIN unicas t ON t.Codigo = f.Codigo AND t.Etiqueta = '{t}' AND t.Fecha = s.Fecha
+            JOIN unicas r ON r.Codigo = f.Codigo AND r.Etiqueta = '{hr}' AND r.Fecha = s.Fecha
+            WHERE f.Tbh_derivada AND r.Valor > 0 AND r.Valor <= 100
+        )
+        SELECT Codigo, Fecha, Tbs, Tbh, 0.72 * (Tbs + Tbh) + 40.6 AS ITH
+        FROM (SELECT * FROM medidas UNION ALL SELECT * FROM derivadas)
+    """)
+
+
+def conectar(raiz=DATASET_DIR):
+    """Cursor de DuckDB con las vistas del corpus sobre el dataset Parquet tal como está"""
+    if not any(raiz.glob("Etiqueta=*/Codigo=*/Anio=*/*.parquet")):
+        raise ValueError("El dataset Parquet está vacío: ejecute `python -m cattleclimate dataset`")
+    # Un cursor por llamada: la conexión base se comparte, los cursores no entre hilos
+    return _conexion(raiz, _firma_dataset(raiz)).cursor()
+
+
+# --- Ejecución ---
+def sentencia(sql):
+    """Texto de la única sentencia SELECT de `sql`; ValueError si hay varias o no es de lectura.
+
+    DESCRIBE, SHOW y SUMMARIZE también son SELECT para DuckDB; EXPLAIN no se admite.
+    """
+    import duckdb
+
+    sentencias = duckdb.extract_statements(sql)
+    if len(sentencias) != 1:
+        raise ValueError("Escriba una sola consulta por vez")
+    if sentencias[0].type != duckdb.StatementType.SELECT:
+        raise ValueError("Solo se permiten consultas de lectura (SELECT, WITH, DESCRIBE...)")
+    sql = sentencias[0].query.strip()
+    while sql.endswith(";"):
+        sql = sql[:-1].rstrip()
+    # Salto de línea antes del paréntesis de cierre por si la consulta termina en un comentario
+    return sql + "\n"
+
+
+def ejecutar(sql, pagina=1, tamano=TAMANO_PAGINA, cursor=None, contar=True):
+    """Una página del resultado de una consulta de lectura.
+
+    Devuelve un dict con `datos` (DataFrame de la página), `total` (filas del
+    resultado completo, o None si `contar=False`) y `segundos`.
+    """
+    sql = sentencia(sql)
+    cursor = cursor or conectar()
+    inicio = time.perf_counter()
+    with etapa("sql.ejecutar") as reg:
+        datos = cursor.execute(
+            f"SELECT * FROM ({sql}) LIMIT {int(tamano)} OFFSET {(int(pagina) - 1) * int(tamano)}"
+        ).df()
+        total = cursor.execute(f"SELECT count(*) FROM ({sql})").fetchone()[0] if contar else None
+        reg["filas"] = len(datos)
+    return {"datos": datos, "total": total, "segundos": time.perf_counter() - inicio}
+
+
+def por_lotes(sql, filas_por_lote=100_000, cursor=None):
+    """Itera el resultado completo como lotes Arrow (para exportar sin juntarlo en memoria)"""
+    sql = sentencia(sql)
+    cursor = cursor or conectar()
+    lector = cursor.execute(f"SELECT * FROM ({sql})").fetch_record_batch(filas_por_lote)
+    yield from lector
+
+
+# --- Consultas guardadas ---
+def consultas_guardadas():
+    """Predefinidas más las guardadas por el usuario ({nombre: sql})"""
+    try:
+        with open(CONSULTAS_PATH, encoding="utf-8") as f:
+            propias = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        propias = {}
+    return {**{k: v.strip() for k, v in CONSULTAS_PREDEFINIDAS.items()}, **propias}
+
+
+def guardar_consulta(nombre, sql):
+    try:
+        with open(CONSULTAS_PATH, encoding="utf-8") as f:
+            propias = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        propias = {}
+    propias[nombre] = sql.strip()
+    CONSULTAS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(CONSULTAS_PATH, "w", encoding="utf-8") as f:
+        json.dump(propias, f, ensure_ascii=False, indent=1)
+
+
+def borrar_consulta(nombre):
+    propias = {k: v for k, v in consultas_guardadas().items() if k not in CONSULTAS_PREDEFINIDAS}
+    propias.pop(nombre, None)
+    CONSULTAS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(CONSULTAS_PATH, "w", encoding="utf-8") as f:
+        json.dump(propias, f, ensure_ascii=False, indent=1)
@@ -0,0 +1,299 @@
+# cattleclimate/superficie.py
+"""Superficies de ITH y temperatura en una grilla regular lat/lon (IDW con teselas en caché).
+
+Los valores de cada estación se promedian por cubeta de tiempo (hora, día, mes,
+año o todo el registro) y se interpolan por distancia inversa (IDW) a los
+centros de una grilla regular. La grilla se divide en teselas fijas de
+`TESELA_GRADOS` × `TESELA_GRADOS` con `CELDAS_TESELA` celdas por lado, de modo
+que al desplazar el recuadro o mover el control de tiempo solo se calculan las
+teselas nuevas:
+
+- la interpolación es un producto de matrices (celdas × estaciones) @ (estaciones
+  × cubetas), así que una tesela se calcula de una vez para un bloque de
+  cubetas vecinas a la pedida, y cada (variable, periodo, cubeta, tesela) queda
+  en caché;
+- con la corrección por altitud, los valores se llevan al nivel del mar con el
+  gradiente vertical de la variable, se interpolan y se devuelven a la altitud
+  de cada celda. Como no hay un modelo de elevación en el proyecto, la altitud
+  de las celdas se interpola (también por IDW) desde las ~4500 estaciones del CNE.
+
+Las celdas a más de `RADIO_MAX_KM` de la estación con dato más cercana quedan en NaN.
+
+    from cattleclimate.superficie import cubetas, superficie
+    etiquetas = cubetas("ITH", "mes")
+    lat, lon, grilla = superficie("ITH", "mes", etiquetas[-1], (8.3, 9.8, -75.8, -74.4))
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from cattleclimate.almacen import cargar_serie, firma_archivos
+from cattleclimate.datos import DATA_HIDRO, cargar_cne, listar_archivos, separar_nombre
+from cattleclimate.diagnostico import etapa, registrar_cache
+from cattleclimate.indices import VARIABLES_INDICES, archivos_ith, estaciones_con_ith, serie_ith
+from cattleclimate.vecinos import distancias_km, matriz_estaciones
+
+GRADIENTE_T = 6.5  # °C por km (atmósfera estándar)
+
+# Variables interpolables y su gradiente vertical (unidades por km). Para el ITH
+# se supone que Tbh desciende al mismo ritmo que Tbs: 0.72 * (6.5 + 6.5)
+VARIABLES_SUPERFICIE = {
+    "ITH": 0.72 * 2 * GRADIENTE_T,
+    "TA2_AUT_60": GRADIENTE_T,
+    "TA2_MEDIA_D": GRADIENTE_T,
+    "TA2_MX_D": GRADIENTE_T,
+    "TA2_MN_D": GRADIENTE_T,
+    VARIABLES_INDICES["Tbs"]: GRADIENTE_T,
+}
+
+# Unidad numpy de cada periodo ("total" es una sola cubeta con todo el registro)
+PERIODOS = {"hora": "h", "dia": "D", "mes": "M", "anio": "Y", "total": None}
+# Cubetas que se calculan juntas alrededor de la pedida
+BLOQUE = {"hora": 24, "dia": 31, "mes": 12, "anio": 5, "total": 1}
+
+TESELA_GRADOS = 0.25
+CELDAS_TESELA = 32
+POTENCIA = 2
+RADIO_MAX_KM = 100
+MARGEN_ALTITUD = 0.5   # grados alrededor de la tesela para buscar estaciones del CNE
+MAX_TESELAS = 4096
+
+_teselas = OrderedDict()
+_candado = threading.Lock()
+
+
+# --- Valores por estación y cubeta ---
+def _series(variable, directorio):
+    if variable == "ITH":
+        return {c: serie_ith(c, directorio) for c in estaciones_con_ith(directorio)}
+    return {separar_nombre(r)[1]: cargar_serie(r) for r in listar_archivos(directorio, etiqueta=variable)}
+
+
+def _rutas(variable, directorio):
+    if variable == "ITH":
+        return [r for c in estaciones_con_ith(directorio) for r in archivos_ith(c, directorio)]
+    return listar_archivos(directorio, etiqueta=variable)
+
+
+def _a_cubetas(tiempos, valores, periodo):
+    """Promedio de cada estación por cubeta; devuelve (cubetas datetime64, valores estación × cubeta)"""
+    unidad = PERIODOS[periodo]
+    if unidad is None:
+        ids = np.zeros(len(tiempos), dtype=np.int64)
+        etiquetas = np.array([tiempos[0]], dtype="datetime64[ns]") if len(tiempos) else tiempos
+    else:
+        ids = tiempos.view("datetime64[ns]").astype(f"datetime64[{unidad}]").astype(np.int64)
+        etiquetas = None
+    unicos, posicion = np.unique(ids, return_inverse=True)
+    if etiquetas is None:
+        etiquetas = unicos.astype(f"datetime64[{unidad}]")
+    n_est, n_cub = valores.shape[0], len(unicos)
+    presentes = ~np.isnan(valores)
+    planos = (np.arange(n_est)[:, None] * n_cub + posicion[None, :])[presentes]
+    sumas = np.bincount(planos, weights=valores[presentes], minlength=n_est * n_cub)
+    conteos = np.bincount(planos, minlength=n_est * n_cub)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        medias = (sumas / conteos).astype(np.float32).reshape(n_est, n_cub)
+    return etiquetas, medias
+
+
+@lru_cache(maxsize=16)
+def _estaciones(variable, periodo, directorio, firma):
+    with etapa("superficie.estaciones", variable=variable, periodo=periodo) as reg:
+        cne = cargar_cne(["CODIGO", "latitud", "longitud", "altitud"]).dropna(subset=["latitud", "longitud"])
+        cne = cne.assign(Codigo=cne["CODIGO"].astype(str)).drop_duplicates("Codigo").set_index("Codigo")
+        series = {c: s for c, s in _series(variable, directorio).items() if c in cne.index}
+        codigos, tiempos, valores = matriz_estaciones(series, "1h")
+        etiquetas, medias = _a_cubetas(tiempos, valores, periodo)
+        coord = cne.loc[codigos]
+        reg.update(estaciones=len(codigos), cubetas=len(etiquetas))
+    return {
+        "codigos": codigos,
+        "latitud": coord["latitud"].to_numpy(dtype="float64"),
+        "longitud": coord["longitud"].to_numpy(dtype="float64"),
+        "altitud": coord["altitud"].fillna(0).to_numpy(dtype="float64"),
+        "cubetas": etiquetas,
+        "valores": medias,
+        "version": hash(firma)
+    }
+
+
+def estaciones(variable, periodo="mes", directorio=DATA_HIDRO):
+    """Coordenadas, altitud y promedio por cubeta de las estaciones de una variable"""
+    if variable not in VARIABLES_SUPERFICIE:
+        raise ValueError(f"Variable no interpolable: {variable}. Opciones: {list(VARIABLES_SUPERFICIE)}")
+    if periodo not in PERIODOS:
+        raise ValueError(f"Periodo no soportado: {periodo}. Opciones: {list(PERIODOS)}")
+    aciertos_previos = _estaciones.cache_info().hits
+    resultado = _estaciones(variable, periodo, directorio, firma_archivos(_rutas(variable, directorio)))
+    registrar_cache("superficie_estaciones", _estaciones.cache_info().hits > aciertos_previos)
+    return resultado
+
+
+def cubetas(variable, periodo="mes", directorio=DATA_HIDRO):
+    """Cubetas de tiempo disponibles (datetime64) para una variable y periodo"""
+    return estaciones(variable, periodo, directorio)["cubetas"]
+
+
+# --- Geometría de las teselas ---
+def teselas_en(bbox):
+    """Índices (ix, iy) de las teselas que cubren bbox = (lat_min, lat_max, lon_min, lon_max)"""
+    lat_min, lat_max, lon_min, lon_max = bbox
+    if not (lat_min < lat_max and lon_min < lon_max):
+        raise ValueError(f"Recuadro vacío o invertido: {bbox}; se espera lat_min < lat_max y lon_min < lon_max")
+    ixs = range(int(np.floor(lon_min / TESELA_GRADOS)), int(np.ceil(lon_max / TESELA_GRADOS)))
+    iys = range(int(np.floor(lat_min / TESELA_GRADOS)), int(np.ceil(lat_max / TESELA_GRADOS)))
+    return [(ix, iy) for iy in iys for ix in ixs]
+
+
+def _ejes(indice):
+    """Centros de las celdas de una tesela a lo largo de un eje"""
+    paso = TESELA_GRADOS / CELDAS_TESELA
+    return indice * TESELA_GRADOS + (np.arange(CELDAS_TESELA) + 0.5) * paso
+
+
+def _centros(ix, iy):
+    lon, lat = np.meshgrid(_ejes(ix), _ejes(iy))
+    return lat.ravel(), lon.ravel()
+
+
+@lru_cache(maxsize=1)
+def _altitudes_cne():
+    cne = cargar_cne(["latitud", "longitud", "altitud"]).dropna()
+    return cne["latitud"].to_numpy(dtype="float64"), cne["longitud"].to_numpy(dtype="float64"), \
+        cne["altitud"].to_numpy(dtype="float64")
+
+
+def pesos_idw(distancias, potencia=POTENCIA):
+    """Pesos 1/d^p (una celda sobre una estación toma su valor)"""
+    return 1.0 / np.maximum(distancias, 0.01) ** potencia
+
+
+@lru_cache(maxsize=MAX_TESELAS)
+def altitud_tesela(ix, iy):
+    """Altitud (m) de las celdas de una tesela, interpolada desde las estaciones del CNE"""
+    lat, lon, alt = _altitudes_cne()
+    lat_c, lon_c = _centros(ix, iy)
+    cerca = (
+        (lat >= lat_c.min() - MARGEN_ALTITUD) & (lat <= lat_c.max() + MARGEN_ALTITUD)
+        & (lon >= lon_c.min() - MARGEN_ALTITUD) & (lon <= lon_c.max() + MARGEN_ALTITUD)
+    )
+    if not cerca.any():
+        cerca = np.ones(len(lat), dtype=bool)
+    pesos = pesos_idw(distancias_km(lat_c, lon_c, lat[cerca], lon[cerca]))
+    return (pesos @ alt[cerca]) / pesos.sum(axis=1)
+
+
+# --- Interpolación ---
+def interpolar(lat_c, lon_c, est, valores, gradiente=0.0, altitud_celdas=None):
+    """IDW de valores (estación × cubeta) a celdas; devuelve celdas × cubeta (float32)"""
+    distancias = distancias_km(lat_c, lon_c, est["latitud"], est["longitud"])
+    pesos = pesos_idw(distancias)
+    presentes = ~np.isnan(valores)
+    if gradiente and altitud_celdas is not None:
+        # Al nivel del mar, y de vuelta a la altitud de cada celda
+        valores = valores + gradiente * est["altitud"][:, None] / 1000
+    numerador = pesos @ np.where(presentes, valores, 0).astype(np.float64)
+    denominador = pesos @ presentes.astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        salida = numerador / denominador
+    if gradiente and altitud_celdas is not None:
+        salida -= gradiente * altitud_celdas[:, None] / 1000
+    # Sin estación con dato dentro del radio, la celda queda vacía
+    cercana = np.where(presentes[None, :, :], distancias[:, :, None], np.inf).min(axis=1)
+    salida[cercana > RADIO_MAX_KM] = np.nan
+    return salida.astype(np.float32)
+
+
+def _clave(variable, periodo, posicion, tesela, correccion, est):
+    # La versión de los datos va en la clave: si cambia un .data, las teselas viejas no se reutilizan
+    return variable, periodo, int(posicion), *tesela, correccion, est["version"]
+
+
+def _posicion(est, cubeta):
+    etiquetas = est["cubetas"]
+    buscada = np.asarray(cubeta).astype(etiquetas.dtype)
+    posicion = int(np.searchsorted(etiquetas, buscada))
+    if posicion >= len(etiquetas) or etiquetas[posicion] != buscada:
+        raise ValueError(f"Cubeta sin datos: {cubeta}")
+    return posicion
+
+
+def _calcular_teselas(variable, periodo, posiciones, pendientes, correccion, est):
+    """Calcula las teselas pendientes para un bloque de cubetas y las guarda en la caché"""
+    valores = est["valores"][:, posiciones]
+    gradiente = VARIABLES_SUPERFICIE[variable] if correccion else 0.0
+    nuevas = {}
+    for tesela in pendientes:
+        lat_c, lon_c = _centros(*tesela)
+        altitud = altitud_tesela(*tesela) if correccion else None
+        superficies = interpolar(lat_c, lon_c, est, valores, gradiente, altitud)
+        for k, p in enumerate(posiciones):
+            nuevas[_clave(variable, periodo, p, tesela, correccion, est)] = \
+                superficies[:, k].reshape(CELDAS_TESELA, CELDAS_TESELA)
+    with _candado:
+        _teselas.update(nuevas)
+        while len(_teselas) > MAX_TESELAS:
+            _teselas.popitem(last=False)
+    return nuevas
+
+
+def superficie(variable, periodo, cubeta, bbox, correccion=True, directorio=DATA_HIDRO):
+    """Grilla interpolada de una cubeta dentro de bbox = (lat_min, lat_max, lon_min, lon_max).
+
+    Devuelve (latitudes, longitudes, grilla) con la grilla de forma (latitudes × longitudes),
+    alineada a las teselas que cubren el recuadro.
+    """
+    est = estaciones(variable, periodo, directorio)
+    posicion = _posicion(est, cubeta)
+    teselas = teselas_en(bbox)
+    with etapa("superficie", variable=variable, periodo=periodo, teselas=len(teselas)) as reg:
+        encontradas = {}
+        with _candado:
+            for tesela in teselas:
+                clave = _clave(variable, periodo, posicion, tesela, correccion, est)
+                encontradas[tesela] = _teselas.get(clave)
+                if encontradas[tesela] is not None:
+                    _teselas.move_to_end(clave)
+                registrar_cache("teselas", encontradas[tesela] is not None)
+        pendientes = [t for t, g in encontradas.items() if g is None]
+        if pendientes:
+            # Las cubetas vecinas salen en el mismo producto de matrices: mover el control de tiempo es un acierto
+            mitad = BLOQUE[periodo] // 2
+            bloque = np.arange(max(posicion - mitad, 0), min(posicion + mitad + 1, len(est["cubetas"])))
+            nuevas = _calcular_teselas(variable, periodo, bloque, pendientes, correccion, est)
+            for tesela in pendientes:
+                encontradas[tesela] = nuevas[_clave(variable, periodo, posicion, tesela, correccion, est)]
+        reg.update(calculadas=len(pendientes))
+
+    ixs = sorted({ix for ix, _ in teselas})
+    iys = sorted({iy for _, iy in teselas})
+    grilla = np.block([[encontradas[(ix, iy)] for ix in ixs] for iy in iys])
+    latitudes = np.concatenate([_ejes(iy) for iy in iys])
+    longitudes = np.concatenate([_ejes(ix) for ix in ixs])
+    return latitudes, longitudes, grilla
+
+
+def recuadro(variable, periodo="total", margen=0.5, directorio=DATA_HIDRO):
+    """bbox que cubre las estaciones de una variable, con un margen en grados"""
+    est = estaciones(variable, periodo, directorio)
+    return (
+        float(est["latitud"].min() - margen), float(est["latitud"].max() + margen),
+        float(est["longitud"].min() - margen), float(est["longitud"].max() + margen)
+    )
+
+
+def valores_estaciones(variable, periodo, cubeta, directorio=DATA_HIDRO):
+    """DataFrame Codigo, latitud, longitud, altitud y Valor de una cubeta (para superponer al mapa)"""
+    est = estaciones(variable, periodo, directorio)
+    posicion = _posicion(est, cubeta)
+    return pd.DataFrame({
+        "Codigo": est["codigos"],
+        "latitud": est["latitud"],
+        "longitud": est["longitud"],
+        "altitud": est["altitud"],
+        "Valor": est["valores"][:, posicion]
+    }).dropna(subset=["Valor"])
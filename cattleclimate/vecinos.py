@@ -0,0 +1,285 @@
+# cattleclimate/vecinos.py
+"""Correlación entre estaciones e imputación de huecos a partir de las vecinas.
+
+Para una variable, todas las estaciones se llevan a una matriz float32
+estación × celda sobre un eje de tiempo común (NaN donde no hay dato). Sobre las
+anomalías (valor menos la climatología horaria de cada estación, para que el
+ciclo diario no infle las correlaciones) se calculan en una sola pasada, con
+productos de matrices sobre la máscara de datos, las correlaciones de Pearson
+por pares usando solo las celdas donde ambas estaciones tienen dato, junto con
+la recta de regresión de cada estación sobre cada otra.
+
+Cada hueco interno de una estación se rellena con el promedio, ponderado por r²,
+de las predicciones de sus `k` vecinas mejor correlacionadas (dentro de
+`radio_km`, según las coordenadas de `datos/estaciones_mapa.csv`) que tienen
+dato en esa celda.
+
+    from cattleclimate.vecinos import imputar, tabla_vecinos
+    series = imputar("TA2_AUT_60")          # {"TA2_AUT_60@25025240": DataFrame, ...}
+    tabla_vecinos("TA2_AUT_60")             # Codigo, Vecino, r, Comunes, Distancia_km
+
+Las variables de dirección (DV*) se excluyen: son circulares y no admiten
+regresión lineal.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from cattleclimate.almacen import cargar_serie, firma_archivos
+from cattleclimate.datos import DATA_DIR, DATA_HIDRO, indice_desde_ns, listar_archivos, separar_nombre, tiempos_ns
+from cattleclimate.diagnostico import etapa, registrar_cache
+from cattleclimate.remuestreo import NS_DIA, clave_climatologica, frecuencia_nativa
+
+MAPA_PATH = DATA_DIR / "estaciones_mapa.csv"
+
+K_VECINOS = 3
+RADIO_KM = 150
+R_MIN = 0.5
+DIAS_COMUNES = 30
+PREFIJOS_CIRCULARES = ("DV",)
+RADIO_TIERRA_KM = 6371.0
+
+
+# --- Coordenadas ---
+def cargar_coordenadas(ruta=MAPA_PATH):
+    """Latitud y longitud por código de estación (índice Codigo como texto)"""
+    df = pd.read_csv(ruta, usecols=["CODIGO", "latitud", "longitud"], dtype={"CODIGO": str})
+    return df.dropna().drop_duplicates("CODIGO").set_index("CODIGO").rename_axis("Codigo")
+
+
+def distancias_km(latitud, longitud, latitud_destino=None, longitud_destino=None):
+    """Distancias de gran círculo (haversine) de cada punto a cada destino (por defecto, entre sí)"""
+    lat = np.radians(np.asarray(latitud, dtype="float64"))[:, None]
+    lon = np.radians(np.asarray(longitud, dtype="float64"))[:, None]
+    if latitud_destino is None:
+        lat2, lon2 = lat.T, lon.T
+    else:
+        lat2 = np.radians(np.asarray(latitud_destino, dtype="float64"))[None, :]
+        lon2 = np.radians(np.asarray(longitud_destino, dtype="float64"))[None, :]
+    a = np.sin((lat - lat2) / 2) ** 2 + np.cos(lat) * np.cos(lat2) * np.sin((lon - lon2) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+# --- Matriz estación × tiempo ---
+def variables_imputables(directorio=DATA_HIDRO):
+    """Etiquetas subdiarias o diarias, no circulares, con al menos dos estaciones"""
+    conteo = pd.Series([separar_nombre(r)[0] for r in listar_archivos(directorio)]).value_counts()
+    return sorted(
+        e for e, n in conteo.items()
+        if n >= 2 and frecuencia_nativa(e) is not None and not e.startswith(PREFIJOS_CIRCULARES)
+    )
+
+
+def matriz_estaciones(series, frecuencia="1h"):
+    """Lleva varias series a una matriz float32 estación × celda con eje de tiempo común.
+
+    `series` es un dict {codigo: Serie}. Devuelve (codigos, tiempos_ns, valores);
+    las celdas con varias observaciones se promedian y las vacías quedan en NaN.
+    """
+    paso = pd.Timedelta(frecuencia).value
+    codigos = [c for c, s in series.items() if not s.empty]
+    tiempos = [tiempos_ns(series[c].index) for c in codigos]
+    if not codigos:
+        return codigos, np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float32)
+    t0 = min(int(t[0]) for t in tiempos)
+    t0 -= t0 % paso
+    n = int((max(int(t[-1]) for t in tiempos) - t0) // paso) + 1
+
+    # Todas las estaciones en un solo bincount, sobre el índice plano estación * n + celda
+    planos = np.concatenate([i * n + (t - t0) // paso for i, t in enumerate(tiempos)])
+    valores = np.concatenate([series[c].to_numpy(dtype="float64") for c in codigos])
+    conteos = np.bincount(planos, minlength=len(codigos) * n)
+    sumas = np.bincount(planos, weights=valores, minlength=len(codigos) * n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        matriz = (sumas / conteos).astype(np.float32).reshape(len(codigos), n)
+    return codigos, t0 + np.arange(n, dtype=np.int64) * paso, matriz
+
+
+def anomalias(valores, tiempos, paso):
+    """Resta a cada estación su climatología (hora del día, o día del año en grillas diarias).
+
+    Devuelve (anomalías, climatología estación × clave, clave por celda).
+    """
+    clave, n_claves = clave_climatologica(tiempos, paso)
+    n_est = valores.shape[0]
+    presentes = ~np.isnan(valores)
+    planos = (np.arange(n_est)[:, None] * n_claves + clave[None, :])[presentes]
+    sumas = np.bincount(planos, weights=valores[presentes], minlength=n_est * n_claves)
+    conteos = np.bincount(planos, minlength=n_est * n_claves)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        climatologia = (sumas / conteos).reshape(n_est, n_claves).astype(np.float32)
+    return valores - climatologia[:, clave], climatologia, clave
+
+
+# --- Correlaciones ---
+def correlaciones(valores):
+    """Estadísticas por pares sobre las celdas donde ambas estaciones tienen dato.
+
+    Devuelve un dict de matrices estación × estación: `r` (Pearson), `comunes`
+    (celdas compartidas), y `pendiente` e `intercepto` de la regresión de la
+    estación de la fila sobre la de la columna.
+    """
+    presentes = ~np.isnan(valores)
+    m = presentes.astype(np.float64)
+    x = np.where(presentes, valores, 0).astype(np.float64)
+    # Sumas sobre la intersección de máscaras: [i, j] suma x_i donde j también tiene dato
+    comunes = m @ m.T
+    suma = x @ m.T
+    suma_cuadrados = (x * x) @ m.T
+    producto = x @ x.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = suma / comunes
+        varianza = suma_cuadrados / comunes - media ** 2
+        covarianza = producto / comunes - media * media.T
+        r = covarianza / np.sqrt(varianza * varianza.T)
+        pendiente = covarianza / varianza.T
+    intercepto = media - pendiente * media.T
+    return {
+        "r": r.astype(np.float32),
+        "comunes": comunes.astype(np.int64),
+        "pendiente": pendiente.astype(np.float32),
+        "intercepto": intercepto.astype(np.float32)
+    }
+
+
+def elegir_vecinos(estadisticas, distancias, k=K_VECINOS, r_min=R_MIN, min_comunes=1, radio_km=RADIO_KM):
+    """Índices de las `k` vecinas mejor correlacionadas de cada estación (-1 si faltan)"""
+    r = estadisticas["r"].astype(np.float64)
+    validas = (
+        (r >= r_min) & (estadisticas["comunes"] >= min_comunes)
+        & (distancias <= radio_km) & ~np.eye(len(r), dtype=bool)
+    )
+    puntaje = np.where(validas, r, -np.inf)
+    orden = np.argsort(-puntaje, axis=1, kind="stable")[:, :k]
+    return np.where(np.take_along_axis(validas, orden, axis=1), orden, -1)
+
+
+def imputar_matriz(anom, estadisticas, vecinos):
+    """Rellena los huecos internos de cada fila con sus vecinas (en anomalías).
+
+    Devuelve (anomalías rellenas, número de vecinas usadas por celda).
+    """
+    faltantes = np.isnan(anom)
+    salida = anom.copy()
+    usadas = np.zeros(anom.shape, dtype=np.int8)
+    posiciones = np.arange(anom.shape[1])
+    for i in range(anom.shape[0]):
+        validos = np.flatnonzero(~faltantes[i])
+        if len(validos) == 0 or not (vecinos[i] >= 0).any():
+            continue
+        internos = (posiciones > validos[0]) & (posiciones < validos[-1]) & faltantes[i]
+        suma = np.zeros(anom.shape[1])
+        pesos = np.zeros(anom.shape[1])
+        for j in vecinos[i][vecinos[i] >= 0]:
+            disponible = internos & ~faltantes[j]
+            prediccion = estadisticas["intercepto"][i, j] + estadisticas["pendiente"][i, j] * anom[j]
+            peso = float(estadisticas["r"][i, j]) ** 2
+            suma[disponible] += peso * prediccion[disponible]
+            pesos[disponible] += peso
+            usadas[i, disponible] += 1
+        rellenar = pesos > 0
+        salida[i, rellenar] = (suma[rellenar] / pesos[rellenar]).astype(np.float32)
+    return salida, usadas
+
+
+# --- Modelo por variable (en caché mientras no cambien los archivos) ---
+@lru_cache(maxsize=8)
+def _modelo(etiqueta, frecuencia, directorio, firma):
+    with etapa("vecinos.modelo", etiqueta=etiqueta) as reg:
+        series = {separar_nombre(r)[1]: cargar_serie(r) for r in listar_archivos(directorio, etiqueta=etiqueta)}
+        coordenadas = cargar_coordenadas()
+        series = {c: s for c, s in series.items() if c in coordenadas.index}
+        codigos, tiempos, valores = matriz_estaciones(series, frecuencia)
+        paso = pd.Timedelta(frecuencia).value
+        anom, climatologia, clave = anomalias(valores, tiempos, paso)
+        coord = coordenadas.loc[codigos]
+        reg.update(estaciones=len(codigos), celdas=len(tiempos))
+        return {
+            "codigos": codigos,
+            "tiempos": tiempos,
+            "valores": valores,
+            "anomalias": anom,
+            "climatologia": climatologia,
+            "clave": clave,
+            "distancias": distancias_km(coord["latitud"], coord["longitud"]),
+            "estadisticas": correlaciones(anom),
+            "min_comunes": max(int(DIAS_COMUNES * NS_DIA // paso), 1)
+        }
+
+
+def modelo(etiqueta, frecuencia=None, directorio=DATA_HIDRO):
+    """Matriz, anomalías y correlaciones de una variable (ver `_modelo`); no modificar"""
+    if etiqueta.startswith(PREFIJOS_CIRCULARES):
+        raise ValueError(f"{etiqueta} es una dirección (circular): no se imputa por regresión")
+    frecuencia = frecuencia or frecuencia_nativa(etiqueta)
+    if frecuencia is None:
+        raise ValueError(f"{etiqueta} es mensual: no se imputa")
+    rutas = listar_archivos(directorio, etiqueta=etiqueta)
+    aciertos_previos = _modelo.cache_info().hits
+    resultado = _modelo(etiqueta, frecuencia, directorio, firma_archivos(rutas))
+    registrar_cache("vecinos", _modelo.cache_info().hits > aciertos_previos)
+    return resultado
+
+
+def tabla_vecinos(etiqueta, k=K_VECINOS, r_min=R_MIN, radio_km=RADIO_KM, directorio=DATA_HIDRO):
+    """Vecinas elegidas por estación: Codigo, Vecino, r, Comunes, Distancia_km"""
+    m = modelo(etiqueta, directorio=directorio)
+    vecinos = elegir_vecinos(m["estadisticas"], m["distancias"], k, r_min, m["min_comunes"], radio_km)
+    filas = [
+        {
+            "Codigo": codigo,
+            "Vecino": m["codigos"][j],
+            "r": float(m["estadisticas"]["r"][i, j]),
+            "Comunes": int(m["estadisticas"]["comunes"][i, j]),
+            "Distancia_km": float(m["distancias"][i, j])
+        }
+        for i, codigo in enumerate(m["codigos"]) for j in vecinos[i] if j >= 0
+    ]
+    return pd.DataFrame(filas, columns=["Codigo", "Vecino", "r", "Comunes", "Distancia_km"])
+
+
+def matriz_correlacion(etiqueta, directorio=DATA_HIDRO):
+    """Correlaciones entre estaciones de una variable como DataFrame Codigo × Codigo"""
+    m = modelo(etiqueta, directorio=directorio)
+    return pd.DataFrame(m["estadisticas"]["r"], index=m["codigos"], columns=m["codigos"])
+
+
+# --- Imputación ---
+def imputar(etiqueta, k=K_VECINOS, r_min=R_MIN, radio_km=RADIO_KM, directorio=DATA_HIDRO):
+    """Series de una variable con los huecos internos rellenados desde las vecinas.
+
+    Devuelve {"ETIQUETA@CODIGO": DataFrame} indexado por Fecha con las columnas de
+    `remuestrear` (Valor, Cobertura, Relleno) más Vecinos (vecinas usadas por celda).
+    """
+    m = modelo(etiqueta, directorio=directorio)
+    with etapa("vecinos.imputar", etiqueta=etiqueta) as reg:
+        vecinos = elegir_vecinos(m["estadisticas"], m["distancias"], k, r_min, m["min_comunes"], radio_km)
+        rellenas, usadas = imputar_matriz(m["anomalias"], m["estadisticas"], vecinos)
+        valores = rellenas + m["climatologia"][:, m["clave"]]
+        # Sin climatología para la fecha la anomalía rellenada no da un valor: la celda no cuenta como relleno
+        rellenado = (usadas > 0) & np.isfinite(valores)
+        usadas = np.where(rellenado, usadas, 0)
+        cobertura = ~np.isnan(m["valores"])
+        indice = indice_desde_ns(m["tiempos"])
+        resultados = {}
+        for i, codigo in enumerate(m["codigos"]):
+            # Cada estación se recorta a su propio periodo de registro
+            validos = np.flatnonzero(cobertura[i])
+            tramo = slice(validos[0], validos[-1] + 1)
+            resultados[f"{etiqueta}@{codigo}"] = pd.DataFrame({
+                "Valor": valores[i, tramo].astype("float64"),
+                "Cobertura": cobertura[i, tramo],
+                "Relleno": rellenado[i, tramo],
+                "Vecinos": usadas[i, tramo]
+            }, index=indice[tramo])
+        reg["rellenas"] = int(rellenado.sum())
+    return resultados
+
+
+def imputar_corpus(etiquetas=None, k=K_VECINOS, r_min=R_MIN, radio_km=RADIO_KM, directorio=DATA_HIDRO):
+    """Imputa todas las variables (por defecto, `variables_imputables`) en lote"""
+    resultados = {}
+    for etiqueta in etiquetas or variables_imputables(directorio):
+        resultados.update(imputar(etiqueta, k, r_min, radio_km, directorio))
+    return resultados
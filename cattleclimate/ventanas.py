@@ -0,0 +1,107 @@
+# cattleclimate/ventanas.py
+"""Estadísticas móviles sobre series en grilla regular.
+
+Todas las ventanas son "hacia atrás": el valor en la celda j resume las celdas
+j - ventana + 1 ... j, igual que `pandas.Series.rolling`.
+
+- Media: diferencia de sumas acumuladas.
+- Máximo / mínimo: algoritmo de van Herk / Gil-Werman (prefijos y sufijos por
+  bloques), que da el mismo resultado que una cola monótona pero sin bucle en Python.
+- Cuantiles: exactos con `pandas.Series.rolling().quantile`, que mantiene la
+  ventana ordenada en una skiplist (O(n log w)). Un histograma deslizante era
+  más lento (una pasada por clase) y los centinelas como 999 ensanchaban tanto
+  las clases que el error llegaba a varias unidades.
+"""
+import numpy as np
+import pandas as pd
+
+from cattleclimate.remuestreo import remuestrear
+
+VENTANAS_ESTRES = ("24h", "72h", "7D")
+
+
+def _conteo_movil(validos, ventana):
+    acumulado = np.concatenate(([0], np.cumsum(validos, dtype=np.int64)))
+    inicio = np.maximum(np.arange(1, len(validos) + 1) - ventana, 0)
+    return acumulado[1:] - acumulado[inicio]
+
+
+def media_movil(valores, ventana, min_periodos=1):
+    """Media móvil ignorando NaN (NaN si hay menos de `min_periodos` datos en la ventana)"""
+    valores = np.asarray(valores, dtype="float64")
+    validos = ~np.isnan(valores)
+    acumulado = np.concatenate(([0.0], np.cumsum(np.where(validos, valores, 0.0))))
+    inicio = np.maximum(np.arange(1, len(valores) + 1) - ventana, 0)
+    sumas = acumulado[1:] - acumulado[inicio]
+    conteos = _conteo_movil(validos, ventana)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = sumas / conteos
+    media[conteos < max(min_periodos, 1)] = np.nan
+    return media
+
+
+def _extremo_movil(valores, ventana, funcion, neutro, min_periodos):
+    valores = np.asarray(valores, dtype="float64")
+    n = len(valores)
+    if n == 0:
+        return valores.copy()
+    validos = ~np.isnan(valores)
+    x = np.where(validos, valores, neutro)
+
+    # Relleno al inicio (ventanas incompletas) y al final (múltiplo del bloque)
+    m = n + ventana - 1
+    m_bloques = -(-m // ventana) * ventana
+    y = np.full(m_bloques, neutro)
+    y[ventana - 1:ventana - 1 + n] = x
+
+    bloques = y.reshape(-1, ventana)
+    prefijo = funcion.accumulate(bloques, axis=1).ravel()
+    sufijo = funcion.accumulate(bloques[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    j = np.arange(n)
+    resultado = funcion(sufijo[j], prefijo[j + ventana - 1])
+    resultado[_conteo_movil(validos, ventana) < max(min_periodos, 1)] = np.nan
+    return resultado
+
+
+def maximo_movil(valores, ventana, min_periodos=1):
+    """Máximo móvil en O(n) ignorando NaN"""
+    return _extremo_movil(valores, ventana, np.maximum, -np.inf, min_periodos)
+
+
+def minimo_movil(valores, ventana, min_periodos=1):
+    """Mínimo móvil en O(n) ignorando NaN"""
+    return _extremo_movil(valores, ventana, np.minimum, np.inf, min_periodos)
+
+
+def cuantil_movil(valores, ventana, q, min_periodos=1):
+    """Cuantil móvil exacto ignorando NaN (interpolación lineal, como pandas)"""
+    valores = pd.Series(np.asarray(valores, dtype="float64"))
+    rolling = valores.rolling(ventana, min_periods=max(min_periodos, 1))
+    return rolling.quantile(q, interpolation="linear").to_numpy()
+
+
+def estadisticas_moviles(serie, ventanas=VENTANAS_ESTRES, frecuencia="1h", cuantiles=(0.9,),
+                         estrategia="nan", max_horas=3, min_fraccion=0.5):
+    """Media, máximo, mínimo y cuantiles móviles de una serie (archivo .data o índice).
+
+    La serie se lleva a grilla regular y cada ventana (p. ej. "24h", "7D") se
+    convierte a número de celdas. Una ventana exige al menos `min_fraccion` de
+    celdas con dato. Las columnas se nombran `media_24h`, `max_24h`, `p90_24h`...
+    """
+    regular = remuestrear(serie, frecuencia, estrategia=estrategia, max_horas=max_horas)
+    valores = regular["Valor"].to_numpy()
+    paso = pd.Timedelta(frecuencia)
+
+    columnas = {}
+    for ventana in ventanas:
+        celdas = max(int(pd.Timedelta(ventana) / paso), 1)
+        min_periodos = max(int(celdas * min_fraccion), 1)
+        columnas[f"media_{ventana}"] = media_movil(valores, celdas, min_periodos)
+        columnas[f"max_{ventana}"] = maximo_movil(valores, celdas, min_periodos)
+        columnas[f"min_{ventana}"] = minimo_movil(valores, celdas, min_periodos)
+        for q in cuantiles:
+            columnas[f"p{round(q * 100)}_{ventana}"] = cuantil_movil(
+                valores, celdas, q, min_periodos=min_periodos
+            )
+    return pd.DataFrame(columnas, index=regular.index)
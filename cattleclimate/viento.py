@@ -0,0 +1,208 @@
+# cattleclimate/viento.py
+"""Rosa de vientos y medias vectoriales a partir de los pares dirección/velocidad.
+
+Cada par (p. ej. DVAG_CON / VVAG_CON) se alinea por fecha y se resume en una sola
+pasada de NumPy en un cubo mes × hora con:
+
+- frecuencias por sector de dirección (`SECTORES`) y clase de velocidad
+  (`CLASES_VELOCIDAD`), sin las calmas;
+- calmas (velocidad menor que `CALMA`) y observaciones válidas;
+- sumas de las componentes u, v y de la velocidad escalar, de las que salen la
+  dirección y velocidad medias vectoriales y la constancia del viento.
+
+Cualquier vista (un mes, un rango de horas, el año completo) se obtiene sumando
+celdas del cubo, sin volver a leer las series. El cubo se guarda en
+`cache/viento/` con la huella de los dos archivos, de modo que los archivos de
+viento (los más grandes del corpus) se leen una sola vez por versión.
+
+    from cattleclimate.viento import cubo, medias, rosa
+    c = cubo("DVAG_CON", "25025240")
+    rosa(c, meses=[1, 2, 3])           # % por sector y clase de velocidad
+    medias(c, por="hora")              # dirección y velocidad vectoriales por hora
+"""
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from cattleclimate.almacen import CACHE_DIR, cargar_serie, firma_archivos, guardar_npz, leer_npz
+from cattleclimate.datos import DATA_HIDRO, listar_archivos, separar_nombre, tiempos_ns
+from cattleclimate.diagnostico import etapa, registrar_cache
+from cattleclimate.remuestreo import NS_DIA, NS_HORA
+
+VIENTO_DIR = CACHE_DIR / "viento"
+
+# Dirección -> velocidad de cada familia de archivos
+PARES_VIENTO = {
+    "DVAG_CON": "VVAG_CON",
+    "DV_AUT_10": "VV_AUT_10",
+    "DV_AUT_2": "VV_AUT_2",
+    "DVMX_AUT_60": "VVMX_AUT_60",
+    "DV_10_VECT_MEDIA_H": "VV_10_MEDIA_H",
+    "DVMXAG_CON": "VVMXAG_CON",
+}
+
+SECTORES = 16
+NOMBRES_SECTOR = ("N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+                  "S", "SSO", "SO", "OSO", "O", "ONO", "NO", "NNO")
+CALMA = 0.5  # m/s
+VELOCIDAD_MAX = 75  # m/s; por encima son códigos de dato faltante (p. ej. 999/1000)
+CLASES_VELOCIDAD = (CALMA, 2, 4, 6, 8, np.inf)
+NOMBRES_CLASE = tuple(
+    f"{a:g}-{b:g} m/s" if np.isfinite(b) else f">{a:g} m/s"
+    for a, b in zip(CLASES_VELOCIDAD[:-1], CLASES_VELOCIDAD[1:])
+)
+
+
+# --- Pares disponibles ---
+def pares_estacion(codigo, directorio=DATA_HIDRO):
+    """Etiquetas de dirección con su par de velocidad presente para la estación"""
+    return [
+        dv for dv, vv in PARES_VIENTO.items()
+        if (directorio / f"{dv}@{codigo}.data").exists() and (directorio / f"{vv}@{codigo}.data").exists()
+    ]
+
+
+def estaciones_viento(directorio=DATA_HIDRO):
+    """Códigos de estación con al menos un par dirección/velocidad"""
+    codigos = {separar_nombre(r)[1] for dv in PARES_VIENTO for r in listar_archivos(directorio, etiqueta=dv)}
+    return sorted(c for c in codigos if pares_estacion(c, directorio))
+
+
+# --- Cubo mes × hora ---
+def alinear(direccion, velocidad):
+    """Tiempos (ns), dirección y velocidad en las fechas comunes de las dos series"""
+    t_dir, t_vel = tiempos_ns(direccion.index), tiempos_ns(velocidad.index)
+    tiempos, i, j = np.intersect1d(t_dir, t_vel, assume_unique=True, return_indices=True)
+    return tiempos, direccion.to_numpy(dtype="float64")[i], velocidad.to_numpy(dtype="float64")[j]
+
+
+def resumir(tiempos, direccion, velocidad):
+    """Cubo mes × hora de un par alineado (ver el módulo), como dict de arrays"""
+    validos = (
+        np.isfinite(direccion) & np.isfinite(velocidad)
+        & (direccion >= 0) & (direccion <= 360) & (velocidad >= 0) & (velocidad <= VELOCIDAD_MAX)
+    )
+    tiempos, direccion, velocidad = tiempos[validos], direccion[validos] % 360, velocidad[validos]
+
+    mes = tiempos.view("datetime64[ns]").astype("datetime64[M]").astype(np.int64) % 12
+    hora = (tiempos % NS_DIA) // NS_HORA
+    celda = mes * 24 + hora
+    calma = velocidad < CALMA
+    # Sectores centrados en N, NNE, ...: el sector 0 cubre [-11.25°, 11.25°)
+    sector = np.floor((direccion + 180 / SECTORES) / (360 / SECTORES)).astype(np.int64) % SECTORES
+    clase = np.clip(np.searchsorted(CLASES_VELOCIDAD, velocidad, side="right") - 1, 0, len(NOMBRES_CLASE) - 1)
+
+    n_celdas = 12 * 24
+    n_bins = SECTORES * len(NOMBRES_CLASE)
+    plano = (celda * n_bins + sector * len(NOMBRES_CLASE) + clase)[~calma]
+    frecuencias = np.bincount(plano, minlength=n_celdas * n_bins).reshape(12, 24, SECTORES, len(NOMBRES_CLASE))
+
+    # Convención meteorológica: la dirección es de donde viene el viento
+    radianes = np.radians(direccion)
+    u = -velocidad * np.sin(radianes)
+    v = -velocidad * np.cos(radianes)
+    return {
+        "frecuencias": frecuencias.astype(np.int32),
+        "calmas": np.bincount(celda[calma], minlength=n_celdas).reshape(12, 24).astype(np.int32),
+        "total": np.bincount(celda, minlength=n_celdas).reshape(12, 24).astype(np.int32),
+        "suma_u": np.bincount(celda, weights=u, minlength=n_celdas).reshape(12, 24),
+        "suma_v": np.bincount(celda, weights=v, minlength=n_celdas).reshape(12, 24),
+        "suma_velocidad": np.bincount(celda, weights=velocidad, minlength=n_celdas).reshape(12, 24),
+    }
+
+
+def _ruta(etiqueta, codigo):
+    return VIENTO_DIR / f"{etiqueta}@{codigo}.npz"
+
+
+@lru_cache(maxsize=64)
+def _cubo(etiqueta, codigo, directorio, firma):
+    clave = json.dumps(firma)
+    ruta = _ruta(etiqueta, codigo)
+    guardado = leer_npz(ruta, clave)
+    registrar_cache("viento_disco", guardado is not None)
+    if guardado is not None:
+        return guardado
+    with etapa("viento.cubo", serie=f"{etiqueta}@{codigo}") as reg:
+        direccion = cargar_serie(directorio / f"{etiqueta}@{codigo}.data")
+        velocidad = cargar_serie(directorio / f"{PARES_VIENTO[etiqueta]}@{codigo}.data")
+        resultado = resumir(*alinear(direccion, velocidad))
+        reg["filas"] = int(resultado["total"].sum())
+    guardar_npz(ruta, clave, **resultado)
+    return resultado
+
+
+def cubo(etiqueta, codigo, directorio=DATA_HIDRO):
+    """Cubo mes × hora del par de `etiqueta` (dirección) en la estación; no modificar"""
+    if etiqueta not in PARES_VIENTO:
+        raise ValueError(f"{etiqueta} no es una dirección de viento. Opciones: {list(PARES_VIENTO)}")
+    rutas = [directorio / f"{e}@{codigo}.data" for e in (etiqueta, PARES_VIENTO[etiqueta])]
+    if not all(r.exists() for r in rutas):
+        raise FileNotFoundError(f"Falta {etiqueta} o {PARES_VIENTO[etiqueta]} para la estación {codigo}")
+    aciertos_previos = _cubo.cache_info().hits
+    resultado = _cubo(etiqueta, str(codigo), directorio, firma_archivos(rutas))
+    registrar_cache("viento", _cubo.cache_info().hits > aciertos_previos)
+    return resultado
+
+
+# --- Vistas del cubo ---
+def _seleccion(meses, horas):
+    """Máscara 12 × 24 de las celdas elegidas (meses 1-12, horas 0-23)"""
+    mascara = np.zeros((12, 24), dtype=bool)
+    mascara[np.ix_(
+        np.asarray(meses if meses is not None else range(1, 13)) - 1,
+        np.asarray(horas if horas is not None else range(24))
+    )] = True
+    return mascara
+
+
+def rosa(c, meses=None, horas=None):
+    """Frecuencia (%) por sector y clase de velocidad, más la fila de calmas.
+
+    DataFrame con índice Sector (en el orden N, NNE, ...) y una columna por clase;
+    el porcentaje es sobre todas las observaciones válidas de la selección.
+    """
+    mascara = _seleccion(meses, horas)
+    total = c["total"][mascara].sum()
+    conteos = c["frecuencias"][mascara].sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        porcentaje = 100 * conteos / total
+    df = pd.DataFrame(porcentaje, index=pd.Index(NOMBRES_SECTOR, name="Sector"), columns=NOMBRES_CLASE)
+    df.attrs["calmas_%"] = float(100 * c["calmas"][mascara].sum() / total) if total else float("nan")
+    df.attrs["observaciones"] = int(total)
+    return df
+
+
+def medias(c, por="mes", meses=None, horas=None):
+    """Media vectorial por mes, por hora o del total de la selección.
+
+    Columnas: Direccion (°), Velocidad_vectorial, Velocidad_media (m/s),
+    Constancia (vectorial / escalar, 0-1), Calmas_% y Observaciones.
+    """
+    mascara = _seleccion(meses, horas)
+    claves = ("suma_u", "suma_v", "suma_velocidad", "calmas", "total")
+    ejes = {"mes": (1, "Mes", np.arange(1, 13)), "hora": (0, "Hora", np.arange(24))}
+    if por == "total":
+        sumas = {k: np.array([c[k][mascara].sum()]) for k in claves}
+        indice = pd.Index(["Total"], name="Periodo")
+    elif por in ejes:
+        eje, nombre, etiquetas = ejes[por]
+        sumas = {k: np.where(mascara, c[k], 0).sum(axis=eje) for k in claves}
+        indice = pd.Index(etiquetas, name=nombre)
+    else:
+        raise ValueError(f"Agrupación no soportada: {por} (use mes, hora o total)")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        u = sumas["suma_u"] / sumas["total"]
+        v = sumas["suma_v"] / sumas["total"]
+        escalar = sumas["suma_velocidad"] / sumas["total"]
+        vectorial = np.hypot(u, v)
+        return pd.DataFrame({
+            "Direccion": np.degrees(np.arctan2(-u, -v)) % 360,
+            "Velocidad_vectorial": vectorial,
+            "Velocidad_media": escalar,
+            "Constancia": vectorial / escalar,
+            "Calmas_%": 100 * sumas["calmas"] / sumas["total"],
+            "Observaciones": sumas["total"]
+        }, index=indice)
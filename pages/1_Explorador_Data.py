@@ -4,6 +4,10 @@ import pandas as pd
 from pathlib import Path
 import warnings
 
+from cattleclimate.datos import cargar_cne, cargar_glosario
+from cattleclimate.diagnostico import etapa
+from cattleclimate.sesion import panel_diagnostico
+
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 
 st.header("📂 Explorador de Archivos .data")
@@ -19,14 +23,6 @@ CNE_PATH = DATA_DIR / "CNE_IDEAM.xlsx"
 # Crear directorio de resultados si no existe
 RESULTS_DIR.mkdir(exist_ok=True)
 
-# --- Cargar auxiliares ---
-try:
-    glosario = pd.read_excel(GLOSARIO_PATH, sheet_name="Básicas")
-    cne = pd.read_excel(CNE_PATH, sheet_name="CNE")
-except Exception as e:
-    st.error(f"Error cargando archivos auxiliares: {e}")
-    st.stop()
-
 # --- Listar archivos .data ---
 try:
     data_files = [f.name for f in DATA_HIDRO.glob("*.data")]  # Usamos pathlib para listar archivos
@@ -38,13 +34,21 @@ try:
 
         # Cargar datos
         try:
-            df = pd.read_csv(ruta_archivo, sep="|", names=["Fecha", "Valor"], engine="python")
+            with etapa("read_csv", archivo=archivo, pagina="1_Explorador_Data") as reg:
+                df = pd.read_csv(ruta_archivo, sep="|", names=["Fecha", "Valor"], engine="python")
+                reg["filas"] = len(df)
             df["Etiqueta"] = etiqueta
             df["Codigo"] = codigo
 
             st.success(f"Archivo: {archivo} cargado correctamente")
 
-            # Mostrar información
+            # Mostrar información (los metadatos se cargan al necesitarlos, desde la caché)
+            try:
+                glosario = cargar_glosario()
+                cne = cargar_cne()
+            except Exception as e:
+                st.error(f"Error cargando archivos auxiliares: {e}")
+                st.stop()
             info_var = glosario[glosario["Etiqueta"] == etiqueta]
             info_est = cne[cne["CODIGO"] == int(codigo)]
 
@@ -57,7 +61,8 @@ try:
                 st.dataframe(info_est)
 
             st.subheader("📄 Vista previa de datos")
-            st.dataframe(df.head(100))
+            from cattleclimate.grilla import tabla_paginada  # trae pyarrow solo al mostrar datos
+            tabla_paginada(df, clave="explorador")
 
             # --- Nueva sección para guardar resultados ---
             st.markdown("---")
@@ -84,4 +89,6 @@ try:
             st.error(f"Error al procesar archivo: {e}")
 
 except Exception as e:
-    st.error(f"No se encontraron archivos .data en: {DATA_HIDRO}")
\ No newline at end of file
+    st.error(f"No se encontraron archivos .data en: {DATA_HIDRO}")
+
+panel_diagnostico()
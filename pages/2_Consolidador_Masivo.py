@@ -2,92 +2,87 @@
 
 import streamlit as st
 import pandas as pd
-from pathlib import Path
 import warnings
 
+from cattleclimate.almacen import descripcion_frescura
+from cattleclimate.consulta import COLUMNAS, consultar
+from cattleclimate.diagnostico import etapa
+from cattleclimate.grilla import tabla_paginada
+from cattleclimate.sesion import obtener_corpus, panel_diagnostico
+
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 
 st.header("📊 Consolidador Masivo de Archivos .data")
 
-# --- Rutas base (multiplataforma) ---
-BASE_DIR = Path(__file__).parent.parent  # Raíz del proyecto
-DATA_DIR = BASE_DIR / "datos"
-DATA_HIDRO = DATA_DIR / "hidrometeorologicos"
-GLOSARIO_PATH = DATA_DIR / "Glosario Variables.xlsx"
-CNE_PATH = DATA_DIR / "CNE_IDEAM.xlsx"
-
-# --- Cargar auxiliares ---
+# --- Datos compartidos entre sesiones (una sola copia por proceso) ---
 try:
-    glosario = pd.read_excel(GLOSARIO_PATH, sheet_name="Básicas")
-    cne = pd.read_excel(CNE_PATH, sheet_name="CNE")
+    corpus = obtener_corpus()
+    estaciones = corpus.estaciones()
 except Exception as e:
     st.error(f"Error cargando archivos auxiliares: {e}")
     st.stop()
 
-# --- Buscar archivos con pathlib ---
-data_files = [f.name for f in DATA_HIDRO.glob("*.data")]  # Lista multiplataforma
-
-@st.cache_data(show_spinner=True)
-def cargar_datos_masivos():
-    todos = []
-    for archivo in data_files:
-        try:
-            etiqueta, codigo = archivo.replace(".data", "").split("@")
-            ruta = DATA_HIDRO / archivo  # Ruta compatible con ambos OS
-            
-            df = pd.read_csv(ruta, sep="|", names=["Fecha", "Valor"], engine="python")
-            df["Archivo"] = archivo
-            df["Etiqueta"] = etiqueta
-            df["Codigo"] = codigo
-
-            # Metadatos (variables)
-            meta_var = glosario[glosario["Etiqueta"] == etiqueta]
-            if not meta_var.empty:
-                df = df.assign(**meta_var.iloc[0].to_dict())
-
-            # Metadatos (estaciones)
-            meta_est = cne[cne["CODIGO"] == int(codigo)]
-            if not meta_est.empty:
-                df = df.assign(**meta_est.iloc[0].to_dict())
-
-            todos.append(df)
-        except Exception as e:
-            st.warning(f"No se pudo procesar {archivo}: {str(e)}")
-    return pd.concat(todos, ignore_index=True) if todos else pd.DataFrame()
-
 # --- Interfaz ---
-st.info("Procesando archivos .data...")
-df_total = cargar_datos_masivos()
-
-if not df_total.empty:
-    st.success(f"✅ {len(df_total)} registros de {df_total['Archivo'].nunique()} archivos procesados")
+st.caption(descripcion_frescura())
 
-    # --- Filtros ---
+if not estaciones.empty:
+    # --- Filtros (a partir del catálogo, sin cargar las series) ---
     col1, col2 = st.columns(2)
-    etiquetas = df_total["Etiqueta"].unique()
-    departamentos = df_total["DEPARTAMENTO"].dropna().unique()
+    etiquetas = estaciones["Etiqueta"].unique()
+    departamentos = estaciones["DEPARTAMENTO"].dropna().unique()
 
     with col1:
         filtro_etiqueta = st.selectbox("📌 Filtrar por variable", ["Todas"] + sorted(etiquetas))
     with col2:
         filtro_departamento = st.selectbox("📍 Filtrar por departamento", ["Todos"] + sorted(departamentos))
 
-    # Aplicar filtros
-    df_filtrado = df_total.copy()
-    if filtro_etiqueta != "Todas":
-        df_filtrado = df_filtrado[df_filtrado["Etiqueta"] == filtro_etiqueta]
-    if filtro_departamento != "Todos":
-        df_filtrado = df_filtrado[df_filtrado["DEPARTAMENTO"] == filtro_departamento]
-
-    # Mostrar resultados
-    st.dataframe(df_filtrado.head(1000), use_container_width=True)
-
-    # Botón de descarga
-    st.download_button(
-        "⬇️ Descargar CSV filtrado",
-        data=df_filtrado.to_csv(index=False, encoding="utf-8-sig"),
-        file_name="datos_consolidados.csv",
-        mime="text/csv"
+    desde = hasta = None
+    if st.checkbox("📅 Limitar a un rango de fechas"):
+        col3, col4 = st.columns(2)
+        with col3:
+            desde = st.date_input("Desde", pd.Timestamp("2020-01-01"))
+        with col4:
+            hasta = st.date_input("Hasta", pd.Timestamp.today())
+        # El día final completo
+        hasta = pd.Timestamp(hasta) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+
+    # Los filtros se empujan al catálogo, a las particiones y a los grupos de filas del dataset
+    filtros = dict(
+        etiquetas=None if filtro_etiqueta == "Todas" else [filtro_etiqueta],
+        departamentos=None if filtro_departamento == "Todos" else [filtro_departamento],
+        desde=desde, hasta=hasta, columnas=COLUMNAS, corpus=corpus
     )
+    reporte = {}
+
+    def leer(desplazamiento, limite):
+        return consultar(desplazamiento=desplazamiento, limite=limite, reporte=reporte, **filtros)
+
+    # Las filas se cuentan sobre la forma compacta, sin expandir ninguna serie
+    consultar(limite=0, reporte=reporte, **filtros)
+    total = reporte["filas_totales"]
+    st.success(f"✅ {total} registros de {reporte['series']} archivos seleccionados")
+
+    # Mostrar resultados (solo se lee y se convierte a pandas la página visible)
+    vista = tabla_paginada(leer, clave="consolidador", total=total)
+    if reporte["grupos_totales"]:
+        st.caption(
+            f"Dataset Parquet: {reporte['bytes_leidos'] / 1e6:,.1f} MB leídos en "
+            f"{reporte['grupos_leidos']} de {reporte['grupos_totales']} grupos de filas"
+        )
+
+    # Botón de descarga (el CSV completo se genera solo a pedido)
+    if st.button("📦 Preparar CSV filtrado"):
+        vista = leer(0, None) if vista is None else vista
+        with etapa("export_csv", pagina="2_Consolidador_Masivo", filas=vista.num_rows):
+            df_filtrado = corpus.anexar_metadatos(vista.to_pandas())
+            csv = df_filtrado.to_csv(index=False, encoding="utf-8-sig")
+        st.download_button(
+            "⬇️ Descargar CSV filtrado",
+            data=csv,
+            file_name="datos_consolidados.csv",
+            mime="text/csv"
+        )
 else:
-    st.error("❌ No se encontraron archivos .data válidos")
\ No newline at end of file
+    st.error("❌ No se encontraron archivos .data válidos")
+
+panel_diagnostico()
@@ -1,11 +1,11 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 from pathlib import Path
-import dask.dataframe as dd
-from dask.diagnostics import ProgressBar
 import warnings
 
+from cattleclimate.datos import cargar_cne
+from cattleclimate.diagnostico import etapa
+from cattleclimate.sesion import obtener_corpus, panel_diagnostico
+
 warnings.filterwarnings("ignore")
 
 # --- Configuración de rutas ---
@@ -30,45 +30,39 @@ def obtener_opciones_disponibles():
         except:
             continue
 
-    cne = pd.read_excel(CNE_PATH, sheet_name="CNE")
+    cne = cargar_cne()
     estaciones = cne[cne["CODIGO"].astype(str).isin(codigos)]["nombre"].unique().tolist()
 
     return sorted(set(etiquetas)), sorted(estaciones), cne
 
 # --- Cargar solo los datos necesarios según filtros ---
-def cargar_datos_filtrados(etiqueta_seleccionada, estacion_seleccionada, cne):
+def cargar_datos_filtrados(etiqueta_seleccionada, estacion_seleccionada, cne, filas=None):
+    """Construye el DataFrame de la selección desde la capa compartida.
+
+    `filas` limita la conversión a pandas a las primeras filas (vista previa).
+    """
     # Obtener código de estación desde el nombre
     codigo_estacion = cne[cne["nombre"] == estacion_seleccionada]["CODIGO"].astype(str).values[0]
 
-    # Buscar archivo que coincida con la etiqueta y el código
-    archivo = DATA_HIDRO / f"{etiqueta_seleccionada}@{codigo_estacion}.data"
-    if not archivo.exists():
-        raise FileNotFoundError(f"No se encontró el archivo: {archivo.name}")
-
-    # Leer solo ese archivo con Dask
-    ddf = dd.read_csv(
-        archivo,
-        sep="|",
-        skiprows=1,
-        names=["Fecha", "Valor"],
-        dtype={"Valor": "float32"},
-        blocksize="8MB",
-        assume_missing=True
-    )
+    corpus = obtener_corpus()
+    nombre = f"{etiqueta_seleccionada}@{codigo_estacion}"
+    if nombre not in set(corpus.catalogo["Etiqueta"] + "@" + corpus.catalogo["Codigo"]):
+        raise FileNotFoundError(f"No se encontró el archivo: {nombre}.data")
+
+    # Vista sobre la tabla compartida; solo se copia lo que se va a mostrar o exportar
+    vista = corpus.vista(etiquetas=[etiqueta_seleccionada], codigos=[codigo_estacion])
+    if filas is not None:
+        vista = vista.slice(0, filas)
+    df = vista.to_pandas()
 
     # Procesamiento mínimo
-    ddf["Fecha"] = dd.to_datetime(ddf["Fecha"], errors="coerce")
-    ddf = ddf[~ddf["Fecha"].isna()]
-    ddf["Etiqueta"] = etiqueta_seleccionada
-    ddf["Codigo"] = codigo_estacion
-    ddf["ITH"] = 0.72 * (ddf["Valor"] + ddf["Valor"].shift(1)) + 40.6
+    df["Valor"] = df["Valor"].astype("float32")
+    df["Etiqueta"] = etiqueta_seleccionada
+    df["Codigo"] = codigo_estacion
+    df["ITH"] = 0.72 * (df["Valor"] + df["Valor"].shift(1)) + 40.6
 
     # Unir con nombre de estación
-    ddf = ddf.merge(cne[["CODIGO", "nombre"]].astype({"CODIGO": "str"}), left_on="Codigo", right_on="CODIGO", how="left")
-
-    # Retornar datos materializados
-    with ProgressBar():
-        return ddf.compute()
+    return df.merge(cne[["CODIGO", "nombre"]].astype({"CODIGO": "str"}), left_on="Codigo", right_on="CODIGO", how="left")
 
 # --- Aplicación Streamlit ---
 def main():
@@ -85,35 +79,44 @@ def main():
 
     # --- Botón para cargar datos ---
     if st.button("📥 Cargar datos filtrados"):
+        # En la sesión solo se guarda la selección; los datos viven en la capa compartida
+        st.session_state.seleccion = (variable, estacion)
+        st.success(f"✅ Selección cargada: {variable} en {estacion}.")
+
+    # --- Mostrar tabla si ya fue cargada antes ---
+    if "seleccion" in st.session_state:
+        variable_sel, estacion_sel = st.session_state.seleccion
         with st.spinner("Procesando archivo seleccionado..."):
             try:
-                df = cargar_datos_filtrados(variable, estacion, cne)
-                st.session_state.df_filtrado = df  # Guardar en sesión
-                st.success(f"✅ {len(df)} registros cargados.")
+                df = cargar_datos_filtrados(variable_sel, estacion_sel, cne, filas=100)
             except Exception as e:
                 st.error(f"⚠️ Error: {str(e)}")
-                st.session_state.pop("df_filtrado", None)  # ← Limpia datos anteriores si hay error
-
-    # --- Mostrar tabla si ya fue cargada antes ---
-    if "df_filtrado" in st.session_state:
+                st.session_state.pop("seleccion", None)  # ← Limpia la selección anterior si hay error
+                return
         st.subheader("Vista previa de los datos")
-        st.dataframe(st.session_state.df_filtrado.head(100))
+        with etapa("render", pagina="2_Consolidador_Masivo_2", filas=len(df)):
+            st.dataframe(df)
 
         # Nombre editable del archivo
         nombre_archivo = st.text_input("📝 Nombre del archivo de salida (sin extensión):", "resultado_filtrado")
 
-        # Botón de exportar
+        # Botón de exportar: el archivo se arma en memoria; el dataset compartido solo lo escribe `sincronizar`
         if st.button("💾 Exportar a Parquet"):
             try:
+                from cattleclimate.dataset import a_parquet
+
                 output_file = f"{nombre_archivo}.parquet"
-                st.session_state.df_filtrado.to_parquet(output_file, index=False)
-                st.success(f"📁 Archivo exportado como '{output_file}'.")
+                with etapa("export_parquet", pagina="2_Consolidador_Masivo_2") as reg:
+                    df_exportar = cargar_datos_filtrados(variable_sel, estacion_sel, cne)
+                    contenido = a_parquet(df_exportar)
+                    reg["filas"] = len(df_exportar)
+                st.success(f"📁 Archivo listo: {len(df_exportar):,} filas.")
 
                 # Botón para descargar
-                with open(output_file, "rb") as f:
-                    st.download_button("⬇️ Descargar Parquet", f, file_name=output_file)
+                st.download_button("⬇️ Descargar Parquet", contenido, file_name=output_file)
             except Exception as e:
                 st.error(f"❌ Error al exportar: {str(e)}")
 
 if __name__ == "__main__":
     main()
+    panel_diagnostico()
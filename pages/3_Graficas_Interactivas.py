@@ -1,12 +1,15 @@
 # pages/3_Graficas_Interactivas.py
 import streamlit as st
 import pandas as pd
-from pathlib import Path
-import plotly.express as px
-import base64
 from datetime import datetime, timedelta
 import warnings
 
+from cattleclimate.almacen import descripcion_frescura
+from cattleclimate.remuestreo import ESTRATEGIAS, frecuencia_nativa, remuestrear
+from cattleclimate.diagnostico import etapa
+from cattleclimate.sesion import obtener_corpus, panel_diagnostico
+from cattleclimate.ventanas import VENTANAS_ESTRES, estadisticas_moviles
+
 # Configuración inicial
 warnings.filterwarnings("ignore")
 st.set_page_config(layout="wide", page_title="Análisis Climático Ganadero")
@@ -15,116 +18,155 @@ st.set_page_config(layout="wide", page_title="Análisis Climático Ganadero")
 # 1. FUNCIÓN DE CARGA OPTIMIZADA
 # ======================================
 
-@st.cache_data(show_spinner="Cargando datos climáticos...", max_entries=1, ttl=3600)
-def cargar_datos():
-    """Carga los datos con manejo robusto de tipos"""
-    BASE_DIR = Path(__file__).parent.parent
-    DATA_DIR = BASE_DIR / "datos"
+def cargar_datos(corpus, codigo, variable):
+    """Serie de una estación y variable (últimos 5 años) desde la capa compartida.
+
+    Solo se copia a la sesión la selección; el corpus completo vive una sola vez
+    en el proceso (ver `cattleclimate.compartido`).
+    """
+    fecha_limite = datetime.now() - timedelta(days=5*365)
+    vista = corpus.vista(etiquetas=[variable], codigos=[codigo], inicio=fecha_limite)
+    with etapa("to_pandas", pagina="3_Graficas_Interactivas", filas=vista.num_rows):
+        df = vista.to_pandas().dropna(subset=["Valor"])
     
-    try:
-        # Cargar metadatos (solo columnas necesarias)
-        glosario = pd.read_excel(
-            DATA_DIR / "Glosario Variables.xlsx",
-            sheet_name="Básicas",
-            usecols=["Etiqueta", "Unidad"]
-        )
-        cne = pd.read_excel(
-            DATA_DIR / "CNE_IDEAM.xlsx",
-            sheet_name="CNE",
-            usecols=["CODIGO", "nombre", "DEPARTAMENTO", "MUNICIPIO"]
-        )
-        
-        # Procesar archivos .data
-        data_files = list((DATA_DIR / "hidrometeorologicos").glob("*.data"))
-        if not data_files:
-            st.error("❌ No se encontraron archivos .data")
-            return None, None, None
-            
-        chunks = []
-        for file in data_files:
-            try:
-                etiqueta, codigo = file.stem.split("@")
-                
-                # Leer archivo con manejo seguro de tipos
-                df = pd.read_csv(
-                    file,
-                    sep="|",
-                    names=["Fecha", "Valor"],
-                    engine="python",
-                    dtype={"Valor": "object"},  # Primero como texto
-                    na_values=["?", "-", "NaN", "NA", "", "null"],
-                    on_bad_lines="skip"
-                )
-                
-                # Conversión segura a numérico
-                df["Valor"] = pd.to_numeric(df["Valor"], errors="coerce")
-                df = df.dropna(subset=["Valor"])
-                
-                if df.empty:
-                    continue
-                
-                # Optimizar tipos de datos
-                df["Valor"] = df["Valor"].astype("float32")
-                df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
-                df = df.dropna(subset=["Fecha"])
-                
-                # Filtrar por fecha (últimos 5 años)
-                fecha_limite = datetime.now() - timedelta(days=5*365)
-                df = df[df["Fecha"] >= fecha_limite]
-                
-                if not df.empty:
-                    # Añadir metadatos básicos
-                    df["Archivo"] = file.name
-                    df["Etiqueta"] = etiqueta
-                    df["Codigo"] = codigo
-                    
-                    # Fusionar con metadatos de estación
-                    meta_est = cne[cne["CODIGO"] == int(codigo)]
-                    if not meta_est.empty:
-                        df = df.assign(**meta_est.iloc[0].to_dict())
-                    
-                    chunks.append(df)
-                    
-            except Exception as e:
-                st.warning(f"⚠️ Archivo {file.name} omitido: {str(e)}")
-                continue
-                
-        return pd.concat(chunks, ignore_index=True), glosario, cne
-        
-    except Exception as e:
-        st.error(f"❌ Error crítico al cargar datos: {str(e)}")
-        return None, None, None
+    # Optimizar tipos de datos
+    df["Valor"] = df["Valor"].astype("float32")
+    df["Archivo"] = f"{variable}@{codigo}.data"
+    
+    # Metadatos de estación (solo columnas necesarias)
+    cne = corpus.cne[["CODIGO", "nombre", "DEPARTAMENTO", "MUNICIPIO"]]
+    meta_est = cne[cne["CODIGO"] == int(codigo)]
+    if not meta_est.empty:
+        df = df.assign(**meta_est.iloc[0].to_dict())
+    return df
 
 # ======================================
 # 2. FUNCIONALIDAD DE EXPORTACIÓN
 # ======================================
 
-def get_image_download_link(fig, filename, text):
-    """Genera enlace de descarga para la imagen"""
-    img_bytes = fig.to_image(format="png", scale=1)
-    b64 = base64.b64encode(img_bytes).decode()
-    return f'<a href="data:image/png;base64,{b64}" download="{filename}">{text}</a>'
+def boton_exportar(fig, figura_json, formato, nombre, etiqueta):
+    """Prepara la gráfica en `formato` solo al pulsar el botón y luego ofrece la descarga.
+
+    La salida queda en la sesión con la huella de la figura: mientras la gráfica no
+    cambie, el botón de descarga sigue disponible en los reruns sin volver a generarla.
+    `figura_json` es `fig.to_json()`, serializada una sola vez por rerun para todos los botones.
+    """
+    from cattleclimate.graficos import FORMATOS, huella, renderizar
+
+    clave = huella(figura_json, formato)
+    guardado = st.session_state.get(f"grafico_{formato}")
+    if guardado is None or guardado[0] != clave:
+        if not st.button(f"🖼️ Preparar {formato.upper()}", key=f"preparar_{formato}"):
+            return
+        try:
+            with st.spinner(f"Generando {formato.upper()}..."):
+                guardado = (clave, renderizar(fig, formato, figura_json=figura_json))
+        except RuntimeError as e:
+            st.warning(str(e))
+            return
+        st.session_state[f"grafico_{formato}"] = guardado
+    st.download_button(etiqueta, data=guardado[1], file_name=nombre, mime=FORMATOS[formato],
+                       key=f"descargar_{formato}")
+
+# ======================================
+# 3. COMPARACIÓN DE SERIES
+# ======================================
+
+def vista_comparacion(corpus, estaciones, modo):
+    """Varias estaciones de una variable, o varias variables de una estación, en un eje común"""
+    from cattleclimate.comparacion import ANCHO, MAX_SERIES, comparar
+
+    nombres_estacion = estaciones.drop_duplicates("Codigo").set_index("Codigo")["nombre"]
+    col1, col2 = st.columns(2)
+    if modo == "Comparar estaciones":
+        with col1:
+            variable = st.selectbox("📌 Variable", sorted(estaciones["Etiqueta"].unique()))
+        codigos = sorted(estaciones.loc[estaciones["Etiqueta"] == variable, "Codigo"].unique())
+        with col2:
+            elegidos = st.multiselect("📍 Estaciones", codigos, default=codigos[:3], max_selections=MAX_SERIES,
+                                      format_func=lambda c: nombres_estacion.get(c, c))
+        series = {f"{variable}@{c}": nombres_estacion.get(c, c) for c in elegidos}
+    else:
+        with col1:
+            codigo = st.selectbox("📍 Estación", list(nombres_estacion.index),
+                                  format_func=lambda c: nombres_estacion.get(c, c))
+        etiquetas = sorted(estaciones.loc[estaciones["Codigo"] == codigo, "Etiqueta"].unique())
+        with col2:
+            elegidas = st.multiselect("📌 Variables", etiquetas, default=etiquetas[:2], max_selections=MAX_SERIES)
+        series = {f"{e}@{codigo}": e for e in elegidas}
+
+    with st.sidebar:
+        st.markdown("### 🔀 Comparación")
+        disposicion = st.radio("Disposición", ("Superpuestas", "Paneles"), horizontal=True)
+        anios = st.slider("Años a mostrar", 1, 40, 5)
+        ancho = st.slider("Puntos por serie (ancho en píxeles)", 400, 3000, ANCHO, step=100)
+    if not series:
+        st.info("Seleccione al menos una serie")
+        return
+
+    # La ventana termina en la última observación de las series elegidas: muchas
+    # estaciones dejaron de reportar hace años y contra el reloj quedarían vacías
+    ultimas = [f for f in (corpus.ultima_fecha(n) for n in series) if f is not None]
+    if not ultimas:
+        st.warning("No se encontraron datos para los filtros seleccionados")
+        return
+    inicio = max(ultimas) - timedelta(days=anios * 365)
+    st.caption(f"Periodo: {inicio:%Y-%m-%d} a {max(ultimas):%Y-%m-%d}")
+    nombres, tiempos, valores = comparar(corpus, list(series), inicio=inicio, ancho=ancho)
+    if not nombres:
+        st.warning("No se encontraron datos para los filtros seleccionados")
+        return
+    sin_datos = [series[n] for n in series if n not in nombres]
+    if sin_datos:
+        st.caption(f"Sin datos en el periodo: {', '.join(map(str, sin_datos))}")
+
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    paneles = disposicion == "Paneles"
+    fig = make_subplots(rows=len(nombres), cols=1, shared_xaxes=True, vertical_spacing=0.02,
+                        subplot_titles=[series[n] for n in nombres]) if paneles else go.Figure()
+    # Todas las trazas comparten el mismo eje reducido
+    for i, nombre in enumerate(nombres):
+        traza = go.Scattergl(x=tiempos, y=valores[i], mode="lines", name=str(series[nombre]))
+        if paneles:
+            fig.add_trace(traza, row=i + 1, col=1)
+        else:
+            fig.add_trace(traza)
+    fig.update_layout(height=max(500, 160 * len(nombres)) if paneles else 550, hovermode="x unified",
+                      margin=dict(t=40, b=30), showlegend=not paneles)
+    with etapa("render", pagina="3_Graficas_Interactivas", filas=valores.size):
+        st.plotly_chart(fig, use_container_width=True)
 
-def get_html_download_link(fig, filename, text):
-    """Genera enlace de descarga para HTML"""
-    html = fig.to_html()
-    b64 = base64.b64encode(html.encode()).decode()
-    return f'<a href="data:text/html;base64,{b64}" download="{filename}">{text}</a>'
+    with st.expander("📊 Ver Estadísticas Descriptivas", expanded=False):
+        resumen = pd.DataFrame(valores.T, columns=[str(series[n]) for n in nombres]).describe().T
+        st.caption("Sobre los puntos reducidos (mínimos y máximos por columna de píxeles)")
+        st.dataframe(resumen)
 
 # ======================================
-# 3. INTERFAZ PRINCIPAL
+# 4. INTERFAZ PRINCIPAL
 # ======================================
 
 def main():
     st.title("📈 Gráficas Climáticas Interactivas")
     
-    # Cargar datos
-    df, glosario, cne = cargar_datos()
+    # Datos compartidos entre sesiones
+    st.caption(descripcion_frescura())
+    try:
+        corpus = obtener_corpus()
+        estaciones = corpus.estaciones().dropna(subset=["nombre"])
+    except Exception as e:
+        st.error(f"❌ Error crítico al cargar datos: {str(e)}")
+        return
     
-    if df is None:
+    if estaciones.empty:
         st.error("No se pudieron cargar los datos. Verifique los archivos fuente.")
         return
     
+    modo = st.radio("🔀 Modo", ("Una serie", "Comparar estaciones", "Comparar variables"), horizontal=True)
+    if modo != "Una serie":
+        vista_comparacion(corpus, estaciones, modo)
+        return
+    
     # ======================
     # CONTROLES DE FILTRO
     # ======================
@@ -133,19 +175,62 @@ def main():
     with col1:
         estacion = st.selectbox(
             "📍 Seleccione Estación",
-            options=sorted(df["nombre"].dropna().unique()),
+            options=sorted(estaciones["nombre"].unique()),
             index=0
         )
     
     with col2:
         variable = st.selectbox(
             "📌 Seleccione Variable",
-            options=sorted(df["Etiqueta"].unique()),
+            options=sorted(estaciones["Etiqueta"].unique()),
             index=0
         )
     
-    # Filtrado de datos
-    df_filtrado = df[(df["nombre"] == estacion) & (df["Etiqueta"] == variable)]
+    # Regularización temporal opcional
+    with st.sidebar:
+        st.markdown("### ⏱️ Regularización temporal")
+        # Las series mensuales no tienen paso fijo: en una grilla diaria casi todo serían huecos
+        mensual = frecuencia_nativa(variable) is None
+        regularizar = st.checkbox(
+            "Llevar la serie a una grilla regular", value=False, disabled=mensual,
+            help="No disponible para series mensuales" if mensual else None
+        ) and not mensual
+        estrategia = st.selectbox(
+            "Relleno de huecos", ESTRATEGIAS + ("vecinos",), disabled=not regularizar,
+            help="vecinos: regresión sobre las estaciones cercanas mejor correlacionadas"
+        )
+        max_horas = st.number_input(
+            "Máximo de horas a interpolar", min_value=1, max_value=168, value=3,
+            disabled=not regularizar or estrategia != "lineal"
+        )
+    
+    # Filtrado de datos (solo se materializa la serie seleccionada)
+    codigo = estaciones.loc[estaciones["nombre"] == estacion, "Codigo"].iloc[0]
+    df_filtrado = cargar_datos(corpus, codigo, variable)
+    
+    if not df_filtrado.empty and regularizar:
+        serie = df_filtrado.set_index("Fecha")["Valor"].astype("float64")
+        regular = None
+        if estrategia == "vecinos":
+            from cattleclimate.vecinos import imputar
+            try:
+                regular = imputar(variable)[f"{variable}@{codigo}"]
+                regular = regular[regular.index >= serie.index.min()]
+            except (ValueError, KeyError) as e:
+                st.warning(f"Sin imputación por vecinas para {variable}: {e}")
+        if regular is None:
+            regular = remuestrear(
+                serie,
+                frecuencia_nativa(variable),
+                estrategia="nan" if estrategia == "vecinos" else estrategia,
+                max_horas=max_horas
+            )
+        st.info(
+            f"Grilla regular de {len(regular):,} celdas · "
+            f"cobertura {regular['Cobertura'].mean():.1%} · "
+            f"rellenado {regular['Relleno'].mean():.1%}"
+        )
+        df_filtrado = regular.reset_index().dropna(subset=["Valor"])
     
     if not df_filtrado.empty:
         # ======================
@@ -153,12 +238,16 @@ def main():
         # ======================
         st.markdown(f"### {variable} en {estacion}")
         
+        # Serie completa para las estadísticas móviles (antes del muestreo)
+        serie_completa = df_filtrado.set_index("Fecha")["Valor"].astype("float64")
+        
         # Muestreo para mejor rendimiento
         if len(df_filtrado) > 15_000:
             df_filtrado = df_filtrado.sample(15_000, random_state=42)
             st.info("Mostrando muestra aleatoria de 15,000 puntos para mejor rendimiento")
         
-        # Crear gráfico interactivo
+        # Crear gráfico interactivo (plotly se importa solo cuando hay algo que graficar)
+        import plotly.express as px
         fig = px.line(
             df_filtrado,
             x="Fecha",
@@ -177,7 +266,8 @@ def main():
             yaxis=dict(showgrid=True, gridcolor="LightGrey")
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        with etapa("render", pagina="3_Graficas_Interactivas", filas=len(df_filtrado)):
+            st.plotly_chart(fig, use_container_width=True)
         
         # ======================
         # SECCIÓN DE EXPORTACIÓN
@@ -186,20 +276,13 @@ def main():
         st.markdown("### 📤 Exportar Gráfico")
         
         exp_col1, exp_col2, exp_col3 = st.columns(3)
+        figura_json = fig.to_json()
         
         with exp_col1:
-            st.markdown(get_image_download_link(
-                fig, 
-                f"{variable}_{estacion}.png", 
-                "⬇️ Descargar como PNG"
-            ), unsafe_allow_html=True)
+            boton_exportar(fig, figura_json, "png", f"{variable}_{estacion}.png", "⬇️ Descargar como PNG")
         
         with exp_col2:
-            st.markdown(get_html_download_link(
-                fig,
-                f"{variable}_{estacion}.html",
-                "⬇️ Descargar como HTML"
-            ), unsafe_allow_html=True)
+            boton_exportar(fig, figura_json, "html", f"{variable}_{estacion}.html", "⬇️ Descargar como HTML")
         
         with exp_col3:
             csv = df_filtrado.to_csv(index=False)
@@ -215,9 +298,19 @@ def main():
         # ======================
         with st.expander("📊 Ver Estadísticas Descriptivas", expanded=False):
             st.dataframe(df_filtrado["Valor"].describe().to_frame("Estadísticas"))
+        
+        with st.expander("📉 Estadísticas Móviles (24 h / 72 h / 7 días)", expanded=False):
+            ventana = st.radio("Ventana", VENTANAS_ESTRES, horizontal=True)
+            moviles = estadisticas_moviles(
+                serie_completa,
+                ventanas=(ventana,),
+                frecuencia=frecuencia_nativa(variable) or "1D"
+            ).dropna(how="all")
+            st.line_chart(moviles.iloc[::max(len(moviles) // 5_000, 1)])
             
     else:
         st.warning("No se encontraron datos para los filtros seleccionados")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    panel_diagnostico()
\ No newline at end of file
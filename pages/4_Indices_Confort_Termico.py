@@ -1,13 +1,21 @@
 # pages/4_Indices_Confort_Termico.py
 import streamlit as st
 import pandas as pd
-import numpy as np
 from pathlib import Path
 import warnings
 
+from cattleclimate.almacen import cargar_serie, descripcion_frescura
+from cattleclimate.datos import separar_nombre
+from cattleclimate.diagnostico import etapa
+from cattleclimate.episodios import detectar_episodios, resumir_episodios
+from cattleclimate.indices import FUENTES_INDICES, FUENTES_VIENTO, UMBRALES_ITH, calcular_indices
+from cattleclimate.psicrometria import listar_derivadas
+from cattleclimate.sesion import panel_diagnostico
+
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 
 st.header("🧮 Cálculo de Índices de Confort Térmico (ITH, ITGH, CTR)")
+st.caption(descripcion_frescura())
 
 # --- Rutas base multiplataforma ---
 BASE_DIR = Path(__file__).parent.parent
@@ -18,69 +26,48 @@ CNE_PATH = DATA_DIR / "CNE_IDEAM.xlsx"
 
 # --- Buscar archivos con pathlib ---
 data_files = [f.name for f in DATA_HIDRO.glob("*.data") if f.is_file()]
+# Bulbo húmedo y punto de rocío derivados de TA2/HRA2 en las estaciones automáticas
+data_files += [r.name for r in listar_derivadas(DATA_HIDRO) if separar_nombre(r)[0] in ("TBH_DER_60", "TPR_DER_60")]
 
 # --- Selección de archivos requeridos ---
 st.markdown("### 1. Seleccione las variables requeridas")
 
+# Cada variable admite las etiquetas de `FUENTES_INDICES` (convencional o automática) y de viento
+etiquetas = {var: [juego[var] for juego in FUENTES_INDICES.values()] for var in ("Tbs", "Tbh", "Tr")}
+etiquetas["Vv"] = list(FUENTES_VIENTO)
+opciones = {var: sorted(f for f in data_files if separar_nombre(f)[0] in permitidas)
+            for var, permitidas in etiquetas.items()}
+
 col1, col2, col3, col4 = st.columns(4)
 with col1:
-    archivo_tbs = st.selectbox(
-        "🌡️ Tbs (bulbo seco)", 
-        [f for f in data_files if "TBS" in f.upper()],
-        index=0 if any("TBS" in f.upper() for f in data_files) else None
-    )
+    archivo_tbs = st.selectbox("🌡️ Tbs (bulbo seco)", opciones["Tbs"])
 with col2:
-    archivo_tbh = st.selectbox(
-        "💧 Tbh (bulbo húmedo)", 
-        [f for f in data_files if "TBH" in f.upper()],
-        index=0 if any("TBH" in f.upper() for f in data_files) else None
-    )
+    archivo_tbh = st.selectbox("💧 Tbh (bulbo húmedo)", opciones["Tbh"])
 with col3:
-    archivo_tr = st.selectbox(
-        "🌫️ Tr (rocío)", 
-        [f for f in data_files if "TR" in f.upper()],
-        index=0 if any("TR" in f.upper() for f in data_files) else None
-    )
+    archivo_tr = st.selectbox("🌫️ Tr (rocío)", opciones["Tr"])
 with col4:
-    archivo_vv = st.selectbox(
-        "💨 Vv (viento)", 
-        [f for f in data_files if "VV" in f.upper()],
-        index=0 if any("VV" in f.upper() for f in data_files) else None
-    )
+    archivo_vv = st.selectbox("💨 Vv (viento)", opciones["Vv"])
 
 # --- Función mejorada para cargar variables ---
 def cargar_variable_segura(nombre_archivo):
     """Carga los datos con manejo robusto de errores"""
     try:
-        ruta = DATA_HIDRO / nombre_archivo
-        df = pd.read_csv(
-            ruta,
-            sep="|",
-            names=["Fecha", "Valor"],
-            engine="python",
-            dtype={"Valor": "object"},
-            na_values=["?", "-", "NaN", "NA", "", "null"],
-            on_bad_lines="warn"
-        )
-        
-        # Conversión segura de tipos
-        df["Valor"] = pd.to_numeric(df["Valor"], errors="coerce")
-        df["Fecha"] = pd.to_datetime(df["Fecha"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+        serie = cargar_serie(DATA_HIDRO / nombre_archivo)
         
-        # Eliminar filas con problemas
-        df = df.dropna(subset=["Fecha", "Valor"])
-        
-        if df.empty:
+        if serie.empty:
             st.warning(f"Archivo {nombre_archivo} no contiene datos válidos")
             return None
             
-        return df.set_index("Fecha")["Valor"]
+        return serie
         
     except Exception as e:
         st.error(f"Error al cargar {nombre_archivo}: {str(e)}")
         return None
 
 # --- Cálculo de índices ---
+archivos = (archivo_tbs, archivo_tbh, archivo_tr, archivo_vv)
+# Los resultados quedan en la sesión: cambiar de página u orden en las tablas
+# provoca un rerun en el que el botón ya no está pulsado
 if st.button("🧮 Calcular Índices", type="primary"):
     with st.spinner("Calculando índices..."):
         try:
@@ -90,7 +77,7 @@ if st.button("🧮 Calcular Índices", type="primary"):
             tr = cargar_variable_segura(archivo_tr)
             vv = cargar_variable_segura(archivo_vv)
             
-            if None in [tbs, tbh, tr, vv]:
+            if any(s is None for s in (tbs, tbh, tr, vv)):
                 st.error("No se pudieron cargar todos los archivos necesarios")
                 st.stop()
             
@@ -102,49 +89,66 @@ if st.button("🧮 Calcular Índices", type="primary"):
                 st.error("No hay datos coincidentes en el rango temporal")
                 st.stop()
             
-            # --- Cálculo de índices con manejo de NaN ---
-            # ITH (Índice de Temperatura y Humedad)
-            df["ITH"] = 0.72 * (df["Tbs"] + df["Tbh"]) + 40.6
-            
-            # ITGH (Índice de Temperatura de Globo y Humedad)
-            df["Tgn"] = 0.0162 * df["Tbs"]**2 + 0.8562 * df["Tbs"] - 0.9387
-            df["ITGH"] = df["Tgn"] + 0.36 * df["Tr"] + 41.5
+            # --- Cálculo de índices (ITH, ITGH, CTR) ---
+            with etapa("calcular_indices", pagina="4_Indices_Confort_Termico", filas=len(df)):
+                df = calcular_indices(df)
             
-            # CTR (Carga Térmica Radiante)
-            Tbs_K = df["Tbs"] + 273.15
-            Tgn_K = df["Tgn"] + 273.15
-            df["CTR"] = 5.67e-8 * (100 * np.sqrt(2.51 * df["Vv"]**0.5 * (df["Tgn"] - df["Tbs"])) + (df["Tgn"] / 100)**44)**4
-            
-            # Mostrar resultados
-            st.success("✅ Índices calculados correctamente")
-            
-            # Resumen estadístico
-            with st.expander("📊 Resumen Estadístico", expanded=True):
-                st.dataframe(df.describe().T)
-            
-            # Gráfico interactivo
-            st.markdown("### 📈 Evolución Temporal de los Índices")
-            fig = px.line(
-                df[["ITH", "ITGH", "CTR"]],
-                labels={"value": "Valor del Índice", "variable": "Índice"},
-                title="Variación de Índices de Confort Térmico"
-            )
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Datos completos (mostrar solo 100 filas)
-            st.markdown("### 📝 Datos Detallados (muestra)")
-            st.dataframe(df.head(100))
-            
-            # Botón de descarga
-            csv = df.to_csv().encode('utf-8')
-            st.download_button(
-                "⬇️ Descargar CSV Completo",
-                data=csv,
-                file_name="indices_confort_termico.csv",
-                mime="text/csv",
-                help="Descargue todos los datos calculados en formato CSV"
-            )
+            # Episodios de estrés térmico (rachas de ITH sobre los umbrales)
+            try:
+                episodios = detectar_episodios(df["ITH"], UMBRALES_ITH)
+            except ValueError as e:
+                # Lecturas convencionales (07/13/19 h): no hay rachas horarias que medir
+                episodios = str(e)
+            st.session_state["indices_confort"] = {"archivos": archivos, "df": df, "episodios": episodios}
             
         except Exception as e:
+            st.session_state.pop("indices_confort", None)
             st.error(f"❌ Error en los cálculos: {str(e)}")
-            st.error("Verifique que los archivos tengan el formato correcto y datos válidos")
\ No newline at end of file
+            st.error("Verifique que los archivos tengan el formato correcto y datos válidos")
+
+# --- Resultados ---
+resultado = st.session_state.get("indices_confort")
+if resultado is not None and resultado["archivos"] == archivos:
+    df, episodios = resultado["df"], resultado["episodios"]
+    st.success("✅ Índices calculados correctamente")
+    
+    # Resumen estadístico
+    with st.expander("📊 Resumen Estadístico", expanded=True):
+        st.dataframe(df.describe().T)
+    
+    from cattleclimate.grilla import tabla_paginada
+    with st.expander("🔥 Episodios de estrés térmico (ITH)", expanded=True):
+        if isinstance(episodios, str):
+            st.info(episodios)
+        elif episodios.empty:
+            st.info(f"No hay horas con ITH ≥ {min(UMBRALES_ITH)}")
+        else:
+            st.dataframe(resumir_episodios(episodios))
+            tabla_paginada(episodios, clave="episodios", orden="Grados_hora", descendente=True)
+    
+    # Gráfico interactivo
+    st.markdown("### 📈 Evolución Temporal de los Índices")
+    import plotly.express as px
+    fig = px.line(
+        df[["ITH", "ITGH", "CTR"]],
+        labels={"value": "Valor del Índice", "variable": "Índice"},
+        title="Variación de Índices de Confort Térmico"
+    )
+    with etapa("render", pagina="4_Indices_Confort_Termico", filas=len(df)):
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # Datos completos, por páginas
+    st.markdown("### 📝 Datos Detallados")
+    tabla_paginada(df.reset_index(), clave="indices")
+    
+    # Botón de descarga
+    csv = df.to_csv().encode('utf-8')
+    st.download_button(
+        "⬇️ Descargar CSV Completo",
+        data=csv,
+        file_name="indices_confort_termico.csv",
+        mime="text/csv",
+        help="Descargue todos los datos calculados en formato CSV"
+    )
+
+panel_diagnostico()
@@ -1,69 +1,45 @@
 # pages/4_Indices_Confort_Termico.py
 import streamlit as st
 import pandas as pd
-import numpy as np
 from pathlib import Path
 import warnings
 
+from cattleclimate.almacen import cargar_serie, descripcion_frescura
+from cattleclimate.datos import separar_nombre
+from cattleclimate.diagnostico import etapa
+from cattleclimate.episodios import episodios_estacion, resumir_episodios, ruta_ith_horario
+from cattleclimate.indices import UMBRALES_ITH, calcular_indices, fuentes_estacion
+from cattleclimate.diurno import es_reconstruida
+from cattleclimate.psicrometria import es_derivada
+from cattleclimate.sesion import panel_diagnostico
+
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 
 st.header("🧮 Cálculo de Índices de Confort Térmico (ITH, ITGH, CTR)")
+st.caption(descripcion_frescura())
 
 # --- Configuración inicial ---
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "datos"
 DATA_HIDRO = DATA_DIR / "hidrometeorologicos"
-GLOSARIO_PATH = DATA_DIR / "Glosario Variables.xlsx"
-
-# --- Cargar glosario ---
-@st.cache_data
-def cargar_glosario():
-    try:
-        return pd.read_excel(GLOSARIO_PATH, sheet_name="Básicas")
-    except Exception as e:
-        st.error(f"Error al cargar el glosario: {str(e)}")
-        return pd.DataFrame()
-
-glosario = cargar_glosario()
-
-# --- Buscar archivos ---
-data_files = [f.name for f in DATA_HIDRO.glob("*.data") if f.is_file()]
 
-# --- Función mejorada para encontrar archivos ---
-def encontrar_archivo_por_parametro(parametro):
-    """Busca archivos usando coincidencias flexibles"""
-    try:
-        if glosario.empty:
-            return None
-            
-        # Buscar en parámetros y etiquetas
-        mask = (glosario["Parámetro"].str.contains(parametro, case=False, na=False) | 
-                glosario["Etiqueta"].str.contains(parametro.split()[0], case=False, na=False))
-        
-        fila = glosario[mask]
-        if not fila.empty:
-            etiqueta = fila.iloc[0]["Etiqueta"]
-            # Buscar archivo que comience con la etiqueta
-            for f in data_files:
-                if f.startswith(etiqueta):
-                    return f
-            # Si no se encuentra por etiqueta exacta, buscar coincidencia parcial
-            for f in data_files:
-                if etiqueta in f:
-                    return f
-        return None
-    except Exception as e:
-        st.warning(f"Error buscando {parametro}: {str(e)}")
-        return None
-
-# --- Detección automática de archivos ---
-archivo_tbs = encontrar_archivo_por_parametro("bulbo seco")
-archivo_tbh = encontrar_archivo_por_parametro("bulbo húmedo")
-archivo_tr = encontrar_archivo_por_parametro("punto de rocío")
-archivo_vv = encontrar_archivo_por_parametro("velocidad del viento")
+# --- Estación ---
+# Las fuentes se resuelven por estación: convencionales (TSSM/THSM/TPR) o, en las
+# automáticas, TA2 con Tbh y Tr derivadas de TA2/HRA2 (series virtuales *_DER_60)
+codigos = sorted({separar_nombre(f)[1] for f in DATA_HIDRO.glob("*.data") if f.is_file()})
+fuentes = {c: fuentes_estacion(c, DATA_HIDRO) for c in codigos}
+completas = [c for c in codigos if all(fuentes[c].values())]
+codigo = st.selectbox(
+    "📍 Estación", completas or codigos,
+    format_func=lambda c: c if all(fuentes[c].values()) else f"{c} (incompleta)"
+)
+rutas = fuentes[codigo] if codigo else dict.fromkeys(["Tbs", "Tbh", "Tr", "Vv"])
+archivo_tbs, archivo_tbh, archivo_tr, archivo_vv = (
+    rutas[v].name if rutas[v] else None for v in ("Tbs", "Tbh", "Tr", "Vv")
+)
 
 # --- Interfaz de usuario ---
-st.markdown("### 1. Archivos detectados automáticamente")
+st.markdown("### 1. Archivos de la estación")
 
 cols = st.columns(4)
 params = [
@@ -76,6 +52,8 @@ params = [
 for col, (label, archivo) in zip(cols, params):
     with col:
         st.metric(label, archivo if archivo else "No encontrado")
+        if archivo and es_derivada(DATA_HIDRO / archivo):
+            st.caption("Derivada de TA2_AUT_60 y HRA2_AUT_60")
 
 # --- Función mejorada para cargar variables ---
 def cargar_variable_segura(nombre_archivo):
@@ -84,29 +62,16 @@ def cargar_variable_segura(nombre_archivo):
         return None
         
     try:
-        ruta = DATA_HIDRO / nombre_archivo
-        df = pd.read_csv(
-            ruta,
-            sep="|",
-            names=["Fecha", "Valor"],
-            engine="python",
-            dtype={"Valor": "object"},
-            na_values=["?", "-", "NaN", "NA", "", "null"],
-            on_bad_lines="warn"
-        )
-        
-        # Conversión segura de tipos
-        df["Valor"] = pd.to_numeric(df["Valor"], errors="coerce")
-        df["Fecha"] = pd.to_datetime(df["Fecha"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
-        df = df.dropna(subset=["Fecha", "Valor"])
-        
-        return df.set_index("Fecha")["Valor"] if not df.empty else None
+        serie = cargar_serie(DATA_HIDRO / nombre_archivo)
+        return serie if not serie.empty else None
         
     except Exception as e:
         st.error(f"Error al cargar {nombre_archivo}: {str(e)}")
         return None
 
 # --- Cálculo de índices ---
+# Los resultados quedan en la sesión: cambiar de página u orden en las tablas
+# provoca un rerun en el que el botón ya no está pulsado
 if st.button("🧮 Calcular Índices", type="primary"):
     with st.spinner("Calculando índices..."):
         try:
@@ -127,7 +92,7 @@ if st.button("🧮 Calcular Índices", type="primary"):
             vv = cargar_variable_segura(archivo_vv)
             
             # Verificar datos cargados
-            if None in [tbs, tbh, tr, vv]:
+            if any(s is None for s in (tbs, tbh, tr, vv)):
                 st.error("Algunos archivos no contenían datos válidos")
                 st.stop()
             
@@ -139,47 +104,66 @@ if st.button("🧮 Calcular Índices", type="primary"):
                 st.error("No hay datos coincidentes en el rango temporal")
                 st.stop()
             
-            # --- Cálculo de índices ---
-            # ITH (Índice de Temperatura y Humedad)
-            df["ITH"] = 0.72 * (df["Tbs"] + df["Tbh"]) + 40.6
-            
-            # ITGH (Índice de Temperatura de Globo y Humedad)
-            df["Tgn"] = 0.0162 * df["Tbs"]**2 + 0.8562 * df["Tbs"] - 0.9387
-            df["ITGH"] = df["Tgn"] + 0.36 * df["Tr"] + 41.5
-            
-            # CTR (Carga Térmica Radiante)
-            df["CTR"] = 5.67e-8 * (100 * np.sqrt(2.51 * df["Vv"]**0.5 * (df["Tgn"] - df["Tbs"])) + (df["Tgn"] / 100)**44)**4
-            
-            # --- Mostrar resultados ---
-            st.success("✅ Índices calculados correctamente")
+            # --- Cálculo de índices (ITH, ITGH, CTR) ---
+            with etapa("calcular_indices", pagina="4_Indices_Confort_Termico2", filas=len(df)):
+                df = calcular_indices(df)
             
-            # Resumen estadístico
-            with st.expander("📊 Resumen Estadístico", expanded=True):
-                st.dataframe(df.describe().T)
-            
-            # Gráfico interactivo
-            st.markdown("### 📈 Evolución Temporal de los Índices")
-            fig = px.line(
-                df[["ITH", "ITGH", "CTR"]],
-                labels={"value": "Valor del Índice", "variable": "Índice"},
-                title="Variación de Índices de Confort Térmico"
-            )
-            fig.update_layout(height=500, hovermode="x unified")
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Datos completos (muestra)
-            st.markdown("### 📝 Datos Detallados (muestra)")
-            st.dataframe(df.head(100))
-            
-            # Botón de descarga
-            csv = df.to_csv().encode('utf-8')
-            st.download_button(
-                "⬇️ Descargar CSV Completo",
-                data=csv,
-                file_name="indices_confort_termico.csv",
-                mime="text/csv"
-            )
+            # Episodios de estrés térmico: las rachas se miden sobre el ITH horario; con
+            # lecturas convencionales (07/13/19 h) cada racha duraría una sola hora
+            episodios = episodios_estacion(codigo, UMBRALES_ITH, directorio=DATA_HIDRO).drop(columns="Codigo")
+            st.session_state["indices_confort2"] = {"codigo": codigo, "df": df, "episodios": episodios}
             
         except Exception as e:
+            st.session_state.pop("indices_confort2", None)
             st.error(f"❌ Error en los cálculos: {str(e)}")
-            st.error("Verifique que los archivos tengan el formato correcto")
\ No newline at end of file
+            st.error("Verifique que los archivos tengan el formato correcto")
+
+# --- Resultados ---
+resultado = st.session_state.get("indices_confort2")
+if resultado is not None and resultado["codigo"] == codigo:
+    df, episodios = resultado["df"], resultado["episodios"]
+    st.success("✅ Índices calculados correctamente")
+    
+    # Resumen estadístico
+    with st.expander("📊 Resumen Estadístico", expanded=True):
+        st.dataframe(df.describe().T)
+    
+    from cattleclimate.grilla import tabla_paginada
+    with st.expander("🔥 Episodios de estrés térmico (ITH)", expanded=True):
+        ruta_horaria = ruta_ith_horario(codigo, DATA_HIDRO)
+        if ruta_horaria is None:
+            st.info("La estación no tiene ITH horario (medido ni reconstruido) para medir rachas")
+        elif episodios.empty:
+            st.info(f"No hay horas con ITH ≥ {min(UMBRALES_ITH)}")
+        else:
+            st.caption(f"Rachas sobre {separar_nombre(ruta_horaria)[0]}"
+                       + (" (reconstruido de extremos diarios)" if es_reconstruida(ruta_horaria) else ""))
+            st.dataframe(resumir_episodios(episodios))
+            tabla_paginada(episodios, clave="episodios", orden="Grados_hora", descendente=True)
+    
+    # Gráfico interactivo
+    st.markdown("### 📈 Evolución Temporal de los Índices")
+    import plotly.express as px
+    fig = px.line(
+        df[["ITH", "ITGH", "CTR"]],
+        labels={"value": "Valor del Índice", "variable": "Índice"},
+        title="Variación de Índices de Confort Térmico"
+    )
+    fig.update_layout(height=500, hovermode="x unified")
+    with etapa("render", pagina="4_Indices_Confort_Termico2", filas=len(df)):
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # Datos completos, por páginas
+    st.markdown("### 📝 Datos Detallados")
+    tabla_paginada(df.reset_index(), clave="indices")
+    
+    # Botón de descarga
+    csv = df.to_csv().encode('utf-8')
+    st.download_button(
+        "⬇️ Descargar CSV Completo",
+        data=csv,
+        file_name="indices_confort_termico.csv",
+        mime="text/csv"
+    )
+
+panel_diagnostico()
@@ -0,0 +1,103 @@
+# pages/6_Consultas_SQL.py
+import math
+
+import streamlit as st
+
+from cattleclimate.diagnostico import etapa
+from cattleclimate.sesion import panel_diagnostico
+from cattleclimate.sql import (
+    CONSULTAS_PREDEFINIDAS, TAMANO_PAGINA, borrar_consulta, consultas_guardadas, disponible,
+    ejecutar, guardar_consulta, por_lotes
+)
+
+st.set_page_config(layout="wide", page_title="Consultas SQL")
+
+AYUDA_TABLAS = """
+| Tabla | Columnas principales |
+|---|---|
+| `series` | Fecha, Valor, Etiqueta, Codigo, Anio |
+| `ith` | Codigo, Fecha, Tbs, Tbh, ITH |
+| `fuentes_ith` | Codigo, Tbs, Tbh, Tbh_derivada (variables usadas para el ITH de cada estación) |
+| `estaciones` | Codigo, Etiqueta, nombre, DEPARTAMENTO, MUNICIPIO, altitud, latitud, longitud, … |
+| `cne` | hoja completa del CNE (CODIGO como texto) |
+| `glosario` | Etiqueta, Parámetro, Unidad, Periodo, … |
+
+Filtrar por `Etiqueta`, `Codigo` o `Anio` evita leer particiones enteras; por `Fecha`, grupos de filas.
+"""
+
+
+def main():
+    st.title("🧮 Consultas SQL")
+    if not disponible():
+        st.warning("El modo SQL necesita DuckDB: `pip install duckdb`")
+        return
+
+    guardadas = consultas_guardadas()
+    with st.sidebar:
+        st.markdown("### 📚 Consultas guardadas")
+        elegida = st.selectbox("Consulta", list(guardadas))
+        tamano = st.selectbox("Filas por página", [100, TAMANO_PAGINA, 2000, 10000], index=1)
+        with st.expander("Tablas disponibles"):
+            st.markdown(AYUDA_TABLAS)
+
+    sql = st.text_area("Consulta", guardadas[elegida], height=220, key=f"sql_{elegida}")
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        if st.button("▶️ Ejecutar", type="primary"):
+            # Nueva consulta: se vuelve a la primera página y se recuenta el total
+            st.session_state.sql_consulta = {"sql": sql, "total": None}
+            st.session_state.sql_pagina = 1
+    with col2:
+        with st.expander("💾 Guardar o borrar"):
+            nombre = st.text_input("Nombre", elegida if elegida not in CONSULTAS_PREDEFINIDAS else "")
+            c1, c2 = st.columns(2)
+            if c1.button("Guardar") and nombre:
+                guardar_consulta(nombre, sql)
+                st.success(f"Consulta '{nombre}' guardada")
+            if c2.button("Borrar", disabled=elegida in CONSULTAS_PREDEFINIDAS):
+                borrar_consulta(elegida)
+                st.rerun()
+
+    consulta = st.session_state.get("sql_consulta")
+    if consulta is None:
+        st.info("Escriba una consulta o elija una guardada y presione Ejecutar.")
+        return
+
+    pagina = st.session_state.get("sql_pagina", 1)
+    try:
+        with st.spinner("Consultando..."):
+            resultado = ejecutar(consulta["sql"], pagina, tamano, contar=consulta["total"] is None)
+    except Exception as e:
+        st.error(f"❌ {e}")
+        return
+    if resultado["total"] is not None:
+        consulta["total"] = resultado["total"]
+    total = consulta["total"]
+    paginas = max(math.ceil(total / tamano), 1)
+
+    st.caption(f"{total:,} filas · página {pagina} de {paginas} · {resultado['segundos']:.2f} s")
+    with etapa("render", pagina="6_Consultas_SQL", filas=len(resultado["datos"])):
+        st.dataframe(resultado["datos"], use_container_width=True, hide_index=True)
+
+    c1, c2, c3 = st.columns([1, 1, 4])
+    if c1.button("⬅️ Anterior", disabled=pagina <= 1):
+        st.session_state.sql_pagina = pagina - 1
+        st.rerun()
+    if c2.button("Siguiente ➡️", disabled=pagina >= paginas):
+        st.session_state.sql_pagina = pagina + 1
+        st.rerun()
+    with c3:
+        if st.button("📦 Preparar CSV completo"):
+            with etapa("export_csv", pagina="6_Consultas_SQL", filas=total):
+                # Por lotes: el resultado nunca se junta en un solo DataFrame
+                partes = [
+                    lote.to_pandas().to_csv(index=False, header=i == 0)
+                    for i, lote in enumerate(por_lotes(consulta["sql"]))
+                ]
+            st.download_button("⬇️ Descargar CSV", "".join(partes), file_name="consulta.csv", mime="text/csv")
+
+
+if __name__ == "__main__":
+    main()
+    panel_diagnostico()
@@ -0,0 +1,68 @@
+# pages/7_Rosa_de_Vientos.py
+import streamlit as st
+
+from cattleclimate.diagnostico import etapa
+from cattleclimate.sesion import obtener_corpus, panel_diagnostico
+from cattleclimate.viento import NOMBRES_CLASE, PARES_VIENTO, cubo, estaciones_viento, medias, pares_estacion, rosa
+
+st.set_page_config(layout="wide", page_title="Rosa de Vientos")
+
+MESES = ("Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic")
+
+
+def main():
+    st.title("🧭 Rosa de Vientos")
+    codigos = estaciones_viento()
+    if not codigos:
+        st.warning("No hay estaciones con pares de dirección y velocidad del viento.")
+        return
+    nombres = obtener_corpus().estaciones().drop_duplicates("Codigo").set_index("Codigo")["nombre"]
+
+    with st.sidebar:
+        codigo = st.selectbox("📍 Estación", codigos, format_func=lambda c: nombres.get(c, c))
+        etiqueta = st.selectbox(
+            "Serie", pares_estacion(codigo), format_func=lambda e: f"{e} / {PARES_VIENTO[e]}"
+        )
+        meses = st.multiselect("Meses", range(1, 13), default=list(range(1, 13)), format_func=lambda m: MESES[m - 1])
+        desde, hasta = st.slider("Horas", 0, 23, (0, 23))
+
+    # El cubo mes × hora está en caché: cambiar meses u horas no vuelve a leer los archivos
+    c = cubo(etiqueta, codigo)
+    horas = range(desde, hasta + 1)
+    frecuencias = rosa(c, meses or None, horas)
+    total = medias(c, "total", meses or None, horas).iloc[0]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Observaciones", f"{frecuencias.attrs['observaciones']:,}")
+    col2.metric("Calmas", f"{frecuencias.attrs['calmas_%']:.1f} %")
+    col3.metric("Dirección vectorial", f"{total['Direccion']:.0f}°")
+    col4.metric("Constancia", f"{total['Constancia']:.2f}")
+
+    import plotly.graph_objects as go
+    fig = go.Figure([
+        go.Barpolar(r=frecuencias[clase], theta=frecuencias.index, name=clase)
+        for clase in NOMBRES_CLASE
+    ])
+    fig.update_layout(
+        height=550, margin=dict(t=30, b=30),
+        polar=dict(angularaxis=dict(direction="clockwise", rotation=90), radialaxis=dict(ticksuffix=" %")),
+        legend_title_text="Velocidad"
+    )
+    with etapa("render", pagina="7_Rosa_de_Vientos"):
+        st.plotly_chart(fig, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### Media vectorial por hora")
+        por_hora = medias(c, "hora", meses or None, horas).query("Observaciones > 0").round(2)
+        st.dataframe(por_hora, use_container_width=True)
+    with col2:
+        st.markdown("#### Media vectorial por mes")
+        por_mes = medias(c, "mes", meses or None, horas).query("Observaciones > 0").round(2)
+        por_mes.index = [MESES[m - 1] for m in por_mes.index]
+        st.dataframe(por_mes, use_container_width=True)
+
+
+if __name__ == "__main__":
+    main()
+    panel_diagnostico()
@@ -0,0 +1,73 @@
+# pages/8_Pronostico_ITH.py
+import pandas as pd
+import streamlit as st
+
+from cattleclimate.almacen import cargar_serie
+from cattleclimate.diagnostico import etapa
+from cattleclimate.episodios import estaciones_ith_horario, ruta_ith_horario
+from cattleclimate.indices import UMBRALES_ITH
+from cattleclimate.pronostico import HORIZONTE_MAX, NIVEL, pronosticar, resumen_modelos, tipo_fuente
+from cattleclimate.sesion import obtener_corpus, panel_diagnostico
+
+st.set_page_config(layout="wide", page_title="Pronóstico de ITH")
+
+COLORES_UMBRAL = ("gold", "orange", "red")
+
+
+def main():
+    st.title("🌡️ Pronóstico de estrés térmico (ITH)")
+    codigos = estaciones_ith_horario()
+    if not codigos:
+        st.warning("No hay estaciones con ITH horario medido o reconstruido.")
+        return
+    nombres = obtener_corpus().estaciones().drop_duplicates("Codigo").set_index("Codigo")["nombre"]
+
+    with st.sidebar:
+        codigo = st.selectbox("📍 Estación", codigos, format_func=lambda c: nombres.get(c, c))
+        horas = st.slider("Horizonte (horas)", 24, HORIZONTE_MAX, 48, step=24)
+        dias_historia = st.slider("Días observados a mostrar", 1, 14, 7)
+
+    try:
+        pronostico = pronosticar(codigo, horas)
+    except (ValueError, FileNotFoundError) as e:
+        st.warning(str(e))
+        return
+    if tipo_fuente(codigo) == "reconstruida":
+        st.caption("ITH reconstruido desde las máximas y mínimas diarias (estación convencional).")
+    st.caption(f"El pronóstico arranca en la hora siguiente a la última observación: "
+               f"{pronostico.index[0]:%Y-%m-%d %H:%M}. Intervalos al {NIVEL:.0%}.")
+
+    cols = st.columns(len(UMBRALES_ITH) + 1)
+    cols[0].metric("ITH máximo pronosticado", f"{pronostico['Pronostico'].max():.1f}")
+    for col, umbral in zip(cols[1:], UMBRALES_ITH):
+        col.metric(f"Horas esperadas con ITH ≥ {umbral}", f"{pronostico[f'P(ITH>={umbral})'].sum():.1f}")
+
+    historia = cargar_serie(ruta_ith_horario(codigo))
+    historia = historia[historia.index > pronostico.index[0] - pd.Timedelta(days=dias_historia)]
+
+    import plotly.graph_objects as go
+    fig = go.Figure([
+        go.Scatter(x=pronostico.index, y=pronostico["Superior"], line=dict(width=0), showlegend=False,
+                   hoverinfo="skip"),
+        go.Scatter(x=pronostico.index, y=pronostico["Inferior"], line=dict(width=0), fill="tonexty",
+                   fillcolor="rgba(31,119,180,0.2)", name=f"Intervalo {NIVEL:.0%}"),
+        go.Scatter(x=pronostico.index, y=pronostico["Pronostico"], line=dict(color="#1f77b4"), name="Pronóstico"),
+        go.Scatter(x=historia.index, y=historia.to_numpy(), line=dict(color="gray"), name="Observado"),
+    ])
+    for umbral, color in zip(UMBRALES_ITH, COLORES_UMBRAL):
+        fig.add_hline(y=umbral, line_dash="dot", line_color=color, annotation_text=f"ITH {umbral}")
+    fig.update_layout(height=500, margin=dict(t=30, b=30), hovermode="x unified", yaxis_title="ITH")
+    with etapa("render", pagina="8_Pronostico_ITH"):
+        st.plotly_chart(fig, use_container_width=True)
+
+    with st.expander("📋 Pronóstico horario"):
+        st.dataframe(pronostico.round(2), use_container_width=True)
+        st.download_button("⬇️ Descargar CSV", pronostico.to_csv().encode("utf-8"),
+                           file_name=f"pronostico_ith_{codigo}.csv", mime="text/csv")
+    with st.expander("⚙️ Modelos por estación"):
+        st.dataframe(resumen_modelos(), use_container_width=True)
+
+
+if __name__ == "__main__":
+    main()
+    panel_diagnostico()
@@ -0,0 +1,65 @@
+# pages/9_Mapa_Calor_Horario.py
+import streamlit as st
+
+from cattleclimate.cubos import ETIQUETAS_CUBOS, cubo, matriz, series_disponibles
+from cattleclimate.diagnostico import etapa
+from cattleclimate.sesion import obtener_corpus, panel_diagnostico
+
+st.set_page_config(layout="wide", page_title="Mapa de Calor Horario")
+
+MESES = ("Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic")
+ESTADISTICOS = {"media": "Media", "maximo": "Máximo", "excedencia": "% de horas sobre el umbral",
+                "observaciones": "Observaciones"}
+
+
+def main():
+    st.title("🗓️ Hora del día × época del año")
+    nombres = series_disponibles()
+    if not nombres:
+        st.warning("No hay series horarias para construir los mapas de calor.")
+        return
+    por_etiqueta = {}
+    for nombre in sorted(nombres, key=lambda n: ETIQUETAS_CUBOS.index(n.split("@")[0])):
+        etiqueta, codigo = nombre.split("@")
+        por_etiqueta.setdefault(etiqueta, []).append(codigo)
+    estaciones = obtener_corpus().estaciones().drop_duplicates("Codigo").set_index("Codigo")["nombre"]
+
+    with st.sidebar:
+        etiqueta = st.selectbox("📌 Variable", list(por_etiqueta),
+                                help="ITH_DER_60: medido en estaciones automáticas; "
+                                     "ITH_REC_60: reconstruido desde máximas y mínimas diarias")
+        codigo = st.selectbox("📍 Estación", por_etiqueta[etiqueta], format_func=lambda c: estaciones.get(c, c))
+        c = cubo(f"{etiqueta}@{codigo}")
+        umbrales = [float(u) for u in c["umbrales"]]
+        opciones = [e for e in ESTADISTICOS if e != "excedencia" or umbrales]
+        estadistico = st.selectbox("Estadístico", opciones, format_func=ESTADISTICOS.get)
+        umbral = None
+        if estadistico == "excedencia":
+            umbral = st.selectbox("Umbral", umbrales, format_func=lambda u: f"{u:g}")
+        resolucion = st.radio("Columnas", ("dia", "mes"), horizontal=True,
+                              format_func={"dia": "Día del año", "mes": "Mes"}.get)
+
+    df = matriz(c, estadistico, resolucion, umbral)
+    st.caption(f"{int(c['conteo'].sum()):,} horas con dato · cubo precalculado en caché")
+
+    import plotly.graph_objects as go
+    x = list(MESES) if resolucion == "mes" else df.columns
+    fig = go.Figure(go.Heatmap(
+        z=df.to_numpy(), x=x, y=df.index, colorscale="RdYlBu_r",
+        colorbar=dict(title="%" if estadistico == "excedencia" else etiqueta),
+        hovertemplate="Hora %{y}<br>%{x}<br>%{z:.1f}<extra></extra>"
+    ))
+    fig.update_layout(height=550, margin=dict(t=30, b=30), yaxis_title="Hora del día",
+                      xaxis_title="Mes" if resolucion == "mes" else "Día del año")
+    with etapa("render", pagina="9_Mapa_Calor_Horario"):
+        st.plotly_chart(fig, use_container_width=True)
+
+    with st.expander("📋 Tabla"):
+        st.dataframe(df.round(2), use_container_width=True)
+        st.download_button("⬇️ Descargar CSV", df.to_csv().encode("utf-8"),
+                           file_name=f"{etiqueta}@{codigo}_{estadistico}_{resolucion}.csv", mime="text/csv")
+
+
+if __name__ == "__main__":
+    main()
+    panel_diagnostico()
@@ -0,0 +1,25 @@
+import numpy as np
+import pyarrow as pa
+
+from cattleclimate.almacen import guardar_arrow, guardar_npz, leer_arrow, leer_npz
+
+
+def test_npz_con_firma(tmp_path):
+    ruta = tmp_path / "cubos" / "TA2_AUT_60@25025280.npz"
+    guardar_npz(ruta, '["v1"]', conteo=np.arange(3), n=np.array(7))
+    assert not ruta.with_suffix(".tmp.npz").exists()
+
+    guardado = leer_npz(ruta, '["v1"]')
+    assert set(guardado) == {"conteo", "n"} and guardado["conteo"].tolist() == [0, 1, 2]
+    assert leer_npz(ruta, '["v2"]') is None
+    # Sin firma: todo lo guardado, para reutilizarlo en una actualización incremental
+    assert str(leer_npz(ruta)["firma"]) == '["v1"]'
+    assert leer_npz(tmp_path / "no_existe.npz") is None
+
+
+def test_arrow_con_firma(tmp_path):
+    ruta = tmp_path / "derivadas" / "TBH_DER_60@25025280.arrow"
+    guardar_arrow(pa.table({"Valor": [1.0, 2.0]}), ruta, "f1")
+    assert leer_arrow(ruta, "f1").column("Valor").to_pylist() == [1.0, 2.0]
+    assert leer_arrow(ruta, "f2") is None
+    assert leer_arrow(tmp_path / "no_existe.arrow", "f1") is None
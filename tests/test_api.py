@@ -0,0 +1,97 @@
+import gzip
+import json
+import threading
+from http.client import HTTPConnection
+
+import pandas as pd
+import pytest
+
+from cattleclimate import api
+from cattleclimate.almacen import guardar_tabla
+
+
+@pytest.fixture
+def servidor(tmp_path, monkeypatch):
+    mensual = pd.DataFrame({
+        "Etiqueta": ["TA2_AUT_60"] * 25 + ["HRA2_AUT_60"] * 5,
+        "Codigo": ["T0001"] * 30,
+        "Anio": [2020] * 12 + [2021] * 13 + [2020] * 5,
+        "Media": [float(i) for i in range(30)],
+    })
+    guardar_tabla(mensual, tmp_path / "mensual.arrow")
+    fechas = pd.date_range("2020-01-01", periods=500, freq="h")
+    pd.Series(range(500), index=fechas.rename("Fecha"), name="Valor", dtype="float64").to_csv(
+        tmp_path / "TA2_AUT_60@T0001.data", sep="|", date_format="%Y-%m-%d %H:%M:%S")
+    monkeypatch.setattr(api, "MENSUAL_PATH", tmp_path / "mensual.arrow")
+    monkeypatch.setattr(api, "DATA_HIDRO", tmp_path)
+    api._cuerpo.cache_clear()
+
+    httpd = api.servidor(puerto=0)  # puerto efímero
+    hilo = threading.Thread(target=httpd.serve_forever, daemon=True)
+    hilo.start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _get(puerto, ruta, **cabeceras):
+    conexion = HTTPConnection("127.0.0.1", puerto, timeout=10)
+    conexion.request("GET", ruta, headers=cabeceras)
+    respuesta = conexion.getresponse()
+    cuerpo = respuesta.read()
+    conexion.close()
+    return respuesta.status, dict(respuesta.getheaders()), cuerpo
+
+
+def test_etag_y_304(servidor):
+    estado, cabeceras, cuerpo = _get(servidor, "/agregados?etiqueta=TA2_AUT_60")
+    assert estado == 200 and json.loads(cuerpo)["total"] == 25
+    etag = cabeceras["ETag"]
+
+    estado, cabeceras, cuerpo = _get(servidor, "/agregados?etiqueta=TA2_AUT_60", **{"If-None-Match": etag})
+    assert estado == 304 and cuerpo == b"" and cabeceras["ETag"] == etag
+    # Otra consulta es otro recurso: su ETag no coincide
+    estado, _, _ = _get(servidor, "/agregados?etiqueta=HRA2_AUT_60", **{"If-None-Match": etag})
+    assert estado == 200
+
+
+def test_paginas_y_limites(servidor):
+    estado, cabeceras, cuerpo = _get(servidor, "/agregados?tamano=10&pagina=3")
+    datos = json.loads(cuerpo)
+    assert estado == 200 and cabeceras["X-Total"] == "30" and cabeceras["X-Pagina"] == "3"
+    assert [fila[-1] for fila in datos["datos"]] == [float(i) for i in range(20, 30)]
+    assert datos["siguiente"] is None and "Link" not in cabeceras
+
+    _, cabeceras, cuerpo = _get(servidor, "/agregados?tamano=10&pagina=1&anio=2021")
+    assert json.loads(cuerpo)["total"] == 13 and "pagina=2" in cabeceras["Link"]
+
+    # Más allá del final: página vacía, no un error
+    estado, _, cuerpo = _get(servidor, "/agregados?tamano=10&pagina=9")
+    assert estado == 200 and json.loads(cuerpo)["datos"] == []
+
+    for consulta in ("tamano=0", f"tamano={api.TAMANO_MAXIMO + 1}", "pagina=0", "pagina=uno"):
+        estado, _, cuerpo = _get(servidor, f"/agregados?{consulta}")
+        assert estado == 400 and "error" in json.loads(cuerpo)
+
+
+@pytest.mark.parametrize("ruta, estado", [
+    ("/no/existe", 404),
+    ("/series/TA2_AUT_60/T9999", 404),
+    ("/agregados?anio=dos", 400),
+    ("/agregados?columnas=Media,Inventada", 400),
+    ("/agregados?formato=xml", 400),
+    ("/series/TA2_AUT_60/T0001?desde=ayer", 400),
+])
+def test_errores_del_cliente(servidor, ruta, estado):
+    obtenido, cabeceras, cuerpo = _get(servidor, ruta)
+    assert obtenido == estado and cabeceras["Content-Type"] == api.TIPO_JSON
+    assert json.loads(cuerpo)["error"]
+
+
+def test_serie_con_fechas_columnas_y_gzip(servidor):
+    ruta = "/series/TA2_AUT_60/T0001?desde=2020-01-02&columnas=Valor&tamano=1000"
+    estado, cabeceras, cuerpo = _get(servidor, ruta, **{"Accept-Encoding": "gzip"})
+    assert estado == 200 and cabeceras.get("Content-Encoding") == "gzip"
+    datos = json.loads(gzip.decompress(cuerpo))
+    assert datos["columnas"] == ["Valor"] and datos["total"] == 476
+    assert [fila[0] for fila in datos["datos"]] == [float(i) for i in range(24, 500)]
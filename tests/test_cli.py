@@ -0,0 +1,68 @@
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from cattleclimate import cli, consulta
+
+
+def _salida(argv):
+    with pytest.raises(SystemExit) as e:
+        cli.main(argv)
+    return e.value.code
+
+
+def _tabla(valores):
+    fechas = pa.array(pd.date_range("2020-01-01", periods=len(valores), freq="h"), pa.timestamp("ns"))
+    n = len(valores)
+    return pa.table({"Fecha": fechas, "Valor": valores, "Etiqueta": ["TA2_AUT_60"] * n, "Codigo": ["T0001"] * n})
+
+
+@pytest.mark.parametrize("argv", [
+    ["consolidar", "--salida", "datos.xlsx"],
+    ["consolidar", "--salida", "datos.csv", "--desde", "2020-13-01"],
+    ["consolidar", "--salida", "datos.csv", "--desde", "2021-01-01", "--hasta", "2020-01-01"],
+    ["pronosticar", "--horas", "0"],
+    ["pronosticar", "--horas", "1000"],
+    ["ingerir", "--procesos", "0"],
+    ["imputar", "--r-min", "2"],
+    ["exportar", "no_existe.csv", "salida.json"],
+    ["exportar", "mensual", "salida.txt"],
+])
+def test_argumentos_invalidos_antes_de_empezar(argv, monkeypatch):
+    monkeypatch.setattr(cli, "ejecutar", lambda args: pytest.fail("no debía ejecutar"))
+    assert _salida(argv) == cli.SALIDA_USO
+
+
+def test_exportar_y_codigos_de_salida(tmp_path):
+    entrada, salida = tmp_path / "tabla.csv", tmp_path / "tabla.json"
+    pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}).to_csv(entrada, index=False)
+    assert _salida(["exportar", str(entrada), str(salida)]) == cli.SALIDA_OK
+    assert pd.read_json(salida)["a"].tolist() == [1, 2]
+
+    vacia = tmp_path / "vacia.csv"
+    vacia.write_text("a,b\n")
+    assert _salida(["exportar", str(vacia), str(salida)]) == cli.SALIDA_SIN_DATOS
+
+    # Argumentos válidos pero datos ilegibles: error de datos, no de uso
+    rota = tmp_path / "rota.parquet"
+    rota.write_bytes(b"no es parquet")
+    assert _salida(["exportar", str(rota), str(salida)]) == cli.SALIDA_ERROR
+
+
+def test_consolidar_escribe_y_no_deja_temporales(tmp_path, monkeypatch):
+    monkeypatch.setattr(consulta, "consultar_por_serie", lambda *a, **k: iter([_tabla([1.0, 2.0]), _tabla([3.0])]))
+    salida = tmp_path / "datos.parquet"
+    assert cli.consolidar(salida) == 3
+    assert pd.read_parquet(salida)["Valor"].tolist() == [1.0, 2.0, 3.0]
+    assert [r.name for r in tmp_path.iterdir()] == ["datos.parquet"]
+
+
+def test_consolidar_borra_el_temporal_si_falla(tmp_path, monkeypatch):
+    def series(*args, **kwargs):
+        yield _tabla([1.0, 2.0])
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(consulta, "consultar_por_serie", series)
+    with pytest.raises(OSError):
+        cli.consolidar(tmp_path / "datos.csv")
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from cattleclimate.compacto import a_serie, compactar, desde_serie, expandir, guardar, leer, rango
+from cattleclimate.datos import tiempos_ns
+
+
+def _horaria():
+    """Serie horaria con huecos y dos lecturas fuera de la hora en punto"""
+    fechas = pd.date_range("2020-01-01", periods=500, freq="h").delete(range(100, 130))
+    fechas = fechas.append(pd.DatetimeIndex(["2020-01-03 05:20", "2020-01-10 11:45"])).sort_values()
+    valores = np.round(np.linspace(-5, 35, len(fechas)), 1)
+    return pd.Series(valores, index=fechas.rename("Fecha"), name="Valor")
+
+
+def _mensual():
+    fechas = pd.date_range("2000-01-01", periods=48, freq="MS")
+    return pd.Series(np.arange(48) * 2.5, index=fechas, name="Valor")
+
+
+def _igual(compacta, serie):
+    tiempos, valores = expandir(compacta)
+    np.testing.assert_array_equal(tiempos, tiempos_ns(serie.index))
+    np.testing.assert_array_equal(valores, serie.to_numpy())
+
+
+def test_rejilla_con_excepciones_ida_y_vuelta():
+    serie = _horaria()
+    c = desde_serie(serie)
+    assert c["tiempos"]["paso"] == 3_600 * 10**9
+    assert len(c["tiempos"]["excepciones"]) == 2 and c["tiempos"]["tramos"].tolist() == [[0, 100], [130, 370]]
+    _igual(c, serie)
+    pd.testing.assert_series_equal(a_serie(c, "Valor"), serie, check_index_type=False, check_freq=False)
+
+
+def test_mensual_sin_rejilla_en_horas():
+    serie = _mensual()
+    c = desde_serie(serie)
+    assert c["tiempos"]["paso"] == 0 and c["tiempos"]["unidad"] == 3_600 * 10**9
+    assert c["tiempos"]["desfases"].dtype == np.int32
+    _igual(c, serie)
+
+
+def test_valores_int16_o_float32():
+    tiempos = tiempos_ns(pd.date_range("2020-01-01", periods=3, freq="h"))
+    enteros = compactar(tiempos, [21.4, -3.0, 100.5])
+    assert enteros["valores"].dtype == np.int16 and enteros["factor"] == 10
+    np.testing.assert_array_equal(expandir(enteros)[1], [21.4, -3.0, 100.5])
+    # Demasiados decimales, o fuera del rango de int16 una vez escalado
+    for valores in ([0.12345, 1.0, 2.0], [5000.5, 1.0, 2.0]):
+        flotantes = compactar(tiempos, valores)
+        assert flotantes["valores"].dtype == np.float32 and flotantes["factor"] is None
+        np.testing.assert_allclose(expandir(flotantes)[1], valores, rtol=1e-6)
+
+
+def test_serie_vacia():
+    c = compactar(np.zeros(0, dtype="int64"), np.zeros(0))
+    tiempos, valores = expandir(c)
+    assert c["n"] == 0 and len(tiempos) == 0 and len(valores) == 0
+    assert rango(c, 0, 10**18) == (0, 0)
+
+
+@pytest.mark.parametrize("armar", [_horaria, _mensual])
+@pytest.mark.parametrize("mapear", [False, True])
+def test_guardar_y_leer(tmp_path, armar, mapear):
+    serie = armar()
+    ruta = tmp_path / "series" / "TA2_AUT_60@25025280.arrow"
+    guardar(desde_serie(serie), ruta)
+    assert not ruta.with_suffix(".tmp").exists()
+    _igual(leer(ruta, mapear=mapear), serie)
+    assert leer(tmp_path / "no_existe.arrow") is None
+
+
+def test_lee_tablas_fecha_valor_anteriores(tmp_path):
+    serie = _horaria()
+    tabla = pa.table({"Fecha": serie.index.to_numpy(), "Valor": serie.to_numpy()})
+    ruta = tmp_path / "vieja.arrow"
+    with pa.OSFile(str(ruta), "wb") as f, pa.ipc.new_file(f, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    _igual(leer(ruta), serie)
+
+
+@pytest.mark.parametrize("armar", [_horaria, _mensual])
+def test_rango_expande_solo_la_ventana(armar):
+    serie = armar()
+    c, tiempos = desde_serie(serie), tiempos_ns(serie.index)
+    medio = serie.index[len(serie) // 2]
+    ventanas = [
+        (None, None), (medio, None), (None, medio), (medio, medio),
+        (serie.index[0] - pd.Timedelta(days=1), serie.index[3] + pd.Timedelta(minutes=1)),
+        (pd.Timestamp("2020-01-03 05:00"), pd.Timestamp("2020-01-10 12:00")),
+        (serie.index[-1] + pd.Timedelta(hours=1), None), (medio, serie.index[0]),
+    ]
+    for inicio, fin in ventanas:
+        a = None if inicio is None else inicio.value
+        b = None if fin is None else fin.value
+        desde = 0 if a is None else np.searchsorted(tiempos, a, "left")
+        hasta = len(tiempos) if b is None else max(np.searchsorted(tiempos, b, "right"), desde)
+        assert rango(c, a, b) == (desde, hasta)
+        t, v = expandir(c, desde, hasta)
+        np.testing.assert_array_equal(t, tiempos[desde:hasta])
+        np.testing.assert_array_equal(v, serie.to_numpy()[desde:hasta])
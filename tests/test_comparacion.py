@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from cattleclimate.comparacion import MAX_SERIES, comparar, reducir
+from cattleclimate.remuestreo import NS_HORA
+
+
+def test_sin_reducir_si_ya_cabe():
+    tiempos = np.arange(10, dtype="int64") * NS_HORA
+    valores = np.arange(20, dtype="float32").reshape(2, 10)
+    t, v = reducir(tiempos, valores, ancho=5)
+    assert t is tiempos and v is valores
+
+
+def test_conserva_minimo_y_maximo_por_columna():
+    rng = np.random.default_rng(0)
+    tiempos = np.arange(1000, dtype="int64") * NS_HORA
+    valores = rng.normal(size=(3, 1000)).astype("float32")
+    valores[1, 400:500] = np.nan  # hueco de la serie 1: columnas completas sin datos
+    valores[2, 10] = 50.0  # pico aislado
+
+    t, v = reducir(tiempos, valores, ancho=100)
+    assert len(t) == 200 and v.shape == (3, 200) and v.dtype == np.float32
+    assert np.all(np.diff(t) >= 0) and t[0] == tiempos[0] and t[-1] == tiempos[-1]
+    # Cada columna cubre 10 horas: mínimo y máximo de cada serie en esas horas
+    bloques = valores.reshape(3, 100, 10)
+    with np.errstate(invalid="ignore"), pytest.warns(RuntimeWarning):
+        np.testing.assert_array_equal(v[:, 0::2], np.nanmin(bloques, axis=2))
+        np.testing.assert_array_equal(v[:, 1::2], np.nanmax(bloques, axis=2))
+    assert np.isnan(v[1, 80:100]).all() and v[2].max() == 50.0
+    np.testing.assert_array_equal(t[0::2], tiempos[::10])
+    np.testing.assert_array_equal(t[1::2], tiempos[9::10])
+
+
+def test_limite_de_series():
+    with pytest.raises(ValueError):
+        comparar(None, [f"TA2_AUT_60@{i}" for i in range(MAX_SERIES + 1)])
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cattleclimate import dataset
+from cattleclimate.consulta import consultar
+
+
+def _escribir(ruta, serie):
+    serie.rename("Valor").rename_axis("Fecha").to_csv(ruta, sep="|", date_format="%Y-%m-%d %H:%M:%S")
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    """Tres series horarias 2019-2021 en .data y en un dataset particionado con grupos de 1000 filas"""
+    monkeypatch.setattr(dataset, "FILAS_POR_GRUPO", 1000)
+    datos, raiz = tmp_path / "datos", tmp_path / "dataset"
+    datos.mkdir()
+    fechas = pd.date_range("2019-01-01", "2021-12-31 23:00", freq="h")
+    series = {}
+    for i, nombre in enumerate(["TA2_AUT_60@T0001", "TA2_AUT_60@T0002", "HRA2_AUT_60@T0001"]):
+        series[nombre] = pd.Series(np.round(np.arange(len(fechas)) * 0.1 + i * 1000, 1), index=fechas)
+        _escribir(datos / f"{nombre}.data", series[nombre])
+    dataset.sincronizar(directorio=datos, raiz=raiz)
+    return datos, raiz, series
+
+
+def test_filtra_y_descarta_particiones_y_grupos(corpus):
+    datos, raiz, series = corpus
+    reporte = {}
+    tabla = consultar(etiquetas=["TA2_AUT_60"], codigos=["T0001"], desde="2020-03-01", hasta="2020-03-10 23:00",
+                      raiz=raiz, directorio=datos, reporte=reporte)
+
+    esperado = series["TA2_AUT_60@T0001"]["2020-03-01":"2020-03-10 23:00"]
+    assert tabla.num_rows == len(esperado) == 240
+    np.testing.assert_array_equal(tabla["Valor"].to_numpy(), esperado.to_numpy())
+    assert pd.DatetimeIndex(tabla["Fecha"].to_numpy()).equals(esperado.index)
+    assert set(tabla["Codigo"].to_pylist()) == {"T0001"} and set(tabla["Etiqueta"].to_pylist()) == {"TA2_AUT_60"}
+
+    # Una serie, leída del dataset: solo la partición Anio=2020 y sus grupos de marzo
+    assert reporte["series"] == 1 and reporte["desde_corpus"] == 0 and reporte["archivos"] == 1
+    assert reporte["grupos_totales"] == 9  # 8784 horas de 2020 en grupos de 1000
+    assert 1 <= reporte["grupos_leidos"] <= 2
+
+
+def test_ventana_entre_anios_y_sin_dataset(corpus):
+    datos, raiz, series = corpus
+    reporte = {}
+    tabla = consultar(etiquetas=["TA2_AUT_60"], desde="2019-12-31 20:00", hasta="2020-01-01 03:00",
+                      raiz=raiz, directorio=datos, reporte=reporte)
+    assert tabla.num_rows == 2 * 8 and reporte["series"] == 2
+    # Dos particiones por serie (2019 y 2020), y de cada una un solo grupo
+    assert reporte["archivos"] == 4 and reporte["grupos_leidos"] == 4 and reporte["grupos_totales"] == 36
+
+    # Sin dataset se sirve desde la capa compartida con el mismo resultado
+    sin_dataset = {}
+    otra = consultar(etiquetas=["TA2_AUT_60"], desde="2019-12-31 20:00", hasta="2020-01-01 03:00",
+                     raiz=raiz.parent / "vacio", directorio=datos, reporte=sin_dataset)
+    assert sin_dataset["desde_corpus"] == 2 and sin_dataset["grupos_totales"] == 0
+    assert otra["Valor"].to_pylist() == tabla["Valor"].to_pylist()
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cattleclimate import cubos, diagnostico
+from cattleclimate.datos import tiempos_ns
+
+
+def _serie(inicio="2023-12-30", horas=24 * 70, semilla=0):
+    rng = np.random.default_rng(semilla)
+    fechas = pd.date_range(inicio, periods=horas, freq="h")
+    valores = rng.normal(75, 5, horas)
+    valores[rng.random(horas) < 0.05] = np.nan
+    return pd.Series(valores, index=fechas)
+
+
+def _esperado(serie, umbral):
+    """Conteo, suma, máximo y excedencias por (día del año bisiesto, hora) con pandas"""
+    serie = serie.dropna()
+    fechas = serie.index
+    dia = fechas.dayofyear - 1
+    # En años comunes, del 1 de marzo en adelante se salta la columna del 29 de febrero
+    dia = np.where(~fechas.is_leap_year & (dia >= 59), dia + 1, dia)
+    grupos = serie.groupby([dia, fechas.hour])
+    return pd.DataFrame({
+        "conteo": grupos.count(), "suma": grupos.sum(), "maximo": grupos.max(),
+        "excedencias": (serie >= umbral).groupby([dia, fechas.hour]).sum(),
+    })
+
+
+def test_acumular_como_pandas():
+    serie = _serie()
+    c = cubos.acumular(tiempos_ns(serie.index), serie.to_numpy(), (79.0,))
+    esperado = _esperado(serie, 79.0)
+    dias, horas = esperado.index.get_level_values(0), esperado.index.get_level_values(1)
+    np.testing.assert_array_equal(c["conteo"][dias, horas], esperado["conteo"])
+    np.testing.assert_allclose(c["suma"][dias, horas], esperado["suma"])
+    np.testing.assert_array_equal(c["maximo"][dias, horas], esperado["maximo"])
+    np.testing.assert_array_equal(c["excedencias"][0][dias, horas], esperado["excedencias"])
+    assert c["conteo"].sum() == serie.notna().sum()
+
+
+def test_combinar_equivale_a_acumular_todo():
+    serie = _serie()
+    tiempos, valores = tiempos_ns(serie.index), serie.to_numpy()
+    corte = len(serie) // 3
+    partes = cubos.combinar(cubos.acumular(tiempos[:corte], valores[:corte], (79.0,)),
+                            cubos.acumular(tiempos[corte:], valores[corte:], (79.0,)))
+    todo = cubos.acumular(tiempos, valores, (79.0,))
+    for k in todo:
+        np.testing.assert_allclose(partes[k], todo[k])
+
+
+def test_matriz_mensual_y_excedencia():
+    serie = _serie()
+    c = {**cubos.acumular(tiempos_ns(serie.index), serie.to_numpy(), (79.0,)), "umbrales": np.array([79.0])}
+    media = cubos.matriz(c, "media", "mes")
+    assert media.shape == (24, 12)
+    validos = serie.dropna()
+    enero = validos[(validos.index.month == 1) & (validos.index.hour == 6)]
+    assert media.loc[6, 1] == pytest.approx(enero.mean())
+    excedencia = cubos.matriz(c, "excedencia", "mes", umbral=79)
+    assert excedencia.loc[6, 1] == pytest.approx(100 * (enero >= 79).mean())
+    assert np.isnan(media.loc[6, 6])  # junio sin datos
+    with pytest.raises(ValueError):
+        cubos.matriz(c, "excedencia", umbral=90)
+
+
+def _escribir(ruta, serie):
+    serie.dropna().rename("Valor").rename_axis("Fecha").to_csv(ruta, sep="|", date_format="%Y-%m-%d %H:%M:%S")
+
+
+@pytest.mark.parametrize("corregir", [False, True])
+def test_cubo_incremental_solo_si_el_tramo_previo_no_cambia(tmp_path, monkeypatch, corregir):
+    monkeypatch.setattr(cubos, "CUBOS_DIR", tmp_path / "cubos")
+    nombre = "ITH_AUT_60@T0001"
+    ruta = tmp_path / f"{nombre}.data"
+    serie = _serie()
+    _escribir(ruta, serie.iloc[:1000])
+    cubos.cubo(nombre, tmp_path)
+
+    nueva = serie.copy()
+    if corregir:
+        # Corrección de una observación ya incluida, además de datos nuevos al final
+        nueva.iloc[10] = 99.0
+    _escribir(ruta, nueva)
+    diagnostico.limpiar()
+    c = cubos.cubo(nombre, tmp_path)
+    [reg] = [r for r in diagnostico.registros() if r["etapa"] == "cubos.construir"]
+    assert reg["modo"] == ("completo" if corregir else "incremental")
+    esperado = cubos.acumular(tiempos_ns(nueva.dropna().index), nueva.dropna().to_numpy(), (72.0, 79.0, 84.0))
+    for k in ("conteo", "suma", "maximo", "excedencias"):
+        np.testing.assert_allclose(c[k], esperado[k])
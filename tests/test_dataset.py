@@ -0,0 +1,34 @@
+import pandas as pd
+import pyarrow as pa
+
+from cattleclimate import dataset
+
+
+def _tabla(inicio, valores):
+    fechas = pd.date_range(inicio, periods=len(valores), freq="12h")
+    return pa.table({"Fecha": pa.array(fechas, pa.timestamp("ns")), "Valor": pa.array(valores, pa.float64())})
+
+
+def test_escribir_anexar_compactar(tmp_path):
+    dataset.escribir_serie(_tabla("2020-12-31", [1.0, 2.0, 3.0]), "TA2_AUT_60", "1", tmp_path)
+    dataset.escribir_serie(_tabla("2021-01-01", [9.0]), "TA2_AUT_60", "1", tmp_path, anexar=True)
+    assert len(list(tmp_path.glob("**/Anio=2021/part-*.parquet"))) == 2
+    assert dataset.compactar(tmp_path) == 1
+    tabla = dataset.abrir(tmp_path).to_table().sort_by("Fecha")
+    assert tabla["Valor"].to_pylist() == [1.0, 2.0, 9.0]  # gana la escritura más reciente
+
+
+def test_reemplazo_quita_anios_vacios(tmp_path):
+    dataset.escribir_serie(_tabla("2020-12-31", [1.0, 2.0, 3.0]), "TA2_AUT_60", "1", tmp_path)
+    dataset.escribir_serie(_tabla("2021-06-01", [4.0]), "TA2_AUT_60", "1", tmp_path)
+    assert [d.name for d in (tmp_path / "Etiqueta=TA2_AUT_60" / "Codigo=1").iterdir()] == ["Anio=2021"]
+
+
+def test_sincronizar_quita_directorios_vacios(tmp_path):
+    raiz = tmp_path / "dataset"
+    dataset.escribir_serie(_tabla("2020-01-01", [1.0]), "TA2_AUT_60", "1", raiz)
+    dataset.guardar_estado({"TA2_AUT_60@1": [0, 0]}, raiz)
+    datos = tmp_path / "datos"
+    datos.mkdir()
+    assert dataset.sincronizar(datos, raiz) == ["TA2_AUT_60@1"]
+    assert [r.name for r in raiz.iterdir()] == [dataset.ESTADO]
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cattleclimate.episodios import detectar_episodios, rachas, resumir_episodios
+
+
+def test_rachas():
+    inicios, fines = rachas([False, True, True, False, True, False, True, True, True])
+    assert inicios.tolist() == [1, 4, 6]
+    assert fines.tolist() == [3, 5, 9]
+
+
+def test_rachas_vacias():
+    inicios, fines = rachas(np.zeros(5, dtype=bool))
+    assert len(inicios) == len(fines) == 0
+    inicios, fines = rachas([])
+    assert len(inicios) == 0
+
+
+def test_episodios_duracion_pico_y_grados_hora():
+    fechas = pd.date_range("2020-01-01", periods=8, freq="h")
+    ith = pd.Series([70, 73, 75, 74, 70, 80, 71, 70], index=fechas, dtype="float64")
+    episodios = detectar_episodios(ith, umbrales=(72,))
+    assert episodios["Duracion_h"].tolist() == [3, 1]
+    assert episodios["Pico"].tolist() == [75, 80]
+    assert episodios["Fecha_pico"].iloc[0] == fechas[2]
+    assert episodios["Grados_hora"].tolist() == pytest.approx([1 + 3 + 2, 8])
+    resumen = resumir_episodios(episodios)
+    assert resumen.loc[0, "Horas_totales"] == 4 and resumen.loc[0, "Racha_max_h"] == 3
+
+
+def test_los_huecos_cortan_las_rachas():
+    fechas = pd.date_range("2020-01-01", periods=5, freq="h").delete(2)
+    ith = pd.Series([80.0, 80.0, 80.0, 80.0], index=fechas)
+    assert detectar_episodios(ith, umbrales=(79,))["Duracion_h"].tolist() == [2, 2]
+
+
+def test_rechaza_series_mas_gruesas_que_la_grilla():
+    # Lecturas convencionales 07, 13 y 19 h
+    fechas = pd.to_datetime([f"2020-01-0{d} {h:02d}:00" for d in (1, 2, 3) for h in (7, 13, 19)])
+    ith = pd.Series(80.0, index=fechas)
+    with pytest.raises(ValueError):
+        detectar_episodios(ith, frecuencia="1h")
+    assert detectar_episodios(ith, umbrales=(79,), frecuencia="1D")["Duracion_h"].tolist() == [72]
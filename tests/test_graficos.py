@@ -0,0 +1,85 @@
+import logging
+import sys
+import types
+from concurrent.futures import Future
+
+import pytest
+
+go = pytest.importorskip("plotly.graph_objects")
+
+from cattleclimate import diagnostico, graficos  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(graficos, "GRAFICOS_DIR", tmp_path)
+    diagnostico.limpiar()
+    return tmp_path
+
+
+def _figura(y):
+    return go.Figure(go.Scatter(x=[1, 2, 3], y=y))
+
+
+def _conteo():
+    fila = diagnostico.resumen_cache().set_index("cache").loc["graficos"]
+    return int(fila["aciertos"]), int(fila["fallos"])
+
+
+class _PoolFalso:
+    """Devuelve bytes fijos y cuenta las imágenes pedidas, sin Kaleido"""
+
+    def __init__(self):
+        self.pedidas = 0
+
+    def submit(self, funcion, figura_json, formato, *args):
+        self.pedidas += 1
+        futuro = Future()
+        futuro.set_result(f"{formato}:{self.pedidas}".encode())
+        return futuro
+
+
+def test_formato_invalido():
+    with pytest.raises(ValueError):
+        graficos.renderizar(_figura([1, 2, 3]), "jpg")
+    with pytest.raises(ValueError):
+        graficos.renderizar_lote({"a": _figura([1, 2, 3])}, "gif")
+
+
+def test_html_se_genera_una_vez(cache):
+    fig = _figura([1, 2, 3])
+    primero = graficos.renderizar(fig, "html")
+    assert graficos.renderizar(fig, "html") == primero and b"<html" in primero
+    assert _conteo() == (1, 1)
+    assert len(list(cache.iterdir())) == 1
+
+
+def test_huella_cambia_con_figura_formato_y_tamano():
+    fig = _figura([1, 2, 3])
+    base = graficos.huella(fig, "png")
+    assert graficos.huella(fig.to_json(), "png") == base
+    assert len({base, graficos.huella(fig, "svg"), graficos.huella(fig, "png", ancho=800),
+                graficos.huella(_figura([1, 2, 4]), "png")}) == 4
+
+
+def test_lote_solo_genera_las_que_faltan(monkeypatch):
+    pool = _PoolFalso()
+    monkeypatch.setattr(graficos, "_obtener_pool", lambda procesos=1: pool)
+    figuras = {"A": _figura([1, 2, 3]), "B": _figura([3, 2, 1])}
+    primero = graficos.renderizar_lote(figuras, "png", procesos=2)
+    assert pool.pedidas == 2 and list(primero) == ["A", "B"]
+
+    figuras["C"] = _figura([0, 0, 0])
+    segundo = graficos.renderizar_lote(figuras, "png", procesos=2)
+    assert pool.pedidas == 3
+    assert segundo["A"] == primero["A"] and segundo["B"] == primero["B"]
+    # renderizar lee la misma caché que el lote
+    assert graficos.renderizar(figuras["C"], "png") == segundo["C"] and pool.pedidas == 3
+    assert _conteo() == (3, 3)
+
+
+def test_calentamiento_avisa_si_kaleido_es_viejo(monkeypatch, caplog):
+    monkeypatch.setitem(sys.modules, "kaleido", types.ModuleType("kaleido"))  # sin start_sync_server
+    with caplog.at_level(logging.WARNING, logger="cattleclimate.graficos"):
+        graficos._iniciar_trabajador()
+    assert "kaleido>=1.1" in caplog.text
@@ -0,0 +1,64 @@
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from cattleclimate.grilla import filtrar, pagina
+
+
+def _tabla():
+    return pa.table({
+        "Fecha": pa.array(pd.date_range("2021-01-01", periods=6, freq="D").to_numpy(), pa.timestamp("us")),
+        "Valor": [3.0, 1.0, None, 5.0, 1.0, 4.0],
+        "Codigo": pa.array(["b", "a", "c", "a", "b", "c"]).dictionary_encode(),
+    })
+
+
+def _dos_trozos():
+    """Dos trozos con diccionarios distintos: 'b' es el 0 del primero y 'a' el 0 del segundo"""
+    uno = pa.table({"Codigo": pa.array(["b", "b"]).dictionary_encode(), "n": [0, 1]})
+    dos = pa.table({"Codigo": pa.array(["a", "a"]).dictionary_encode(), "n": [2, 3]})
+    return pa.concat_tables([uno, dos])
+
+
+def test_ordena_diccionarios_de_trozos_distintos():
+    tabla = _dos_trozos()
+    assert pagina(tabla, 1, 10, orden="Codigo").column("Codigo").to_pylist() == ["a", "a", "b", "b"]
+    assert pagina(tabla, 1, 10, orden="Codigo", descendente=True).column("n").to_pylist() == [0, 1, 2, 3]
+
+
+def test_paginas_ordenadas_sin_solapes():
+    tabla = pa.concat_tables([_tabla()] * 50)
+    filas = [f for n in range(1, 4) for f in pagina(tabla, n, 100, orden="Valor").column("Valor").to_pylist()]
+    esperado = sorted(tabla.column("Valor").to_pylist(), key=lambda v: (v is None, v))
+    assert filas == esperado
+    # Top-k (página cercana al principio) y orden completo coinciden
+    primera = pagina(tabla, 1, 10, orden="Codigo", descendente=True)
+    assert primera.column("Codigo").to_pylist() == ["c"] * 10
+
+
+def test_pagina_sin_orden_y_columnas():
+    tabla = _tabla()
+    trozo = pagina(tabla, 2, 4, columnas=["Valor"])
+    assert trozo.column_names == ["Valor"] and trozo.column("Valor").to_pylist() == [1.0, 4.0]
+    assert pagina(tabla, 5, 4).num_rows == 0
+
+
+@pytest.mark.parametrize("expresion, esperado", [
+    (">= 3", [3.0, 5.0, 4.0]),
+    ("1", [1.0, 1.0]),
+    ("!= 1", [3.0, 5.0, 4.0]),
+    ("2..4", [3.0, 4.0]),
+    ("", [3.0, 1.0, None, 5.0, 1.0, 4.0]),
+])
+def test_filtro_numerico(expresion, esperado):
+    assert filtrar(_tabla(), "Valor", expresion).column("Valor").to_pylist() == esperado
+
+
+def test_filtro_de_fechas_y_texto():
+    tabla = _tabla()
+    assert filtrar(tabla, "Fecha", "< 2021-01-03").num_rows == 2
+    assert filtrar(tabla, "Fecha", "2021-01-02..2021-01-04").num_rows == 3
+    assert filtrar(tabla, "Codigo", "A").column("Valor").to_pylist() == [1.0, 5.0]
+    assert filtrar(_dos_trozos(), "Codigo", "a").column("n").to_pylist() == [2, 3]
+    with pytest.raises(ValueError):
+        filtrar(tabla, "Valor", ">= abc")
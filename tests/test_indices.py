@@ -0,0 +1,32 @@
+from cattleclimate import api
+from cattleclimate.indices import archivos_ith, estaciones_con_ith, fuentes_estacion, serie_ith, tabla_indices
+
+AUTOMATICA = "25025280"  # solo TA2_AUT_60 y HRA2_AUT_60: Tbh y Tr se derivan
+
+
+def test_estacion_automatica_usa_derivadas():
+    fuentes = fuentes_estacion(AUTOMATICA)
+    assert fuentes["Tbs"].name == f"TA2_AUT_60@{AUTOMATICA}.data"
+    assert fuentes["Tbh"].name == f"TBH_DER_60@{AUTOMATICA}.data"
+    assert AUTOMATICA in estaciones_con_ith()
+    # Para las huellas cuentan los archivos reales, no la ruta virtual
+    assert [r.name for r in archivos_ith(AUTOMATICA)] == [f"TA2_AUT_60@{AUTOMATICA}.data",
+                                                            f"HRA2_AUT_60@{AUTOMATICA}.data"]
+
+
+def test_serie_y_tabla_de_estacion_automatica():
+    ith = serie_ith(AUTOMATICA)
+    assert len(ith) and ith.between(50, 100).all()
+    tabla = tabla_indices(AUTOMATICA)
+    assert not tabla.empty and (tabla["ITH"] == ith.reindex(tabla.index)).all()
+
+
+def test_api_indices_de_estacion_automatica():
+    _, construir = api.resolver(f"/indices/{AUTOMATICA}")
+    assert construir({}).num_rows > 0
+
+
+def test_estacion_sin_datos():
+    assert serie_ith("00000000").empty
+    assert tabla_indices("00000000").empty
+    assert archivos_ith("00000000") is None
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cattleclimate import diagnostico, pronostico
+from cattleclimate.datos import tiempos_ns
+from cattleclimate.remuestreo import NS_HORA
+
+
+def _ith(horas=24 * 90, semilla=0):
+    rng = np.random.default_rng(semilla)
+    fechas = pd.date_range("2022-01-01", periods=horas, freq="h")
+    ciclo = 76 + 4 * np.sin(2 * np.pi * (fechas.hour - 9) / 24)
+    ruido = np.zeros(horas)
+    for i in range(1, horas):
+        ruido[i] = 0.8 * ruido[i - 1] + rng.normal(0, 1)
+    return pd.Series(ciclo + ruido, index=fechas)
+
+
+def test_estadisticas_por_tramos_suman_como_el_total():
+    ith = _ith()
+    tiempos, valores = tiempos_ns(ith.index), ith.to_numpy()
+    corte = 1000
+    partes = pronostico.sumar(
+        pronostico.estadisticas(tiempos[:corte], valores[:corte]),
+        pronostico.estadisticas(tiempos[corte:], valores[corte:], previo=(tiempos[corte - 1], valores[corte - 1]))
+    )
+    total = pronostico.estadisticas(tiempos, valores)
+    for k in total:
+        np.testing.assert_allclose(partes[k], total[k], rtol=1e-9, atol=1e-6)
+
+
+def test_ajuste_recupera_ciclo_y_persistencia():
+    ith = _ith()
+    est = pronostico.estadisticas(tiempos_ns(ith.index), ith.to_numpy())
+    ajuste = pronostico.ajustar(est)
+    assert ajuste["phi"] == pytest.approx(0.8, abs=0.05)
+    df = pronostico.proyectar(est, ajuste, (tiempos_ns(ith.index)[-1], ith.iloc[-1]), horas=48)
+    assert len(df) == 48 and (df["Inferior"] < df["Pronostico"]).all() and (df["Pronostico"] < df["Superior"]).all()
+    assert df.index[0] == ith.index[-1] + pd.Timedelta(hours=1)
+
+
+@pytest.mark.parametrize("corregir", [False, True])
+def test_modelo_incremental_solo_si_las_horas_previas_no_cambian(tmp_path, monkeypatch, corregir):
+    monkeypatch.setattr(pronostico, "PRONOSTICO_DIR", tmp_path)
+    ith = _ith()
+    actual = {"serie": ith.iloc[:1500]}
+    monkeypatch.setattr(pronostico, "cargar_serie", lambda ruta: actual["serie"])
+    pronostico._modelo("T0001", tmp_path, ("v1",))
+
+    nueva = ith.copy()
+    if corregir:
+        nueva.iloc[100] += 5  # corrección de una hora ya sumada, además de las horas nuevas
+    actual["serie"] = nueva
+    diagnostico.limpiar()
+    est, ultimo = pronostico._modelo("T0001", tmp_path, ("v2",))
+    [reg] = [r for r in diagnostico.registros() if r["etapa"] == "pronostico.ajuste"]
+    assert reg["modo"] == ("completo" if corregir else "incremental")
+    esperado = pronostico.estadisticas(tiempos_ns(nueva.index), nueva.to_numpy())
+    for k in esperado:
+        np.testing.assert_allclose(est[k], esperado[k], rtol=1e-9, atol=1e-6)
+    assert ultimo == (float(tiempos_ns(nueva.index)[-1]), nueva.iloc[-1])
+    assert int(ultimo[0]) - tiempos_ns(nueva.index)[-2] == NS_HORA
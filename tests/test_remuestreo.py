@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cattleclimate.remuestreo import longitud_huecos, remuestrear
+
+
+def _serie(fechas, valores):
+    return pd.Series(valores, index=pd.DatetimeIndex(pd.to_datetime(fechas), name="Fecha"), dtype="float64")
+
+
+def test_agrega_en_celdas_y_marca_cobertura():
+    serie = _serie(["2020-01-01 00:10", "2020-01-01 00:50", "2020-01-01 02:00"], [1.0, 3.0, 5.0])
+    df = remuestrear(serie, "1h")
+    assert list(df["Valor"].fillna(-1)) == [2.0, -1, 5.0]
+    assert list(df["Cobertura"]) == [True, False, True]
+    assert not df["Relleno"].any()
+
+
+def test_lineal_respeta_el_maximo_de_horas():
+    serie = _serie(["2020-01-01 00:00", "2020-01-01 02:00", "2020-01-01 08:00"], [0.0, 2.0, 8.0])
+    df = remuestrear(serie, "1h", "lineal", max_horas=3)
+    assert df["Valor"].iloc[1] == pytest.approx(1.0)
+    assert df["Valor"].iloc[3:8].isna().all()  # hueco de 5 horas: no se rellena
+    assert list(np.flatnonzero(df["Relleno"])) == [1]
+
+
+def test_lineal_en_grilla_diaria_rellena_al_menos_una_celda():
+    serie = _serie(["2020-01-01", "2020-01-03"], [1.0, 3.0])
+    df = remuestrear(serie, "1D", "lineal", max_horas=3)
+    assert df["Valor"].tolist() == [1.0, 2.0, 3.0]
+    assert df["Relleno"].tolist() == [False, True, False]
+
+
+def test_climatologica_usa_la_misma_hora_del_dia():
+    fechas = pd.date_range("2020-01-01", periods=72, freq="h")
+    serie = pd.Series(fechas.hour.to_numpy(dtype="float64"), index=fechas).drop(fechas[30])
+    df = remuestrear(serie, "1h", "climatologica")
+    assert df["Valor"].iloc[30] == fechas[30].hour
+    assert df["Relleno"].sum() == 1
+
+
+def test_serie_vacia():
+    vacia = _serie([], [])
+    assert remuestrear(vacia).empty
+    assert remuestrear(vacia, inicio="2020-01-01").empty
+    assert remuestrear(vacia, fin="2020-01-01").empty
+    df = remuestrear(vacia, "1h", inicio="2020-01-01", fin="2020-01-01 05:00")
+    assert len(df) == 6 and df["Valor"].isna().all()
+
+
+def test_rango_invertido():
+    serie = _serie(["2020-01-01"], [1.0])
+    with pytest.raises(ValueError):
+        remuestrear(serie, "1h", inicio="2020-02-01", fin="2020-01-01")
+    with pytest.raises(ValueError):
+        remuestrear(serie, "1h", inicio="2020-02-01")
+
+
+def test_longitud_huecos():
+    faltantes = np.array([0, 1, 1, 0, 1, 0, 0, 1, 1, 1], dtype=bool)
+    assert longitud_huecos(faltantes).tolist() == [0, 2, 2, 0, 1, 0, 0, 3, 3, 3]
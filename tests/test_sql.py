@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+pytest.importorskip("duckdb")
+
+from cattleclimate import dataset, sql  # noqa: E402
+from cattleclimate.psicrometria import bulbo_humedo_stull  # noqa: E402
+
+# Estaciones del corpus: una convencional (Tbs y Tbh medidas) y una automática (Tbh derivada de TA2 y HRA2)
+CONVENCIONAL, AUTOMATICA = "25025080", "25025280"
+
+
+@pytest.fixture
+def cursor(tmp_path):
+    fechas = pa.array(pd.date_range("2020-01-01", periods=3, freq="h"), pa.timestamp("ns"))
+    series = {
+        ("TSSM_CON", CONVENCIONAL): [30.0, 31.0, 32.0], ("THSM_CON", CONVENCIONAL): [20.0] * 3,
+        ("TA2_AUT_60", AUTOMATICA): [28.0, 29.0, 30.0], ("HRA2_AUT_60", AUTOMATICA): [70.0, 150.0, 60.0],
+    }
+    for (etiqueta, codigo), valores in series.items():
+        dataset.escribir_serie(pa.table({"Fecha": fechas, "Valor": valores}), etiqueta, codigo, tmp_path)
+    # Parte anexada sin compactar con una fecha repetida: gana la más reciente
+    dataset.escribir_serie(pa.table({"Fecha": fechas[:1], "Valor": [35.0]}), "TSSM_CON", CONVENCIONAL,
+                           tmp_path, anexar=True)
+    return sql.conectar(tmp_path)
+
+
+def test_consulta_y_ith_sin_repetidas(cursor):
+    resultado = sql.ejecutar(f"SELECT * FROM ith WHERE Codigo = '{CONVENCIONAL}' ORDER BY Fecha;", cursor=cursor)
+    assert resultado["total"] == 3
+    assert resultado["datos"]["Tbs"].tolist() == [35.0, 31.0, 32.0]
+    assert sql.ejecutar("DESCRIBE series", cursor=cursor)["total"] == 5
+    tssm = sql.ejecutar("SELECT Valor FROM series WHERE Etiqueta = 'TSSM_CON' ORDER BY Fecha", cursor=cursor)
+    assert tssm["datos"]["Valor"].tolist() == [35.0, 31.0, 32.0]
+    assert sql.ejecutar("SELECT 1 -- comentario final", cursor=cursor)["total"] == 1
+
+
+def test_ith_de_estacion_automatica(cursor):
+    datos = sql.ejecutar(f"SELECT * FROM ith WHERE Codigo = '{AUTOMATICA}' ORDER BY Fecha", cursor=cursor)["datos"]
+    # La humedad fuera de rango (150 %) no se usa, como en psicrometria
+    assert datos["Tbs"].tolist() == [28.0, 30.0]
+    assert datos["Tbh"].to_numpy() == pytest.approx(bulbo_humedo_stull(np.array([28.0, 30.0]), np.array([70.0, 60.0])))
+
+
+@pytest.mark.parametrize("consulta", [
+    "SELECT 1; COPY (SELECT 1) TO 'fuga.csv'",
+    "COPY (SELECT 1) TO 'fuga.csv'",
+    "SET enable_external_access = true",
+    "ATTACH 'otra.db'",
+    "EXPLAIN ANALYZE SELECT 1",
+])
+def test_rechaza_escrituras_y_varias_sentencias(cursor, consulta):
+    with pytest.raises(ValueError):
+        sql.ejecutar(consulta, cursor=cursor)
+    with pytest.raises(ValueError):
+        list(sql.por_lotes(consulta, cursor=cursor))
+
+
+def test_sin_acceso_a_archivos_fuera_del_dataset(cursor):
+    import duckdb
+
+    with pytest.raises(duckdb.PermissionException):
+        sql.ejecutar("SELECT * FROM read_text('/etc/passwd')", cursor=cursor)
+    with pytest.raises(duckdb.Error):
+        cursor.execute("SET enable_external_access = true")
+
+
+def test_dataset_vacio(tmp_path):
+    with pytest.raises(ValueError):
+        sql.conectar(tmp_path)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from cattleclimate.superficie import GRADIENTE_T, RADIO_MAX_KM, TESELA_GRADOS, interpolar, teselas_en
+
+
+def _estaciones(altitudes=(0.0, 0.0, 0.0)):
+    """Tres estaciones a unos 20-30 km entre sí"""
+    return {
+        "latitud": np.array([9.0, 9.2, 9.1]),
+        "longitud": np.array([-75.0, -75.0, -74.8]),
+        "altitud": np.array(altitudes, dtype="float64"),
+    }
+
+
+def test_teselas_cubren_el_recuadro():
+    teselas = teselas_en((8.3, 9.8, -75.8, -74.4))
+    ixs = {ix for ix, _ in teselas}
+    iys = {iy for _, iy in teselas}
+    assert min(ixs) * TESELA_GRADOS <= -75.8 and (max(ixs) + 1) * TESELA_GRADOS >= -74.4
+    assert min(iys) * TESELA_GRADOS <= 8.3 and (max(iys) + 1) * TESELA_GRADOS >= 9.8
+    assert len(teselas) == len(ixs) * len(iys)
+
+
+@pytest.mark.parametrize("bbox", [(9.0, 9.0, -75, -74), (9.0, 8.0, -75, -74), (4.0, 5.0, -74, -74)])
+def test_recuadro_vacio_o_invertido(bbox):
+    with pytest.raises(ValueError, match="Recuadro"):
+        teselas_en(bbox)
+
+
+def test_idw_exacto_en_las_estaciones():
+    est = _estaciones()
+    valores = np.array([[20.0, 25.0], [30.0, np.nan], [26.0, 27.0]])
+    salida = interpolar(est["latitud"], est["longitud"], est, valores)
+    assert salida.shape == (3, 2) and salida.dtype == np.float32
+    np.testing.assert_allclose(salida[:, 0], [20.0, 30.0, 26.0], rtol=1e-5)
+    # Sin dato en la estación, su celda toma el promedio ponderado de las demás
+    assert 25.0 < salida[1, 1] < 27.0
+    # Entre estaciones el valor queda dentro del rango observado
+    medio = interpolar(np.array([9.1]), np.array([-74.93]), est, valores[:, :1])
+    assert 20.0 < medio[0, 0] < 30.0
+
+
+def test_celdas_lejos_de_toda_estacion_quedan_vacias():
+    est = _estaciones()
+    lejos = 9.2 + (RADIO_MAX_KM + 20) / 111.0  # grados de latitud al norte de la estación más al norte
+    salida = interpolar(np.array([9.05, lejos]), np.array([-75.0, -75.0]), est, np.array([[1.0], [2.0], [3.0]]))
+    assert not np.isnan(salida[0, 0]) and np.isnan(salida[1, 0])
+
+
+def test_correccion_por_altitud():
+    # Temperaturas que solo difieren por la altitud: 30 °C al nivel del mar
+    est = _estaciones((0.0, 1000.0, 2000.0))
+    valores = (30.0 - GRADIENTE_T * est["altitud"] / 1000)[:, None]
+    lat_c, lon_c = np.array([9.1, 9.1]), np.array([-74.93, -74.93])
+    altitud_celdas = np.array([500.0, 3000.0])
+    corregida = interpolar(lat_c, lon_c, est, valores, GRADIENTE_T, altitud_celdas)
+    # La celda más alta es más fría, en GRADIENTE_T por km
+    np.testing.assert_allclose(corregida[:, 0], [30.0 - GRADIENTE_T * 0.5, 30.0 - GRADIENTE_T * 3], rtol=1e-5)
+    assert corregida[1, 0] - corregida[0, 0] == pytest.approx(-GRADIENTE_T * 2.5, rel=1e-5)
+    # Sin corrección la altitud de la celda no cuenta
+    plana = interpolar(lat_c, lon_c, est, valores)
+    assert plana[0, 0] == plana[1, 0]
+    assert interpolar(lat_c, lon_c, est, valores, GRADIENTE_T)[0, 0] == plana[0, 0]
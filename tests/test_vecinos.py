@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from cattleclimate.vecinos import correlaciones, elegir_vecinos, imputar_matriz
+
+
+@pytest.fixture
+def matriz():
+    """Fila 0 = 2·fila 1 + 1 (relación exacta), fila 2 ruido independiente, con huecos distintos"""
+    rng = np.random.default_rng(0)
+    n = 400
+    b = rng.normal(0, 3, n)
+    valores = np.vstack([2 * b + 1, b, rng.normal(0, 1, n)])
+    valores[0, [0, 1, 50, 51, 52, 200, 399]] = np.nan  # bordes y huecos internos de la fila 0
+    valores[1, [52, 300]] = np.nan
+    valores[2, rng.random(n) < 0.2] = np.nan
+    return valores.astype(np.float32)
+
+
+def test_correlaciones_sobre_celdas_comunes(matriz):
+    e = correlaciones(matriz)
+    ambas = ~np.isnan(matriz[0]) & ~np.isnan(matriz[1])
+    assert e["comunes"][0, 1] == e["comunes"][1, 0] == ambas.sum()
+    assert e["r"][0, 1] == pytest.approx(1, abs=1e-5)
+    # Regresión de la fila sobre la columna: a = 2b + 1 y b = a/2 - 1/2
+    assert e["pendiente"][0, 1] == pytest.approx(2, abs=1e-4)
+    assert e["intercepto"][0, 1] == pytest.approx(1, abs=1e-3)
+    assert e["pendiente"][1, 0] == pytest.approx(0.5, abs=1e-4)
+    assert e["intercepto"][1, 0] == pytest.approx(-0.5, abs=1e-3)
+    # Con huecos en ambas: igual que Pearson sobre las celdas compartidas
+    ambas = ~np.isnan(matriz[0]) & ~np.isnan(matriz[2])
+    esperado = np.corrcoef(matriz[0, ambas].astype(np.float64), matriz[2, ambas].astype(np.float64))[0, 1]
+    assert e["r"][0, 2] == pytest.approx(esperado, abs=1e-4)
+    assert abs(e["r"][0, 2]) < 0.2
+
+
+def test_elige_solo_vecinas_correlacionadas_y_cercanas(matriz):
+    e = correlaciones(matriz)
+    distancias = np.full((3, 3), 10.0)
+    vecinos = elegir_vecinos(e, distancias, k=2, r_min=0.5)
+    assert vecinos[0].tolist() == [1, -1] and vecinos[1].tolist() == [0, -1] and vecinos[2].tolist() == [-1, -1]
+    distancias[0, 1] = distancias[1, 0] = 500.0
+    assert (elegir_vecinos(e, distancias, k=2, r_min=0.5)[:2] == -1).all()
+
+
+def test_imputa_huecos_internos_por_regresion(matriz):
+    e = correlaciones(matriz)
+    vecinos = elegir_vecinos(e, np.full((3, 3), 10.0), k=2, r_min=0.5)
+    salida, usadas = imputar_matriz(matriz, e, vecinos)
+
+    # Huecos internos con la vecina presente: la relación lineal exacta
+    for t in (50, 51, 200):
+        assert salida[0, t] == pytest.approx(2 * matriz[1, t] + 1, abs=1e-3) and usadas[0, t] == 1
+    # Sin dato en la vecina (52) o fuera del tramo observado (bordes): queda el hueco
+    assert np.isnan(salida[0, [0, 1, 52, 399]]).all() and usadas[0, [0, 1, 52, 399]].sum() == 0
+    # El resto no cambia; la fila sin vecinas tampoco
+    presentes = ~np.isnan(matriz)
+    np.testing.assert_array_equal(salida[presentes], matriz[presentes])
+    np.testing.assert_array_equal(salida[2], matriz[2])
+    assert salida[1, 300] == pytest.approx((matriz[0, 300] - 1) / 2, abs=1e-3)
+
+
+def test_promedia_vecinas_ponderadas_por_r2():
+    rng = np.random.default_rng(1)
+    base = rng.normal(0, 2, 300)
+    valores = np.vstack([base, base + rng.normal(0, 0.5, 300), 3 - base + rng.normal(0, 1.5, 300)])
+    valores[0, 100] = np.nan
+    valores = valores.astype(np.float32)
+    e = correlaciones(valores)
+    vecinos = elegir_vecinos(e, np.zeros((3, 3)), k=2, r_min=-1)
+    salida, usadas = imputar_matriz(valores, e, vecinos)
+
+    predicciones = [e["intercepto"][0, j] + e["pendiente"][0, j] * valores[j, 100] for j in (1, 2)]
+    pesos = [float(e["r"][0, j]) ** 2 for j in (1, 2)]
+    assert usadas[0, 100] == 2
+    assert salida[0, 100] == pytest.approx(np.average(predicciones, weights=pesos), abs=1e-4)
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cattleclimate.ventanas import cuantil_movil, estadisticas_moviles, maximo_movil, media_movil, minimo_movil
+
+
+@pytest.fixture
+def valores():
+    rng = np.random.default_rng(0)
+    x = rng.normal(25, 3, 2_000)
+    x[rng.random(2_000) < 0.1] = np.nan
+    x[::97] = 999.0  # centinela de dato inválido que no se filtró
+    return x
+
+
+@pytest.mark.parametrize("ventana", [1, 5, 24, 168])
+def test_media_maximo_minimo_como_pandas(valores, ventana):
+    minimo = min(3, ventana)
+    rolling = pd.Series(valores).rolling(ventana, min_periods=minimo)
+    np.testing.assert_allclose(media_movil(valores, ventana, minimo), rolling.mean(), equal_nan=True)
+    np.testing.assert_array_equal(maximo_movil(valores, ventana, minimo), rolling.max())
+    np.testing.assert_array_equal(minimo_movil(valores, ventana, minimo), rolling.min())
+
+
+@pytest.mark.parametrize("q", [0.1, 0.5, 0.9])
+@pytest.mark.parametrize("ventana", [1, 24])
+def test_cuantil_exacto(valores, q, ventana):
+    minimo = min(12, ventana)
+    # Referencia independiente: np.nanquantile sobre cada ventana recortada a mano
+    esperado = np.full(len(valores), np.nan)
+    for i in range(len(valores)):
+        tramo = valores[max(0, i - ventana + 1):i + 1]
+        if np.count_nonzero(~np.isnan(tramo)) >= minimo:
+            esperado[i] = np.nanquantile(tramo, q)
+    np.testing.assert_allclose(cuantil_movil(valores, ventana, q, minimo), esperado, equal_nan=True)
+
+
+def test_todo_nan_y_vacio():
+    assert np.isnan(media_movil(np.full(5, np.nan), 3)).all()
+    assert np.isnan(cuantil_movil(np.full(5, np.nan), 3, 0.9)).all()
+    assert len(maximo_movil(np.array([]), 3)) == 0
+
+
+def test_estadisticas_moviles_columnas():
+    fechas = pd.date_range("2020-01-01", periods=72, freq="h")
+    serie = pd.Series(np.arange(72, dtype="float64"), index=fechas)
+    df = estadisticas_moviles(serie, ventanas=("24h",))
+    assert list(df.columns) == ["media_24h", "max_24h", "min_24h", "p90_24h"]
+    assert df["max_24h"].iloc[-1] == 71 and df["min_24h"].iloc[-1] == 48
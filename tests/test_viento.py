@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cattleclimate.datos import tiempos_ns
+from cattleclimate.viento import NOMBRES_CLASE, alinear, medias, resumir, rosa
+
+
+def _tiempos(*fechas):
+    return tiempos_ns(pd.DatetimeIndex(pd.to_datetime(list(fechas))))
+
+
+def test_celdas_sectores_clases_y_calmas():
+    tiempos = _tiempos("2020-01-05 06:00", "2020-01-06 06:00", "2020-07-01 13:00", "2020-07-01 13:00",
+                       "2020-12-31 23:00")
+    direccion = np.array([0.0, 359.0, 90.0, 180.0, 11.25])
+    velocidad = np.array([3.0, 5.0, 0.2, 9.0, 1.0])
+    c = resumir(tiempos, direccion, velocidad)
+
+    assert c["total"][0, 6] == 2 and c["total"][6, 13] == 2 and c["total"][11, 23] == 1
+    assert c["total"].sum() == 5 and c["calmas"].sum() == 1 and c["calmas"][6, 13] == 1
+    # 359° cae en el sector N; 11.25° ya es NNE; 180° es S
+    assert c["frecuencias"][0, 6, 0, 1] == 1 and c["frecuencias"][0, 6, 0, 2] == 1
+    assert c["frecuencias"][11, 23, 1, 0] == 1
+    assert c["frecuencias"][6, 13, 8, len(NOMBRES_CLASE) - 1] == 1
+    assert c["frecuencias"].sum() == 4  # sin la calma
+
+
+def test_descarta_lecturas_invalidas():
+    tiempos = _tiempos(*pd.date_range("2020-03-01", periods=5, freq="h"))
+    direccion = np.array([90.0, np.nan, 400.0, -5.0, 90.0])
+    velocidad = np.array([2.0, 2.0, 2.0, 2.0, 999.0])
+    c = resumir(tiempos, direccion, velocidad)
+    assert c["total"].sum() == 1 and c["total"][2, 0] == 1
+
+
+def test_medias_vectoriales_y_rosa():
+    tiempos = _tiempos(*pd.date_range("2020-01-01", periods=4, freq="h"))
+    # Viento del este y del norte con la misma velocidad: media vectorial del NE
+    c = resumir(tiempos, np.array([90.0, 90.0, 0.0, 0.0]), np.array([4.0, 4.0, 4.0, 4.0]))
+    total = medias(c, por="total").iloc[0]
+    assert total["Direccion"] == pytest.approx(45.0)
+    assert total["Velocidad_vectorial"] == pytest.approx(np.hypot(2, 2))
+    assert total["Velocidad_media"] == pytest.approx(4.0)
+    assert total["Constancia"] == pytest.approx(np.hypot(2, 2) / 4)
+    assert total["Observaciones"] == 4
+
+    r = rosa(c)
+    assert r.loc["E", "4-6 m/s"] == pytest.approx(50.0) and r.loc["N", "4-6 m/s"] == pytest.approx(50.0)
+    assert r.attrs["calmas_%"] == 0.0 and r.attrs["observaciones"] == 4
+    assert rosa(c, meses=[6]).attrs["observaciones"] == 0
+    with pytest.raises(ValueError):
+        medias(c, por="semana")
+
+
+def test_alinear_usa_las_fechas_comunes():
+    fechas = pd.date_range("2020-01-01", periods=4, freq="h")
+    direccion = pd.Series([10.0, 20.0, 30.0, 40.0], index=fechas)
+    velocidad = pd.Series([1.0, 3.0], index=fechas[[1, 3]])
+    tiempos, d, v = alinear(direccion, velocidad)
+    np.testing.assert_array_equal(tiempos, tiempos_ns(fechas[[1, 3]]))
+    np.testing.assert_array_equal(d, [20.0, 40.0])
+    np.testing.assert_array_equal(v, [1.0, 3.0])